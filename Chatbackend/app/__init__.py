@@ -83,6 +83,14 @@ def create_app():
             else:
                 app.logger.error("Failed to ensure MongoDB indexes after multiple retries.")
     
+    # 预先重建"近期是否已分析"的布隆过滤器，失败时在首次使用时重建
+    with app.app_context():
+        try:
+            from .services.recent_analysis_filter import RecentAnalysisFilter
+            RecentAnalysisFilter.warm()
+        except Exception as e:
+            app.logger.warning(f"Failed to warm recent analysis filter: {e}")
+    
     # Log startup information
     # app.logger.info(f"Flask application created (PID: {os.getpid()}, Debug mode: {app.debug})")
     
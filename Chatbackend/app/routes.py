@@ -12,6 +12,7 @@ import traceback
 from .models import User, db
 from .services.news_service import NewsService
 from .services.video_service import VideoService
+from .services.token_budget import get_token_budget
 from .api import api_blueprint  # 修改为导入api_blueprint
 
 api_bp = Blueprint('api', __name__)
@@ -235,6 +236,17 @@ def analyze_news():
         print(f"Error fetching news analysis data: {str(e)}")
         return jsonify({"data": [], "error": str(e)}), 500
 
+@api_bp.route('/tokenUsage', methods=['GET'])
+@login_required
+def get_token_usage():
+    """按天汇总新闻分析、对话和报告每个模型的token用量，以及当天的预算状态"""
+    try:
+        days = min(max(request.args.get('days', 7, type=int), 1), 90)
+        return jsonify({"data": get_token_budget().usage_report(days)})
+    except Exception as e:
+        print(f"Error fetching token usage: {str(e)}")
+        return jsonify({"data": None, "error": str(e)}), 500
+
 @api_bp.route('/currentnews', methods=['GET'])
 @login_required
 def get_current_hot_news():
@@ -260,7 +272,7 @@ def get_current_hot_news():
         # 如果缓存为空但未请求强制更新，尝试更新一次
         if not news_data and not update and not force_update:
             print("缓存为空，尝试更新热搜新闻缓存...")
-            update_result = NewsService.update_current_hot_news()
+            update_result = NewsService.rebuild_current_hot_news_if_empty()
             print(f"热搜新闻缓存更新结果: {update_result}")
             
             # 重新获取数据
@@ -0,0 +1,202 @@
+"""
+近似重复标题的分析结果缓存
+
+同一事件在各平台、各时段的标题略有不同（语序、标点、话题标记、增减几个字），
+每个变体都会触发一次完整的LLM分析。缓存在内存中维护最近分析过的标题的MinHash/LSH索引，
+新标题与某个新鲜分析的字符n-gram Jaccard相似度达到阈值时直接复用该分析结果。
+复用的结果带有reused_from字段，不会再被当作复用来源，因此不会延长原始分析的寿命。
+"""
+import copy
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from ..utils.similarity import MinHasher, MinHashLSH, shingles, jaccard
+
+
+class AnalysisSimilarityCache:
+    def __init__(self, threshold=0.55, max_age_hours=6, refresh_seconds=300):
+        """
+        初始化缓存
+
+        Args:
+            threshold (float): 复用所需的最低Jaccard相似度
+            max_age_hours (float): 可复用分析的最长时间（小时）
+            refresh_seconds (int): 从transformed_news增量加载新分析的间隔（秒）
+        """
+        self.threshold = threshold
+        self.max_age = timedelta(hours=max_age_hours)
+        self.refresh_interval = timedelta(seconds=refresh_seconds)
+        self.hasher = MinHasher()
+        self.index = MinHashLSH()
+        # 标题 -> {"shingles", "analyzed_at", "analysis"(仅本进程新增的条目)}
+        self.entries = {}
+        self.loaded_until = None
+        self.last_refresh = None
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0}
+
+    def _insert(self, title, analyzed_at, analysis=None):
+        title_shingles = shingles(title)
+        if not title_shingles:
+            return
+        self.entries[title] = {"shingles": title_shingles, "analyzed_at": analyzed_at, "analysis": analysis}
+        self.index.insert(title, self.hasher.signature(title_shingles))
+
+    def _evict(self, now):
+        cutoff = (now - self.max_age).isoformat()
+        for title in [t for t, entry in self.entries.items() if entry["analyzed_at"] < cutoff]:
+            del self.entries[title]
+            self.index.remove(title)
+
+    def refresh(self, now=None):
+        """从transformed_news增量加载最近的有效分析，并淘汰过期条目"""
+        from ..extensions import db
+
+        now = now or datetime.now()
+        since = max(self.loaded_until or "", (now - self.max_age).isoformat())
+        # 只索引原始分析，复用得到的结果不再被复用，避免相似度逐级漂移
+        query = {"analyzed_at": {"$gte": since}, "is_fallback": {"$ne": True}, "reused_from": {"$exists": False}}
+        projection = {"_id": 0, "title": 1, "analyzed_at": 1}
+        self.last_refresh = now
+        try:
+            docs = list(db.transformed_news.find(query, projection))
+        except Exception as e:
+            print(f"加载分析缓存失败: {str(e)}")
+            return
+
+        with self.lock:
+            for doc in docs:
+                title = doc.get("title")
+                analyzed_at = doc.get("analyzed_at")
+                if not title or not isinstance(analyzed_at, str):
+                    continue
+                current = self.entries.get(title)
+                if current is None or current["analyzed_at"] < analyzed_at:
+                    self._insert(title, analyzed_at)
+            self._evict(now)
+            # 分析时间早于写入时间，下次加载与本次重叠一个刷新间隔以免漏掉刚写入的记录
+            self.loaded_until = (now - self.refresh_interval).isoformat()
+
+    def add(self, title, analysis, analyzed_at=None):
+        """
+        登记本进程刚完成的分析，使同一批次后续的近似标题可以立即复用
+
+        Args:
+            title (str): 新闻标题
+            analysis (dict): 分析结果
+            analyzed_at (str, optional): 分析时间，默认当前时间
+        """
+        if not title or not analysis or analysis.get("is_fallback") or analysis.get("reused_from"):
+            return
+        with self.lock:
+            self._insert(title, analyzed_at or datetime.now().isoformat(), copy.deepcopy(analysis))
+
+    def find_similar(self, title, now=None):
+        """
+        查找最相似的新鲜分析标题
+
+        Returns:
+            tuple: (匹配的标题, 相似度)，没有达到阈值的匹配时为 (None, 0.0)
+        """
+        title_shingles = shingles(title)
+        if not title_shingles:
+            return None, 0.0
+        cutoff = ((now or datetime.now()) - self.max_age).isoformat()
+
+        best_title, best_score = None, 0.0
+        with self.lock:
+            for candidate in self.index.query(self.hasher.signature(title_shingles)):
+                entry = self.entries[candidate]
+                if entry["analyzed_at"] < cutoff:
+                    continue
+                score = jaccard(title_shingles, entry["shingles"])
+                if score > best_score:
+                    best_title, best_score = candidate, score
+        if best_score < self.threshold:
+            return None, 0.0
+        return best_title, best_score
+
+    def lookup(self, title):
+        """
+        为标题查找可复用的分析结果
+
+        Args:
+            title (str): 新闻标题
+
+        Returns:
+            dict: 可直接使用的分析结果（已替换标题和ID），没有可复用结果时返回None
+        """
+        now = datetime.now()
+        if self.last_refresh is None or now - self.last_refresh >= self.refresh_interval:
+            self.refresh(now)
+
+        self.stats["lookups"] += 1
+        matched_title, similarity = self.find_similar(title, now)
+        if matched_title is None:
+            return None
+
+        entry = self.entries.get(matched_title) or {}
+        analysis = entry.get("analysis")
+        if analysis is None:
+            analysis = self._load_analysis(matched_title)
+        if analysis is None:
+            return None
+
+        self.stats["hits"] += 1
+        print(f"复用近似标题的分析结果: '{title}' ≈ '{matched_title}' (相似度 {similarity:.2f})")
+        return reuse_analysis(analysis, title, matched_title, similarity, entry.get("analyzed_at"))
+
+    @staticmethod
+    def _load_analysis(title):
+        from ..extensions import db
+
+        try:
+            return db.transformed_news.find_one(
+                {"title": title, "is_fallback": {"$ne": True}, "reused_from": {"$exists": False}},
+                {"_id": 0},
+                sort=[("analyzed_at", -1)]
+            )
+        except Exception as e:
+            print(f"读取缓存分析结果失败: {str(e)}")
+            return None
+
+
+def reuse_analysis(analysis, title, matched_title, similarity, source_analyzed_at=None):
+    """
+    复制一份分析结果给近似标题使用
+
+    Args:
+        analysis (dict): 被复用的分析结果
+        title (str): 新标题
+        matched_title (str): 被复用分析的标题
+        similarity (float): 两个标题的相似度
+        source_analyzed_at (str, optional): 原始分析时间
+
+    Returns:
+        dict: 替换了title和id并带有reused_from的分析结果
+    """
+    result = copy.deepcopy(analysis)
+    result.pop("_id", None)
+    result["reused_from"] = {
+        "title": matched_title,
+        "analyzed_at": source_analyzed_at or analysis.get("analyzed_at"),
+        "similarity": round(similarity, 4)
+    }
+    result["title"] = title
+    result["id"] = hashlib.md5(title.encode()).hexdigest()
+    return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(threshold=0.55, max_age_hours=6):
+    """获取进程内共享的分析缓存，参数只在首次创建时生效"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisSimilarityCache(threshold=threshold, max_age_hours=max_age_hours)
+    return _cache
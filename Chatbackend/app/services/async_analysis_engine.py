@@ -0,0 +1,508 @@
+"""
+基于asyncio的新闻批量分析引擎
+
+替代analyze_multiple_news中"每条新闻一个线程"的做法：所有请求在同一个事件循环中发出，
+由信号量限制同时在途的请求数，发出前从集群共享的令牌桶取得配额，
+每个请求有独立超时，重试使用asyncio.sleep而不占用线程。
+整批分析超过总时限时取消剩余请求并使用后备数据。
+batch_size大于1时每次请求分析多条新闻（系统提示词只发送一次），
+批量结果中缺失或无效的条目回退为单条请求。
+提供了上次分析的新闻使用刷新模式：只请求heatTrend、timeline、emotion和stance并合并到上次的分析中，
+刷新失败时回退为完整分析。
+提供metrics时记录每次请求的耗时、输出是否为合法JSON以及每条新闻是否使用了后备数据，供模型路由使用。
+单条分析通过供应商池发出：主供应商超过p95耗时未完成时向备用供应商发出对冲请求，失败时立即转移到备用供应商，
+批量和刷新请求只发给主供应商，失败的条目回退为单条分析。
+Celery任务等同步代码通过AsyncAnalysisEngine.run调用。
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+from openai import AsyncOpenAI
+
+from ..utils.db_utils import update_analysis_status
+from ..utils.data_utils import generate_fallback_data
+from ..utils.rate_limiter import get_rate_limiter, estimate_tokens, provider_from_url, RateLimitExceeded
+from ..utils.stream_json import StreamingJSONValidator, StreamingJSONError
+from .provider_pool import ProviderPool, load_providers
+
+
+class AsyncAnalysisEngine:
+    def __init__(self, api_key, base_url, model, sys_prompt, max_concurrency=64,
+                 request_timeout=120, max_retries=1, total_timeout=None, enable_search=True,
+                 analysis_cache=None, batch_size=1, refresh_prompt=None, metrics=None, pool=None):
+        """
+        初始化异步分析引擎
+
+        Args:
+            api_key (str): API密钥
+            base_url (str): OpenAI兼容接口的基础URL
+            model (str): 模型名称
+            sys_prompt (str): 系统提示词
+            max_concurrency (int): 同时在途的最大请求数
+            request_timeout (float): 单个请求（含流式读取）的超时时间（秒）
+            max_retries (int): 单条新闻失败后的最大重试次数
+            total_timeout (float, optional): 整批分析的总时限（秒），超时的请求被取消
+            enable_search (bool): 是否请求模型联网搜索（DashScope的enable_search参数）
+            analysis_cache (AnalysisSimilarityCache, optional): 近似标题分析缓存，命中时不调用模型
+            batch_size (int): 每次请求分析的新闻条数，1为逐条请求
+            refresh_prompt (str, optional): 刷新模式的系统提示词，默认为REFRESH_PROMPT
+            metrics (ModelMetrics, optional): 记录本模型请求质量和耗时的指标
+            pool (ProviderPool, optional): 单条分析使用的供应商池，主供应商应为本引擎的模型，
+                                           默认只有本引擎的模型一个供应商
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.sys_prompt = sys_prompt
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.total_timeout = total_timeout
+        self.enable_search = enable_search
+        self.analysis_cache = analysis_cache
+        self.batch_size = max(int(batch_size or 1), 1)
+        if refresh_prompt is None:
+            from .news_analysis_service import REFRESH_PROMPT
+            refresh_prompt = REFRESH_PROMPT
+        self.refresh_prompt = refresh_prompt
+        self.metrics = metrics
+        if pool is None:
+            pool = ProviderPool(load_providers([], {"model": model, "base_url": base_url, "api_key": api_key,
+                                                    "enable_search": enable_search}), name="analysis")
+        self.pool = pool
+
+        self.api_stats = {
+            "total": 0,
+            "success": 0,
+            "timeout": 0,
+            "error": 0,
+            "cancelled": 0,
+            "rate_limited": 0,
+            "cache_hits": 0,
+            "batches": 0,
+            "batch_fallbacks": 0,
+            "stream_aborts": 0,
+            "refreshes": 0,
+            "refresh_fallbacks": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "failovers": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "avg_duration": 0,
+            "durations": []
+        }
+        # 按实际返回结果的模型累计的请求数和token数，供应商池转移到备用供应商时记在备用模型下
+        self.model_usage = {}
+
+    def _record_duration(self, duration):
+        self.api_stats["success"] += 1
+        self.api_stats["durations"].append(duration)
+        self.api_stats["avg_duration"] = sum(self.api_stats["durations"]) / len(self.api_stats["durations"])
+
+    def _observe(self, duration=None, valid=None, model=None):
+        """记录一次请求的模型指标，超时或出错时duration为None"""
+        if self.metrics is not None:
+            self.metrics.record_request(model or self.model, duration, valid)
+
+    def _observe_result(self, fallback, model=None):
+        """记录一条新闻是否使用了后备数据"""
+        if self.metrics is not None:
+            self.metrics.record_result(model or self.model, fallback)
+
+    def _usage(self, model=None):
+        return self.model_usage.setdefault(model or self.model,
+                                           {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+
+    def _record_request(self, model=None):
+        """累计发出的请求数，model为实际请求的模型，默认为主模型"""
+        self.api_stats["total"] += 1
+        self._usage(model)["requests"] += 1
+
+    def _record_tokens(self, messages, text, model=None):
+        """累计估算的输入和输出token数，model为实际返回结果的模型，默认为主模型"""
+        prompt_tokens = estimate_tokens(messages)
+        completion_tokens = estimate_tokens(text=text)
+        self.api_stats["prompt_tokens"] += prompt_tokens
+        self.api_stats["completion_tokens"] += completion_tokens
+        usage = self._usage(model)
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+
+    async def _complete(self, client, messages, validator=None, provider=None):
+        """
+        发出一次流式请求并拼接返回的文本
+
+        提供validator时边接收边校验：JSON完整后不再读取剩余输出，
+        结构出错时关闭流并抛出StreamingJSONError，已接收的文本在validator.text中。
+        provider为供应商池中的供应商，默认为主供应商。
+        """
+        provider = provider or self.pool.primary
+        kwargs = {"model": provider["model"], "messages": messages, "temperature": 0.7, "stream": True}
+        try:
+            stream = await client.chat.completions.create(
+                extra_body={"enable_search": True} if provider["enable_search"] else None, **kwargs
+            )
+        except Exception as api_error:
+            # 不支持enable_search的接口去掉该参数后重试一次
+            if provider["enable_search"] and ("extra_body" in str(api_error) or "enable_search" in str(api_error)):
+                print("尝试不带enable_search参数重试...")
+                provider["enable_search"] = False
+                stream = await client.chat.completions.create(**kwargs)
+            else:
+                raise
+
+        chunks = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and getattr(chunk.choices[0].delta, "content", None):
+                    chunks.append(chunk.choices[0].delta.content)
+                    if validator is not None and validator.feed(chunk.choices[0].delta.content):
+                        break
+        except StreamingJSONError as e:
+            self.api_stats["stream_aborts"] += 1
+            print(f"模型输出结构错误，提前结束读取: {e.msg}（已接收{len(validator.text)}字符）")
+            self._record_tokens(messages, validator.text, provider["model"])
+            raise
+        finally:
+            await stream.close()
+        return "".join(chunks)
+
+    async def _analyze_one(self, clients, semaphore, title, platform, use_cache=True):
+        """在信号量限制下通过供应商池分析单条新闻，失败时重试，最终失败使用后备数据"""
+        from .news_analysis_service import analysis_validator, analysis_from_validator, ANALYSIS_COMPLETION_TOKENS
+
+        limiter = get_rate_limiter()
+        messages = [
+            {'role': 'system', 'content': self.sys_prompt},
+            {'role': 'user', 'content': title}
+        ]
+        estimated_tokens = estimate_tokens(text=self.sys_prompt + title, completion_tokens=ANALYSIS_COMPLETION_TOKENS)
+
+        async def request(provider):
+            """向一个供应商发出完整的分析请求，被对冲请求取消时关闭流"""
+            model = provider["model"]
+            limiter_provider = provider_from_url(provider["base_url"])
+            try:
+                await limiter.acquire_async(limiter_provider, model, estimated_tokens, self.request_timeout)
+            except RateLimitExceeded:
+                self.api_stats["rate_limited"] += 1
+                raise
+
+            self._record_request(model)
+            start_time = time.time()
+            validator = analysis_validator()
+            try:
+                text = await asyncio.wait_for(self._complete(clients[provider["name"]], messages, validator, provider),
+                                              self.request_timeout)
+            except asyncio.TimeoutError:
+                self.api_stats["timeout"] += 1
+                self._observe(model=model)
+                print(f"⏱️ 分析'{title}'超时 (>{self.request_timeout}秒，{provider['name']})")
+                raise
+            except json.JSONDecodeError:
+                self._observe(time.time() - start_time, False, model)
+                raise
+            except Exception:
+                self.api_stats["error"] += 1
+                self._observe(model=model)
+                raise
+
+            self._record_duration(time.time() - start_time)
+            self._record_tokens(messages, text, model)
+            limiter.record_usage(limiter_provider, model, estimated_tokens,
+                                 estimate_tokens(text=self.sys_prompt + title + text))
+            try:
+                result = analysis_from_validator(validator, title)
+            except json.JSONDecodeError:
+                self._observe(time.time() - start_time, False, model)
+                raise
+            self._observe(time.time() - start_time, True, model)
+            return result
+
+        result = None
+        provider = None
+        async with semaphore:
+            if use_cache and self.analysis_cache is not None:
+                # 缓存刷新会访问数据库，放到线程中执行
+                result = await asyncio.to_thread(self.analysis_cache.lookup, title)
+                if result is not None:
+                    self.api_stats["cache_hits"] += 1
+
+            # 命中缓存时不再请求模型
+            attempts = self.max_retries + 1 if result is None else 0
+            for attempt in range(attempts):
+                if attempt > 0:
+                    delay = random.uniform(1, 3)
+                    print(f"重试 '{title}' (尝试 {attempt}/{self.max_retries})，等待{delay:.1f}秒")
+                    await asyncio.sleep(delay)
+
+                try:
+                    result, provider = await self.pool.call_async(request, self.api_stats)
+                    if self.analysis_cache is not None:
+                        self.analysis_cache.add(title, result)
+                    break
+                except json.JSONDecodeError as e:
+                    # 所有供应商返回的内容都不是合法JSON，与同步实现一致直接使用后备数据
+                    print(f"JSON解析失败: {str(e)}")
+                    break
+                except (RateLimitExceeded, asyncio.TimeoutError):
+                    continue
+                except Exception as e:
+                    print(f"分析'{title}'失败: {str(e)}")
+
+            if attempts:
+                self._observe_result(result is None, provider["model"] if provider else None)
+
+        return await self._finish(title, platform, result, provider["model"] if provider else None)
+
+    async def _refresh_one(self, clients, semaphore, prior, platform):
+        """在信号量限制下刷新单条新闻的时效性字段，失败时回退为完整分析"""
+        from .news_analysis_service import (build_refresh_messages, refresh_validator, merge_refresh,
+                                            REFRESH_COMPLETION_TOKENS)
+
+        title = prior["title"]
+        limiter = get_rate_limiter()
+        provider = provider_from_url(self.base_url)
+        messages = build_refresh_messages(self.refresh_prompt, prior)
+        estimated_tokens = estimate_tokens(messages, completion_tokens=REFRESH_COMPLETION_TOKENS)
+        result = None
+        async with semaphore:
+            try:
+                await limiter.acquire_async(provider, self.model, estimated_tokens, self.request_timeout)
+                self._record_request()
+                self.api_stats["refreshes"] += 1
+                start_time = time.time()
+                validator = refresh_validator()
+                try:
+                    text = await asyncio.wait_for(self._complete(clients[self.pool.primary["name"]], messages, validator),
+                                                  self.request_timeout)
+                    self._record_duration(time.time() - start_time)
+                    self._record_tokens(messages, text)
+                except StreamingJSONError:
+                    # 出错位置之前已完成的字段仍然可以合并
+                    text = validator.text
+                limiter.record_usage(provider, self.model, estimated_tokens, estimate_tokens(messages, text=text))
+                result = merge_refresh(prior, validator, title)
+                self._observe(time.time() - start_time, True)
+                self._observe_result(False)
+            except RateLimitExceeded as e:
+                self.api_stats["rate_limited"] += 1
+                print(f"刷新'{title}'未取得调用配额: {str(e)}")
+            except asyncio.TimeoutError:
+                self.api_stats["timeout"] += 1
+                self._observe()
+                print(f"⏱️ 刷新'{title}'超时 (>{self.request_timeout}秒)")
+            except json.JSONDecodeError as e:
+                self._observe(time.time() - start_time, False)
+                print(f"刷新'{title}'的结果无法使用: {str(e)}")
+            except Exception as e:
+                self.api_stats["error"] += 1
+                self._observe()
+                print(f"刷新'{title}'失败: {str(e)}")
+
+        if result is None:
+            # 信号量释放后再发出完整分析请求
+            self.api_stats["refresh_fallbacks"] += 1
+            print(f"刷新'{title}'失败，改为完整分析")
+            return await self._analyze_one(clients, semaphore, title, platform, use_cache=False)
+        return await self._finish(title, platform, result)
+
+    async def _finish(self, title, platform, result, model=None):
+        """记录分析状态并补充平台、分析时间和模型，result为None时使用后备数据"""
+        news_id = hashlib.md5(title.encode()).hexdigest()
+        status = "completed" if result is not None else "failed"
+        if result is None:
+            result = generate_fallback_data(title)
+        await asyncio.to_thread(update_analysis_status, news_id, status, result if status == "completed" else None)
+
+        result["platform"] = platform
+        result["analyzed_at"] = datetime.now().isoformat()
+        result["title"] = title
+        result["analysis_model"] = model or self.model
+        return result
+
+    async def _analyze_batch(self, clients, semaphore, titles, platforms):
+        """
+        一次请求分析多条新闻，缺失或无效的条目回退为单条请求
+
+        Returns:
+            list: 与titles顺序一致的分析结果
+        """
+        from .news_analysis_service import build_batch_messages, split_batch_response, ANALYSIS_COMPLETION_TOKENS
+
+        results = [None] * len(titles)
+        async with semaphore:
+            if self.analysis_cache is not None:
+                for i, title in enumerate(titles):
+                    results[i] = await asyncio.to_thread(self.analysis_cache.lookup, title)
+                    if results[i] is not None:
+                        self.api_stats["cache_hits"] += 1
+
+            remaining = [i for i, result in enumerate(results) if result is None]
+            if len(remaining) > 1:
+                batch_titles = [titles[i] for i in remaining]
+                messages = build_batch_messages(self.sys_prompt, batch_titles)
+                limiter = get_rate_limiter()
+                provider = provider_from_url(self.base_url)
+                estimated_tokens = estimate_tokens(messages, completion_tokens=ANALYSIS_COMPLETION_TOKENS * len(remaining))
+                # 输出长度随条数增长，超时按条数放宽
+                timeout = self.request_timeout * len(remaining)
+                try:
+                    await limiter.acquire_async(provider, self.model, estimated_tokens, timeout)
+                    self._record_request()
+                    self.api_stats["batches"] += 1
+                    start_time = time.time()
+                    validator = StreamingJSONValidator(expect="any")
+                    aborted = False
+                    try:
+                        text = await asyncio.wait_for(self._complete(clients[self.pool.primary["name"]], messages, validator),
+                                                      timeout)
+                        self._record_duration(time.time() - start_time)
+                        self._record_tokens(messages, text)
+                    except StreamingJSONError:
+                        # 出错位置之前已完整的条目仍然可用，其余条目改为逐条分析
+                        text = validator.text
+                        aborted = True
+                    limiter.record_usage(provider, self.model, estimated_tokens, estimate_tokens(messages, text=text))
+                    parsed = split_batch_response(text, batch_titles)
+                    self._observe(time.time() - start_time, not aborted and len(parsed) == len(remaining))
+                    for position, result in parsed.items():
+                        results[remaining[position]] = result
+                        self._observe_result(False)
+                        if self.analysis_cache is not None:
+                            self.analysis_cache.add(batch_titles[position], result)
+                except RateLimitExceeded as e:
+                    self.api_stats["rate_limited"] += 1
+                    print(f"批量分析{len(remaining)}条新闻未取得调用配额: {str(e)}")
+                except asyncio.TimeoutError:
+                    self.api_stats["timeout"] += 1
+                    self._observe()
+                    print(f"⏱️ 批量分析{len(remaining)}条新闻超时 (>{timeout}秒)")
+                except Exception as e:
+                    self.api_stats["error"] += 1
+                    self._observe()
+                    print(f"批量分析{len(remaining)}条新闻失败: {str(e)}")
+
+        # 信号量释放后再发出单条请求，避免占用两个并发名额
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed and len(remaining) > 1:
+            self.api_stats["batch_fallbacks"] += len(failed)
+            print(f"批量分析中{len(failed)}/{len(remaining)}条结果缺失或无效，改为逐条分析")
+        single = await asyncio.gather(*[
+            self._analyze_one(clients, semaphore, titles[i], platforms[i], use_cache=False) for i in failed
+        ])
+        for i, result in zip(failed, single):
+            results[i] = result
+
+        finished = []
+        for i, (title, platform) in enumerate(zip(titles, platforms)):
+            finished.append(results[i] if i in failed else await self._finish(title, platform, results[i]))
+        return finished
+
+    async def analyze_many(self, titles, platforms=None, priors=None):
+        """
+        并发分析多条新闻
+
+        Args:
+            titles (list): 新闻标题列表（调用方负责去重）
+            platforms (list, optional): 与titles对应的平台列表
+            priors (dict, optional): 标题到上次分析的映射，这些标题使用刷新模式
+
+        Returns:
+            list: 分析结果，按participants降序排列
+        """
+        if not titles:
+            return []
+        platforms = platforms or [None] * len(titles)
+        priors = priors or {}
+
+        # 刷新的新闻逐条请求，其余新闻按batch_size分组
+        refresh = [(title, platform) for title, platform in zip(titles, platforms) if title in priors]
+        full = [(title, platform) for title, platform in zip(titles, platforms) if title not in priors]
+        titles = [title for title, _ in full]
+        platforms = [platform for _, platform in full]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 供应商池中每个供应商一个客户端
+        clients = {provider["name"]: AsyncOpenAI(api_key=provider["api_key"], base_url=provider["base_url"], max_retries=0)
+                   for provider in self.pool.providers}
+        size = self.batch_size
+        try:
+            # 每个任务负责连续的size条新闻，结果为列表
+            chunks = [(titles[i:i + size], platforms[i:i + size]) for i in range(0, len(titles), size)]
+            tasks = [
+                asyncio.create_task(self._analyze_batch(clients, semaphore, chunk_titles, chunk_platforms))
+                if len(chunk_titles) > 1 else
+                asyncio.create_task(self._analyze_one(clients, semaphore, chunk_titles[0], chunk_platforms[0]))
+                for chunk_titles, chunk_platforms in chunks
+            ]
+            for title, platform in refresh:
+                chunks.append(([title], [platform]))
+                tasks.append(asyncio.create_task(self._refresh_one(clients, semaphore, priors[title], platform)))
+            done, pending = await asyncio.wait(tasks, timeout=self.total_timeout)
+
+            # 超过总时限的请求取消后使用后备数据
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                self.api_stats["cancelled"] += len(pending)
+                print(f"⚠️ 整批分析超过{self.total_timeout}秒，取消了{len(pending)}个请求")
+
+            results = []
+            for task, (chunk_titles, chunk_platforms) in zip(tasks, chunks):
+                if task in done and not task.cancelled() and task.exception() is None:
+                    result = task.result()
+                    results.extend(result if isinstance(result, list) else [result])
+                    continue
+                for title, platform in zip(chunk_titles, chunk_platforms):
+                    fallback = generate_fallback_data(title)
+                    fallback["platform"] = platform
+                    fallback["analyzed_at"] = datetime.now().isoformat()
+                    fallback["title"] = title
+                    results.append(fallback)
+        finally:
+            for client in clients.values():
+                await client.close()
+
+        results.sort(key=lambda x: x.get("participants", 0), reverse=True)
+        return results
+
+    def run(self, titles, platforms=None, priors=None):
+        """
+        同步入口，供Celery任务和其他同步代码调用
+
+        当前线程已有运行中的事件循环时，在新线程中运行以免嵌套。
+        """
+        start_time = time.time()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            results = asyncio.run(self.analyze_many(titles, platforms, priors))
+        else:
+            holder = {}
+
+            def runner():
+                try:
+                    holder["results"] = asyncio.run(self.analyze_many(titles, platforms, priors))
+                except BaseException as e:
+                    holder["error"] = e
+
+            thread = threading.Thread(target=runner)
+            thread.start()
+            thread.join()
+            if "error" in holder:
+                raise holder["error"]
+            results = holder["results"]
+
+        print(f"异步分析完成 {len(results)} 条新闻，耗时 {time.time() - start_time:.2f}秒，"
+              f"成功 {self.api_stats['success']}/{self.api_stats['total']}，"
+              f"超时 {self.api_stats['timeout']}，错误 {self.api_stats['error']}，取消 {self.api_stats['cancelled']}，"
+              f"对冲 {self.api_stats['hedged']}，故障转移 {self.api_stats['failovers']}")
+        return results
@@ -6,6 +6,8 @@ from bson import ObjectId
 from flask import current_app
 from openai import OpenAI
 from ..extensions import db
+from ..utils.rate_limiter import get_rate_limiter, estimate_tokens, provider_from_url
+from .token_budget import get_token_budget
 from celery_app import celery
 import logging
 import re
@@ -285,9 +287,17 @@ class ChatService:
             if settings.get('enable_search', True):
                 extra_body['enable_search'] = True
             
+            # Switch to the economy model when the daily token budget is nearly spent
+            model = get_token_budget().choose_model('chat', settings.get('model', 'deepseek/deepseek-chat-v3-0324:online'))
+            
+            # Wait for a share of the provider's rate limit
+            provider = provider_from_url(base_url)
+            estimated_tokens = estimate_tokens(messages)
+            get_rate_limiter().acquire(provider, model, estimated_tokens)
+            
             # Call the API
             response = client.chat.completions.create(
-                model=settings.get('model', 'deepseek/deepseek-chat-v3-0324:online'),
+                model=model,
                 messages=messages,
                 temperature=settings.get('temperature', 0.2),
                 extra_body=extra_body
@@ -296,8 +306,9 @@ class ChatService:
             # Log token usage
             if hasattr(response, 'usage') and response.usage:
                 usage = response.usage
+                get_rate_limiter().record_usage(provider, model, estimated_tokens, usage.total_tokens)
                 ChatService.log_token_usage(
-                    settings.get('model', 'deepseek/deepseek-chat-v3-0324:online'),
+                    model,
                     usage.prompt_tokens,
                     usage.completion_tokens,
                     usage.total_tokens
@@ -352,6 +363,9 @@ class ChatService:
                 max_tokens = 2048
                 current_app.logger.warning(f"Invalid MAX_TOKENS value, using default: {max_tokens}")
 
+            # Switch to the economy model when the daily token budget is nearly spent
+            settings['model'] = get_token_budget().choose_model('chat', settings.get('model'))
+
             # Prepare request parameters
             request_params = {
                 'model': settings.get('model'),
@@ -416,6 +430,11 @@ class ChatService:
             # 发送就绪事件，告知前端准备接收数据
             yield {'event': 'ready', 'data': {'status': 'ready'}}
 
+            # 取得供应商的调用配额，输出按max_tokens预留
+            provider = provider_from_url(base_url)
+            estimated_tokens = estimate_tokens(messages, completion_tokens=max(max_tokens, 0))
+            get_rate_limiter().acquire(provider, settings.get('model'), estimated_tokens)
+
             # 创建响应流
             current_app.logger.debug(f"Starting API stream request with params: {request_params}")
             response = client.chat.completions.create(**request_params)
@@ -423,6 +442,7 @@ class ChatService:
 
             # 使用更小的缓冲区，更频繁地发送数据
             buffer = ""
+            streamed_text = ""
             buffer_max_size = 5  # 更小的缓冲区，每5个字符发送一次，提高实时性
             chunk_count = 0
             last_send_time = time.time()
@@ -436,6 +456,7 @@ class ChatService:
                         if hasattr(delta, 'content') and delta.content is not None:
                             content_chunk = delta.content
                             buffer += content_chunk
+                            streamed_text += content_chunk
                             
                             current_time = time.time()
                             # 只要达到缓冲区大小，是首个响应块，或者达到最大时间间隔，立即发送
@@ -458,6 +479,14 @@ class ChatService:
             if buffer:
                 yield {'event': 'message', 'data': buffer}
 
+            # 流式响应没有usage，按输出内容修正token估算
+            get_rate_limiter().record_usage(
+                provider, settings.get('model'), estimated_tokens,
+                estimate_tokens(messages, text=streamed_text)
+            )
+            get_token_budget().record('chat', settings.get('model'), estimate_tokens(messages),
+                                      estimate_tokens(text=streamed_text))
+
             current_app.logger.debug(f"API stream finished after {chunk_count} chunks.")
             # The 'done' event will be sent by the calling generate() function in chat.py
 
@@ -468,15 +497,17 @@ class ChatService:
             yield {'event': 'error', 'data': safe_json_data({'error': error_message})}
     
     @staticmethod
-    def log_token_usage(model, prompt_tokens, completion_tokens, total_tokens):
-        """Log token usage for billing and monitoring"""
+    def log_token_usage(model, prompt_tokens, completion_tokens, total_tokens, feature='chat'):
+        """Log token usage for billing and monitoring, and count it against the daily token budget"""
+        get_token_budget().record(feature, model, prompt_tokens, completion_tokens)
         try:
             db.token_usage.insert_one({
                 'timestamp': datetime.datetime.utcnow(),
                 'model': model,
                 'prompt_tokens': prompt_tokens,
                 'completion_tokens': completion_tokens,
-                'total_tokens': total_tokens
+                'total_tokens': total_tokens,
+                'feature': feature
             })
         except Exception as e:
             current_app.logger.error(f"记录Token使用量失败: {str(e)}")
@@ -0,0 +1,359 @@
+"""
+自适应热榜采集调度
+
+上游热榜按固定节奏刷新（如每小时的第7分钟），固定间隔的采集要么在刷新后很久才取到新数据，
+要么在两次刷新之间重复拉取相同内容。调度器从采集记录中学习上游的刷新节奏：
+每次检查都给出一个区间(上一次检查, 本次检查]以及其间内容是否变化。
+对每个候选周期、窗口宽度和周期内的起始分钟，假设上游总在[起始分钟, 起始分钟+宽度)内刷新，
+统计与之矛盾的检查（有变化但区间与任何刷新窗口都不相交、无变化但区间完整包含一个刷新窗口）。
+矛盾比例足够低的最短周期即为刷新周期：过短的周期会让调度器在多出来的窗口采集，
+得到的无变化检查随即否定它，因此错误的假设会自我纠正。
+
+有了刷新窗口后在窗口结束后采集，仍未变化则按1、2、4...分钟退避重试，
+直到检测到变化或超过窗口一段时间，再等下一个窗口。定期在窗口开始时额外检查一次，把刷新时间限定在很短的区间内，
+使学到的窗口不会随时间漂移；这样的探测每隔几个小时做一次，其余窗口只在结束后采集。
+节奏尚不明确时按默认间隔采集，内容长时间未变化则逐步放慢。
+出现尚未分析的高热度新闻时，采集间隔收紧到COLLECTION_HOT_INTERVAL_MINUTES以内。
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 候选刷新周期（分钟），均能整除一天，周期内的相位在不同日期之间一致
+CANDIDATE_PERIODS = (10, 15, 20, 30, 60, 120)
+
+# 候选刷新窗口宽度（分钟），容忍上游每次刷新的时间有所波动，矛盾同样少时取最窄的
+CANDIDATE_WINDOWS = (3, 6)
+
+# 学习刷新节奏所用的观测天数、最少检查次数（其中至少一半为有变化的检查）
+LEARNING_DAYS = 3
+MIN_SAMPLES = 8
+
+# 可接受的最高矛盾比例（上游偶尔跳过或推迟刷新），以及视为与最优假设同样好的误差范围
+MAX_ERROR = 0.15
+ERROR_MARGIN = 0.05
+
+# 调度状态在hot_news_metadata中的键
+SCHEDULE_KEY = "collection_schedule"
+
+# 调度器触发的采集总是先做变更检测，内容未变化时不重新处理
+CHANGE_DETECTION_MAX_AGE_MINUTES = 24 * 60
+
+# 计算周期内分钟数的参考零点，所有候选周期都能整除一天，因此任取一个午夜即可
+_EPOCH = datetime(2000, 1, 1)
+
+
+def _minutes(moment):
+    return (moment - _EPOCH).total_seconds() / 60
+
+
+def _merge_checks(checks):
+    """按时间排序，并把首尾相接的无变化检查合并为一个区间：整段时间内上游都没有刷新"""
+    rows = []
+    for previous, current, changed in sorted((c for c in checks if c[0] is not None and c[0] < c[1]),
+                                             key=lambda c: c[1]):
+        previous, current = _minutes(previous), _minutes(current)
+        if not changed and rows and not rows[-1][2] and rows[-1][1] == previous:
+            rows[-1] = (rows[-1][0], current, False)
+        else:
+            rows.append((previous, current, bool(changed)))
+    return rows
+
+
+def _middle_of_longest_run(minutes, period):
+    """
+    同样可信的起始分钟在周期上构成若干段连续区间，返回最长一段的中点
+
+    取中点使窗口两侧都留有余量，之后的检查无论落在哪一侧都能继续收窄这段区间
+    """
+    members = set(minutes)
+    if len(members) == period:
+        return 0
+    runs = {}
+    for minute in members:
+        if (minute - 1) % period not in members:
+            length = 1
+            while (minute + length) % period in members:
+                length += 1
+            runs[minute] = length
+    first = max(sorted(runs), key=runs.get)
+    return (first + (runs[first] - 1) // 2) % period
+
+
+def learn_update_cadence(checks, candidate_periods=CANDIDATE_PERIODS, candidate_windows=CANDIDATE_WINDOWS,
+                         min_samples=MIN_SAMPLES, max_error=MAX_ERROR, margin=ERROR_MARGIN):
+    """
+    从检查记录中学习上游的刷新周期和刷新窗口
+
+    Args:
+        checks (list): (上一次检查时间, 本次检查时间, 内容是否变化) 元组列表，上一次检查时间未知的记录会被忽略
+        candidate_periods (tuple): 候选周期（分钟）
+        candidate_windows (tuple): 候选窗口宽度（分钟）
+        min_samples (int): 合并相邻的无变化检查后至少需要的检查次数
+        max_error (float): 可接受的最高矛盾比例
+        margin (float): 矛盾比例不超过最优值加上该值的周期视为同样可信，取其中最短的
+
+    Returns:
+        dict: {"period", "window_start", "window_end", "error", "samples"}，
+              window_start/window_end为刷新窗口在周期内的起止分钟，没有足够可信的节奏时返回None
+    """
+    rows = _merge_checks(checks)
+    if len(rows) < min_samples or sum(changed for _, _, changed in rows) < min_samples / 2:
+        return None
+    start, end, changed = (np.array(column)[:, None] for column in zip(*rows))
+
+    results = []
+    for period in candidate_periods:
+        phase = np.arange(period, dtype=np.float64)[None, :]
+        # 第一个开始时间晚于start的窗口
+        following = phase + (np.floor((start - phase) / period) + 1) * period
+        fitted = None
+        for window in candidate_windows:
+            # 第一个结束时间晚于start的窗口，区间与窗口相交当且仅当它在end之前开始
+            overlapping = phase + (np.floor((start - phase - window) / period) + 1) * period
+            intersects = overlapping < end
+            # 区间完整包含窗口当且仅当第一个开始时间晚于start的窗口在end之前结束
+            contains = following + window <= end
+
+            error = ((changed & ~intersects) | (~changed & contains)).mean(axis=0)
+            best = float(error.min())
+            # 更宽的窗口只在矛盾更少时采用
+            if fitted is None or best < fitted[2]:
+                first = _middle_of_longest_run(np.flatnonzero(error == best).tolist(), period)
+                fitted = (period, window, best, first)
+        results.append(fitted)
+
+    best_error = min(error for _, _, error, _ in results)
+    if best_error > max_error:
+        return None
+    for period, window, error, first in results:
+        if error <= best_error + margin:
+            return {
+                "period": period,
+                "window_start": first,
+                "window_end": (first + window) % period,
+                "error": round(error, 4),
+                "samples": len(rows)
+            }
+    return None
+
+
+class CollectionScheduler:
+    # 预测刷新时间之后等待多久再采集（秒），给上游留出完成刷新的时间
+    UPDATE_LAG_SECONDS = 30
+    # 窗口结束后仍未检测到变化时的首次重试间隔（秒），之后每次翻倍
+    RETRY_SECONDS = 60
+    # 两次采集之间的最短间隔（秒）
+    MIN_INTERVAL_SECONDS = 60
+    # 每隔多久（分钟）在刷新窗口开始时探测一次，把刷新时间限定在短区间内，避免学到的窗口漂移
+    PROBE_MINUTES = 180
+    # 领取调度后的租约（秒），采集任务崩溃时租约到期后可被重新领取
+    LEASE_SECONDS = 600
+
+    def __init__(self, default_interval_minutes=10, max_interval_minutes=120, hot_interval_minutes=10):
+        """
+        初始化调度器
+
+        Args:
+            default_interval_minutes (float): 刷新节奏不明确时的采集间隔（分钟）
+            max_interval_minutes (float): 最长采集间隔（分钟）
+            hot_interval_minutes (float): 存在未分析的高热度新闻时的最长采集间隔（分钟）
+        """
+        self.default_interval = timedelta(minutes=default_interval_minutes)
+        self.max_interval = timedelta(minutes=max_interval_minutes)
+        self.hot_interval = timedelta(minutes=hot_interval_minutes)
+
+    @classmethod
+    def from_config(cls):
+        """按Flask配置创建调度器"""
+        from flask import current_app
+
+        return cls(
+            default_interval_minutes=current_app.config.get('COLLECTION_DEFAULT_INTERVAL_MINUTES', 10),
+            max_interval_minutes=current_app.config.get('COLLECTION_MAX_INTERVAL_MINUTES', 120),
+            hot_interval_minutes=current_app.config.get('COLLECTION_HOT_INTERVAL_MINUTES', 10)
+        )
+
+    def plan(self, now, outcome, streak, high_heat=False, cadence=None, last_changed_at=None):
+        """
+        计算下一次采集时间
+
+        Args:
+            now (datetime): 本次采集完成的时间
+            outcome (str): 本次采集结果，changed、unchanged或error
+            streak (int): 截至本次连续未检测到变化（unchanged或error）的次数，本次为changed时为0
+            high_heat (bool): 是否存在尚未分析的高热度新闻
+            cadence (dict, optional): learn_update_cadence的结果
+            last_changed_at (datetime, optional): 本次之前最近一次检测到变化的时间
+
+        Returns:
+            tuple: (下一次采集时间, 原因说明)
+        """
+        if cadence:
+            period = cadence["period"]
+            start = cadence["window_start"]
+            window_length = (cadence["window_end"] - start) % period or period
+            # 最近一个已经开始的刷新窗口
+            offset = (_minutes(now) - start) % period
+            window_begin = now - timedelta(minutes=offset)
+            next_begin = window_begin + timedelta(minutes=period)
+            next_window = next_begin + timedelta(seconds=self.UPDATE_LAG_SECONDS)
+            if round(_minutes(next_begin) - start) // period % max(self.PROBE_MINUTES // period, 1):
+                # 每PROBE_MINUTES只在一个窗口开始时探测，其余窗口直接在结束后采集
+                next_window += timedelta(minutes=window_length)
+            # 窗口结束后再留出四分之一周期，容忍上游偶尔延迟刷新
+            grace_end = window_begin + timedelta(minutes=window_length + period / 4)
+
+            window_close = window_begin + timedelta(minutes=window_length, seconds=self.UPDATE_LAG_SECONDS)
+            if outcome == "changed" and now < window_close:
+                # 窗口结束前检测到的变化可能是上一周期迟到的刷新，窗口结束后再确认一次；
+                # 本周期已经检测到过变化时，确认未变化即可等下一个窗口
+                next_run, reason = window_close, "刷新窗口内检测到变化，窗口结束后再确认一次"
+            elif outcome != "changed" and now < grace_end and not (last_changed_at and last_changed_at >= window_begin):
+                # 窗口结束后按1、2、4...分钟退避，超过宽限期就等下一个窗口
+                retry = max(timedelta(seconds=self.RETRY_SECONDS), now - window_close)
+                next_run = max(now + retry, window_close)
+                if next_run > grace_end:
+                    next_run = next_window
+                reason = "刷新窗口内尚未检测到变化，退避重试"
+            else:
+                next_run, reason = next_window, f"预测的下一次刷新（每{period}分钟，第{start}分钟起）"
+        elif outcome == "error":
+            retry = timedelta(seconds=self.RETRY_SECONDS * 2 ** min(max(streak - 1, 0), 6))
+            next_run, reason = now + min(retry, self.default_interval), "采集失败，退避重试"
+        else:
+            # 内容超过最长候选周期仍未变化时上游可能暂停了刷新，逐步放慢；在此之前保持默认间隔以便学习节奏
+            stalled = streak * self.default_interval - timedelta(minutes=max(CANDIDATE_PERIODS))
+            if stalled > timedelta(0):
+                doublings = min(int(stalled / self.default_interval) + 1, 8)
+                next_run = now + min(self.default_interval * 2 ** doublings, self.max_interval)
+                reason = f"连续{streak}次未变化，放慢采集"
+            else:
+                next_run, reason = now + self.default_interval, "刷新节奏未知，按默认间隔采集"
+
+        if high_heat and next_run > now + self.hot_interval:
+            next_run, reason = now + self.hot_interval, "存在未分析的高热度新闻，收紧采集间隔"
+
+        earliest = now + timedelta(seconds=self.MIN_INTERVAL_SECONDS)
+        return min(max(next_run, earliest), now + self.max_interval), reason
+
+    @staticmethod
+    def outcome_of(stats):
+        """把smart_collect_news的结果映射为changed/unchanged/error"""
+        status = (stats or {}).get("status")
+        if status == "success":
+            return "changed"
+        if status == "unchanged":
+            return "unchanged"
+        return "error"
+
+    @staticmethod
+    def load_cadence(now=None):
+        """
+        从hot_news_updates（检测到变化）和hot_news_checks（未变化）学习刷新节奏
+
+        Returns:
+            dict: learn_update_cadence的结果，没有可信的节奏时为None
+        """
+        from app.extensions import db
+
+        now = now or datetime.now()
+        since = (now - timedelta(days=LEARNING_DAYS)).isoformat()
+        checks = []
+        try:
+            for collection, changed in ((db.hot_news_updates, True), (db.hot_news_checks, False)):
+                docs = collection.find({"timestamp": {"$gte": since}},
+                                       {"_id": 0, "timestamp": 1, "previous_check": 1})
+                for doc in docs:
+                    try:
+                        previous = doc.get("previous_check")
+                        checks.append((datetime.fromisoformat(previous) if previous else None,
+                                       datetime.fromisoformat(doc["timestamp"]), changed))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        except Exception as e:
+            print(f"读取采集记录失败: {str(e)}")
+            return None
+        return learn_update_cadence(checks)
+
+    def claim(self, now=None):
+        """
+        领取到期的采集，多个beat/worker同时检查时只有一个能领取成功
+
+        Returns:
+            dict: 领取前的调度状态，未到期时返回None
+        """
+        from pymongo import ReturnDocument
+        from app.extensions import db
+
+        now = now or datetime.now()
+        db.hot_news_metadata.update_one(
+            {"key": SCHEDULE_KEY},
+            {"$setOnInsert": {"next_run_at": now.isoformat(), "streak": 0}},
+            upsert=True
+        )
+        return db.hot_news_metadata.find_one_and_update(
+            {"key": SCHEDULE_KEY, "next_run_at": {"$lte": now.isoformat()}},
+            {"$set": {"next_run_at": (now + timedelta(seconds=self.LEASE_SECONDS)).isoformat(),
+                      "claimed_at": now.isoformat()}},
+            return_document=ReturnDocument.BEFORE
+        )
+
+    def record(self, state, stats, high_heat=False, now=None):
+        """
+        记录本次采集结果并安排下一次采集
+
+        Args:
+            state (dict): claim返回的调度状态
+            stats (dict): smart_collect_news的结果
+            high_heat (bool): 是否存在尚未分析的高热度新闻
+            now (datetime, optional): 当前时间
+
+        Returns:
+            dict: 新的调度状态
+        """
+        from app.extensions import db
+
+        now = now or datetime.now()
+        outcome = self.outcome_of(stats)
+        state = state or {}
+        streak = 0 if outcome == "changed" else state.get("streak", 0) + 1
+        last_changed_at = state.get("last_changed_at")
+        cadence = self.load_cadence(now)
+        next_run, reason = self.plan(now, outcome, streak, high_heat, cadence,
+                                     datetime.fromisoformat(last_changed_at) if last_changed_at else None)
+
+        schedule = {
+            "next_run_at": next_run.isoformat(),
+            "streak": streak,
+            "last_run_at": now.isoformat(),
+            "last_outcome": outcome,
+            "last_changed_at": now.isoformat() if outcome == "changed" else last_changed_at,
+            "reason": reason,
+            "cadence": cadence
+        }
+        db.hot_news_metadata.update_one({"key": SCHEDULE_KEY}, {"$set": schedule}, upsert=True)
+        print(f"下一次热榜采集: {schedule['next_run_at']}（{reason}）")
+        return schedule
+
+    def tick(self, run, now=None):
+        """
+        到期时执行一次采集并安排下一次
+
+        Args:
+            run (callable): 执行采集的函数，返回 (smart_collect_news的结果, 是否存在未分析的高热度新闻)
+            now (datetime, optional): 当前时间
+
+        Returns:
+            dict: 采集结果，未到期时为 {"status": "not_due"}
+        """
+        state = self.claim(now)
+        if state is None:
+            return {"status": "not_due"}
+        stats, high_heat = {}, False
+        try:
+            stats, high_heat = run()
+        finally:
+            stats = dict(stats or {})
+            stats["schedule"] = self.record(state, stats, high_heat)
+        return stats
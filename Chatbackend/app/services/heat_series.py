@@ -0,0 +1,251 @@
+"""
+标题热度时间序列
+
+采集时为榜单中的每个标题追加一个热度点，按 (标题ID, 日期) 分桶存放在hot_news_heat_series集合中。
+重建current_hot_news时，前N条新闻的热度历史只需一次带索引的$in查询，
+无需再逐份扫描历史快照。
+
+超出原始数据保留期的日期分桶由rollup汇总到hot_news_heat_rollups（每个标题每天一条，
+包含逐小时汇总hours和全天汇总daily），再删除原始分桶；更久之后只保留全天汇总。
+已汇总到的最后一天记录在hot_news_metadata中，history按该日期自动拼接汇总和原始热度点。
+"""
+import hashlib
+from datetime import datetime
+
+import pymongo
+from pymongo import UpdateOne
+
+from app.extensions import db
+
+SERIES_COLLECTION = "hot_news_heat_series"
+ROLLUP_COLLECTION = "hot_news_heat_rollups"
+
+# hot_news_metadata中记录已汇总到哪一天的键
+ROLLUP_METADATA_KEY = "heat_rollup"
+
+# 热度点记录的字段
+SERIES_FIELDS = ("comprehensive_heat", "weighted_heat_value", "normalized_heat")
+
+
+def title_id(title):
+    """标题的稳定ID（去除首尾空白后的MD5）"""
+    return hashlib.md5(title.strip().encode("utf-8")).hexdigest()
+
+
+def bucket_day(timestamp):
+    """ISO时间戳所在的日期分桶，如2025-03-01"""
+    return timestamp[:10]
+
+
+def rollup_points(points, key_length):
+    """
+    按时间戳前缀把热度点汇总为平均值和峰值
+
+    Args:
+        points (list): 热度点列表
+        key_length (int): 时间戳前缀长度，13为按小时，10为按天
+
+    Returns:
+        list: 每个时间段一个汇总点，按时间升序；timestamp为时间段起点，
+              各热度字段为平均值，{字段}_max为峰值，samples为原始点数量
+    """
+    groups = {}
+    for point in points:
+        timestamp = point.get("timestamp")
+        if timestamp:
+            groups.setdefault(timestamp[:key_length], []).append(point)
+
+    rolled = []
+    for key in sorted(groups):
+        group = groups[key]
+        start = key + (":00:00" if len(key) > 10 else "T00:00:00")
+        summary = {"timestamp": start, "samples": len(group)}
+        for field in SERIES_FIELDS:
+            values = [float(point.get(field, 0) or 0) for point in group]
+            summary[field] = round(sum(values) / len(values), 6)
+            summary[f"{field}_max"] = max(values)
+        rolled.append(summary)
+    return rolled
+
+
+class HeatSeriesStore:
+    @staticmethod
+    def collection():
+        return getattr(db, SERIES_COLLECTION)
+
+    @classmethod
+    def record(cls, timestamp, news_list):
+        """
+        将一份榜单中每个标题的热度追加到对应的日期分桶
+
+        Args:
+            timestamp (str): 榜单的ISO时间戳
+            news_list (list): 榜单新闻列表
+
+        Returns:
+            int: 写入的热度点数量
+        """
+        day = bucket_day(timestamp)
+        operations = []
+        for news in news_list:
+            title = news.get("title")
+            if not title:
+                continue
+            tid = title_id(title)
+            point = {"timestamp": timestamp}
+            for field in SERIES_FIELDS:
+                point[field] = news.get(field, 0)
+            operations.append(UpdateOne(
+                {"_id": f"{tid}:{day}"},
+                {
+                    "$push": {"points": point},
+                    "$setOnInsert": {"title_id": tid, "title": title, "day": day}
+                },
+                upsert=True
+            ))
+
+        if not operations:
+            return 0
+        cls.collection().bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @classmethod
+    def history(cls, titles, since):
+        """
+        查询若干标题自since以来的热度历史
+
+        Args:
+            titles (list): 标题列表
+            since (str): ISO格式起始时间
+
+        Returns:
+            dict: 标题到热度历史列表的映射，按时间升序；没有任何记录的标题不在结果中
+        """
+        id_to_title = {title_id(title): title for title in titles}
+        ids = list(id_to_title)
+        day_query = {"$gte": bucket_day(since)}
+        history = {}
+
+        # 已汇总的日期：保留逐小时汇总的用小时点，更早的用全天汇总点
+        rolled_through = cls.rolled_through()
+        if rolled_through and rolled_through >= day_query["$gte"]:
+            rollups = cls.rollup_collection().find(
+                {"title_id": {"$in": ids}, "day": {"$gte": day_query["$gte"], "$lte": rolled_through}},
+                {"title_id": 1, "hours": 1, "daily": 1},
+                sort=[("title_id", pymongo.ASCENDING), ("day", pymongo.ASCENDING)]
+            )
+            for rollup in rollups:
+                if rollup.get("hours"):
+                    points, key_length = rollup["hours"], 13
+                else:
+                    points, key_length = [rollup["daily"]] if rollup.get("daily") else [], 10
+                history.setdefault(id_to_title[rollup["title_id"]], []).extend(
+                    point for point in points if point["timestamp"][:key_length] >= since[:key_length]
+                )
+            day_query["$gt"] = rolled_through
+
+        buckets = cls.collection().find(
+            {"title_id": {"$in": ids}, "day": day_query},
+            {"title_id": 1, "points": 1},
+            sort=[("title_id", pymongo.ASCENDING), ("day", pymongo.ASCENDING)]
+        )
+
+        for bucket in buckets:
+            title = id_to_title[bucket["title_id"]]
+            points = history.setdefault(title, [])
+            points.extend(point for point in bucket.get("points", []) if point["timestamp"] >= since)
+        return history
+
+    @classmethod
+    def first_day(cls):
+        """返回最早有热度序列（含汇总）的日期，集合为空时返回None"""
+        days = []
+        for collection in (cls.rollup_collection(), cls.collection()):
+            first = collection.find_one({}, {"day": 1}, sort=[("day", pymongo.ASCENDING)])
+            if first:
+                days.append(first["day"])
+        return min(days) if days else None
+
+    @staticmethod
+    def rollup_collection():
+        return getattr(db, ROLLUP_COLLECTION)
+
+    @staticmethod
+    def rolled_through():
+        """返回已汇总到的最后一天，尚未汇总过时返回None"""
+        meta = db.hot_news_metadata.find_one({"key": ROLLUP_METADATA_KEY}, {"rolled_through": 1})
+        return meta.get("rolled_through") if meta else None
+
+    @classmethod
+    def rollup(cls, before_day, batch_size=500):
+        """
+        把早于before_day的原始分桶汇总为逐小时和全天汇总，然后删除原始分桶
+
+        先写汇总、再推进rolled_through、最后删除原始分桶，中途失败时history仍读取原始分桶，
+        重新执行是幂等的。
+
+        Args:
+            before_day (str): 日期，如2025-03-01，该日期及之后的分桶保持原样
+            batch_size (int): 每次批量写入的汇总数量
+
+        Returns:
+            dict: 汇总的分桶数量和已汇总到的日期
+        """
+        query = {"day": {"$lt": before_day}}
+        operations = []
+        rolled = 0
+        last_day = None
+        for bucket in cls.collection().find(query, sort=[("day", pymongo.ASCENDING)]):
+            points = bucket.get("points", [])
+            daily = rollup_points(points, 10)
+            operations.append(UpdateOne(
+                {"_id": bucket["_id"]},
+                {"$set": {
+                    "title_id": bucket["title_id"],
+                    "title": bucket.get("title", ""),
+                    "day": bucket["day"],
+                    "hours": rollup_points(points, 13),
+                    "daily": daily[0] if daily else None
+                }},
+                upsert=True
+            ))
+            last_day = max(last_day or bucket["day"], bucket["day"])
+            if len(operations) >= batch_size:
+                cls.rollup_collection().bulk_write(operations, ordered=False)
+                rolled += len(operations)
+                operations = []
+        if operations:
+            cls.rollup_collection().bulk_write(operations, ordered=False)
+            rolled += len(operations)
+
+        if last_day is None:
+            return {"rolled": 0, "rolled_through": cls.rolled_through()}
+        through = max(last_day, cls.rolled_through() or last_day)
+        db.hot_news_metadata.update_one(
+            {"key": ROLLUP_METADATA_KEY},
+            {"$set": {"rolled_through": through, "updated_at": datetime.now().isoformat()}},
+            upsert=True
+        )
+        cls.collection().delete_many(query)
+        return {"rolled": rolled, "rolled_through": through}
+
+    @classmethod
+    def compact_rollups(cls, hourly_before_day, delete_before_day=None):
+        """
+        早于hourly_before_day的汇总只保留全天汇总，早于delete_before_day的汇总删除
+
+        Args:
+            hourly_before_day (str): 保留逐小时汇总的最早日期
+            delete_before_day (str, optional): 保留汇总的最早日期，不设置则永久保留全天汇总
+
+        Returns:
+            dict: 精简和删除的汇总数量
+        """
+        compacted = cls.rollup_collection().update_many(
+            {"day": {"$lt": hourly_before_day}, "hours": {"$exists": True}},
+            {"$unset": {"hours": ""}}
+        ).modified_count
+        deleted = 0
+        if delete_before_day:
+            deleted = cls.rollup_collection().delete_many({"day": {"$lt": delete_before_day}}).deleted_count
+        return {"compacted": compacted, "deleted": deleted}
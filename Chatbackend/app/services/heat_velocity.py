@@ -0,0 +1,179 @@
+"""
+标题热度变化率与上升话题检测
+
+detect_high_heat_news只看最新一份榜单的归一化热度，快速爬升的新闻要到已经排在前列时才会被分析。
+采集时为榜单中的每个标题维护一条紧凑的状态记录（hot_news_heat_state，以标题ID为主键）：
+最近一次的热度和排名、平滑后的热度速度（每小时归一化热度的变化）、加速度以及排名变化。
+每份新榜单只按当前标题的ID批量读取上一份状态并批量写回，开销与榜单条数成正比，不回看历史序列。
+
+满足以下条件之一且尚未达到高热度阈值的标题被标记为上升话题：
+- 排名在RISING_MAX_RANK以内，并且较上一份榜单上升了至少RISING_MIN_RANK_GAIN名
+- 热度仍在加速，按当前速度RISING_HORIZON_HOURS小时后将达到高热度阈值
+"""
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from app.extensions import db
+from app.services.heat_series import title_id
+
+STATE_COLLECTION = "hot_news_heat_state"
+
+# 速度的指数平滑系数，越大越跟随最新变化
+VELOCITY_SMOOTHING = 0.5
+
+# 两份榜单间隔超过该时长（小时）时不计算变化率，视为重新出现
+MAX_GAP_HOURS = 6
+
+# 多久未出现在榜单中的标题状态被清理（小时）
+STATE_RETENTION_HOURS = 48
+
+# 上升话题判定
+RISING_MAX_RANK = 50
+RISING_MIN_RANK_GAIN = 10
+RISING_HORIZON_HOURS = 1
+RISING_MIN_VELOCITY = 0.05
+
+
+def update_heat_state(previous, news, rank, timestamp):
+    """
+    由上一条状态和本次榜单中的新闻计算新的状态
+
+    Args:
+        previous (dict): 上一条状态，首次出现时为None
+        news (dict): 榜单中的新闻
+        rank (int): 本次排名，从1开始
+        timestamp (str): 榜单的ISO时间戳
+
+    Returns:
+        dict: 新的状态记录（不含_id）
+    """
+    heat = float(news.get("normalized_heat", 0) or 0)
+    state = {
+        "title": news.get("title", ""),
+        "timestamp": timestamp,
+        "heat": heat,
+        "comprehensive_heat": news.get("comprehensive_heat", 0),
+        "rank": rank,
+        "velocity": 0.0,
+        "acceleration": 0.0,
+        "rank_delta": 0,
+        "seen_count": 1,
+        "first_seen": timestamp
+    }
+    if not previous:
+        return state
+
+    state["first_seen"] = previous.get("first_seen", previous.get("timestamp", timestamp))
+    state["seen_count"] = previous.get("seen_count", 1) + 1
+    try:
+        hours = (datetime.fromisoformat(timestamp) - datetime.fromisoformat(previous["timestamp"])).total_seconds() / 3600
+    except (KeyError, TypeError, ValueError):
+        return state
+    if hours <= 0 or hours > MAX_GAP_HOURS:
+        return state
+
+    previous_velocity = previous.get("velocity", 0.0)
+    raw_velocity = (heat - previous.get("heat", 0.0)) / hours
+    velocity = VELOCITY_SMOOTHING * raw_velocity + (1 - VELOCITY_SMOOTHING) * previous_velocity
+    state["velocity"] = round(velocity, 6)
+    state["acceleration"] = round((velocity - previous_velocity) / hours, 6)
+    state["rank_delta"] = previous.get("rank", rank) - rank
+    return state
+
+
+def is_rising(state, threshold):
+    """
+    判断状态是否为上升话题
+
+    Args:
+        state (dict): update_heat_state返回的状态
+        threshold (float): 高热度阈值，已达到的标题由高热度检测处理
+
+    Returns:
+        bool: 是否为上升话题
+    """
+    if state["seen_count"] < 2 or state["heat"] >= threshold:
+        return False
+    if state["rank"] <= RISING_MAX_RANK and state["rank_delta"] >= RISING_MIN_RANK_GAIN:
+        return True
+    projected = state["heat"] + state["velocity"] * RISING_HORIZON_HOURS
+    return (state["velocity"] >= RISING_MIN_VELOCITY and state["acceleration"] >= 0
+            and projected >= threshold)
+
+
+class HeatVelocityStore:
+    @staticmethod
+    def collection():
+        return getattr(db, STATE_COLLECTION)
+
+    @classmethod
+    def record(cls, timestamp, news_list, threshold=0.75):
+        """
+        用一份新榜单增量更新所有标题的热度状态
+
+        Args:
+            timestamp (str): 榜单的ISO时间戳
+            news_list (list): 按综合热度排序的新闻列表
+            threshold (float): 高热度阈值
+
+        Returns:
+            list: 本次被标记为上升话题的状态记录
+        """
+        ranked = []
+        for rank, news in enumerate(news_list, 1):
+            if news.get("title"):
+                ranked.append((title_id(news["title"]), rank, news))
+        if not ranked:
+            return []
+
+        previous = {doc["_id"]: doc for doc in cls.collection().find({"_id": {"$in": [tid for tid, _, _ in ranked]}})}
+        operations = []
+        rising = []
+        for tid, rank, news in ranked:
+            state = update_heat_state(previous.get(tid), news, rank, timestamp)
+            state["rising"] = is_rising(state, threshold)
+            if state["rising"]:
+                rising.append(dict(state, _id=tid))
+            operations.append(UpdateOne({"_id": tid}, {"$set": state}, upsert=True))
+        cls.collection().bulk_write(operations, ordered=False)
+
+        cutoff = (datetime.fromisoformat(timestamp) - timedelta(hours=STATE_RETENTION_HOURS)).isoformat()
+        cls.collection().delete_many({"timestamp": {"$lt": cutoff}})
+        return rising
+
+    @classmethod
+    def first_seen(cls, titles):
+        """
+        返回已有状态记录的标题首次上榜的时间
+
+        Args:
+            titles (list): 标题列表
+
+        Returns:
+            dict: 标题到first_seen的映射，没有状态记录的标题不在结果中
+        """
+        id_to_title = {title_id(title): title for title in titles if title}
+        states = cls.collection().find({"_id": {"$in": list(id_to_title)}}, {"first_seen": 1, "timestamp": 1})
+        return {id_to_title[state["_id"]]: state.get("first_seen") or state.get("timestamp")
+                for state in states if state.get("first_seen") or state.get("timestamp")}
+
+    @classmethod
+    def rising(cls, timestamp=None, limit=20):
+        """
+        返回最近一份榜单中的上升话题，按热度速度降序
+
+        Args:
+            timestamp (str, optional): 榜单时间戳，默认为最近一次更新的时间
+            limit (int): 最多返回的数量
+
+        Returns:
+            list: 状态记录
+        """
+        if timestamp is None:
+            latest = cls.collection().find_one({}, {"timestamp": 1}, sort=[("timestamp", -1)])
+            if not latest:
+                return []
+            timestamp = latest["timestamp"]
+        return list(cls.collection().find({"timestamp": timestamp, "rising": True})
+                    .sort("velocity", -1).limit(limit))
@@ -0,0 +1,284 @@
+"""
+分析模型路由
+
+ANALYSIS_MODEL_TIERS配置若干模型档位（按能力从高到低排列），每个档位有min_score：
+任务的优先级分数（queue_priority.priority_score，由热度和平台覆盖决定）达到min_score才使用该档位，
+最后一个档位兜底。热度高的头部新闻使用能力强的模型，长尾新闻使用便宜、快速的模型。
+
+压力越大，高档位的门槛越高（最多提高到min_score与1之间的PRESSURE_SHIFT处）：
+- 队列积压：待分析任务数达到queue_depth_high时压力为1
+- 预算消耗：剩余预算比例低于一半后压力线性增加，耗尽时为1
+
+每个模型最近WINDOW_SIZE次请求的耗时、JSON合法率和后备数据比例记录在进程内，
+样本足够且合法率过低、后备数据比例过高或p95耗时超过档位max_p95的档位暂时视为不可用，
+分到该档位的任务改用更高的可用档位，没有时改用更低的可用档位。
+指标的累计计数按天写入llm_model_metrics集合。
+"""
+import json
+import math
+import threading
+from collections import deque
+from datetime import datetime
+
+from app.extensions import db
+
+METRICS_COLLECTION = "llm_model_metrics"
+
+# 每个模型保留的最近请求数
+WINDOW_SIZE = 200
+
+# 压力为1时，高档位门槛提高到min_score与1之间的比例
+PRESSURE_SHIFT = 0.5
+
+# 开始按指标调整路由所需的最少样本数
+MIN_SAMPLES = 20
+
+
+class ModelMetrics:
+    def __init__(self, window=WINDOW_SIZE):
+        """
+        初始化模型指标
+
+        Args:
+            window (int): 每个模型保留的最近样本数
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        # 模型 -> 最近请求的 (耗时, 是否合法JSON)，耗时为None表示超时或出错
+        self.requests = {}
+        # 模型 -> 最近完成的新闻是否使用了后备数据
+        self.results = {}
+        # 尚未写入数据库的累计计数
+        self.pending = {}
+
+    def _count(self, model, field, value=1):
+        counts = self.pending.setdefault(model, {})
+        counts[field] = counts.get(field, 0) + value
+
+    def record_request(self, model, duration=None, valid=None):
+        """
+        记录一次模型请求
+
+        Args:
+            model (str): 模型名称
+            duration (float, optional): 耗时（秒），超时或出错时为None
+            valid (bool, optional): 输出是否为合法JSON，没有输出时为None
+        """
+        with self.lock:
+            self.requests.setdefault(model, deque(maxlen=self.window)).append((duration, valid))
+            self._count(model, "requests")
+            if duration is None:
+                self._count(model, "errors")
+            else:
+                self._count(model, "duration", duration)
+            if valid is not None:
+                self._count(model, "valid" if valid else "invalid")
+
+    def record_result(self, model, fallback):
+        """
+        记录一条新闻的分析结果
+
+        Args:
+            model (str): 模型名称
+            fallback (bool): 是否使用了后备数据
+        """
+        with self.lock:
+            self.results.setdefault(model, deque(maxlen=self.window)).append(bool(fallback))
+            self._count(model, "results")
+            if fallback:
+                self._count(model, "fallbacks")
+
+    def summary(self, model):
+        """
+        返回模型最近的指标
+
+        Returns:
+            dict: samples、valid_rate、error_rate、fallback_rate、p50、p95（没有样本的指标为None）
+        """
+        with self.lock:
+            requests = list(self.requests.get(model, ()))
+            results = list(self.results.get(model, ()))
+        durations = sorted(duration for duration, _ in requests if duration is not None)
+        judged = [valid for _, valid in requests if valid is not None]
+
+        def percentile(p):
+            if not durations:
+                return None
+            return durations[min(len(durations) - 1, math.ceil(p * len(durations)) - 1)]
+
+        return {
+            "samples": len(requests),
+            "valid_rate": sum(judged) / len(judged) if judged else None,
+            "error_rate": (len(requests) - len(durations)) / len(requests) if requests else None,
+            "fallback_rate": sum(results) / len(results) if results else None,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95)
+        }
+
+    def snapshot(self):
+        """返回所有模型的指标"""
+        with self.lock:
+            models = set(self.requests) | set(self.results)
+        return {model: self.summary(model) for model in sorted(models)}
+
+    def flush(self, now=None):
+        """
+        将累计计数按天写入llm_model_metrics
+
+        Returns:
+            int: 写入的模型数
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        day = (now or datetime.now()).strftime("%Y-%m-%d")
+        for model, counts in pending.items():
+            try:
+                getattr(db, METRICS_COLLECTION).update_one(
+                    {"day": day, "model": model},
+                    {"$inc": counts, "$set": {"updated_at": datetime.now().isoformat()}},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"写入模型指标失败 {model}: {str(e)}")
+        return len(pending)
+
+
+_metrics = ModelMetrics()
+
+
+def get_model_metrics():
+    """返回进程内共享的模型指标"""
+    return _metrics
+
+
+def load_tiers(raw_tiers, default_model, default_base_url, default_api_key, default_enable_search=True):
+    """
+    规范化模型档位配置
+
+    Args:
+        raw_tiers (list|str): ANALYSIS_MODEL_TIERS，列表或JSON字符串，
+                              每项可包含name、model、base_url、api_key、enable_search、min_score、max_p95
+        default_model (str): 未配置档位或档位缺少model时使用的模型
+        default_base_url (str): 档位缺少base_url时使用的地址
+        default_api_key (str): 档位缺少api_key时使用的密钥
+        default_enable_search (bool): 档位缺少enable_search时的取值
+
+    Returns:
+        list: 档位列表，顺序与配置一致，最后一个档位的min_score为0
+    """
+    if isinstance(raw_tiers, str):
+        raw_tiers = json.loads(raw_tiers) if raw_tiers.strip() else []
+    raw_tiers = raw_tiers or [{"name": "default"}]
+
+    tiers = []
+    for position, raw in enumerate(raw_tiers):
+        tiers.append({
+            "name": raw.get("name") or raw.get("model") or f"tier{position}",
+            "model": raw.get("model") or default_model,
+            "base_url": raw.get("base_url") or default_base_url,
+            "api_key": raw.get("api_key") or default_api_key,
+            "enable_search": raw.get("enable_search", default_enable_search),
+            "min_score": float(raw.get("min_score", 0) or 0),
+            "max_p95": raw.get("max_p95")
+        })
+    tiers[-1]["min_score"] = 0.0
+    return tiers
+
+
+class ModelRouter:
+    def __init__(self, tiers, metrics=None, queue_depth_high=200, min_valid_rate=0.8,
+                 max_fallback_rate=0.2, min_samples=MIN_SAMPLES):
+        """
+        初始化模型路由
+
+        Args:
+            tiers (list): load_tiers返回的档位列表，按能力从高到低排列
+            metrics (ModelMetrics, optional): 模型指标，默认为进程内共享的指标
+            queue_depth_high (int): 队列压力达到1时的待分析任务数
+            min_valid_rate (float): 档位可用所需的最低JSON合法率
+            max_fallback_rate (float): 档位可用允许的最高后备数据比例
+            min_samples (int): 开始按指标调整路由所需的最少样本数
+        """
+        self.tiers = tiers
+        self.metrics = metrics or get_model_metrics()
+        self.queue_depth_high = queue_depth_high
+        self.min_valid_rate = min_valid_rate
+        self.max_fallback_rate = max_fallback_rate
+        self.min_samples = min_samples
+
+    def pressure(self, queue_depth=0, budget_remaining=1.0):
+        """
+        计算路由压力
+
+        Args:
+            queue_depth (int): 待分析的任务数
+            budget_remaining (float): 剩余预算比例（0~1）
+
+        Returns:
+            float: 0~1之间的压力
+        """
+        queue_pressure = min(max(queue_depth / self.queue_depth_high, 0.0), 1.0) if self.queue_depth_high else 0.0
+        budget_pressure = min(max((0.5 - budget_remaining) / 0.5, 0.0), 1.0)
+        return max(queue_pressure, budget_pressure)
+
+    def healthy(self, tier):
+        """档位的近期指标是否正常，样本不足时视为正常"""
+        summary = self.metrics.summary(tier["model"])
+        if summary["samples"] < self.min_samples:
+            return True
+        if summary["valid_rate"] is not None and summary["valid_rate"] < self.min_valid_rate:
+            return False
+        if summary["fallback_rate"] is not None and summary["fallback_rate"] > self.max_fallback_rate:
+            return False
+        if tier.get("max_p95") and summary["p95"] is not None and summary["p95"] > tier["max_p95"]:
+            return False
+        return True
+
+    def route(self, score, queue_depth=0, budget_remaining=1.0, health=None):
+        """
+        为一条新闻选择模型档位
+
+        Args:
+            score (float): 任务的优先级分数（0~1）
+            queue_depth (int): 待分析的任务数
+            budget_remaining (float): 剩余预算比例（0~1）
+            health (list, optional): 各档位是否可用，批量路由时由调用方预先计算
+
+        Returns:
+            dict: 选中的档位
+        """
+        pressure = self.pressure(queue_depth, budget_remaining)
+        chosen = len(self.tiers) - 1
+        for position, tier in enumerate(self.tiers):
+            threshold = tier["min_score"] + pressure * (1 - tier["min_score"]) * PRESSURE_SHIFT
+            if tier["min_score"] == 0 or (score or 0) >= threshold:
+                chosen = position
+                break
+
+        health = health or [self.healthy(tier) for tier in self.tiers]
+        if health[chosen]:
+            return self.tiers[chosen]
+        # 先找更高的可用档位，再找更低的
+        for position in list(range(chosen - 1, -1, -1)) + list(range(chosen + 1, len(self.tiers))):
+            if health[position]:
+                return self.tiers[position]
+        return self.tiers[chosen]
+
+    def assign(self, scores, queue_depth=0, budget_remaining=1.0):
+        """
+        为一批新闻选择模型档位
+
+        Args:
+            scores (list): 各条新闻的优先级分数
+            queue_depth (int): 待分析的任务数
+            budget_remaining (float): 剩余预算比例（0~1）
+
+        Returns:
+            list: [(档位, [新闻下标, ...]), ...]，按档位顺序排列，不包含没有新闻的档位
+        """
+        health = [self.healthy(tier) for tier in self.tiers]
+        groups = {}
+        for index, score in enumerate(scores):
+            tier = self.route(score, queue_depth, budget_remaining, health)
+            groups.setdefault(tier["name"], []).append(index)
+        return [(tier, groups[tier["name"]]) for tier in self.tiers if tier["name"] in groups]
@@ -1,3 +1,4 @@
+import copy
 import json
 import random
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -11,8 +12,59 @@ from openai import OpenAI
 from flask import current_app
 from ..utils.db_utils import update_analysis_status, get_pending_analysis_tasks
 from ..utils.data_utils import validate_and_fix_data, generate_fallback_data
+from ..utils.rate_limiter import get_rate_limiter, estimate_tokens, provider_from_url
+from ..utils.stream_json import StreamingJSONValidator, StreamingJSONError
+from .analysis_cache import get_analysis_cache
+from .model_router import ModelRouter, load_tiers
+from .token_budget import get_token_budget
+from .provider_pool import ProviderPool, load_providers
 import inspect
 
+# 单条新闻分析结果的预留输出token数，用于限流估算
+ANALYSIS_COMPLETION_TOKENS = 1500
+
+# 分析结果各顶层字段的形状，不符合的字段在流式校验时丢弃，由validate_and_fix_data补齐
+ANALYSIS_SCHEMA = {
+    "emotion": {"schema": dict},
+    "stance": {"schema": dict},
+    "heatTrend": [dict],
+    "timeline": [dict],
+    "wordCloud": [{"word": str}]
+}
+
+# 输出被截断时，至少完成了这些字段才使用已完成的部分，否则使用后备数据
+SALVAGE_FIELDS = ("introduction", "emotion", "stance")
+
+# 刷新模式只重新生成的时效性字段，其余字段沿用上次的分析
+REFRESH_FIELDS = ("heatTrend", "timeline", "emotion", "stance")
+
+# 刷新一条新闻的预留输出token数
+REFRESH_COMPLETION_TOKENS = 600
+
+# 刷新请求中发送的上次heatTrend和timeline的最近数据点数，更早的数据点不会变化
+REFRESH_CONTEXT_POINTS = 5
+
+# 刷新模式的系统提示词，用户消息为上次分析的相关字段
+REFRESH_PROMPT = """请你扮演新闻助理，更新一条新闻的时效性信息。用户消息是该新闻上次分析结果的JSON，analyzed_at为上次分析时间。
+请结合此后的最新进展，只以JSON格式输出以下四个字段，不要包含任何其他文字说明：
+{"heatTrend": [{"date": "日期", "value": 热度量化值}], "timeline": [{"date": "日期", "event": "时间点详细介绍"}],
+ "emotion": {"schema": {...}, "rationale": "情绪量化依据"}, "stance": {"schema": {...}, "rationale": "立场量化依据"}}
+
+请确保:
+- heatTrend和timeline只包含上次分析日期（含当天）以来新增或变化的数据点，日期格式与上次相同，没有新进展时为空数组
+- emotion和stance的schema维度与上次分析相同，量化当前的整体舆论
+- 所有量化值在0-1范围内，emotion各维度总和为1
+- 数据尽可能真实可靠
+"""
+
+# 批量分析时追加在系统提示词之后的说明，用户消息为[{"index": 序号, "title": 标题}, ...]
+BATCH_PROMPT_SUFFIX = """
+本次用户消息是一个JSON数组，包含多条新闻，每项有index（序号）和title（新闻标题）。
+请对每条新闻分别按上述格式分析，输出一个JSON数组，数组中每个元素是一条新闻的分析结果对象，
+并且必须包含与输入相同的index字段，title字段与输入标题完全一致。
+只输出这个JSON数组，不要包含任何其他文字说明。
+"""
+
 # 客户端工厂函数 - 以处理不同版本的OpenAI库
 def create_openai_client(api_key, base_url):
     """创建OpenAI客户端，处理不同版本的API兼容性"""
@@ -45,6 +97,215 @@ def create_openai_client(api_key, base_url):
         print(f"创建OpenAI客户端时发生错误: {str(e)}")
         raise
 
+def analysis_validator():
+    """创建校验单条分析结果的流式校验器"""
+    return StreamingJSONValidator(expect="object", schema=ANALYSIS_SCHEMA)
+
+def analysis_from_validator(validator, news_title):
+    """
+    由流式校验器得到分析结果
+
+    输出完整时使用全部字段；输出被截断但SALVAGE_FIELDS都已完成时使用已完成的字段，
+    其余字段由validate_and_fix_data补齐。
+
+    Args:
+        validator (StreamingJSONValidator): 已消费完模型输出的校验器
+        news_title (str): 新闻标题，用于修正数据
+
+    Returns:
+        dict: 验证和修正后的分析结果
+
+    Raises:
+        StreamingJSONError: 输出不完整且无法使用
+    """
+    for warning in validator.warnings:
+        print(f"分析'{news_title[:30]}'：{warning}")
+    if not validator.done and all(field in validator.fields for field in SALVAGE_FIELDS):
+        print(f"分析'{news_title[:30]}'的输出被截断，使用已完成的{len(validator.fields)}个字段")
+        return validate_and_fix_data(dict(validator.fields), news_title)
+    return validate_and_fix_data(validator.result(), news_title)
+
+def build_refresh_messages(refresh_prompt, prior):
+    """
+    构造刷新请求的消息，用户消息只包含上次分析中与刷新相关的字段
+
+    Args:
+        refresh_prompt (str): 刷新模式的系统提示词
+        prior (dict): transformed_news中上次的分析
+
+    Returns:
+        list: OpenAI格式的消息列表
+    """
+    context = {key: prior.get(key) for key in ("title", "type", "introduction", "analyzed_at") if prior.get(key)}
+    for key in REFRESH_FIELDS:
+        if prior.get(key):
+            context[key] = prior[key]
+    for key in ("heatTrend", "timeline"):
+        if isinstance(context.get(key), list):
+            context[key] = context[key][-REFRESH_CONTEXT_POINTS:]
+    context = _round_floats(context)
+    for key in ("emotion", "stance"):
+        # 依据说明会重新生成，不再发送
+        if isinstance(context.get(key), dict):
+            context[key] = {"schema": context[key].get("schema")}
+    return [
+        {'role': 'system', 'content': refresh_prompt},
+        {'role': 'user', 'content': json.dumps(context, ensure_ascii=False, default=str)}
+    ]
+
+def _round_floats(value, digits=3):
+    """缩短上下文中的量化值，减少输入token"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {key: _round_floats(item, digits) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_round_floats(item, digits) for item in value]
+    return value
+
+def refresh_validator():
+    """创建校验刷新结果的流式校验器"""
+    return StreamingJSONValidator(expect="object",
+                                  schema={key: ANALYSIS_SCHEMA[key] for key in REFRESH_FIELDS})
+
+def _merge_by_date(previous, updates):
+    """按date合并数据点，新数据点覆盖同日期的旧数据点"""
+    merged = {}
+    for item in list(previous or []) + list(updates):
+        if isinstance(item, dict):
+            merged[str(item.get("date", ""))] = item
+    return [merged[date] for date in sorted(merged)]
+
+def merge_refresh(prior, validator, news_title):
+    """
+    将刷新结果合并到上次的分析中
+
+    heatTrend和timeline按日期合并，emotion和stance整体替换，其余字段沿用上次的分析；
+    输出被截断时只合并已完成的字段。
+
+    Args:
+        prior (dict): transformed_news中上次的分析
+        validator (StreamingJSONValidator): 已消费完模型输出的校验器
+        news_title (str): 新闻标题，用于修正数据
+
+    Returns:
+        dict: 验证和修正后的分析结果，full_analyzed_at为最近一次完整分析的时间
+
+    Raises:
+        StreamingJSONError: 没有得到任何可用字段
+    """
+    for warning in validator.warnings:
+        print(f"刷新'{news_title[:30]}'：{warning}")
+    if not validator.fields:
+        # 输出不完整时result()抛出，完整但没有可用字段时同样视为失败
+        validator.result()
+        raise StreamingJSONError("刷新结果没有可用字段", validator.text, len(validator.text))
+    fields = validator.fields
+
+    # validate_and_fix_data会原地修改嵌套字段，不能影响调用方的prior
+    merged = copy.deepcopy({key: value for key, value in prior.items() if key != "_id"})
+    for key in ("heatTrend", "timeline"):
+        if key in fields:
+            merged[key] = _merge_by_date(prior.get(key), fields[key])
+    for key in ("emotion", "stance"):
+        if key in fields:
+            merged[key] = fields[key]
+    merged["full_analyzed_at"] = prior.get("full_analyzed_at") or prior.get("analyzed_at")
+    merged["analysis_mode"] = "refresh"
+    return validate_and_fix_data(merged, news_title)
+
+def build_batch_messages(sys_prompt, titles):
+    """
+    构建一次分析多条新闻的消息
+
+    Args:
+        sys_prompt (str): 单条分析的系统提示词
+        titles (list): 新闻标题列表，序号从1开始
+
+    Returns:
+        list: OpenAI格式的消息列表
+    """
+    items = [{"index": i, "title": title} for i, title in enumerate(titles, 1)]
+    return [
+        {'role': 'system', 'content': sys_prompt + BATCH_PROMPT_SUFFIX},
+        {'role': 'user', 'content': json.dumps(items, ensure_ascii=False)}
+    ]
+
+def _batch_objects(result_str):
+    """从批量分析的返回文本中取出各条结果对象，输出被截断时返回截断前的完整对象"""
+    if "```json" in result_str:
+        result_str = result_str.split("```json")[1].split("```")[0]
+    elif "```" in result_str:
+        result_str = result_str.split("```")[1].split("```")[0]
+    result_str = result_str.strip()
+
+    try:
+        data = json.loads(result_str)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [data])
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)]
+
+    # 不是合法的JSON数组时逐个解码数组中的对象
+    start = result_str.find("[")
+    if start < 0:
+        return []
+    decoder = json.JSONDecoder()
+    objects = []
+    position = start + 1
+    while position < len(result_str):
+        while position < len(result_str) and result_str[position] in " \t\r\n,":
+            position += 1
+        if position >= len(result_str) or result_str[position] == "]":
+            break
+        try:
+            item, position = decoder.raw_decode(result_str, position)
+        except json.JSONDecodeError:
+            break
+        if isinstance(item, dict):
+            objects.append(item)
+    return objects
+
+def split_batch_response(result_str, titles):
+    """
+    把批量分析的返回文本拆分为每条新闻的分析结果
+
+    按index对应到标题，index缺失或无效时按标题匹配；每条结果经过validate_and_fix_data修正。
+    无法对应、重复或修正失败的条目不在结果中，由调用方回退为单条分析。
+
+    Args:
+        result_str (str): 模型返回的完整文本
+        titles (list): 本次请求的新闻标题列表，与build_batch_messages的顺序一致
+
+    Returns:
+        dict: 标题在titles中的位置（从0开始）到分析结果的映射
+    """
+    title_positions = {}
+    for position, title in enumerate(titles):
+        title_positions.setdefault(title.strip(), position)
+
+    results = {}
+    for item in _batch_objects(result_str):
+        position = None
+        index = item.pop("index", None)
+        if isinstance(index, str) and index.strip().isdigit():
+            index = int(index)
+        if isinstance(index, int) and not isinstance(index, bool) and 1 <= index <= len(titles):
+            position = index - 1
+        title = item.get("title")
+        if isinstance(title, str) and title.strip() in title_positions:
+            # 序号与标题不一致时以标题为准
+            position = title_positions[title.strip()]
+        if position is None or position in results:
+            continue
+        try:
+            results[position] = validate_and_fix_data(item, titles[position])
+        except Exception as e:
+            print(f"批量分析结果修正失败 '{titles[position][:30]}': {str(e)}")
+    return results
+
 # 创建MockClient作为备用方案
 class MockClient:
     """当无法创建真实客户端时的备用模拟客户端"""
@@ -128,7 +389,15 @@ class NewsAnalysisService:
             model (str): 使用的模型名称
         """
         self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
         self.use_mock = False
+        # 在创建服务时读取配置，线程池的工作线程中没有应用上下文
+        self.analysis_cache = self._analysis_cache()
+        self.router = self._model_router()
+        self.pool = self._provider_pool({"model": model, "base_url": base_url, "api_key": api_key})
+        # 备用供应商的同步客户端，按供应商名称缓存
+        self.provider_clients = {}
         
         try:
             # 使用工厂函数创建客户端
@@ -210,6 +479,7 @@ class NewsAnalysisService:
 - 数据尽可能真实可靠
 """
         self.sys_prompt = tmpprompt
+        self.refresh_prompt = current_date_str + REFRESH_PROMPT
         
         # API调用监控
         self.api_stats = {
@@ -218,6 +488,17 @@ class NewsAnalysisService:
             "timeout": 0,
             "error": 0,
             "rate_limited": 0,
+            "cache_hits": 0,
+            "batches": 0,
+            "batch_fallbacks": 0,
+            "stream_aborts": 0,
+            "refreshes": 0,
+            "refresh_fallbacks": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "failovers": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
             "avg_duration": 0,
             "durations": []
         }
@@ -256,13 +537,32 @@ class NewsAnalysisService:
             update_analysis_status(news_id, "completed", fallback)
             return fallback
             
+        # 近似标题已有新鲜分析时直接复用，不调用模型
+        analysis_cache = self.analysis_cache
+        if analysis_cache is not None:
+            cached = analysis_cache.lookup(news_title)
+            if cached is not None:
+                self.api_stats["cache_hits"] += 1
+                update_analysis_status(news_id, "completed", cached)
+                return cached
+        
         # 构建消息内容
         messages = [
             {'role': 'system', 'content': self.sys_prompt},
             {'role': 'user', 'content': news_title}
         ]
         
-        try:
+        # 分析结果JSON的预留输出token数
+        estimated_tokens = estimate_tokens(messages, completion_tokens=ANALYSIS_COMPLETION_TOKENS)
+        
+        def request(provider, cancelled):
+            """向一个供应商发出流式分析请求，对冲请求中落选时停止读取"""
+            client = self.client if provider is self.pool.primary else self._provider_client(provider)
+            limiter_provider = provider_from_url(provider["base_url"])
+            
+            # 取得集群共享的调用配额
+            get_rate_limiter().acquire(limiter_provider, provider["model"], estimated_tokens)
+            
             # 流式调用API
             start_time = time.time()
             
@@ -271,20 +571,21 @@ class NewsAnalysisService:
             
             # 流式调用API
             try:
-                stream = self.client.chat.completions.create(
-                    model=self.model,
+                stream = client.chat.completions.create(
+                    model=provider["model"],
                     messages=messages,
                     temperature=0.7,
                     stream=True,  # 启用流式处理
-                    extra_body={"enable_search": True}
+                    extra_body={"enable_search": True} if provider["enable_search"] else None
                 )
             except Exception as api_error:
                 print(f"API调用失败: {str(api_error)}")
                 # 尝试不带enable_search参数重试一次
                 if "extra_body" in str(api_error) or "enable_search" in str(api_error):
                     print("尝试不带enable_search参数重试...")
-                    stream = self.client.chat.completions.create(
-                        model=self.model,
+                    provider["enable_search"] = False
+                    stream = client.chat.completions.create(
+                        model=provider["model"],
                         messages=messages,
                         temperature=0.7,
                         stream=True  # 启用流式处理
@@ -292,15 +593,38 @@ class NewsAnalysisService:
                 else:
                     raise
             
-            # 收集所有响应片段
+            # 边接收边校验：结构出错时立即停止读取，JSON完整后不再等待剩余输出
             response_chunks = []
-            for chunk in stream:
-                if hasattr(chunk.choices[0], 'delta') and hasattr(chunk.choices[0].delta, 'content') and chunk.choices[0].delta.content:
-                    response_chunks.append(chunk.choices[0].delta.content)
+            validator = analysis_validator()
+            try:
+                for chunk in stream:
+                    if cancelled.is_set():
+                        break
+                    if chunk.choices and hasattr(chunk.choices[0], 'delta') and hasattr(chunk.choices[0].delta, 'content') and chunk.choices[0].delta.content:
+                        response_chunks.append(chunk.choices[0].delta.content)
+                        if validator.feed(chunk.choices[0].delta.content):
+                            break
+            except StreamingJSONError as e:
+                self.api_stats["stream_aborts"] += 1
+                print(f"模型输出结构错误，提前结束读取: {e.msg}（已接收{len(validator.text)}字符）")
+            finally:
+                if hasattr(stream, 'close'):
+                    stream.close()
             
             # 计算API调用时间
             api_duration = time.time() - start_time
             
+            # 用实际输出长度修正token估算
+            result_str = "".join(response_chunks)
+            get_rate_limiter().record_usage(
+                limiter_provider, provider["model"], estimated_tokens,
+                estimate_tokens(messages, text=result_str)
+            )
+            get_token_budget().record("analysis", provider["model"], estimate_tokens(messages),
+                                      estimate_tokens(text=result_str))
+            if cancelled.is_set():
+                return None
+            
             # 更新API统计
             self.api_stats["success"] += 1
             self.api_stats["durations"].append(api_duration)
@@ -314,39 +638,35 @@ class NewsAnalysisService:
                 self.api_stats["rate_limited"] += 1
                 print(f"⚠️ 可能被限流: 请求耗时 {api_duration:.2f}秒，是平均时间的 {api_duration/self.api_stats['avg_duration']:.1f}倍")
             
-            # 合并所有响应片段
-            result_str = "".join(response_chunks)
-            
             try:
-                # 尝试去除可能的markdown格式 ```json ... ```
-                if "```json" in result_str:
-                    result_str = result_str.split("```json")[1].split("```")[0].strip()
-                elif "```" in result_str:
-                    result_str = result_str.split("```")[1].split("```")[0].strip()
-                
-                # 解析JSON
-                result_json = json.loads(result_str)
-                
-                # 验证和修正数据
-                result_json = validate_and_fix_data(result_json, news_title)
-                
-                # 更新状态为已完成，保存结果
-                update_analysis_status(news_id, "completed", result_json)
-                
-                print(f"新闻'{news_title}'分析完成")
-                return result_json
-                
-            except json.JSONDecodeError as e:
-                print(f"JSON解析失败: {str(e)}")
-                print(f"原始响应: {result_str[:200]}...")  # 只显示前200个字符
-                
-                # 生成后备数据
-                fallback = generate_fallback_data(news_title)
-                
-                # 更新状态为失败
-                update_analysis_status(news_id, "completed", fallback)
-                
-                return fallback
+                # 验证和修正流式校验得到的数据，不合法时由供应商池转给下一个供应商
+                return analysis_from_validator(validator, news_title)
+            except json.JSONDecodeError:
+                print(f"原始响应（{provider['name']}）: {result_str[:200]}...")  # 只显示前200个字符
+                raise
+        
+        try:
+            result_json, provider = self.pool.call(request, self.api_stats)
+            result_json["analysis_model"] = provider["model"]
+            
+            # 更新状态为已完成，保存结果
+            update_analysis_status(news_id, "completed", result_json)
+            if analysis_cache is not None:
+                analysis_cache.add(news_title, result_json)
+            
+            print(f"新闻'{news_title}'分析完成")
+            return result_json
+            
+        except json.JSONDecodeError as e:
+            print(f"JSON解析失败: {str(e)}")
+            
+            # 生成后备数据
+            fallback = generate_fallback_data(news_title)
+            
+            # 更新状态为失败
+            update_analysis_status(news_id, "completed", fallback)
+            
+            return fallback
                 
         except Exception as e:
             self.api_stats["error"] += 1
@@ -418,15 +738,20 @@ class NewsAnalysisService:
             print(f"解析新闻数据失败: {str(e)}")
             return {}
 
-    def analyze_multiple_news(self, news_items, platforms=None, max_workers=16, timeout=60):
+    def analyze_multiple_news(self, news_items, platforms=None, max_workers=16, timeout=60, priors=None,
+                              scores=None, queue_depth=0, budget_remaining=None):
         """
         并行分析多个新闻，带有避免重复处理、错误恢复和API限流保护
         
         Args:
             news_items (list): 新闻标题列表
             platforms (list, optional): 对应的平台列表
-            max_workers (int): 最大线程数
+            max_workers (int): 最大线程数（仅在关闭ASYNC_ANALYSIS_ENABLED时使用线程池）
             timeout (int): API调用超时时间（秒）
+            priors (dict, optional): 标题到上次分析的映射，这些标题只刷新时效性字段（仅异步引擎支持）
+            scores (list, optional): 对应的优先级分数，用于选择模型档位（仅异步引擎支持）
+            queue_depth (int): 待分析的任务数，用于选择模型档位
+            budget_remaining (float, optional): 剩余预算比例，默认读取当天的token预算（仅异步引擎支持）
             
         Returns:
             list: 分析结果列表
@@ -471,18 +796,26 @@ class NewsAnalysisService:
         processed_titles = set()
         news_to_process = []
         platform_map = []
+        score_map = []
         
-        for title, platform in zip(news_items, platforms):
+        for i, (title, platform) in enumerate(zip(news_items, platforms)):
             if not title or title in processed_titles:
                 continue
             
             processed_titles.add(title)
             news_to_process.append(title)
             platform_map.append(platform)
+            score_map.append(scores[i] if scores and i < len(scores) else 1.0)
         
         if not news_to_process:
             return []
         
+        # 默认使用异步分析引擎，所有请求在一个事件循环中并发
+        if self._config('ASYNC_ANALYSIS_ENABLED', True):
+            return self.analyze_multiple_news_async(news_to_process, platform_map, priors=priors,
+                                                    scores=score_map, queue_depth=queue_depth,
+                                                    budget_remaining=budget_remaining)
+        
         # 优化线程数量，避免过多线程
         effective_workers = min(max_workers, len(news_to_process))
         print(f"使用{effective_workers}个线程分析{len(news_to_process)}条新闻")
@@ -589,6 +922,134 @@ class NewsAnalysisService:
         results.sort(key=lambda x: x.get("participants", 0), reverse=True)
         return results
 
+    @staticmethod
+    def _config(key, default):
+        """读取Flask配置，不在应用上下文中时返回默认值"""
+        try:
+            return current_app.config.get(key, default)
+        except RuntimeError:
+            return default
+
+    def _analysis_cache(self):
+        """返回近似标题分析缓存，ANALYSIS_CACHE_ENABLED关闭时返回None"""
+        if not self._config('ANALYSIS_CACHE_ENABLED', True):
+            return None
+        return get_analysis_cache(
+            threshold=self._config('ANALYSIS_CACHE_THRESHOLD', 0.55),
+            max_age_hours=self._config('ANALYSIS_CACHE_MAX_AGE_HOURS', 6)
+        )
+
+    def _model_router(self):
+        """按ANALYSIS_MODEL_TIERS创建模型路由，未配置档位时只有当前模型一个档位"""
+        tiers = load_tiers(self._config('ANALYSIS_MODEL_TIERS', []), self.model, self.base_url, self.api_key)
+        return ModelRouter(
+            tiers,
+            queue_depth_high=self._config('ROUTER_QUEUE_DEPTH_HIGH', 200),
+            min_valid_rate=self._config('ROUTER_MIN_VALID_RATE', 0.8),
+            max_fallback_rate=self._config('ROUTER_MAX_FALLBACK_RATE', 0.2)
+        )
+
+    def _provider_pool(self, primary):
+        """创建以primary为主供应商、ANALYSIS_FAILOVER_PROVIDERS为备用供应商的供应商池"""
+        return ProviderPool(
+            load_providers(self._config('ANALYSIS_FAILOVER_PROVIDERS', []), primary),
+            name="analysis",
+            hedge=self._config('LLM_HEDGE_ENABLED', True),
+            default_delay=self._config('ANALYSIS_HEDGE_DELAY', 60),
+            failure_threshold=self._config('LLM_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=self._config('LLM_BREAKER_RESET_SECONDS', 60)
+        )
+
+    def _provider_client(self, provider):
+        """返回备用供应商的同步客户端"""
+        if provider["name"] not in self.provider_clients:
+            self.provider_clients[provider["name"]] = create_openai_client(provider["api_key"], provider["base_url"])
+        return self.provider_clients[provider["name"]]
+
+    def analyze_multiple_news_async(self, titles, platforms=None, timeout=None, priors=None,
+                                    scores=None, queue_depth=0, budget_remaining=None):
+        """
+        使用异步分析引擎并发分析多条新闻
+        
+        新闻先由模型路由分配到各档位，每个档位使用各自的模型和异步引擎，多个档位并行执行。
+        当天token预算进入economy及以下时，每次请求至少分析TOKEN_BUDGET_BATCH_SIZE条新闻。
+        
+        Args:
+            titles (list): 已去重的新闻标题列表
+            platforms (list, optional): 对应的平台列表
+            timeout (int, optional): 单个请求的超时时间（秒），默认读取ANALYSIS_REQUEST_TIMEOUT
+            priors (dict, optional): 标题到上次分析的映射，这些标题只刷新时效性字段
+            scores (list, optional): 对应的优先级分数，未提供时全部使用最高档位
+            queue_depth (int): 待分析的任务数，队列积压时提高高档位的门槛
+            budget_remaining (float, optional): 剩余预算比例（0~1），预算紧张时提高高档位的门槛，
+                                               默认读取当天新闻分析的token预算
+            
+        Returns:
+            list: 分析结果列表，按participants降序排列
+        """
+        from .async_analysis_engine import AsyncAnalysisEngine
+        
+        platforms = platforms or [None] * len(titles)
+        scores = scores or [1.0] * len(titles)
+        budget = get_token_budget()
+        if budget_remaining is None:
+            budget_remaining = budget.remaining_fraction("analysis")
+        batch_size = self._config('ANALYSIS_BATCH_SIZE', 1)
+        if budget.mode_for(budget_remaining) != "normal":
+            # 合并请求，多条新闻共用一份系统提示词
+            batch_size = max(batch_size, self._config('TOKEN_BUDGET_BATCH_SIZE', 4))
+            print(f"token预算剩余{budget_remaining:.0%}，每次请求分析{batch_size}条新闻")
+        groups = self.router.assign(scores, queue_depth, budget_remaining)
+        if len(self.router.tiers) > 1:
+            print("模型路由: " + "，".join(f"{tier['name']}({tier['model']}) {len(indices)}条" for tier, indices in groups))
+        # 在当前线程读取配置，档位线程中没有应用上下文
+        pools = {tier["name"]: self._provider_pool({key: tier[key] for key in ("model", "base_url", "api_key", "enable_search")})
+                 for tier, _ in groups}
+        
+        def run_group(tier, indices):
+            engine = AsyncAnalysisEngine(
+                tier["api_key"], tier["base_url"], tier["model"], self.sys_prompt,
+                max_concurrency=self._config('ANALYSIS_MAX_CONCURRENCY', 64),
+                request_timeout=timeout or self._config('ANALYSIS_REQUEST_TIMEOUT', 120),
+                total_timeout=self._config('ANALYSIS_TOTAL_TIMEOUT', None),
+                enable_search=tier["enable_search"],
+                analysis_cache=self.analysis_cache,
+                batch_size=batch_size,
+                refresh_prompt=self.refresh_prompt,
+                metrics=self.router.metrics,
+                pool=pools[tier["name"]]
+            )
+            print(f"使用异步引擎({tier['model']})分析{len(indices)}条新闻，最大并发{engine.max_concurrency}，每次请求{engine.batch_size}条")
+            return engine, engine.run([titles[i] for i in indices], [platforms[i] for i in indices], priors=priors)
+        
+        if len(groups) == 1:
+            finished = [run_group(*groups[0])]
+        else:
+            # 每个档位的引擎在各自的线程和事件循环中运行
+            with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+                finished = list(executor.map(lambda group: run_group(*group), groups))
+        
+        results = []
+        for engine, engine_results in finished:
+            results.extend(engine_results)
+            # 合并API统计
+            for key in ("total", "success", "timeout", "error", "rate_limited", "cache_hits",
+                        "batches", "batch_fallbacks", "stream_aborts", "refreshes", "refresh_fallbacks",
+                        "hedged", "hedge_wins", "failovers", "prompt_tokens", "completion_tokens"):
+                self.api_stats[key] += engine.api_stats[key]
+            self.api_stats["durations"].extend(engine.api_stats["durations"])
+            # 按实际返回结果的模型记账，转移到备用供应商的请求不计入主模型
+            for model, usage in engine.model_usage.items():
+                budget.record("analysis", model, usage["prompt_tokens"],
+                              usage["completion_tokens"], requests=usage["requests"])
+        if self.api_stats["durations"]:
+            self.api_stats["avg_duration"] = sum(self.api_stats["durations"]) / len(self.api_stats["durations"])
+        self.router.metrics.flush()
+        budget.flush()
+        
+        results.sort(key=lambda x: x.get("participants", 0), reverse=True)
+        return results
+
     # def parallel_process(self, title_url="https://api.vvhan.com/api/hotlist/all", max_workers=16, max_news_per_platform=5):
     #     """
     #     从API获取热门新闻并进行并行分析处理，并实现防重复处理和错误恢复
@@ -5,9 +5,20 @@ import re
 import math
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-from flask import current_app
+from flask import current_app, has_app_context
 from app.extensions import db
-from app.utils.api_utils import fetch_hot_news
+from app.utils.http_client import get_http_client
+from app.utils.db_utils import get_latest_analyses_by_titles
+from app.utils.hotlist_stream import HotlistStreamParser, iter_hotlist_items
+from app.utils.heat_scoring import HeatScoringEngine
+from app.utils.hotness_parser import parse_hotness_value
+from app.services.snapshot_store import HotNewsSnapshotStore
+from app.services.heat_series import HeatSeriesStore
+from app.services.heat_velocity import HeatVelocityStore
+from app.services.news_sources import collector_from_config
+from app.services.retention_service import expire_at
+from app.services.recent_analysis_filter import RecentAnalysisFilter
+from app.utils import analysis_queue
 import os
 import copy
 import numpy as np
@@ -61,6 +72,51 @@ class NewsCollectionService:
         (0, 0.2): "低"
     }
 
+    # 跨平台近似标题合并的默认Jaccard阈值，可通过TITLE_MERGE_THRESHOLD配置，设为0关闭
+    TITLE_MERGE_THRESHOLD = 0.55
+
+    @staticmethod
+    def scoring_engine():
+        """
+        创建使用本服务平台权重、平台分组、热度级别和标题合并阈值配置的评分引擎
+        
+        Returns:
+            HeatScoringEngine: 评分引擎实例
+        """
+        threshold = NewsCollectionService.TITLE_MERGE_THRESHOLD
+        if has_app_context():
+            threshold = current_app.config.get('TITLE_MERGE_THRESHOLD', threshold)
+        return HeatScoringEngine(
+            NewsCollectionService.PLATFORM_WEIGHTS,
+            NewsCollectionService.PLATFORM_CATEGORIES,
+            NewsCollectionService.HEAT_LEVELS,
+            title_merge_threshold=threshold or None
+        )
+
+    @staticmethod
+    def known_since(titles):
+        """
+        返回标题从何时起已在跟踪中，供合并近似标题时选择稳定的规范标题
+
+        有热度状态的标题取首次上榜时间，其余有分析记录的标题取最近一次分析的时间。
+
+        Args:
+            titles (list): 发生近似合并的标题
+
+        Returns:
+            dict: 标题到ISO时间的映射，查询失败时为空
+        """
+        try:
+            known = HeatVelocityStore.first_seen(titles)
+            remaining = [title for title in titles if title not in known]
+            if remaining:
+                analyses = get_latest_analyses_by_titles(remaining, projection={"title": 1, "analyzed_at": 1})
+                known.update({title: doc["analyzed_at"] for title, doc in analyses.items() if doc.get("analyzed_at")})
+            return known
+        except Exception as e:
+            print(f"查询标题跟踪记录失败，按热度选择规范标题: {str(e)}")
+            return {}
+
     @staticmethod
     def normalize_heat(heat_values):
         """
@@ -89,74 +145,10 @@ class NewsCollectionService:
     def parse_hot_value(hot_str):
         """
         处理不同格式的热度值，转换为浮点数
-        """
-        if not hot_str:
-            return 0.0
-
-        if isinstance(hot_str, (int, float)):
-            return float(hot_str)
-
-        # 记录原始输入以便调试
-        original_value = str(hot_str)
-        
-        # 移除非数字内容（如"万"、"热度"、"亮"等）
-        hot_str = str(hot_str)
-        
-        # 特殊处理知乎热榜格式，例如 "3901 万热度"
-        if "万热度" in hot_str:
-            try:
-                # 提取数字部分
-                num_part = hot_str.split("万热度")[0].strip()
-                result = float(num_part) * 10000
-             
-                return result
-            except ValueError:
-              
-                return 0.0
-                
-        # 特殊处理带有单位的数字格式，如"4.1万"、"3.6亿"
-        match = re.search(r'([\d\.]+)([亿万千])', hot_str)
-        if match:
-            try:
-                base_num = float(match.group(1))
-                unit = match.group(2)
-                multipliers = {'千': 1000, '万': 10000, '亿': 100000000}
-                result = base_num * multipliers.get(unit, 1)
-                print(f"解析带单位热度: '{original_value}' => {result}")
-                return result
-            except (ValueError, AttributeError):
-                pass
         
-        # 处理"万"单位但没有按正则匹配到的情况
-        if "万" in hot_str:
-            hot_str = hot_str.replace("万", "")
-            try:
-                result = float(hot_str) * 10000
-                print(f"解析带'万'热度: '{original_value}' => {result}")
-                return result
-            except ValueError:
-                print(f"解析带'万'热度失败: '{original_value}'")
-        
-        # 尝试直接提取数字部分
-        hot_str = re.sub(r'[^0-9.]', '', hot_str)
-
-        try:
-            result = float(hot_str)
-            # 对于某些平台（如36氪）可能需要额外的缩放
-            if result < 100 and any(keyword in original_value.lower() for keyword in ["热度", "热力", "heat"]):
-                # 如果热度值很小且含有"热度"关键词，可能是某种缩放后的值，乘以10000提升量级
-                result = result * 10000
-                print(f"对小热度值进行缩放: '{original_value}' => {result}")
-            elif result < 1000 and "36氪" in original_value:
-                # 36氪特殊处理
-                result = result * 10000
-                print(f"36氪热度值缩放: '{original_value}' => {result}")
-            else:
-                print(f"提取数字部分: '{original_value}' => {result}")
-            return result
-        except ValueError:
-            print(f"无法解析热度值: '{original_value}'")
-            return 0.0
+        保留以兼容旧代码，实际解析由app.utils.hotness_parser完成
+        """
+        return parse_hotness_value(hot_str)
 
     @staticmethod
     def parse_hotness(hotness_str):
@@ -169,49 +161,7 @@ class NewsCollectionService:
         Returns:
             float: 解析后的数值
         """
-        if not hotness_str or not isinstance(hotness_str, str):
-            return 0
-            
-        # 记录原始输入以便调试
-        original_value = str(hotness_str)
-        
-        # 清理字符串
-        cleaned = hotness_str.strip().replace(',', '')
-        
-        # 特殊处理知乎格式
-        if "万热度" in cleaned:
-            try:
-                num_part = cleaned.split("万热度")[0].strip()
-                result = float(num_part) * 10000
-                print(f"parse_hotness-知乎: '{original_value}' => {result}")
-                return result
-            except ValueError:
-                pass
-        
-        # 匹配数字和单位
-        match = re.search(r'([\d\.]+)([亿万千])?', cleaned)
-        if not match:
-            print(f"parse_hotness-无法匹配: '{original_value}'")
-            return 0
-            
-        base_num = float(match.group(1))
-        unit = match.group(2) if match.group(2) else ''
-        
-        # 根据单位转换数值
-        multipliers = {'': 1, '千': 1000, '万': 10000, '亿': 100000000}
-        result = base_num * multipliers.get(unit, 1)
-        
-        # 特殊处理某些平台
-        if "36氪" in original_value and result < 1000:
-            result = result * 10000
-            print(f"parse_hotness-36氪: '{original_value}' => {result}")
-        elif "澎湃" in original_value and result < 1000:
-            result = result * 10000
-            print(f"parse_hotness-澎湃: '{original_value}' => {result}")
-        else:
-            print(f"parse_hotness: '{original_value}' => {result}")
-            
-        return result
+        return parse_hotness_value(hotness_str)
 
     @staticmethod
     def normalize_heat_value(value, max_heat_values):
@@ -258,13 +208,10 @@ class NewsCollectionService:
             cutoff_time_str = cutoff_time.isoformat()
             print(f"截止时间: {cutoff_time_str}")
             
-            # 查询最近更新的记录
-            latest = db.hot_news_processed.find_one(
-                sort=[("timestamp", -1)]
-            )
+            # 查询最近更新的时间戳
+            timestamp = HotNewsSnapshotStore.latest_timestamp()
             
-            if latest and "timestamp" in latest:
-                timestamp = latest["timestamp"]
+            if timestamp:
                 if isinstance(timestamp, str):
                     try:
                         print(f"最近更新时间: {timestamp}")
@@ -290,14 +237,53 @@ class NewsCollectionService:
             traceback.print_exc()
             return False
 
+    @staticmethod
+    def iter_payload_items(data):
+        """
+        从已解析的API响应中逐条取出标准化的新闻条目
+
+        Args:
+            data (dict): API响应
+
+        Yields:
+            dict: 包含title、url、hotness、platform的条目
+        """
+        for platform_data in data.get("data", []):
+            platform = platform_data.get("name")
+            if platform in NewsCollectionService.EXCLUDE_PLATFORMS:
+                continue
+            for news in platform_data.get("data", []):
+                yield {
+                    "title": news.get("title", ""),
+                    "url": news.get("url", ""),
+                    "hotness": news.get("hot", "0"),
+                    "platform": platform
+                }
+
+    @staticmethod
+    def collect_from_sources():
+        """
+        并发采集所有配置的数据源
+
+        Returns:
+            SourceCollection: 去重后的标准化条目、每个数据源的报告和抓取结果
+        """
+        collection = collector_from_config(NewsCollectionService.EXCLUDE_PLATFORMS).collect()
+        print(f"并发采集 {len(collection.reports)} 个数据源，耗时 {collection.elapsed:.2f}秒，"
+              f"共 {len(collection.items)} 条")
+        for line in collection.summary():
+            print(f"  {line}")
+        return collection
+
     @staticmethod
     def process_hot_news(response_file=None, skip_save=False, force_update=False):
         """
         处理热门新闻数据，整合get_hot_news.py的功能
         
         Args:
-            response_file (str, optional): 响应文件路径，默认值为None，
-                                        None表示使用API获取数据
+            response_file (str|bytes|dict|list, optional): 响应文件路径、原始API响应、已解析的API响应
+                                        或数据源采集到的标准化条目，默认值为None，None表示并发采集所有数据源；
+                                        文件和原始响应以流式解析，排除的平台不会构建为Python对象
             skip_save (bool, optional): 是否跳过保存到数据库，默认为False
             force_update (bool, optional): 是否强制更新，即使数据库中有最近的数据，默认为False
         
@@ -314,144 +300,52 @@ class NewsCollectionService:
                     return NewsCollectionService.get_latest_processed_news()
             
             # 获取热点新闻数据
-            if response_file and isinstance(response_file, str) and os.path.exists(response_file):
-                print(f"从文件读取热门新闻数据: {response_file}")
-                # 从文件读取
-                with open(response_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            parser = None
+            if isinstance(response_file, list):
+                # 数据源已经产出的标准化条目
+                items = response_file
+            elif response_file is None:
+                print("从数据源采集热门新闻数据...")
+                items = NewsCollectionService.collect_from_sources().items
+                if not items:
+                    print("未能获取到热门新闻数据")
+                    return None
+            elif isinstance(response_file, dict):
+                # 调用方已经解析好的API响应
+                if not response_file:
+                    print("未能获取到热门新闻数据")
+                    return None
+                items = NewsCollectionService.iter_payload_items(response_file)
             else:
-                print("从API获取热门新闻数据...")
-                # 从API获取
-                data = fetch_hot_news()
-                
-            if not data:
-                print("未能获取到热门新闻数据")
-                return None
-            
-            # 获取所有新闻并合并
-            all_news = []
-            platforms = {}
-            print(f"原始数据包含 {len(data.get('data', []))} 个平台的新闻")
-            
-            # 收集并标准化每个平台的新闻
-            for platform_data in data.get("data", []):
-                platform = platform_data.get("name")
-                
-                if platform in NewsCollectionService.EXCLUDE_PLATFORMS:
-                    print(f"跳过排除的平台: {platform}")
-                    continue
-                    
-                platforms[platform] = {
-                    "name": platform,
-                    "platform": platform,
-                    "data": []
-                }
-                
-                news_list = platform_data.get("data", [])
-                print(f"处理平台 {platform} 的 {len(news_list)} 条新闻")
-                
-                for news in news_list:
-                    hotness = news.get("hot", "0")
-                    news_item = {
-                        "title": news.get("title", ""),
-                        "url": news.get("url", ""),
-                        "hotness": hotness,
-                        "heat_value": NewsCollectionService.parse_hotness(hotness),
-                        "platform": platform
-                    }
-                    platforms[platform]["data"].append(news_item)
-            
-            # 计算加权热度和归一化
-            max_heat_values = {}
-            for platform, platform_data in platforms.items():
-                platform_weight = NewsCollectionService.PLATFORM_WEIGHTS.get(platform, 0.5)
-                max_heat = 0
-                for news in platform_data["data"]:
-                    news["weighted_heat_value"] = news["heat_value"] * platform_weight
-                    max_heat = max(max_heat, news["weighted_heat_value"])
-                max_heat_values[platform] = max_heat
-                print(f"平台 {platform} 的最大加权热度值: {max_heat}")
-            
-            global_max_heat = max(max_heat_values.values()) if max_heat_values else 0
-            print(f"全局最大加权热度值: {global_max_heat}")
-            
-            for platform, platform_data in platforms.items():
-                for news in platform_data["data"]:
-                    news["normalized_heat"] = NewsCollectionService.normalize_heat_value(
-                        news["weighted_heat_value"], global_max_heat
-                    )
-            print("完成跨平台热度全局归一化")
-            
-            # 收集处理后的新闻到all_news
-            all_news = []
-            for platform_data in platforms.values():
-                all_news.extend(platform_data["data"])
-            print(f"标准化后共有 {len(all_news)} 条新闻")
-            
-            # 合并相同标题的新闻
-            merged_news = {}
-            for news in all_news:
-                title = news["title"].strip()
-                if not title:
-                    continue
-                    
-                platform = news["platform"]
-                normalized_heat = news["normalized_heat"]
-                
-                if title in merged_news:
-                    merged_news[title]["platforms"].append(platform)
-                    merged_news[title]["platform_count"] += 1
-                    merged_news[title]["heat_sum"] += normalized_heat
-                    merged_news[title]["weighted_heat_value"] += int(news["weighted_heat_value"])
+                if isinstance(response_file, (bytes, bytearray)):
+                    content = response_file
+                elif isinstance(response_file, str) and os.path.exists(response_file):
+                    print(f"从文件读取热门新闻数据: {response_file}")
+                    with open(response_file, 'rb') as f:
+                        content = f.read()
                 else:
-                    merged_news[title] = {
-                        "title": title,
-                        "url": news["url"],
-                        "platforms": [platform],
-                        "platform_count": 1,
-                        "heat_sum": normalized_heat,
-                        "weighted_heat_value": int(news["weighted_heat_value"]),
-                        "hotness": news["hotness"],
-                    }
-            
-            print(f"合并后共有 {len(merged_news)} 条不同标题的新闻")
-            
-            # 计算综合热度分数
-            for title, news in merged_news.items():
-                diversity_score = min(1.0, news["platform_count"] / 3)
-                news["comprehensive_heat"] = news["heat_sum"] * (1 + diversity_score)
-                news["comprehensive_heat"] = min(1.0, news["comprehensive_heat"])
-            
-            # 按综合热度排序
-            sorted_news = sorted(
-                merged_news.values(),
-                key=lambda x: x["comprehensive_heat"],
-                reverse=True
-            )
-            print(f"排序后共有 {len(sorted_news)} 条新闻")
-            
-            # 最终归一化并计算热度级别
-            if sorted_news:
-                max_heat = max(news["comprehensive_heat"] for news in sorted_news)
-                print(f"最大综合热度值: {max_heat}")
-                
-                for news in sorted_news:
-                    news["normalized_heat"] = news["comprehensive_heat"] / max_heat if max_heat > 0 else 0
-                    for (min_val, max_val), level in NewsCollectionService.HEAT_LEVELS.items():
-                        if min_val <= news["normalized_heat"] < max_val:
-                            news["heat_level"] = level
-                            break
-                    else:
-                        news["heat_level"] = "低"
-                    
-                    categories_covered = set()
-                    for platform in news["platforms"]:
-                        for category, platforms in NewsCollectionService.PLATFORM_CATEGORIES.items():
-                            if platform in platforms:
-                                categories_covered.add(category)
-                                break
-                    news["category_diversity"] = len(categories_covered)
-            else:
+                    content = None
+                if not content:
+                    print("未能获取到热门新闻数据")
+                    return None
+                # 流式解析，排除的平台只扫描不构建对象
+                parser = HotlistStreamParser(exclude=NewsCollectionService.EXCLUDE_PLATFORMS)
+                items = parser.items(content)
+            
+            # 使用列式评分引擎完成加权、全局归一化、合并、综合热度和热度级别计算
+            # 条目以生成器形式进入评分引擎，热度在载入时逐条解析
+            engine = NewsCollectionService.scoring_engine().load_items(items)
+            if parser is not None:
+                if parser.meta.get("success") is False:
+                    print("API返回非成功状态")
+                    return None
+                skipped = [name for name, count in parser.platforms.items() if count is None]
+                print(f"原始数据包含 {len(parser.platforms)} 个平台的新闻，跳过排除的平台: {', '.join(skipped) or '无'}")
+            print(f"标准化后共有 {len(engine.titles)} 条新闻")
+            sorted_news = engine.score(known_since=NewsCollectionService.known_since)
+            merged_variants = sum(len(news.get("title_variants", [])) for news in sorted_news)
+            print(f"合并排序后共有 {len(sorted_news)} 条不同的新闻（其中 {merged_variants} 个近似标题被合并）")
+            if not sorted_news:
                 print("没有有效的新闻数据")
             
             # 整理结果
@@ -469,7 +363,12 @@ class NewsCollectionService:
             if not skip_save:
                 print("保存热门新闻数据到MongoDB...")
                 try:
-                    db.hot_news_processed.insert_one(result)
+                    HotNewsSnapshotStore.save(result)
+                    HeatSeriesStore.record(result["timestamp"], sorted_news)
+                    threshold = current_app.config.get('HOT_NEWS_THRESHOLD', 0.75) if has_app_context() else 0.75
+                    rising = HeatVelocityStore.record(result["timestamp"], sorted_news, threshold)
+                    if rising:
+                        print(f"发现 {len(rising)} 个上升话题: {', '.join(state['title'][:20] for state in rising[:5])}")
                     print("数据成功保存到MongoDB")
                 except Exception as db_error:
                     print(f"MongoDB保存失败: {str(db_error)}")
@@ -503,39 +402,34 @@ class NewsCollectionService:
                 print("数据库中已有最近更新，跳过采集")
                 
                 # 返回最近的处理结果
-                latest = db.hot_news_processed.find_one(
-                    sort=[("timestamp", -1)]
-                )
+                latest_timestamp = HotNewsSnapshotStore.latest_timestamp()
                 
-                if latest:
-                    return {"status": "recent_data", "timestamp": latest.get("timestamp")}
+                if latest_timestamp:
+                    return {"status": "recent_data", "timestamp": latest_timestamp}
                 
                 # 如果没有找到最近的结果但判断存在更新，防止重复获取
                 return {"status": "recent_data_expected", "message": "数据库中应该有最近更新，但未能获取到"}
             
             api_url = current_app.config.get('NEWS_API_BASE_URL', 'https://api.vvhan.com/api/hotlist/all')
             
-            try:
-                # 获取API数据
-                print(f"从API获取热门新闻: {api_url}")
-                response = requests.get(api_url, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                if not data.get('success'):
-                    raise ValueError("API返回数据格式错误")
-                
-                # 处理热门新闻
-                result = NewsCollectionService.process_hot_news(data, force_update=force)
-                
-                if result:
-                    return {"status": "success", "total_news": result.get("total_news", 0)}
-                else:
-                    return {"status": "error", "message": "处理热门新闻失败"}
-                
-            except requests.exceptions.RequestException as e:
-                print(f"请求API失败: {str(e)}")
-                return {"status": "api_error", "message": str(e)}
+            # 并发采集所有数据源，总耗时取决于最慢的健康数据源
+            collection = NewsCollectionService.collect_from_sources()
+            checked_at = datetime.now().isoformat()
+            if not collection.items:
+                errors = "; ".join(collection.summary())
+                return {"status": "api_error", "message": f"所有数据源均未采集到数据: {errors}"}
+            
+            # 处理热门新闻（数据源已经完成流式解析）
+            result = NewsCollectionService.process_hot_news(collection.items, force_update=force)
+            
+            if result:
+                # 主接口的验证信息供smart_collect_news做条件请求和变更检测
+                response = collection.response_for(api_url)
+                if response is not None:
+                    NewsCollectionService.save_fetch_validators(response, checked_at)
+                return {"status": "success", "total_news": result.get("total_news", 0)}
+            else:
+                return {"status": "error", "message": "处理热门新闻失败"}
                 
         except Exception as e:
             print(f"新闻采集失败: {str(e)}")
@@ -552,20 +446,8 @@ class NewsCollectionService:
             dict: 包含最新处理过的热门新闻数据的字典
         """
         try:
-            # 直接使用已导入的db对象
-            # 获取最新的一条记录，按时间戳降序排序
-            latest_record = db.hot_news_processed.find_one(
-                sort=[("timestamp", -1)]
-            )
-            
-            if latest_record:
-                # 转换ObjectId为字符串，以便JSON序列化
-                if "_id" in latest_record:
-                    latest_record["_id"] = str(latest_record["_id"])
-                
-                return latest_record
-            
-            return None
+            # 从增量快照中还原最新的榜单（_id已转换为字符串，便于JSON序列化）
+            return HotNewsSnapshotStore.get_at()
         except Exception as e:
             print(f"获取最新处理过的热门新闻数据失败: {str(e)}")
             return None
@@ -596,11 +478,14 @@ class NewsCollectionService:
         生成内容哈希值，用于快速比较两份数据是否有实质区别
         
         Args:
-            data (dict): 新闻数据
+            data (dict|bytes): 新闻数据，bytes为原始API响应，只流式读取标题
             
         Returns:
             str: 哈希值
         """
+        if data and isinstance(data, (bytes, bytearray)):
+            titles = {item["title"] for item in iter_hotlist_items(data)}
+            return hashlib.md5("|".join(sorted(titles)).encode('utf-8')).hexdigest()
         if not data or not isinstance(data, dict):
             return ""
             
@@ -624,6 +509,29 @@ class NewsCollectionService:
         # 生成MD5哈希
         return hashlib.md5(title_str.encode('utf-8')).hexdigest()
         
+    @staticmethod
+    def save_fetch_validators(response, checked_at=None):
+        """
+        保存最近一次成功采集的响应验证信息，供后续条件请求和变更检测使用
+
+        Args:
+            response (FetchResult): 抓取结果
+            checked_at (str, optional): 抓取时间，作为下一次检查区间的起点，默认为当前时间
+        """
+        try:
+            db.hot_news_metadata.update_one(
+                {"key": "hotlist_fetch"},
+                {"$set": {
+                    **response.validators(),
+                    "content_hash": NewsCollectionService.generate_content_hash(response.content),
+                    "timestamp": datetime.now().isoformat(),
+                    "checked_at": checked_at or datetime.now().isoformat()
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"保存采集验证信息失败: {str(e)}")
+
     @staticmethod
     def smart_collect_news(force=False, max_age_minutes=55):
         """
@@ -643,11 +551,11 @@ class NewsCollectionService:
             if not force:
                 cutoff_time = datetime.now() - timedelta(minutes=max_age_minutes)
                 
-                # 获取最近一条记录
-                latest = db.hot_news.find_one(sort=[("timestamp", -1)])
+                # 最近一次快照的时间和对应的响应验证信息
+                timestamp = HotNewsSnapshotStore.latest_timestamp()
+                fetch_meta = db.hot_news_metadata.find_one({"key": "hotlist_fetch"}, {"_id": 0}) or {}
                 
-                if latest and "timestamp" in latest:
-                    timestamp = latest.get("timestamp")
+                if timestamp:
                     if isinstance(timestamp, str):
                         try:
                             timestamp_dt = datetime.fromisoformat(timestamp)
@@ -666,23 +574,38 @@ class NewsCollectionService:
                                     except (ValueError, TypeError):
                                         pass
                                 
-                                # 数据足够新，只需要检查变更
-                                content_hash = latest.get("content_hash", "")
-                                current_data = fetch_hot_news()
+                                # 数据足够新，只需要检查变更：带上次的ETag/Last-Modified发出条件请求，
+                                # 上游返回304或响应体与上次完全相同时不需要解析
+                                content_hash = fetch_meta.get("content_hash", "")
+                                api_url = current_app.config.get('NEWS_API_BASE_URL', 'https://api.vvhan.com/api/hotlist/all')
+                                fetched = get_http_client().fetch(api_url, timeout=10, validators=fetch_meta)
+                                checked_at = datetime.now().isoformat()
+                                current_data = fetched.content if fetched.changed else None
                                 
-                                if current_data and "data" in current_data:
+                                if content_hash and not fetched.changed:
+                                    current_hash = content_hash
+                                elif current_data:
                                     current_hash = NewsCollectionService.generate_content_hash(current_data)
-                                    
+                                else:
+                                    current_hash = None
+                                
+                                if current_hash:
                                     # 如果内容哈希值相同，数据没有变化，跳过采集
                                     if content_hash and content_hash == current_hash:
                                         print(f"数据哈希值相同({content_hash[:8]}...)，未检测到API更新，跳过采集")
                                         
-                                        # 记录检查时间
+                                        # 记录检查时间，上一次检查到本次检查之间上游没有刷新
+                                        db.hot_news_metadata.update_one(
+                                            {"key": "hotlist_fetch"},
+                                            {"$set": {"checked_at": checked_at}}
+                                        )
                                         db.hot_news_checks.insert_one({
-                                            "timestamp": datetime.now().isoformat(),
+                                            "timestamp": checked_at,
+                                            "previous_check": fetch_meta.get("checked_at"),
                                             "content_hash": content_hash,
                                             "result": "unchanged",
-                                            "age_minutes": (datetime.now() - timestamp_dt).total_seconds() / 60
+                                            "age_minutes": (datetime.now() - timestamp_dt).total_seconds() / 60,
+                                            "expire_at": expire_at()
                                         })
                                         
                                         return {
@@ -692,17 +615,20 @@ class NewsCollectionService:
                                             "check_time": datetime.now().isoformat()
                                         }
                                     
-                                    # 内容哈希值不同，数据有更新
+                                    # 内容哈希值不同，数据有更新，跳过一小时内已采集的检查
                                     print(f"检测到API数据更新，旧哈希: {content_hash[:8]}..., 新哈希: {current_hash[:8]}...")
+                                    force = True
                                     
-                                    # 记录更新时间模式
-                                    update_time = datetime.now()
+                                    # 记录更新时间模式，上游的刷新发生在上一次检查与本次检查之间
+                                    update_time = datetime.fromisoformat(checked_at)
                                     db.hot_news_updates.insert_one({
-                                        "timestamp": update_time.isoformat(),
+                                        "timestamp": checked_at,
+                                        "previous_check": fetch_meta.get("checked_at"),
                                         "old_hash": content_hash,
                                         "new_hash": current_hash,
                                         "minute_of_hour": update_time.minute,
-                                        "hour": update_time.hour
+                                        "hour": update_time.hour,
+                                        "expire_at": expire_at()
                                     })
                                     
                                     # 智能推测下一次更新时间
@@ -777,12 +703,9 @@ class NewsCollectionService:
             
             for platform_data in latest_processed["data"]:
                 if platform_data.get("platform") == "comprehensive":
-                    # 按综合热度降序排序
+                    # 按综合热度取前max_news条新闻
                     news_list = platform_data.get("data", [])
-                    sorted_news = sorted(news_list, key=lambda x: x.get("comprehensive_heat", 0), reverse=True)
-                    
-                    # 取前max_news条新闻
-                    top_news = sorted_news[:max_news]
+                    top_news = HeatScoringEngine.top_news(news_list, max_news)
                     
                     # 添加到待分析列表
                     for news in top_news:
@@ -830,6 +753,43 @@ class NewsCollectionService:
             traceback.print_exc()
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    def enqueue_priority_analysis(news_list, trigger):
+        """
+        将需要即时分析的新闻以高优先级加入分析队列并立即启动处理
+
+        Args:
+            news_list (list): 入队的新闻数据
+            trigger (str): 触发来源，记录到分析记录中
+
+        Returns:
+            dict: 队列处理结果
+        """
+        # 导入NewsService并调用其方法安排分析任务
+        from .news_service import NewsService
+        
+        for news in news_list:
+            news_id = hashlib.md5(news.get("title", "").encode()).hexdigest()
+            queued_at = datetime.now()
+            
+            # 使用高优先级标记，调度键由热度级别和平台覆盖计算
+            analysis_queue.enqueue(news_id, news, fields={
+                "priority": "high",  # 高优先级标记
+                "heat_level": news.get("normalized_heat", 0)
+            }, now=queued_at)
+            
+            # 记录到分析记录
+            db.news_analysis_records.insert_one({
+                "news_id": news_id,
+                "title": news.get("title", ""),
+                "queued_at": datetime.now().isoformat(),
+                "heat_level": news.get("normalized_heat", 0),
+                "trigger": trigger
+            })
+        
+        # 立即启动处理队列
+        return NewsService.process_queue_immediately(max_workers=2)
+
     @staticmethod
     def detect_high_heat_news(threshold=0.75):
         """
@@ -858,33 +818,35 @@ class NewsCollectionService:
                 if platform_data.get("platform") == "comprehensive":
                     news_list = platform_data.get("data", [])
                     
-                    for news in news_list:
-                        # 获取归一化后的热度值
+                    # 归一化热度不低于阈值的新闻
+                    hot_news = list(HeatScoringEngine.news_above(news_list, threshold))
+                    
+                    # 检查这些新闻是否已在最近4小时内分析过：布隆过滤器排除一定没有分析过的标题，
+                    # 可能分析过的标题合并为一次批量查询
+                    recent_analyses = RecentAnalysisFilter.analyzed_since(
+                        [news.get("title", "") for news in hot_news],
+                        datetime.now() - timedelta(hours=4),
+                        projection={"title": 1, "analyzed_at": 1, "_id": 0}
+                    )
+                    
+                    for news in hot_news:
                         normalized_heat = news.get("normalized_heat", 0)
+                        recent_analysis = recent_analyses.get(news.get("title", ""))
                         
-                        # 如果热度值高于阈值，添加到高热度列表
-                        if normalized_heat >= threshold:
-                            # 检查该新闻是否已在近期分析过
-                            news_id = hashlib.md5(news.get("title", "").encode()).hexdigest()
-                            
-                            # 查询分析记录
-                            from app.extensions import db
-                            recent_analysis = db.news_analysis_records.find_one({
-                                "news_id": news_id,
-                                "analyzed_at": {"$gte": (datetime.now() - timedelta(hours=4)).isoformat()}
+                        # 如果最近4小时内未分析过，加入待分析列表
+                        if not recent_analysis:
+                            high_heat_news.append({
+                                "title": news.get("title", ""),
+                                "platform": news.get("platforms", ["unknown"])[0] if news.get("platforms") else "unknown",
+                                "url": news.get("url", ""),
+                                "heat": news.get("comprehensive_heat", 0),
+                                "normalized_heat": normalized_heat,
+                                "heat_level": news.get("heat_level"),
+                                "platform_count": news.get("platform_count", 1),
+                                "category_diversity": news.get("category_diversity", 0)
                             })
-                            
-                            # 如果最近4小时内未分析过，加入待分析列表
-                            if not recent_analysis:
-                                high_heat_news.append({
-                                    "title": news.get("title", ""),
-                                    "platform": news.get("platforms", ["unknown"])[0] if news.get("platforms") else "unknown",
-                                    "url": news.get("url", ""),
-                                    "heat": news.get("comprehensive_heat", 0),
-                                    "normalized_heat": normalized_heat
-                                })
-                            else:
-                                print(f"高热度新闻'{news.get('title', '')[:30]}...'已于{recent_analysis.get('analyzed_at')}分析过，跳过")
+                        else:
+                            print(f"高热度新闻'{news.get('title', '')[:30]}...'已于{recent_analysis.get('analyzed_at')}分析过，跳过")
             
             if not high_heat_news:
                 print(f"未检测到热度高于{threshold}的新闻")
@@ -901,40 +863,7 @@ class NewsCollectionService:
                 "news_titles": [news.get("title") for news in high_heat_news]
             })
             
-            # 导入NewsService并调用其方法安排分析任务
-            from .news_service import NewsService
-            
-            # 将高热度新闻加入分析队列
-            for news in high_heat_news:
-                news_id = hashlib.md5(news.get("title", "").encode()).hexdigest()
-                
-                # 使用高优先级标记，确保优先分析
-                db.news_analysis_queue.update_one(
-                    {"news_id": news_id},
-                    {"$set": {
-                        "news_id": news_id,
-                        "news_data": news,
-                        "status": "pending",
-                        "priority": "high",  # 高优先级标记
-                        "queued_at": datetime.now().isoformat(),
-                        "attempts": 0,
-                        "last_attempt": None,
-                        "heat_level": news.get("normalized_heat", 0)
-                    }},
-                    upsert=True
-                )
-                
-                # 记录到分析记录
-                db.news_analysis_records.insert_one({
-                    "news_id": news_id,
-                    "title": news.get("title", ""),
-                    "queued_at": datetime.now().isoformat(),
-                    "heat_level": news.get("normalized_heat", 0),
-                    "trigger": "high_heat_detection"
-                })
-            
-            # 立即启动处理队列
-            process_result = NewsService.process_queue_immediately(max_workers=2)
+            process_result = NewsCollectionService.enqueue_priority_analysis(high_heat_news, "high_heat_detection")
             
             return {
                 "status": "high_heat_detected",
@@ -949,3 +878,76 @@ class NewsCollectionService:
             import traceback
             traceback.print_exc()
             return {"status": "error", "message": str(e)}
+
+    @staticmethod
+    def detect_rising_news(limit=10):
+        """
+        检测正在快速上升但尚未达到高热度阈值的新闻并提前安排分析
+        上升话题在采集时由HeatVelocityStore增量标记，这里只读取最近一份榜单的标记结果
+        
+        Args:
+            limit (int): 每次最多安排分析的上升话题数量
+            
+        Returns:
+            dict: 检测结果统计
+        """
+        try:
+            rising_states = HeatVelocityStore.rising(limit=limit)
+            if not rising_states:
+                return {"status": "normal", "message": "未检测到上升话题"}
+            
+            # 从最新榜单中取出完整的新闻数据
+            latest_processed = NewsCollectionService.get_latest_processed_news()
+            news_by_title = {}
+            for platform_data in (latest_processed or {}).get("data", []):
+                if platform_data.get("platform") == "comprehensive":
+                    for news in platform_data.get("data", []):
+                        news_by_title.setdefault(news.get("title"), news)
+            
+            recent_analyses = RecentAnalysisFilter.analyzed_since(
+                [state["title"] for state in rising_states],
+                datetime.now() - timedelta(hours=4),
+                projection={"title": 1, "_id": 0}
+            )
+            rising_news = []
+            for state in rising_states:
+                news = news_by_title.get(state["title"])
+                if not news or state["title"] in recent_analyses:
+                    continue
+                rising_news.append({
+                    "title": state["title"],
+                    "platform": news.get("platforms", ["unknown"])[0] if news.get("platforms") else "unknown",
+                    "url": news.get("url", ""),
+                    "heat": news.get("comprehensive_heat", 0),
+                    "normalized_heat": state["heat"],
+                    "heat_level": news.get("heat_level"),
+                    "platform_count": news.get("platform_count", 1),
+                    "category_diversity": news.get("category_diversity", 0),
+                    "rising": True,
+                    "heat_velocity": state["velocity"],
+                    "rank": state["rank"],
+                    "rank_delta": state["rank_delta"]
+                })
+            
+            if not rising_news:
+                return {"status": "normal", "message": "上升话题近期均已分析"}
+            
+            for news in rising_news:
+                print(f"上升话题: {news['title'][:30]}，排名 {news['rank']}（上升 {news['rank_delta']}），"
+                      f"热度速度 {news['heat_velocity']:.3f}/小时")
+            
+            process_result = NewsCollectionService.enqueue_priority_analysis(rising_news, "rising_topic")
+            
+            return {
+                "status": "rising_detected",
+                "message": f"检测到{len(rising_news)}个上升话题并安排提前分析",
+                "news_count": len(rising_news),
+                "titles": [news["title"] for news in rising_news],
+                "process_result": process_result
+            }
+            
+        except Exception as e:
+            print(f"检测上升话题失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {"status": "error", "message": str(e)}
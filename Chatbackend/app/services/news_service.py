@@ -2,10 +2,15 @@ import json
 import os
 from datetime import datetime, timedelta
 import traceback
+import uuid
 from flask import current_app, jsonify
 from app.utils.transform_utils import normalize_scores, process_emotion_stance_data
+from app.utils.db_utils import get_latest_analyses_by_titles
+from app.utils import analysis_queue
 from .news_analysis_service import NewsAnalysisService
 from .news_collection_service import NewsCollectionService
+from .recent_analysis_filter import RecentAnalysisFilter
+from .token_budget import get_token_budget
 from app.extensions import db
 import hashlib
 import concurrent.futures
@@ -15,6 +20,12 @@ from tqdm import tqdm
 import pymongo
 
 class NewsService:
+    # current_hot_news重建时写入的暂存集合名前缀，每次重建使用独立的暂存集合，写完后原子重命名为current_hot_news
+    CURRENT_HOT_NEWS_STAGING = "current_hot_news_staging"
+    
+    # 冷启动时防止并发请求重复重建缓存
+    _current_hot_news_rebuild_lock = threading.Lock()
+    
     @staticmethod
     def load_news_data():
         """
@@ -300,7 +311,10 @@ class NewsService:
                             # 格式化为分析所需的格式
                             formatted_news = [{"title": news.get("title", ""), 
                                              "platform": news.get("platforms", ["unknown"])[0] if news.get("platforms") else "unknown", 
-                                             "url": news.get("url", "")} 
+                                             "url": news.get("url", ""),
+                                             "heat_level": news.get("heat_level"),
+                                             "platform_count": news.get("platform_count", 1),
+                                             "category_diversity": news.get("category_diversity", 0)} 
                                             for news in top_news]
                             
                             print(f"从数据库获取了{len(formatted_news)}条待分析的热门新闻")
@@ -374,13 +388,8 @@ class NewsService:
         if not all_titles:
             return [], []
         
-        # 单次查询获取所有已存在的分析
-        existing_analyses = list(db.transformed_news.find({"title": {"$in": all_titles}}))
-        
-        # 创建标题到分析的映射
-        title_to_analysis = {}
-        for analysis in existing_analyses:
-            title_to_analysis[analysis.get("title")] = analysis
+        # 布隆过滤器排除一定没有近期分析的标题，其余标题单次聚合查询获取最新的分析
+        title_to_analysis = RecentAnalysisFilter.analyzed_since(all_titles, max_age_time)
         
         # 分类处理每个新闻项
         existing_news = []
@@ -539,6 +548,7 @@ class NewsService:
                         {"$set": result},
                         upsert=True
                     )
+                    RecentAnalysisFilter.add(title, result["analyzed_at"])
                     
                     # 安全地添加到结果列表
                     with result_lock:
@@ -566,6 +576,7 @@ class NewsService:
                             {"$set": fallback},
                             upsert=True
                         )
+                        RecentAnalysisFilter.add(title, fallback["analyzed_at"])
                         
                         with result_lock:
                             analyzed_results.append(fallback)
@@ -880,15 +891,16 @@ class NewsService:
             existing_titles = set()
             recent_cutoff = datetime.now() - timedelta(hours=24)
             
-            # 查询最近24小时内已分析的新闻
-            existing_analyses = list(db.transformed_news.find(
-                {"analyzed_at": {"$gte": recent_cutoff.isoformat()}},
-                {"title": 1, "_id": 0}
-            ))
-            
-            for analysis in existing_analyses:
-                if "title" in analysis:
-                    existing_titles.add(analysis["title"])
+            # 只查询本批标题中可能在最近24小时内分析过的标题
+            # 热度最高的若干条新闻（news_items已按热度降序）使用更短的间隔，入队后以刷新模式更新
+            top_n = current_app.config.get('ANALYSIS_REFRESH_TOP_N', 10)
+            top_cutoff = datetime.now() - timedelta(hours=current_app.config.get('ANALYSIS_REFRESH_TOP_HOURS', 3))
+            for batch, cutoff in ((news_items[:top_n], top_cutoff), (news_items[top_n:], recent_cutoff)):
+                existing_titles.update(RecentAnalysisFilter.analyzed_since(
+                    [item.get("title", "").strip() for item in batch],
+                    cutoff,
+                    projection={"title": 1, "_id": 0}
+                ))
             
             # 过滤出需要分析的新闻
             news_to_analyze = []
@@ -910,18 +922,7 @@ class NewsService:
                 news_id = hashlib.md5(item.get("title", "").encode()).hexdigest()
                 
                 # 保存到分析队列
-                db.news_analysis_queue.update_one(
-                    {"news_id": news_id},
-                    {"$set": {
-                        "news_id": news_id,
-                        "news_data": item,
-                        "status": "pending",
-                        "queued_at": timestamp.isoformat(),
-                        "attempts": 0,
-                        "last_attempt": None
-                    }},
-                    upsert=True
-                )
+                analysis_queue.enqueue(news_id, item, now=timestamp)
             
             print(f"成功将 {len(news_to_analyze)} 条新闻加入分析队列")
             
@@ -974,7 +975,8 @@ class NewsService:
                         print("线程已启动，开始处理队列...")
                         # 处理队列中的所有待处理项目
                         while True:
-                            # 检查是否还有待处理项目
+                            # 回收租约过期的任务后检查是否还有待处理项目
+                            analysis_queue.release_expired_leases()
                             pending_count = db.news_analysis_queue.count_documents({"status": "pending"})
                             processing_count = db.news_analysis_queue.count_documents({"status": "processing"})
                             
@@ -1047,6 +1049,34 @@ class NewsService:
             traceback.print_exc()
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    def select_refresh_priors(titles):
+        """
+        选出可以使用刷新模式的新闻及其上次的分析
+        
+        最近一次完整分析在ANALYSIS_FULL_MAX_AGE_HOURS小时内、且不是后备数据或复用结果的新闻，
+        只需要更新heatTrend、timeline、emotion和stance，其余新闻做完整分析。
+        
+        Args:
+            titles (list): 新闻标题列表
+            
+        Returns:
+            dict: 标题到上次分析文档的映射
+        """
+        if not current_app.config.get('ANALYSIS_REFRESH_ENABLED', True):
+            return {}
+        
+        cutoff = (datetime.now() - timedelta(hours=current_app.config.get('ANALYSIS_FULL_MAX_AGE_HOURS', 72))).isoformat()
+        priors = {}
+        for title, analysis in get_latest_analyses_by_titles(titles, analyzed_after=cutoff).items():
+            if analysis.get("is_fallback") or analysis.get("reused_from"):
+                continue
+            # 早于本功能的分析没有full_analyzed_at，都是完整分析
+            full_analyzed_at = analysis.get("full_analyzed_at") or analysis.get("analyzed_at")
+            if isinstance(full_analyzed_at, str) and full_analyzed_at >= cutoff:
+                priors[title] = analysis
+        return priors
+    
     @staticmethod
     def process_analysis_queue(max_workers=16, limit=50):
         """
@@ -1060,61 +1090,29 @@ class NewsService:
         Returns:
             dict: 处理结果
         """
+        lease_id = None
         try:
-            # 使用原子操作查找待处理项目并更新为处理中状态
-            # 这样可以避免多个进程同时读取和处理同一条新闻
-            current_time = datetime.now().isoformat()
-            
-            # 查找并标记要处理的项目的原子操作
-            processing_ids = []
-            pending_news = []
-            
-            # 修改查询方式，优先处理高热度新闻（有priority=high标记的）
-            # 第一轮：查找高优先级的新闻
-            for _ in range(limit):
-                result = db.news_analysis_queue.find_one_and_update(
-                    {"status": "pending", "priority": "high"},
-                    {"$set": {
-                        "status": "processing", 
-                        "last_attempt": current_time
-                    },
-                    "$inc": {"attempts": 1}},
-                    sort=[("queued_at", 1)],
-                    return_document=True
-                )
-                
-                if result:
-                    pending_news.append(result)
-                    processing_ids.append(result.get("news_id"))
-                else:
-                    # 没有更多高优先级的待处理项目
-                    break
-            
-            # 计算还需要处理多少普通优先级的新闻
-            remaining_limit = limit - len(pending_news)
-            
-            # 第二轮：如果还有空间处理普通项目，查找普通优先级的新闻
-            if remaining_limit > 0:
-                for _ in range(remaining_limit):
-                    result = db.news_analysis_queue.find_one_and_update(
-                        {"status": "pending", "$or": [{"priority": {"$ne": "high"}}, {"priority": {"$exists": False}}]},
-                        {"$set": {
-                            "status": "processing", 
-                            "last_attempt": current_time
-                        },
-                        "$inc": {"attempts": 1}},
-                        sort=[("queued_at", 1)],
-                        return_document=True
-                    )
-                    
-                    if result:
-                        pending_news.append(result)
-                        processing_ids.append(result.get("news_id"))
-                    else:
-                        # 没有更多待处理项目
-                        break
+            # 先回收租约已过期的任务（worker崩溃等），再批量领取
+            # 每批任务共用一个租约，领取是原子的，多个worker不会重复处理同一条新闻
+            analysis_queue.release_expired_leases()
+            
+            # 当天token预算耗尽时暂停分析，即将耗尽时只领取高优先级任务，其余留在队列中
+            budget = get_token_budget()
+            budget_remaining = budget.remaining_fraction("analysis")
+            budget_mode = budget.mode_for(budget_remaining)
+            if budget_mode == "exhausted":
+                print("当天token预算已用完，暂停分析")
+                return {"status": "deferred", "message": "当天token预算已用完"}
+            
+            # 按调度键领取：热度越高越靠前，等待越久越靠前，不会出现低优先级任务饿死
+            lease_id, pending_news = analysis_queue.claim_batch(
+                limit, query={"priority": "high"} if budget_mode == "defer" else None
+            )
             
             if not pending_news:
+                if budget_mode == "defer":
+                    print(f"token预算剩余{budget_remaining:.0%}，没有待分析的高优先级新闻")
+                    return {"status": "deferred", "message": "token预算即将用完，只分析高优先级新闻"}
                 print("分析队列为空，无需处理")
                 return {"status": "empty", "message": "分析队列为空"}
             
@@ -1136,11 +1134,7 @@ class NewsService:
             if not api_key or not base_url or not model:
                 print("API配置不完整，无法进行分析")
                 # 重置处理中状态
-                for news_id in processing_ids:
-                    db.news_analysis_queue.update_one(
-                        {"news_id": news_id},
-                        {"$set": {"status": "pending"}}
-                    )
+                analysis_queue.release(lease_id)
                 return {"status": "error", "message": "API配置不完整"}
                 
             print(f"API配置: model={model}, base_url={base_url[:15]}...")
@@ -1188,6 +1182,7 @@ class NewsService:
                                     {"$set": result},
                                     upsert=True
                                 )
+                                RecentAnalysisFilter.add(title, timestamp)
                                 
                                 # 更新分析记录
                                 db.news_analysis_records.update_one(
@@ -1203,17 +1198,14 @@ class NewsService:
                                 )
                                 
                                 # 从队列中移除
-                                db.news_analysis_queue.delete_one({"news_id": news_id})
+                                analysis_queue.complete(news_id, lease_id)
                                 
                                 success_count += 1
                                 print(f"成功生成并保存模拟分析: {title[:30]}...")
                             except Exception as e:
                                 print(f"保存模拟分析失败: {str(e)}")
                                 # 将任务标记为失败
-                                db.news_analysis_queue.update_one(
-                                    {"news_id": news_id},
-                                    {"$set": {"status": "failed", "error": str(e)}}
-                                )
+                                analysis_queue.release(lease_id, [news_id], status="failed", fields={"error": str(e)})
                         except Exception as e:
                             print(f"处理新闻数据时出错: {str(e)}")
                             continue
@@ -1225,12 +1217,8 @@ class NewsService:
                     }
             except Exception as e:
                 print(f"创建分析服务失败: {str(e)}")
-                # 将所有处理中的新闻重置为待处理状态
-                for news_id in processing_ids:
-                    db.news_analysis_queue.update_one(
-                        {"news_id": news_id},
-                        {"$set": {"status": "pending", "updated_at": datetime.now().isoformat()}}
-                    )
+                # 将本批处理中的新闻重置为待处理状态
+                analysis_queue.release(lease_id)
                 return {"status": "error", "message": f"创建分析服务失败: {str(e)}"}
             
             # 4. 准备批量分析
@@ -1238,6 +1226,7 @@ class NewsService:
             titles = []
             platforms = []
             priorities = []
+            scores = []
             
             for item in pending_news:
                 news_data = item.get("news_data", {})
@@ -1245,23 +1234,26 @@ class NewsService:
                 titles.append(news_data.get("title", ""))
                 platforms.append(news_data.get("platform", "unknown"))
                 priorities.append(item.get("priority", "normal"))
+                # 高优先级任务（高热度、上升话题）按满分路由到最高档位模型
+                scores.append(1.0 if item.get("priority") == "high" else item.get("priority_score", 0))
             
-            print(f"开始分析 {len(titles)} 条新闻，其中高优先级: {priorities.count('high')}条")
+            # 近期做过完整分析的新闻只刷新时效性字段
+            priors = NewsService.select_refresh_priors(titles)
+            print(f"开始分析 {len(titles)} 条新闻，其中高优先级: {priorities.count('high')}条，刷新: {len(priors)}条")
             
-            # 5. 使用优化的多线程分析方法
+            # 5. 使用优化的多线程分析方法，分析期间定期延长租约
             try:
-                results = analysis_service.analyze_multiple_news(
-                    titles, platforms, max_workers=max_workers
-                )
+                with analysis_queue.LeaseHeartbeat(lease_id):
+                    results = analysis_service.analyze_multiple_news(
+                        titles, platforms, max_workers=max_workers, priors=priors, scores=scores,
+                        queue_depth=db.news_analysis_queue.count_documents({"status": "pending"}),
+                        budget_remaining=budget_remaining
+                    )
                 print(f"分析完成，得到 {len(results)} 条结果")
             except Exception as analysis_error:
                 print(f"分析过程中出错: {str(analysis_error)}")
                 # 将状态重置为待处理
-                for news_id in news_ids:
-                    db.news_analysis_queue.update_one(
-                        {"news_id": news_id, "status": "processing"},
-                        {"$set": {"status": "pending"}}
-                    )
+                analysis_queue.release(lease_id)
                 return {"status": "error", "message": f"分析过程中出错: {str(analysis_error)}"}
             
             # 6. 更新队列和保存结果
@@ -1290,6 +1282,11 @@ class NewsService:
                     result["analyzed_at"] = timestamp
                     result["analysis_trigger"] = priority
                     
+                    # 刷新结果沿用上次完整分析的时间，完整分析从此刻重新计时
+                    if result.get("analysis_mode") != "refresh":
+                        result["analysis_mode"] = "full"
+                        result["full_analyzed_at"] = timestamp
+                    
                     # 生成唯一ID，基于标题和时间戳
                     unique_id = f"{title}_{timestamp}"
                     result["id"] = hashlib.md5(unique_id.encode()).hexdigest()
@@ -1304,6 +1301,7 @@ class NewsService:
                         {"$set": result},
                         upsert=True
                     )
+                    RecentAnalysisFilter.add(title, timestamp)
                     
                     # 更新分析记录
                     db.news_analysis_records.update_one(
@@ -1313,16 +1311,14 @@ class NewsService:
                             "title": title,
                             "analyzed_at": timestamp,
                             "status": "completed",
-                            "priority": priority
+                            "priority": priority,
+                            "mode": result["analysis_mode"]
                         }},
                         upsert=True
                     )
                     
-                    # 从队列中移除 - 确保只删除状态为processing的项目
-                    db.news_analysis_queue.delete_one({
-                        "news_id": news_id,
-                        "status": "processing"
-                    })
+                    # 从队列中移除 - 确保只删除仍由本租约持有的项目
+                    analysis_queue.complete(news_id, lease_id)
                     
                     success_count += 1
                     print(f"成功保存新闻分析: {title[:30]}... (优先级: {priority})")
@@ -1339,27 +1335,19 @@ class NewsService:
                                 {"$set": result},
                                 upsert=True
                             )
-                            # 从队列中移除 - 确保只删除状态为processing的项目
-                            db.news_analysis_queue.delete_one({
-                                "news_id": news_id,
-                                "status": "processing"
-                            })
+                            RecentAnalysisFilter.add(title, timestamp)
+                            # 从队列中移除 - 确保只删除仍由本租约持有的项目
+                            analysis_queue.complete(news_id, lease_id)
                             success_count += 1
                             print(f"成功使用新ID保存新闻分析: {title[:30]}...")
                         except Exception as retry_error:
                             print(f"使用新ID保存失败: {str(retry_error)}")
                             # 将项目标记为失败
-                            db.news_analysis_queue.update_one(
-                                {"news_id": news_id, "status": "processing"},
-                                {"$set": {"status": "failed", "error": str(retry_error)}}
-                            )
+                            analysis_queue.release(lease_id, [news_id], status="failed", fields={"error": str(retry_error)})
                     else:
                         print(f"保存新闻分析结果失败 {title[:30]}: {str(save_error)}")
                         # 将项目标记为失败
-                        db.news_analysis_queue.update_one(
-                            {"news_id": news_id, "status": "processing"},
-                            {"$set": {"status": "failed", "error": str(save_error)}}
-                        )
+                        analysis_queue.release(lease_id, [news_id], status="failed", fields={"error": str(save_error)})
             
             # 统计高优先级和普通优先级的成功数量
             high_success = 0
@@ -1372,40 +1360,8 @@ class NewsService:
                     
             print(f"成功分析并保存 {success_count}/{len(pending_news)} 条新闻 (高优先级: {high_success}, 普通优先级: {normal_success})")
             
-            # 7. 处理失败的新闻
-            failed_count = 0
-            for i, news_id in enumerate(news_ids):
-                # 检查是否仍在队列中并且状态为processing
-                queue_item = db.news_analysis_queue.find_one({
-                    "news_id": news_id,
-                    "status": "processing"
-                })
-                
-                if queue_item:
-                    attempts = queue_item.get("attempts", 0)
-                    priority = queue_item.get("priority", "normal")
-                    
-                    if attempts >= 3:  # 最多尝试3次
-                        # 超过最大尝试次数，标记为失败
-                        db.news_analysis_queue.update_one(
-                            {"news_id": news_id, "status": "processing"},
-                            {"$set": {
-                                "status": "failed",
-                                "updated_at": datetime.now().isoformat(),
-                                "error": "超过最大尝试次数"
-                            }}
-                        )
-                        failed_count += 1
-                    else:
-                        # 重新标记为待处理，但保持优先级
-                        db.news_analysis_queue.update_one(
-                            {"news_id": news_id, "status": "processing"},
-                            {"$set": {
-                                "status": "pending",
-                                "priority": priority,  # 保持原有优先级
-                                "updated_at": datetime.now().isoformat()
-                            }}
-                        )
+            # 7. 处理失败的新闻：超过3次尝试的标记为失败，其余放回待处理（保持原有优先级）
+            failed_count, _ = analysis_queue.release_unfinished(lease_id, max_attempts=3)
             
             return {
                 "status": "success",
@@ -1421,13 +1377,11 @@ class NewsService:
             import traceback
             traceback.print_exc()
             
-            # 将所有正在处理的项目重置为待处理
+            # 将本批正在处理的项目重置为待处理，不影响其他worker持有的租约
             try:
-                db.news_analysis_queue.update_many(
-                    {"status": "processing"},
-                    {"$set": {"status": "pending", "updated_at": datetime.now().isoformat()}}
-                )
-                print("已将所有处理中的新闻重置为待处理状态")
+                if lease_id:
+                    analysis_queue.release(lease_id)
+                print("已将本批处理中的新闻重置为待处理状态")
             except Exception as reset_error:
                 print(f"重置处理状态失败: {str(reset_error)}")
                 
@@ -1683,7 +1637,7 @@ class NewsService:
     @classmethod
     def update_current_hot_news(cls, n=None):
         """
-        从hot_news_processed中找出最新的记录，从data[0].data里找出comprehensive_heat最高的前n条热搜，
+        从热榜快照存储中还原最新的记录，从data[0].data里找出comprehensive_heat最高的前n条热搜，
         然后根据标题在transformed_news中查找最新的分析结果，
         将这些结果原封不动地覆盖current_hot_news表内容
         
@@ -1699,10 +1653,10 @@ class NewsService:
                 
             print(f"[{datetime.now()}] 开始更新前{n}条热搜新闻缓存...")
             
-            # 步骤1: 从hot_news_processed获取最新的记录
-            latest_record = db.hot_news_processed.find_one(
-                sort=[("timestamp", pymongo.DESCENDING)]
-            )
+            # 步骤1: 从热榜快照存储中还原最新的记录
+            from app.services.snapshot_store import HotNewsSnapshotStore
+            from app.services.heat_series import HeatSeriesStore, bucket_day
+            latest_record = HotNewsSnapshotStore.get_at()
             
             if not latest_record:
                 print("未找到热搜新闻记录")
@@ -1736,43 +1690,20 @@ class NewsService:
                 
                 # 获取历史热度数据（过去7天）
                 print("开始收集历史热度数据...")
-                title_to_heat_history = {}
                 
                 # 计算7天前的时间
                 seven_days_ago = datetime.now() - timedelta(days=7)
                 
-                # 获取过去7天的热度记录
-                historical_records = list(db.hot_news_processed.find(
-                    {"timestamp": {"$gte": seven_days_ago.isoformat()}},
-                    sort=[("timestamp", pymongo.ASCENDING)]
-                ))
-                
-                print(f"找到{len(historical_records)}条历史热度记录")
-                
-                # 为每个热门标题收集历史热度数据
-                for title in top_news_titles:
-                    heat_history = []
-                    
-                    # 遍历历史记录
-                    for record in historical_records:
-                        if not record.get('data') or not record.get('data')[0].get('data'):
-                            continue
-                            
-                        record_timestamp = record.get('timestamp')
-                        record_data = record.get('data', [{}])[0].get('data', [])
-                        
-                        # 在记录中查找匹配标题的新闻
-                        for news_item in record_data:
-                            if news_item.get('title') == title:
-                                heat_history.append({
-                                    'timestamp': record_timestamp,
-                                    'comprehensive_heat': news_item.get('comprehensive_heat', 0),
-                                    'weighted_heat_value': news_item.get('weighted_heat_value', 0),
-                                    'normalized_heat': news_item.get('normalized_heat', 0)
-                                })
-                                break
-                    
-                    title_to_heat_history[title] = heat_history
+                # 获取过去7天的热度记录：热度序列覆盖整个窗口时一次$in查询，
+                # 否则（刚启用热度序列的前7天）从快照存储中回放
+                since = seven_days_ago.isoformat()
+                first_series_day = HeatSeriesStore.first_day()
+                if first_series_day and first_series_day <= bucket_day(since):
+                    series = HeatSeriesStore.history(top_news_titles, since)
+                    title_to_heat_history = {title: series.get(title, []) for title in top_news_titles}
+                else:
+                    title_to_heat_history = HotNewsSnapshotStore.title_history(top_news_titles, since)
+                for title, heat_history in title_to_heat_history.items():
                     print(f"为新闻《{title}》收集了{len(heat_history)}条历史热度数据")
                 
             except (IndexError, KeyError, TypeError) as e:
@@ -1787,12 +1718,9 @@ class NewsService:
             # 步骤3: 根据标题获取最新的完整分析结果
             latest_analyses = []
             i = 1
+            title_to_analysis = get_latest_analyses_by_titles(top_news_titles)
             for title in top_news_titles:
-                # 查找该标题最新的分析结果
-                analysis = db.transformed_news.find_one(
-                    {"title": title},
-                    sort=[("analyzed_at", -1)]  # 按分析时间降序
-                )
+                analysis = title_to_analysis.get(title)
                 
                 if analysis:
                     # 移除MongoDB的_id字段，避免插入错误
@@ -1870,20 +1798,28 @@ class NewsService:
                 traceback.print_exc()
                 # 继续执行，不影响主流程
             
-            # 步骤5: 清空current_hot_news表并插入新数据
+            # 步骤5: 写入暂存集合后原子替换current_hot_news，读取方始终看到完整的一代数据。
+            # 定时任务和其他进程的冷启动重建可能同时进行，每次重建使用独立的暂存集合，互不覆盖
+            staging = getattr(db, f"{cls.CURRENT_HOT_NEWS_STAGING}_{uuid.uuid4().hex}")
+            renamed = False
             try:
-                # 删除旧数据
-                delete_result = db.current_hot_news.delete_many({})
-                print(f"删除了{delete_result.deleted_count}条旧数据")
-                
-                # 插入新数据
-                insert_result = db.current_hot_news.insert_many(latest_analyses)
+                insert_result = staging.insert_many(latest_analyses)
                 inserted_count = len(insert_result.inserted_ids) if hasattr(insert_result, 'inserted_ids') else 0
-                print(f"插入了{inserted_count}条新数据")
+                print(f"向暂存集合插入了{inserted_count}条新数据")
+                
+                staging.rename("current_hot_news", dropTarget=True)
+                renamed = True
+                print("暂存集合已替换current_hot_news")
             except Exception as e:
                 print(f"更新数据库时出错: {str(e)}")
                 traceback.print_exc()
                 return {"status": "error", "message": str(e), "count": 0}
+            finally:
+                if not renamed:
+                    try:
+                        staging.drop()
+                    except Exception as e:
+                        print(f"删除暂存集合失败: {str(e)}")
             
             print(f"[{datetime.now()}] 成功更新{len(latest_analyses)}条热搜新闻分析结果到缓存表")
             
@@ -1898,4 +1834,31 @@ class NewsService:
         except Exception as e:
             print(f"更新热搜新闻缓存失败: {str(e)}")
             traceback.print_exc()
-            return {"status": "error", "message": str(e), "count": 0} 
\ No newline at end of file
+            return {"status": "error", "message": str(e), "count": 0} 
+
+    @classmethod
+    def rebuild_current_hot_news_if_empty(cls, wait_timeout=60):
+        """
+        current_hot_news为空时重建缓存，同一进程内只有一个请求执行重建
+        
+        其他并发请求等待正在进行的重建完成后直接读取结果，避免冷启动时的重复重建。
+        
+        Args:
+            wait_timeout (int): 等待其他请求重建完成的最长秒数
+            
+        Returns:
+            dict: 重建结果，未执行重建时status为skipped
+        """
+        if cls._current_hot_news_rebuild_lock.acquire(blocking=False):
+            try:
+                # 拿到锁后再检查一次，可能刚由其他请求或定时任务重建完成
+                if db.current_hot_news.find_one({}, {"_id": 1}):
+                    return {"status": "skipped", "message": "Cache already populated"}
+                return cls.update_current_hot_news()
+            finally:
+                cls._current_hot_news_rebuild_lock.release()
+        
+        print("其他请求正在重建热搜新闻缓存，等待完成...")
+        if cls._current_hot_news_rebuild_lock.acquire(timeout=wait_timeout):
+            cls._current_hot_news_rebuild_lock.release()
+        return {"status": "skipped", "message": "Rebuild performed by another request"}
@@ -0,0 +1,322 @@
+"""
+可插拔的热榜数据源与并发采集
+
+每个数据源是一个插件，抓取并解析自己的接口，产出标准化条目（title、url、hotness、platform），
+供process_hot_news的评分引擎使用。NewsSourceCollector并发抓取所有数据源：
+- 每个数据源有自己的超时，超时或失败的数据源不拖慢本轮采集，总耗时取决于最慢的健康数据源
+- 每个数据源有一个熔断器，连续失败后在冷却期内直接跳过，不再占用本轮时间
+- 多个数据源返回同一平台的同一标题时（如聚合接口和它的备用接口），按配置顺序保留第一个
+
+新的数据源类型用register_source_type注册，在NEWS_SOURCES中按type引用。
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.http_client import get_http_client
+from app.utils.hotlist_stream import HotlistStreamParser
+
+# 数据源默认超时（秒）
+DEFAULT_SOURCE_TIMEOUT = 8
+
+# 熔断默认配置：连续失败次数、冷却时间（秒）
+DEFAULT_BREAKER_THRESHOLD = 3
+DEFAULT_BREAKER_RESET_SECONDS = 120
+
+SOURCE_TYPES = {}
+
+
+def register_source_type(type_name):
+    """注册数据源类型的类装饰器"""
+    def decorator(cls):
+        cls.type_name = type_name
+        SOURCE_TYPES[type_name] = cls
+        return cls
+    return decorator
+
+
+class NewsSource:
+    type_name = None
+
+    def __init__(self, name, url, timeout=DEFAULT_SOURCE_TIMEOUT, exclude=None, max_per_platform=None, params=None):
+        """
+        初始化数据源
+
+        Args:
+            name (str): 数据源名称，熔断器和采集报告以此区分
+            url (str): 接口地址
+            timeout (float): 超时时间（秒）
+            exclude (iterable, optional): 需要跳过的平台
+            max_per_platform (int, optional): 每个平台最多保留的条目数
+            params (dict, optional): 查询参数
+        """
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.exclude = set(exclude or ())
+        self.max_per_platform = max_per_platform
+        self.params = params
+
+    def fetch(self):
+        """
+        抓取并解析数据源
+
+        Returns:
+            tuple: (标准化条目列表, FetchResult)
+
+        Raises:
+            Exception: 抓取失败、接口返回错误或数据无法解析
+        """
+        response = get_http_client().fetch(self.url, params=self.params, timeout=self.timeout)
+        if response.content is None:
+            raise ValueError(f"{self.name} 没有返回内容")
+        return self.parse(response), response
+
+    def parse(self, response):
+        """把响应解析为标准化条目列表，由具体数据源实现"""
+        raise NotImplementedError
+
+
+@register_source_type("hotlist")
+class HotlistSource(NewsSource):
+    """聚合热榜接口：{"success": true, "data": [{"name": 平台, "data": [新闻, ...]}, ...]}"""
+
+    def parse(self, response):
+        parser = HotlistStreamParser(exclude=self.exclude, max_per_platform=self.max_per_platform)
+        items = list(parser.items(response.content))
+        if parser.meta.get("success") is False:
+            raise ValueError(f"{self.name} 返回非成功状态: {parser.meta.get('msg', '')}")
+        return items
+
+
+@register_source_type("json_list")
+class JsonListSource(NewsSource):
+    """单平台列表接口，通过items_path定位新闻列表，字段名可配置"""
+
+    def __init__(self, name, url, platform=None, items_path="data", title_field="title", url_field="url",
+                 hot_field="hot", **kwargs):
+        """
+        Args:
+            platform (str, optional): 条目所属平台，默认为数据源名称
+            items_path (str): 新闻列表在响应中的路径，以点号分隔，如"data.list"
+            title_field (str): 标题字段名
+            url_field (str): 链接字段名
+            hot_field (str): 热度字段名
+            其余参数见NewsSource
+        """
+        super().__init__(name, url, **kwargs)
+        self.platform = platform or name
+        self.items_path = [part for part in items_path.split(".") if part]
+        self.title_field = title_field
+        self.url_field = url_field
+        self.hot_field = hot_field
+
+    def parse(self, response):
+        if self.platform in self.exclude:
+            return []
+        data = response.json()
+        for part in self.items_path:
+            data = data[int(part)] if isinstance(data, list) else data[part]
+        if not isinstance(data, list):
+            raise ValueError(f"{self.name} 的 {'.'.join(self.items_path)} 不是列表")
+
+        items = []
+        for news in data:
+            title = news.get(self.title_field) if isinstance(news, dict) else None
+            if not title:
+                continue
+            items.append({
+                "title": title,
+                "url": news.get(self.url_field) or "",
+                "hotness": news.get(self.hot_field, "0"),
+                "platform": self.platform
+            })
+            if self.max_per_platform and len(items) >= self.max_per_platform:
+                break
+        return items
+
+
+def build_sources(configs, exclude=None, timeout=DEFAULT_SOURCE_TIMEOUT):
+    """
+    按配置创建数据源
+
+    Args:
+        configs (list): 数据源配置，每项包含type、name、url，其余键作为构造参数
+        exclude (iterable, optional): 所有数据源都跳过的平台
+        timeout (float): 未单独配置超时的数据源使用的超时（秒）
+
+    Returns:
+        list: NewsSource实例，未知类型的配置会被跳过
+    """
+    sources = []
+    for config in configs:
+        options = dict(config)
+        type_name = options.pop("type", "hotlist")
+        source_cls = SOURCE_TYPES.get(type_name)
+        if source_cls is None:
+            print(f"未知的数据源类型 {type_name}，跳过 {options.get('name')}")
+            continue
+        options.setdefault("name", options.get("url"))
+        options.setdefault("timeout", timeout)
+        options["exclude"] = set(exclude or ()) | set(options.get("exclude") or ())
+        sources.append(source_cls(**options))
+    return sources
+
+
+class SourceCollection:
+    """一轮并发采集的结果"""
+
+    def __init__(self, items, reports, responses, elapsed):
+        self.items = items
+        self.reports = reports
+        self.responses = responses
+        self.elapsed = elapsed
+
+    def response_for(self, url):
+        """返回指定地址的数据源本轮的抓取结果，没有时为None"""
+        for response in self.responses.values():
+            if response.url == url:
+                return response
+        return None
+
+    def summary(self):
+        """每个数据源一行的采集摘要"""
+        lines = []
+        for name, report in self.reports.items():
+            line = f"{name}: {report['status']}"
+            if report.get("items") is not None:
+                line += f"，{report['items']} 条"
+            if report.get("elapsed") is not None:
+                line += f"，{report['elapsed']:.2f}秒"
+            if report.get("error"):
+                line += f"（{report['error']}）"
+            lines.append(line)
+        return lines
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, failure_threshold=DEFAULT_BREAKER_THRESHOLD, reset_timeout=DEFAULT_BREAKER_RESET_SECONDS):
+    """获取数据源的熔断器，同一进程内按名称共享"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return breaker
+
+
+class NewsSourceCollector:
+    def __init__(self, sources, failure_threshold=DEFAULT_BREAKER_THRESHOLD,
+                 reset_timeout=DEFAULT_BREAKER_RESET_SECONDS):
+        """
+        初始化并发采集器
+
+        Args:
+            sources (list): NewsSource实例，顺序决定重复条目的保留优先级
+            failure_threshold (int): 熔断前允许的连续失败次数
+            reset_timeout (float): 熔断冷却时间（秒）
+        """
+        self.sources = sources
+        self.breakers = {source.name: get_breaker(source.name, failure_threshold, reset_timeout)
+                         for source in sources}
+
+    @staticmethod
+    def _run(source):
+        start = time.time()
+        items, response = source.fetch()
+        return items, response, time.time() - start
+
+    def collect(self):
+        """
+        并发抓取所有数据源，每个数据源到自己的超时为止
+
+        Returns:
+            SourceCollection: 去重后的条目、每个数据源的报告和抓取结果
+        """
+        start = time.time()
+        reports = {source.name: {"status": "circuit_open", **self.breakers[source.name].snapshot()}
+                   for source in self.sources}
+        results = {}
+        responses = {}
+
+        active = [source for source in self.sources if self.breakers[source.name].allow()]
+        if active:
+            executor = ThreadPoolExecutor(max_workers=len(active), thread_name_prefix="news-source")
+            pending = {executor.submit(self._run, source): source for source in active}
+            deadlines = {future: start + source.timeout for future, source in pending.items()}
+            try:
+                while pending:
+                    remaining = min(deadlines[future] for future in pending) - time.time()
+                    done, _ = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        source = pending.pop(future)
+                        breaker = self.breakers[source.name]
+                        try:
+                            items, response, elapsed = future.result()
+                        except Exception as e:
+                            breaker.record_failure()
+                            reports[source.name] = {"status": "error", "error": str(e)[:200],
+                                                    "elapsed": time.time() - start}
+                            continue
+                        breaker.record_success()
+                        results[source.name] = items
+                        responses[source.name] = response
+                        reports[source.name] = {"status": "ok", "items": len(items), "elapsed": elapsed}
+                    now = time.time()
+                    for future in [f for f in pending if deadlines[f] <= now]:
+                        # 超时的数据源不再等待，线程在后台结束
+                        source = pending.pop(future)
+                        self.breakers[source.name].record_failure()
+                        reports[source.name] = {"status": "timeout", "elapsed": now - start,
+                                                "error": f"超过{source.timeout}秒"}
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        # 按配置顺序合并，同一平台的同一标题只保留第一个数据源的条目
+        items = []
+        seen = set()
+        for source in self.sources:
+            for item in results.get(source.name, ()):
+                key = (item.get("platform"), item["title"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                items.append(item)
+        return SourceCollection(items, reports, responses, time.time() - start)
+
+
+def configured_sources(exclude=None):
+    """
+    按Flask配置创建数据源：NEWS_SOURCES为空时使用NEWS_API_BASE_URL和FALLBACK_NEWS_API_URL两个聚合接口
+
+    Args:
+        exclude (iterable, optional): 所有数据源都跳过的平台
+
+    Returns:
+        list: NewsSource实例
+    """
+    from flask import current_app
+
+    configs = current_app.config.get('NEWS_SOURCES') or []
+    if not configs:
+        primary = current_app.config.get('NEWS_API_BASE_URL', 'https://api.vvhan.com/api/hotlist/all')
+        configs = [{"type": "hotlist", "name": "hotlist", "url": primary}]
+        fallback = current_app.config.get('FALLBACK_NEWS_API_URL')
+        if fallback and fallback != primary:
+            configs.append({"type": "hotlist", "name": "hotlist_fallback", "url": fallback})
+    return build_sources(configs, exclude=exclude,
+                         timeout=current_app.config.get('NEWS_SOURCE_TIMEOUT', DEFAULT_SOURCE_TIMEOUT))
+
+
+def collector_from_config(exclude=None):
+    """按Flask配置创建并发采集器"""
+    from flask import current_app
+
+    return NewsSourceCollector(
+        configured_sources(exclude),
+        failure_threshold=current_app.config.get('NEWS_SOURCE_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD),
+        reset_timeout=current_app.config.get('NEWS_SOURCE_BREAKER_RESET_SECONDS', DEFAULT_BREAKER_RESET_SECONDS)
+    )
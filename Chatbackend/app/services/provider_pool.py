@@ -0,0 +1,307 @@
+"""
+LLM供应商池：对冲请求与故障转移
+
+池中第一个供应商为主供应商，其余为备用供应商（可以是同一模型的其他接入地址，也可以是其他模型）。
+一次调用先发给第一个熔断器放行的供应商：
+- 对冲：请求在该供应商近期p95耗时内没有完成时，向下一个可用供应商再发一个相同的请求，
+  先成功的结果被采用，另一个请求被取消（异步请求直接取消任务并关闭流，同步请求通过cancelled事件通知）
+- 故障转移：在途请求全部失败后，立即改发下一个可用供应商，而不是等待重试或使用后备数据
+
+每个供应商有一个进程内熔断器，连续失败达到阈值后在冷却期内跳过该供应商。
+输出不是合法JSON和未取得限流配额不是供应商故障，会转移到下一个供应商但不计入熔断。
+耗时按"池名称/供应商名称"分别统计，样本不足时使用default_delay作为对冲等待时间。
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.rate_limiter import RateLimitExceeded, provider_from_url
+
+# 每个供应商保留的最近成功请求耗时数
+LATENCY_WINDOW = 200
+
+# 使用p95作为对冲等待时间所需的最少样本数
+HEDGE_MIN_SAMPLES = 20
+
+# 不计入熔断的错误：模型输出问题和本地限流
+NON_TRIPPING_ERRORS = (json.JSONDecodeError, RateLimitExceeded)
+
+
+class ProvidersUnavailable(Exception):
+    """池中所有供应商都已熔断"""
+
+
+_breakers = {}
+_latencies = {}
+_registry_lock = threading.Lock()
+
+
+def get_provider_breaker(name, failure_threshold=5, reset_timeout=60):
+    """获取供应商的熔断器，同一进程内按名称共享"""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(f"LLM供应商 {name}", failure_threshold, reset_timeout)
+        return breaker
+
+
+def _latency_window(key):
+    with _registry_lock:
+        return _latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW))
+
+
+def load_providers(raw_providers, primary):
+    """
+    规范化供应商配置
+
+    Args:
+        raw_providers (list|str): 备用供应商，列表或JSON字符串，每项可包含name、model、base_url、api_key、enable_search
+        primary (dict): 主供应商，包含model、base_url、api_key，可选name、enable_search
+
+    Returns:
+        list: 主供应商在前的供应商列表，每项都有name、model、base_url、api_key、enable_search；
+              与主供应商地址和模型都相同的备用供应商被忽略
+    """
+    if isinstance(raw_providers, str):
+        raw_providers = json.loads(raw_providers) if raw_providers.strip() else []
+
+    providers = []
+    seen = set()
+    for raw in [primary] + list(raw_providers or []):
+        provider = {
+            "model": raw.get("model") or primary["model"],
+            "base_url": raw.get("base_url") or primary["base_url"],
+            "api_key": raw.get("api_key") or primary["api_key"],
+            "enable_search": raw.get("enable_search", primary.get("enable_search", True))
+        }
+        if (provider["base_url"], provider["model"]) in seen:
+            continue
+        seen.add((provider["base_url"], provider["model"]))
+        provider["name"] = raw.get("name") or f"{provider_from_url(provider['base_url'])}:{provider['model']}"
+        providers.append(provider)
+    return providers
+
+
+class ProviderPool:
+    def __init__(self, providers, name="llm", hedge=True, default_delay=30, min_delay=1,
+                 failure_threshold=5, reset_timeout=60, min_samples=HEDGE_MIN_SAMPLES):
+        """
+        初始化供应商池
+
+        Args:
+            providers (list): load_providers返回的供应商列表
+            name (str): 池名称，不同用途（分析、报告）的耗时分开统计
+            hedge (bool): 是否发出对冲请求，关闭时只做故障转移
+            default_delay (float): 样本不足时的对冲等待时间（秒）
+            min_delay (float): 对冲等待时间的下限（秒）
+            failure_threshold (int): 供应商连续失败多少次后熔断
+            reset_timeout (float): 熔断冷却时间（秒）
+            min_samples (int): 使用p95作为对冲等待时间所需的最少样本数
+        """
+        self.providers = providers
+        self.name = name
+        self.hedge = hedge
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.breakers = {provider["name"]: get_provider_breaker(provider["name"], failure_threshold, reset_timeout)
+                         for provider in providers}
+        self.lock = threading.Lock()
+        self.stats = {"hedged": 0, "hedge_wins": 0, "failovers": 0, "skipped": 0}
+
+    @property
+    def primary(self):
+        return self.providers[0]
+
+    def _count(self, field, stats=None):
+        with self.lock:
+            self.stats[field] += 1
+            if stats is not None and field in stats:
+                stats[field] += 1
+
+    def hedge_delay(self, provider):
+        """
+        返回向该供应商发出请求后，等待多久再发出对冲请求
+
+        Returns:
+            float: 近期成功请求耗时的p95，样本不足时为default_delay
+        """
+        durations = sorted(_latency_window(f"{self.name}/{provider['name']}"))
+        if len(durations) < self.min_samples:
+            return max(self.default_delay, self.min_delay)
+        p95 = durations[min(len(durations) - 1, math.ceil(0.95 * len(durations)) - 1)]
+        return max(p95, self.min_delay)
+
+    def _next_provider(self, remaining, stats=None):
+        """从remaining中取出下一个熔断器放行的供应商，没有时返回None"""
+        if len(self.providers) == 1:
+            # 只有一个供应商时没有可以切换的目标，熔断只会让请求直接失败
+            return remaining.pop(0) if remaining else None
+        while remaining:
+            provider = remaining.pop(0)
+            if self.breakers[provider["name"]].allow():
+                return provider
+            self._count("skipped", stats)
+        return None
+
+    def _succeeded(self, provider, duration):
+        self.breakers[provider["name"]].record_success()
+        _latency_window(f"{self.name}/{provider['name']}").append(duration)
+
+    def _failed(self, provider, error):
+        if isinstance(error, NON_TRIPPING_ERRORS):
+            self.breakers[provider["name"]].record_cancel()
+        else:
+            self.breakers[provider["name"]].record_failure()
+        print(f"供应商 {provider['name']} 请求失败: {str(error)}")
+
+    def _hedge_timeout(self, running, remaining, hedged):
+        """单个请求在途、还有备用供应商且尚未对冲时，返回距离发出对冲请求的秒数"""
+        if not self.hedge or hedged or len(running) != 1 or not remaining:
+            return None
+        provider, started = next(iter(running.values()))
+        return max(self.hedge_delay(provider) - (time.monotonic() - started), 0)
+
+    async def call_async(self, request, stats=None):
+        """
+        通过供应商池发出一次异步调用
+
+        Args:
+            request (callable): request(provider)返回协程，完成一次完整请求（含流式读取和校验）并返回结果
+            stats (dict, optional): 调用方的统计，其中的hedged、hedge_wins、failovers、skipped同时累加
+
+        Returns:
+            tuple: (结果, 提供结果的供应商)
+
+        Raises:
+            ProvidersUnavailable: 所有供应商都已熔断
+            Exception: 所有可用供应商都失败时，抛出最后一个错误
+        """
+        remaining = list(self.providers)
+        running = {}
+        hedged = False
+        last_error = None
+
+        def start(provider):
+            running[asyncio.ensure_future(request(provider))] = (provider, time.monotonic())
+
+        provider = self._next_provider(remaining, stats)
+        if provider is None:
+            raise ProvidersUnavailable(f"{self.name}的所有供应商均已熔断")
+        start(provider)
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, timeout=self._hedge_timeout(running, remaining, hedged),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 当前请求超过p95耗时，向备用供应商发出对冲请求
+                    hedged = True
+                    provider = self._next_provider(remaining, stats)
+                    if provider is not None:
+                        self._count("hedged", stats)
+                        print(f"供应商 {running[next(iter(running))][0]['name']} 响应慢，对冲请求 {provider['name']}")
+                        start(provider)
+                    continue
+
+                for task in done:
+                    provider, started = running.pop(task)
+                    if task.exception() is None:
+                        self._succeeded(provider, time.monotonic() - started)
+                        if hedged and provider is not self.primary:
+                            self._count("hedge_wins", stats)
+                        return task.result(), provider
+                    last_error = task.exception()
+                    self._failed(provider, last_error)
+
+                if not running:
+                    provider = self._next_provider(remaining, stats)
+                    if provider is not None:
+                        self._count("failovers", stats)
+                        print(f"故障转移到供应商 {provider['name']}")
+                        start(provider)
+        finally:
+            # 取消落选或未完成的请求，任务内部负责关闭流
+            for task, (provider, _) in running.items():
+                task.cancel()
+                self.breakers[provider["name"]].record_cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        if last_error is None:
+            raise ProvidersUnavailable(f"{self.name}的所有供应商均已熔断")
+        raise last_error
+
+    def call(self, request, stats=None):
+        """
+        通过供应商池发出一次同步调用，每个请求在单独的线程中执行
+
+        落选的请求通过cancelled事件通知，流式请求应在读取分片时检查并尽快关闭流；
+        非流式请求无法中途取消，结束后结果被丢弃。
+
+        Args:
+            request (callable): request(provider, cancelled)完成一次完整请求并返回结果，
+                                cancelled是threading.Event
+            stats (dict, optional): 调用方的统计，其中的hedged、hedge_wins、failovers、skipped同时累加
+
+        Returns:
+            tuple: (结果, 提供结果的供应商)
+        """
+        remaining = list(self.providers)
+        running = {}
+        hedged = False
+        last_error = None
+        executor = ThreadPoolExecutor(max_workers=len(self.providers))
+
+        def start(provider):
+            cancelled = threading.Event()
+            future = executor.submit(request, provider, cancelled)
+            running[future] = (provider, time.monotonic(), cancelled)
+
+        provider = self._next_provider(remaining, stats)
+        if provider is None:
+            executor.shutdown(wait=False)
+            raise ProvidersUnavailable(f"{self.name}的所有供应商均已熔断")
+        start(provider)
+        try:
+            while running:
+                timeout = self._hedge_timeout({f: v[:2] for f, v in running.items()}, remaining, hedged)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    provider = self._next_provider(remaining, stats)
+                    if provider is not None:
+                        self._count("hedged", stats)
+                        print(f"供应商 {running[next(iter(running))][0]['name']} 响应慢，对冲请求 {provider['name']}")
+                        start(provider)
+                    continue
+
+                for future in done:
+                    provider, started, _ = running.pop(future)
+                    if future.exception() is None:
+                        self._succeeded(provider, time.monotonic() - started)
+                        if hedged and provider is not self.primary:
+                            self._count("hedge_wins", stats)
+                        return future.result(), provider
+                    last_error = future.exception()
+                    self._failed(provider, last_error)
+
+                if not running:
+                    provider = self._next_provider(remaining, stats)
+                    if provider is not None:
+                        self._count("failovers", stats)
+                        print(f"故障转移到供应商 {provider['name']}")
+                        start(provider)
+        finally:
+            for provider, _, cancelled in running.values():
+                cancelled.set()
+                self.breakers[provider["name"]].record_cancel()
+            executor.shutdown(wait=False)
+
+        if last_error is None:
+            raise ProvidersUnavailable(f"{self.name}的所有供应商均已熔断")
+        raise last_error
@@ -0,0 +1,209 @@
+"""
+"近期是否已分析"的进程内预检查
+
+check_news_in_database、schedule_news_analysis、detect_high_heat_news和detect_rising_news
+都需要知道一批标题在最近若干小时内是否分析过，而绝大多数标题并没有。
+RecentAnalysisFilter在进程内维护一个按小时分片的布隆过滤器：
+- 首次使用时从transformed_news重建最近RETENTION_HOURS小时的分析
+- 本进程完成分析后立即add；其他进程（Celery worker）写入的分析每隔REFRESH_SECONDS增量同步一次
+- 过滤器判定"一定没有分析过"的标题不再查询数据库，只有可能命中的标题合并为一次批量查询确认
+
+增量同步以上一次同步开始的时间为水位，读取之后写入的分析：新插入的文档按_id（upsert时由服务端生成），
+原地更新的文档按analyzed_at。analyzed_at在写入前生成，写入可能晚于同步完成，
+因此每次都回看SYNC_OVERLAP_SECONDS秒。上一次同步之后写入的分析还不在过滤器中，
+这段时间内写入过的标题即使过滤器未命中也会交给数据库确认。
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from app.extensions import db
+from app.utils.bloom_filter import TimePartitionedBloomFilter
+from app.utils.db_utils import get_latest_analyses_by_titles
+
+# 过滤器覆盖的时长（小时），更长的时间窗口直接查询数据库
+RETENTION_HOURS = 48
+
+# 分片时长（秒）、每个分片的预计分析数量和误判率
+PARTITION_SECONDS = 3600
+PARTITION_CAPACITY = 5000
+ERROR_RATE = 0.01
+
+# 增量同步其他进程写入的分析的间隔（秒）
+REFRESH_SECONDS = 30
+
+# 增量同步回看的时长（秒），覆盖analyzed_at生成到写入完成之间的延迟和各主机的时钟偏差
+SYNC_OVERLAP_SECONDS = 120
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecentAnalysisFilter:
+    _lock = threading.Lock()
+    _filter = None
+    _synced_at = 0.0
+    _refreshed_at = 0.0
+    _stats = {"checked": 0, "skipped": 0, "queried": 0}
+
+    @classmethod
+    def _new_filter(cls):
+        return TimePartitionedBloomFilter(PARTITION_SECONDS, RETENTION_HOURS * 3600,
+                                          PARTITION_CAPACITY, ERROR_RATE)
+
+    @staticmethod
+    def _load(query):
+        """读取transformed_news中符合条件的分析，返回 [(标题, 分析时间), ...]"""
+        entries = []
+        for doc in db.transformed_news.find(query, {"title": 1, "analyzed_at": 1, "_id": 0}):
+            analyzed_at = _parse_time(doc.get("analyzed_at"))
+            if doc.get("title") and analyzed_at:
+                entries.append((doc["title"].strip(), analyzed_at))
+        return entries
+
+    @staticmethod
+    def _written_since(epoch):
+        """
+        构造查询条件：epoch（减去回看时长）之后写入的分析
+
+        Args:
+            epoch (float): Unix时间戳
+
+        Returns:
+            dict: 新插入的按_id、原地更新的按analyzed_at匹配的查询条件
+        """
+        floor = epoch - SYNC_OVERLAP_SECONDS
+        return {"$or": [
+            {"_id": {"$gte": ObjectId.from_datetime(datetime.fromtimestamp(floor, timezone.utc))}},
+            {"analyzed_at": {"$gte": datetime.fromtimestamp(floor).isoformat()}}
+        ]}
+
+    @classmethod
+    def warm(cls):
+        """
+        从transformed_news重建过滤器
+
+        Returns:
+            int: 过滤器中的分片数量
+        """
+        started = time.time()
+        since = (datetime.now() - timedelta(hours=RETENTION_HOURS)).isoformat()
+        bloom = cls._new_filter()
+        for title, analyzed_at in cls._load({"analyzed_at": {"$gte": since}}):
+            bloom.add(title, analyzed_at)
+        with cls._lock:
+            cls._filter = bloom
+            cls._synced_at = started
+            cls._refreshed_at = time.monotonic()
+        print(f"近期分析过滤器已重建，{len(bloom.partitions)}个分片")
+        return len(bloom.partitions)
+
+    @classmethod
+    def _sync(cls):
+        """首次使用时重建，之后按间隔增量同步其他进程写入的分析"""
+        if cls._filter is None:
+            cls.warm()
+            return
+        if time.monotonic() - cls._refreshed_at < REFRESH_SECONDS:
+            return
+        started = time.time()
+        with cls._lock:
+            synced_at = cls._synced_at
+            cls._refreshed_at = time.monotonic()
+        entries = cls._load(cls._written_since(synced_at))
+        with cls._lock:
+            for title, analyzed_at in entries:
+                cls._filter.add(title, analyzed_at)
+            cls._synced_at = max(cls._synced_at, started)
+            cls._filter.expire(datetime.now())
+
+    @classmethod
+    def _written_since_sync(cls, titles):
+        """返回titles中上一次同步之后（含回看时长）写入过分析的标题"""
+        if not titles:
+            return set()
+        query = {"title": {"$in": titles}}
+        query.update(cls._written_since(cls._synced_at))
+        return {doc["title"] for doc in db.transformed_news.find(query, {"title": 1, "_id": 0})}
+
+    @classmethod
+    def add(cls, title, analyzed_at=None):
+        """
+        记录本进程完成的一次分析
+
+        Args:
+            title (str): 新闻标题
+            analyzed_at (str|datetime, optional): 分析时间，默认为当前时间
+        """
+        if not title or cls._filter is None:
+            # 过滤器尚未重建时，重建会从数据库读到这次分析
+            return
+        analyzed_at = _parse_time(analyzed_at) or datetime.now()
+        with cls._lock:
+            cls._filter.add(title.strip(), analyzed_at)
+
+    @classmethod
+    def candidates(cls, titles, since):
+        """
+        返回可能在since之后分析过的标题
+
+        其余标题在since之后没有分析过，除非分析的写入比analyzed_at晚了SYNC_OVERLAP_SECONDS秒以上。
+
+        Args:
+            titles (list): 新闻标题列表
+            since (str|datetime): 时间窗口起点
+
+        Returns:
+            list: 可能分析过的标题；过滤器不可用或时间窗口超出覆盖范围时返回全部标题
+        """
+        titles = [title for title in titles if title]
+        since = _parse_time(since)
+        try:
+            cls._sync()
+            if since is None or not cls._filter.covers(since, datetime.now()):
+                return titles
+            hits = {title for title in titles if cls._filter.might_contain(title.strip(), since)}
+            # 上一次同步之后其他进程写入的分析还不在过滤器中，这些标题同样交给数据库确认
+            hits |= cls._written_since_sync([title for title in titles if title not in hits])
+        except Exception as e:
+            print(f"近期分析过滤器不可用，直接查询数据库: {str(e)}")
+            return titles
+        result = [title for title in titles if title in hits]
+
+        cls._stats["checked"] += len(titles)
+        cls._stats["skipped"] += len(titles) - len(result)
+        cls._stats["queried"] += len(result)
+        return result
+
+    @classmethod
+    def analyzed_since(cls, titles, since, projection=None):
+        """
+        查询一批标题在since之后的最新分析，只对过滤器可能命中的标题查询数据库
+
+        Args:
+            titles (list): 新闻标题列表
+            since (str|datetime): 时间窗口起点
+            projection (dict, optional): 返回字段，需要包含title
+
+        Returns:
+            dict: 标题到最新分析文档的映射，since之后没有分析的标题不在结果中
+        """
+        candidates = cls.candidates(titles, since)
+        if not candidates:
+            return {}
+        if isinstance(since, datetime):
+            since = since.isoformat()
+        return get_latest_analyses_by_titles(candidates, projection=projection, analyzed_after=since)
+
+    @classmethod
+    def stats(cls):
+        """返回累计检查、免查询和需要查询的标题数量"""
+        return dict(cls._stats)
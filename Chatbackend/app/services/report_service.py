@@ -10,6 +10,12 @@ from bson.objectid import ObjectId
 from flask import current_app
 from openai import OpenAI
 from ..utils.data_utils import safe_json_data  # 导入安全JSON处理函数
+from ..utils.rate_limiter import get_rate_limiter, estimate_tokens, provider_from_url
+from .token_budget import get_token_budget
+from .provider_pool import ProviderPool, load_providers
+
+# 报告生成的预留输出token数，用于限流估算
+REPORT_COMPLETION_TOKENS = 8000
 
 # 获取MongoDB连接 - 优先使用Flask应用上下文中的连接
 def get_db():
@@ -405,6 +411,19 @@ class ReportService:
             return None
     
     @classmethod        
+    def get_provider_pool(cls, model, base_url, api_key):
+        """创建生成报告使用的供应商池，备用供应商为REPORT_FAILOVER_PROVIDERS"""
+        return ProviderPool(
+            load_providers(current_app.config.get('REPORT_FAILOVER_PROVIDERS', []),
+                           {"model": model, "base_url": base_url, "api_key": api_key, "enable_search": False}),
+            name="report",
+            hedge=current_app.config.get('LLM_HEDGE_ENABLED', True),
+            default_delay=current_app.config.get('REPORT_HEDGE_DELAY', 120),
+            failure_threshold=current_app.config.get('LLM_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_timeout=current_app.config.get('LLM_BREAKER_RESET_SECONDS', 60)
+        )
+    
+    @classmethod
     def generate_report(cls, session_id):
         """生成舆情分析报告"""
         try:
@@ -472,6 +491,8 @@ class ReportService:
             api_key = current_app.config.get('OPENROUTER_API_KEY') or os.getenv('OPENROUTER_API_KEY') or os.getenv("LLM_API_KEY", "")
             base_url = current_app.config.get('OPENROUTER_BASE_URL') or os.getenv('OPENROUTER_BASE_URL') or os.getenv("LLM_API_URL", "http://localhost:11434/v1")
             model = current_app.config.get('LLM_MODEL') or os.getenv("LLM_MODEL", "google/gemini-2.5-pro-preview-03-25:online")
+            # 当天token预算即将用完时改用经济模型
+            model = get_token_budget().choose_model('report', model)
             
             # 创建配置字典
             settings = {
@@ -483,12 +504,6 @@ class ReportService:
             current_app.logger.info(f"API配置: model={model}, base_url={base_url}")
             
             try:
-                # 创建OpenAI客户端
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=base_url
-                )
-                
                 # 设置请求参数
                 request_params = {
                     'model': settings.get('model'),
@@ -497,23 +512,40 @@ class ReportService:
                     'response_format': settings.get('response_format')
                 }
                 
-                # 调用API
-                current_app.logger.info("开始调用LLM API生成报告...")
-                response = client.chat.completions.create(**request_params)
-                current_app.logger.info("LLM API调用完成")
-                
-                # 获取完整响应内容
-                if not response or not hasattr(response, 'choices') or not response.choices:
-                    current_app.logger.error("API返回结果为空或格式不正确")
-                    raise ValueError("API返回结果为空或格式不正确")
+                # 报告输出较长，预留REPORT_COMPLETION_TOKENS
+                estimated_tokens = estimate_tokens(messages_to_llm, completion_tokens=REPORT_COMPLETION_TOKENS)
                 
-                report_data = response.choices[0].message.content
-                current_app.logger.info(f"收到LLM响应，长度: {len(report_data) if report_data else 0}")
+                def request(provider, cancelled):
+                    """向一个供应商请求生成报告，在线程中执行，不使用current_app"""
+                    # 取得供应商的调用配额
+                    limiter_provider = provider_from_url(provider["base_url"])
+                    get_rate_limiter().acquire(limiter_provider, provider["model"], estimated_tokens, timeout=120)
+                    
+                    # 创建OpenAI客户端并调用API
+                    client = OpenAI(
+                        api_key=provider["api_key"],
+                        base_url=provider["base_url"]
+                    )
+                    response = client.chat.completions.create(**dict(request_params, model=provider["model"]))
+                    
+                    if getattr(response, 'usage', None):
+                        get_rate_limiter().record_usage(limiter_provider, provider["model"], estimated_tokens,
+                                                        response.usage.total_tokens)
+                        get_token_budget().record('report', provider["model"], response.usage.prompt_tokens,
+                                                  response.usage.completion_tokens)
+                    
+                    # 获取完整响应内容
+                    if not response or not hasattr(response, 'choices') or not response.choices:
+                        raise ValueError("API返回结果为空或格式不正确")
+                    if not response.choices[0].message.content:
+                        raise ValueError("API响应内容为空")
+                    return response.choices[0].message.content
                 
-                # 如果响应为空，则抛出错误
-                if not report_data:
-                    current_app.logger.error("API响应内容为空")
-                    raise ValueError("API响应内容为空")
+                # 调用API，主供应商响应慢时向备用供应商发出对冲请求，失败时转移到备用供应商
+                current_app.logger.info("开始调用LLM API生成报告...")
+                report_data, provider = cls.get_provider_pool(model, base_url, api_key).call(request)
+                current_app.logger.info(f"LLM API调用完成，供应商: {provider['name']}")
+                current_app.logger.info(f"收到LLM响应，长度: {len(report_data)}")
                 
                 # 尝试解析JSON
                 try:
@@ -0,0 +1,194 @@
+"""
+采集数据的保留与汇总
+
+采集产生的集合原本只增不减，按时间分层保留：
+- hot_news_checks、hot_news_updates：写入时带expire_at，由TTL索引自动过期；
+  没有expire_at的旧文档由prune按timestamp清理
+- hot_news_snapshots：keyframe和delta组成依赖链，不能用TTL逐条过期，
+  按整组清理早于保留期内第一个keyframe的文档；旧的hot_news_processed按timestamp清理
+- hot_news_heat_series：超出原始保留期的日期分桶汇总为逐小时/全天汇总（见HeatSeriesStore.rollup），
+  history对更早的时间自动读取汇总
+- history_top_news：超出完整保留期的存档每小时只保留一代，并只保留精简字段，更久之后删除
+"""
+from datetime import datetime, timedelta, timezone
+
+import pymongo
+from pymongo import ReplaceOne
+
+from app.extensions import db
+from app.services.heat_series import HeatSeriesStore, bucket_day
+
+# 通过TTL索引过期的集合
+TTL_COLLECTIONS = ("hot_news_checks", "hot_news_updates")
+
+# 默认保留天数
+DEFAULT_RAW_DAYS = 7
+DEFAULT_HEAT_SERIES_RAW_DAYS = 3
+DEFAULT_HEAT_ROLLUP_HOURLY_DAYS = 30
+DEFAULT_HEAT_ROLLUP_DAYS = 365
+DEFAULT_HISTORY_TOP_NEWS_FULL_DAYS = 3
+DEFAULT_HISTORY_TOP_NEWS_DAYS = 90
+
+# history_top_news精简后保留的字段
+HISTORY_TOP_NEWS_FIELDS = ("title", "rank", "rank_change", "archived_at", "original_id", "analyzed_at")
+
+
+def retention_days(name, default):
+    """读取保留天数配置，没有应用上下文时使用默认值"""
+    from flask import current_app, has_app_context
+
+    if has_app_context():
+        return float(current_app.config.get(name, default))
+    return default
+
+
+def expire_at(days=None):
+    """
+    TTL集合文档的过期时间
+
+    Args:
+        days (float, optional): 保留天数，默认读取RETENTION_RAW_DAYS
+
+    Returns:
+        datetime: UTC过期时间，TTL索引按该时间删除文档
+    """
+    if days is None:
+        days = retention_days('RETENTION_RAW_DAYS', DEFAULT_RAW_DAYS)
+    return datetime.now(timezone.utc) + timedelta(days=days)
+
+
+def select_generations(archived_ats):
+    """
+    从存档时间中选出每小时保留的一代（该小时内最早的一代）
+
+    Args:
+        archived_ats (iterable): 存档的ISO时间戳
+
+    Returns:
+        tuple: (保留的时间戳集合, 删除的时间戳集合)
+    """
+    keep = {}
+    for archived_at in sorted(set(archived_ats)):
+        keep.setdefault(archived_at[:13], archived_at)
+    kept = set(keep.values())
+    return kept, set(archived_ats) - kept
+
+
+class RetentionService:
+    @staticmethod
+    def ensure_ttl_indexes():
+        """为TTL集合创建expire_at上的TTL索引，文档到达expire_at即被删除"""
+        for name in TTL_COLLECTIONS:
+            getattr(db, name).create_index([("expire_at", 1)], expireAfterSeconds=0)
+
+    @staticmethod
+    def prune_raw(cutoff):
+        """
+        清理早于cutoff的原始检查记录和榜单快照
+
+        Args:
+            cutoff (str): ISO时间
+
+        Returns:
+            dict: 各集合删除的文档数量
+        """
+        deleted = {}
+        # TTL索引只作用于带expire_at的文档，旧文档按时间戳清理
+        for name in TTL_COLLECTIONS:
+            deleted[name] = getattr(db, name).delete_many(
+                {"timestamp": {"$lt": cutoff}, "expire_at": {"$exists": False}}
+            ).deleted_count
+
+        # 保留期内最早的快照依赖的keyframe及其之后的文档都要保留
+        keyframe = db.hot_news_snapshots.find_one(
+            {"kind": "keyframe", "timestamp": {"$lte": cutoff}},
+            {"timestamp": 1}, sort=[("timestamp", pymongo.DESCENDING)]
+        )
+        deleted["hot_news_snapshots"] = 0
+        if keyframe:
+            deleted["hot_news_snapshots"] = db.hot_news_snapshots.delete_many(
+                {"timestamp": {"$lt": keyframe["timestamp"]}}
+            ).deleted_count
+
+        deleted["hot_news_processed"] = db.hot_news_processed.delete_many(
+            {"timestamp": {"$lt": cutoff}}
+        ).deleted_count
+        return deleted
+
+    @staticmethod
+    def compact_history_top_news(cutoff, delete_before=None, batch_size=500):
+        """
+        精简早于cutoff的history_top_news存档：每小时只保留一代，只保留精简字段
+
+        Args:
+            cutoff (str): ISO时间，按小时对齐，之后的存档保持完整
+            delete_before (str, optional): ISO时间，早于该时间的存档全部删除
+            batch_size (int): 每次批量替换的文档数量
+
+        Returns:
+            dict: 删除和精简的文档数量
+        """
+        collection = db.history_top_news
+        result = {"deleted": 0, "compacted": 0}
+        if delete_before:
+            result["deleted"] += collection.delete_many({"archived_at": {"$lt": delete_before}}).deleted_count
+
+        # 按小时对齐，避免同一小时在两次执行中各保留一代
+        cutoff = cutoff[:13] + ":00:00"
+        query = {"archived_at": {"$lt": cutoff}, "compacted": {"$ne": True}}
+        kept, dropped = select_generations(collection.distinct("archived_at", query))
+        compacted_hours = {archived_at[:13] for archived_at in collection.distinct(
+            "archived_at", {"archived_at": {"$lt": cutoff}, "compacted": True})}
+        for archived_at in list(kept):
+            if archived_at[:13] in compacted_hours:
+                kept.discard(archived_at)
+                dropped.add(archived_at)
+
+        if dropped:
+            result["deleted"] += collection.delete_many({"archived_at": {"$in": list(dropped)}}).deleted_count
+
+        operations = []
+        for item in collection.find({"archived_at": {"$in": list(kept)}, "compacted": {"$ne": True}}):
+            slim = {field: item[field] for field in HISTORY_TOP_NEWS_FIELDS if field in item}
+            slim.update({"_id": item["_id"], "compacted": True})
+            operations.append(ReplaceOne({"_id": item["_id"]}, slim))
+            if len(operations) >= batch_size:
+                collection.bulk_write(operations, ordered=False)
+                result["compacted"] += len(operations)
+                operations = []
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            result["compacted"] += len(operations)
+        return result
+
+    @classmethod
+    def run(cls, now=None):
+        """
+        执行一次保留策略：清理原始数据、汇总并精简热度序列、精简热榜存档
+
+        Args:
+            now (datetime, optional): 当前时间，默认为datetime.now()
+
+        Returns:
+            dict: 各步骤的结果
+        """
+        now = now or datetime.now()
+
+        def before(name, default):
+            return now - timedelta(days=retention_days(name, default))
+
+        raw_cutoff = before('RETENTION_RAW_DAYS', DEFAULT_RAW_DAYS).isoformat()
+        series_day = bucket_day(before('HEAT_SERIES_RAW_DAYS', DEFAULT_HEAT_SERIES_RAW_DAYS).isoformat())
+        hourly_day = bucket_day(before('HEAT_ROLLUP_HOURLY_DAYS', DEFAULT_HEAT_ROLLUP_HOURLY_DAYS).isoformat())
+        rollup_day = bucket_day(before('HEAT_ROLLUP_DAYS', DEFAULT_HEAT_ROLLUP_DAYS).isoformat())
+        history_cutoff = before('HISTORY_TOP_NEWS_FULL_DAYS', DEFAULT_HISTORY_TOP_NEWS_FULL_DAYS).isoformat()
+        history_delete = before('HISTORY_TOP_NEWS_DAYS', DEFAULT_HISTORY_TOP_NEWS_DAYS).isoformat()
+
+        result = {
+            "raw": cls.prune_raw(raw_cutoff),
+            "heat_series": HeatSeriesStore.rollup(series_day),
+            "heat_rollups": HeatSeriesStore.compact_rollups(hourly_day, rollup_day),
+            "history_top_news": cls.compact_history_top_news(history_cutoff, history_delete)
+        }
+        print(f"数据保留策略执行完成: {result}")
+        return result
@@ -0,0 +1,381 @@
+"""
+热榜快照存储（增量编码）
+
+每次采集不再把完整的合并榜单写入hot_news_processed，而是写入hot_news_snapshots集合：
+- keyframe: 完整榜单，每隔KEYFRAME_INTERVAL次或榜单变动过大时写入一次
+- delta: 相对上一份快照的增量，只记录新上榜、下榜的标题以及发生变化和被删除的字段
+
+读取时从最近的keyframe开始依次应用delta即可还原任意时刻的榜单。
+同一keyframe下的delta按seq排列，(keyframe_id, seq)上的唯一索引保证并发写入时seq不重复。
+集合为空或时间点早于第一份快照时回退到旧的hot_news_processed集合。
+"""
+from datetime import datetime
+
+import pymongo
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.extensions import db
+
+SNAPSHOT_COLLECTION = "hot_news_snapshots"
+LEGACY_COLLECTION = "hot_news_processed"
+
+# 两个keyframe之间最多的delta数量
+KEYFRAME_INTERVAL = 24
+
+# 新上榜+下榜的数量超过上一份榜单的该比例时直接写keyframe
+KEYFRAME_CHURN_RATIO = 0.5
+
+# 并发写入同一个seq时基于新的链尾重新计算的次数，仍然冲突则写入keyframe
+SAVE_ATTEMPTS = 3
+
+# 热度历史中记录的字段
+HISTORY_FIELDS = ("comprehensive_heat", "weighted_heat_value", "normalized_heat")
+
+
+def compute_delta(previous, current):
+    """
+    计算两份榜单之间的增量
+
+    Args:
+        previous (list): 上一份榜单（按顺序排列的新闻列表）
+        current (list): 当前榜单
+
+    Returns:
+        dict: 包含added、removed、changed以及必要时的order；
+              changed中每项的fields为变化的字段，unset为被删除的字段（仅在有删除时出现）
+    """
+    previous_by_title = {news["title"]: news for news in previous}
+    current_titles = {news["title"] for news in current}
+
+    added = []
+    changed = []
+    for news in current:
+        old = previous_by_title.get(news["title"])
+        if old is None:
+            added.append(news)
+            continue
+        fields = {key: value for key, value in news.items() if key not in old or old[key] != value}
+        unset = [key for key in old if key not in news]
+        if fields or unset:
+            change = {"title": news["title"], "fields": fields}
+            if unset:
+                change["unset"] = unset
+            changed.append(change)
+
+    removed = [news["title"] for news in previous if news["title"] not in current_titles]
+    delta = {"added": added, "removed": removed, "changed": changed}
+
+    # 仅当按综合热度稳定排序无法还原原顺序时才记录完整顺序
+    rebuilt = apply_delta(previous, delta)
+    titles = [news["title"] for news in current]
+    if [news["title"] for news in rebuilt] != titles:
+        delta["order"] = titles
+    return delta
+
+
+def apply_delta(previous, delta):
+    """
+    在榜单上应用一次增量，返回新的榜单（不修改输入）
+
+    Args:
+        previous (list): 上一份榜单
+        delta (dict): compute_delta生成的增量
+
+    Returns:
+        list: 还原后的榜单
+    """
+    removed = set(delta.get("removed", []))
+    news_by_title = {}
+    for news in previous:
+        if news["title"] not in removed:
+            news_by_title[news["title"]] = dict(news)
+
+    for change in delta.get("changed", []):
+        news = news_by_title.get(change["title"])
+        if news is not None:
+            news.update(change["fields"])
+            for key in change.get("unset", []):
+                news.pop(key, None)
+
+    for news in delta.get("added", []):
+        news_by_title[news["title"]] = dict(news)
+
+    if delta.get("order"):
+        return [news_by_title[title] for title in delta["order"] if title in news_by_title]
+    return sorted(news_by_title.values(), key=lambda news: news.get("comprehensive_heat", 0), reverse=True)
+
+
+def to_processed_record(timestamp, news_list, record_id=None):
+    """将榜单包装成与hot_news_processed文档一致的结构"""
+    record = {
+        "timestamp": timestamp,
+        "total_news": len(news_list),
+        "data": [{
+            "name": "热门新闻",
+            "platform": "comprehensive",
+            "data": news_list
+        }]
+    }
+    if record_id is not None:
+        record["_id"] = str(record_id)
+    return record
+
+
+class HotNewsSnapshotStore:
+    # 本进程最近写入的快照，避免下一次写入前重新还原榜单
+    _last_written = {"id": None, "news": None}
+
+    @staticmethod
+    def collection():
+        return getattr(db, SNAPSHOT_COLLECTION)
+
+    @staticmethod
+    def legacy_collection():
+        return getattr(db, LEGACY_COLLECTION)
+
+    @staticmethod
+    def _news_of(record):
+        try:
+            return record.get("data", [{}])[0].get("data", []) or []
+        except (IndexError, AttributeError):
+            return []
+
+    @classmethod
+    def ensure_indexes(cls):
+        """创建快照集合的索引，(keyframe_id, seq)对delta唯一"""
+        collection = cls.collection()
+        collection.create_index([("timestamp", -1)])
+        collection.create_index([("kind", 1), ("timestamp", -1)])
+        existing = collection.index_information().get("keyframe_id_1_seq_1")
+        if existing and not existing.get("unique"):
+            # 旧版本创建的是普通索引
+            collection.drop_index("keyframe_id_1_seq_1")
+        try:
+            collection.create_index([("keyframe_id", 1), ("seq", 1)], unique=True,
+                                    partialFilterExpression={"kind": "delta"})
+        except OperationFailure as e:
+            # 已有并发写入留下的重复seq，先保留普通索引，待这些快照过期后再创建唯一索引
+            print(f"热榜快照(keyframe_id, seq)唯一索引创建失败: {str(e)}")
+            collection.create_index([("keyframe_id", 1), ("seq", 1)])
+
+    @classmethod
+    def _chain_tip(cls):
+        """
+        返回最近一份快照所属keyframe链上seq最大的文档，新的delta接在它后面
+
+        并发写入时seq最大的文档不一定是时间戳最新的，因此按seq而不是按时间确定链尾。
+        """
+        collection = cls.collection()
+        projection = {"kind": 1, "keyframe_id": 1, "seq": 1, "timestamp": 1}
+        head = collection.find_one({}, projection, sort=[("timestamp", pymongo.DESCENDING)])
+        if not head:
+            return None
+        keyframe_id = head["_id"] if head.get("kind") == "keyframe" else head.get("keyframe_id")
+        tip = collection.find_one({"keyframe_id": keyframe_id, "kind": "delta"}, projection,
+                                  sort=[("seq", pymongo.DESCENDING)])
+        if tip is None or tip.get("seq", 0) < head.get("seq", 0):
+            return head
+        return tip
+
+    @classmethod
+    def _delta_document(cls, timestamp, news_list):
+        """基于当前链尾生成delta文档，需要写keyframe时返回None"""
+        head = cls._chain_tip()
+        if not head or head.get("seq", 0) >= KEYFRAME_INTERVAL:
+            return None
+        if cls._last_written["id"] == head["_id"]:
+            previous = cls._last_written["news"]
+        else:
+            previous = cls._reconstruct(head)
+        if previous is None:
+            return None
+        delta = compute_delta(previous, news_list)
+        churn = len(delta["added"]) + len(delta["removed"])
+        if churn > KEYFRAME_CHURN_RATIO * max(len(previous), 1):
+            return None
+        return {
+            "timestamp": timestamp,
+            "kind": "delta",
+            "keyframe_id": head["_id"] if head["kind"] == "keyframe" else head["keyframe_id"],
+            "seq": head.get("seq", 0) + 1,
+            "total_news": len(news_list),
+            **delta
+        }
+
+    @classmethod
+    def save(cls, record):
+        """
+        保存一份process_hot_news生成的榜单
+
+        其他进程同时写入了相同的seq时，基于新的链尾重新计算delta，多次冲突后改写keyframe。
+
+        Args:
+            record (dict): 包含timestamp和data[0].data的处理结果
+
+        Returns:
+            str: 写入的快照类型，keyframe或delta
+        """
+        collection = cls.collection()
+        timestamp = record.get("timestamp") or datetime.now().isoformat()
+        news_list = [news for news in cls._news_of(record) if news.get("title")]
+
+        result = None
+        for _ in range(SAVE_ATTEMPTS):
+            document = cls._delta_document(timestamp, news_list)
+            if document is None:
+                break
+            try:
+                result = collection.insert_one(document)
+                break
+            except DuplicateKeyError:
+                print(f"热榜快照seq={document['seq']}已被其他进程写入，重新计算增量")
+
+        if result is None:
+            document = {
+                "timestamp": timestamp,
+                "kind": "keyframe",
+                "seq": 0,
+                "total_news": len(news_list),
+                "news": news_list
+            }
+            result = collection.insert_one(document)
+
+        cls._last_written = {"id": result.inserted_id, "news": [dict(news) for news in news_list]}
+        print(f"热榜快照已保存: {document['kind']} seq={document['seq']}, "
+              f"新增{len(document.get('added', news_list))}条, "
+              f"下榜{len(document.get('removed', []))}条, "
+              f"变化{len(document.get('changed', []))}条")
+        return document["kind"]
+
+    @classmethod
+    def _reconstruct(cls, head):
+        """从head所属的keyframe开始应用delta，还原head时刻的榜单"""
+        collection = cls.collection()
+        if head.get("kind") == "keyframe":
+            keyframe = head if "news" in head else collection.find_one({"_id": head["_id"]})
+            return list(keyframe.get("news", [])) if keyframe else None
+
+        keyframe = collection.find_one({"_id": head["keyframe_id"]})
+        if not keyframe:
+            return None
+
+        news_list = keyframe.get("news", [])
+        deltas = collection.find(
+            {"keyframe_id": head["keyframe_id"], "seq": {"$lte": head["seq"]}},
+            sort=[("seq", pymongo.ASCENDING)]
+        )
+        for delta in deltas:
+            news_list = apply_delta(news_list, delta)
+        return news_list
+
+    @classmethod
+    def get_at(cls, timestamp=None):
+        """
+        还原指定时刻（默认最新）的榜单
+
+        Args:
+            timestamp (str, optional): ISO格式时间，返回不晚于该时间的最近一份榜单
+
+        Returns:
+            dict: 与hot_news_processed文档结构一致的记录，不存在时返回None
+        """
+        query = {"timestamp": {"$lte": timestamp}} if timestamp else {}
+        head = cls.collection().find_one(query, sort=[("timestamp", pymongo.DESCENDING)])
+        if head:
+            news_list = cls._reconstruct(head)
+            if news_list is not None:
+                return to_processed_record(head["timestamp"], news_list, head["_id"])
+
+        # 回退到旧的完整快照集合
+        legacy = cls.legacy_collection().find_one(query, sort=[("timestamp", pymongo.DESCENDING)])
+        if legacy and "_id" in legacy:
+            legacy["_id"] = str(legacy["_id"])
+        return legacy
+
+    @classmethod
+    def latest_timestamp(cls):
+        """返回最近一份榜单的时间戳，不读取榜单内容"""
+        for collection in (cls.collection(), cls.legacy_collection()):
+            latest = collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", pymongo.DESCENDING)])
+            if latest and latest.get("timestamp"):
+                return latest["timestamp"]
+        return None
+
+    @classmethod
+    def title_history(cls, titles, since):
+        """
+        收集若干标题自since以来的热度历史
+
+        只跟踪指定标题的热度字段，delta无需还原成完整榜单。
+
+        Args:
+            titles (list): 标题列表
+            since (str): ISO格式起始时间
+
+        Returns:
+            dict: 标题到热度历史列表的映射，按时间升序
+        """
+        wanted = set(titles)
+        history = {title: [] for title in titles}
+        collection = cls.collection()
+
+        first = collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", pymongo.ASCENDING)])
+        legacy_query = {"timestamp": {"$gte": since}}
+        if first:
+            legacy_query["timestamp"]["$lt"] = first["timestamp"]
+        cls._legacy_title_history(legacy_query, wanted, history)
+        if not first:
+            return history
+
+        # 从since之前最近的keyframe开始，之后的文档按时间顺序依次应用
+        keyframe = collection.find_one(
+            {"kind": "keyframe", "timestamp": {"$lte": since}},
+            {"timestamp": 1}, sort=[("timestamp", pymongo.DESCENDING)]
+        )
+        start = keyframe["timestamp"] if keyframe else first["timestamp"]
+        tracked = {}
+        documents = collection.find({"timestamp": {"$gte": start}}, sort=[("timestamp", pymongo.ASCENDING)])
+        for document in documents:
+            if document.get("kind") == "keyframe":
+                tracked = {
+                    news["title"]: {field: news.get(field, 0) for field in HISTORY_FIELDS}
+                    for news in document.get("news", []) if news.get("title") in wanted
+                }
+            else:
+                for title in document.get("removed", []):
+                    tracked.pop(title, None)
+                for change in document.get("changed", []):
+                    if change["title"] in tracked:
+                        for field in HISTORY_FIELDS:
+                            if field in change["fields"]:
+                                tracked[change["title"]][field] = change["fields"][field]
+                            elif field in change.get("unset", []):
+                                tracked[change["title"]][field] = 0
+                for news in document.get("added", []):
+                    if news.get("title") in wanted:
+                        tracked[news["title"]] = {field: news.get(field, 0) for field in HISTORY_FIELDS}
+
+            if document["timestamp"] < since:
+                continue
+            for title, heat in tracked.items():
+                history[title].append({"timestamp": document["timestamp"], **heat})
+
+        return history
+
+    @classmethod
+    def _legacy_title_history(cls, query, wanted, history):
+        """从旧的完整快照集合中收集热度历史"""
+        projection = {"timestamp": 1, "data.data.title": 1}
+        for field in HISTORY_FIELDS:
+            projection[f"data.data.{field}"] = 1
+        records = cls.legacy_collection().find(query, projection, sort=[("timestamp", pymongo.ASCENDING)])
+        for record in records:
+            seen = set()
+            for news in cls._news_of(record):
+                title = news.get("title")
+                if title in wanted and title not in seen:
+                    seen.add(title)
+                    history[title].append({
+                        "timestamp": record.get("timestamp"),
+                        **{field: news.get(field, 0) for field in HISTORY_FIELDS}
+                    })
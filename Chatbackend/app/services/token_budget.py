@@ -0,0 +1,278 @@
+"""
+每日token预算
+
+新闻分析（analysis）、对话（chat）和报告（report）调用LLM后把token用量记入进程内的TokenBudget，
+累计计数每隔FLUSH_SECONDS秒按 {day, feature, model} 以$inc写入token_budget_usage集合。
+当天用量 = 集合中当天的合计（每REFRESH_SECONDS秒重新读取一次，包含其他进程写入的用量）+ 本进程尚未写入的计数。
+
+DAILY_TOKEN_BUDGET是所有功能共用的每日上限，TOKEN_BUDGET_FEATURES可以为单个功能另设上限，
+功能的剩余比例取两者中较小的一个，都未配置时为1。预算逐步耗尽时分级降级：
+- normal：正常
+- economy：剩余比例低于degrade_ratio，新闻分析合并请求，模型路由把更多新闻分到低档位模型
+- defer：剩余比例低于defer_ratio，新闻分析只领取高优先级任务，其余留在队列中；对话和报告改用经济模型
+- exhausted：预算耗尽，新闻分析暂停领取任务；对话和报告仍可使用经济模型
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.extensions import db
+
+USAGE_COLLECTION = "token_budget_usage"
+
+FEATURES = ("analysis", "chat", "report")
+
+# 进程内累计计数写入数据库的间隔（秒）
+FLUSH_SECONDS = 30
+
+# 重新读取数据库中当天用量的间隔（秒）
+REFRESH_SECONDS = 30
+
+def _day(now=None):
+    return (now or datetime.now()).strftime("%Y-%m-%d")
+
+
+class TokenBudget:
+    def __init__(self, daily_limit=0, feature_limits=None, degrade_ratio=0.5, defer_ratio=0.15,
+                 economy_model=None, flush_seconds=FLUSH_SECONDS, refresh_seconds=REFRESH_SECONDS):
+        """
+        初始化token预算
+
+        Args:
+            daily_limit (int): 所有功能共用的每日token上限，0表示不限
+            feature_limits (dict, optional): 功能 -> 每日token上限
+            degrade_ratio (float): 剩余比例低于此值时进入economy
+            defer_ratio (float): 剩余比例低于此值时进入defer
+            economy_model (str, optional): 对话和报告在defer及以下使用的模型
+            flush_seconds (float): 累计计数写入数据库的间隔（秒）
+            refresh_seconds (float): 重新读取数据库中当天用量的间隔（秒）
+        """
+        self.daily_limit = daily_limit or 0
+        self.feature_limits = feature_limits or {}
+        self.degrade_ratio = degrade_ratio
+        self.defer_ratio = defer_ratio
+        self.economy_model = economy_model or None
+        self.flush_seconds = flush_seconds
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        # (day, feature, model) -> 尚未写入数据库的计数
+        self.pending = {}
+        # 数据库中各功能当天的用量，以及读取的日期和时间
+        self.stored = {}
+        self.stored_day = None
+        self.stored_at = 0.0
+        self.last_flush = time.time()
+
+    def record(self, feature, model, prompt_tokens=0, completion_tokens=0, requests=1, now=None):
+        """
+        记录一次LLM调用的token用量
+
+        Args:
+            feature (str): 功能，analysis、chat或report
+            model (str): 模型名称
+            prompt_tokens (int): 输入token数
+            completion_tokens (int): 输出token数
+            requests (int): 调用次数，汇总记录多次调用时传入
+            now (datetime, optional): 调用时间，默认当前时间
+        """
+        prompt_tokens = int(prompt_tokens or 0)
+        completion_tokens = int(completion_tokens or 0)
+        with self.lock:
+            counts = self.pending.setdefault((_day(now), feature, model or "unknown"), {})
+            for field, value in (("requests", requests), ("prompt_tokens", prompt_tokens),
+                                 ("completion_tokens", completion_tokens),
+                                 ("total_tokens", prompt_tokens + completion_tokens)):
+                counts[field] = counts.get(field, 0) + value
+            due = time.time() - self.last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        将累计计数写入token_budget_usage，写入失败的计数保留到下次
+
+        Returns:
+            int: 写入的 (日期, 功能, 模型) 数
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.time()
+
+        written = 0
+        for (day, feature, model), counts in pending.items():
+            try:
+                getattr(db, USAGE_COLLECTION).update_one(
+                    {"day": day, "feature": feature, "model": model},
+                    {"$inc": counts, "$set": {"updated_at": datetime.now().isoformat()}},
+                    upsert=True
+                )
+                written += 1
+            except Exception as e:
+                print(f"写入token用量失败 {feature}/{model}: {str(e)}")
+                with self.lock:
+                    restored = self.pending.setdefault((day, feature, model), {})
+                    for field, value in counts.items():
+                        restored[field] = restored.get(field, 0) + value
+                continue
+            # 在下次读取数据库之前，已写入的用量计入缓存的当天合计
+            with self.lock:
+                if day == self.stored_day:
+                    self.stored[feature] = self.stored.get(feature, 0) + counts["total_tokens"]
+        return written
+
+    def _refresh(self, day):
+        """按需重新读取数据库中当天各功能的用量，读取失败时沿用上次的结果"""
+        if day == self.stored_day and time.time() - self.stored_at < self.refresh_seconds:
+            return
+        try:
+            rows = getattr(db, USAGE_COLLECTION).aggregate([
+                {"$match": {"day": day}},
+                {"$group": {"_id": "$feature", "total_tokens": {"$sum": "$total_tokens"}}}
+            ])
+            stored = {row["_id"]: row["total_tokens"] for row in rows}
+        except Exception as e:
+            print(f"读取token用量失败: {str(e)}")
+            if day == self.stored_day:
+                return
+            stored = {}
+        with self.lock:
+            self.stored, self.stored_day, self.stored_at = stored, day, time.time()
+
+    def used(self, feature=None, now=None):
+        """
+        返回当天已使用的token数
+
+        Args:
+            feature (str, optional): 功能，未提供时返回所有功能的合计
+            now (datetime, optional): 日期，默认今天
+
+        Returns:
+            int: token数
+        """
+        day = _day(now)
+        self._refresh(day)
+        with self.lock:
+            stored = sum(total for name, total in self.stored.items() if feature in (None, name))
+            pending = sum(counts["total_tokens"] for (pending_day, name, _), counts in self.pending.items()
+                          if pending_day == day and feature in (None, name))
+        return stored + pending
+
+    def remaining_fraction(self, feature, now=None):
+        """
+        返回功能当天的剩余预算比例
+
+        Returns:
+            float: 0~1，未配置上限时为1
+        """
+        fractions = []
+        if self.daily_limit > 0:
+            fractions.append(1 - self.used(now=now) / self.daily_limit)
+        if self.feature_limits.get(feature):
+            fractions.append(1 - self.used(feature, now) / self.feature_limits[feature])
+        return min(max(min(fractions), 0.0), 1.0) if fractions else 1.0
+
+    def mode_for(self, fraction):
+        """按剩余预算比例返回降级级别：normal、economy、defer或exhausted"""
+        if fraction <= 0:
+            return "exhausted"
+        if fraction < self.defer_ratio:
+            return "defer"
+        if fraction < self.degrade_ratio:
+            return "economy"
+        return "normal"
+
+    def mode(self, feature, now=None):
+        """返回功能当天的降级级别"""
+        return self.mode_for(self.remaining_fraction(feature, now))
+
+    def choose_model(self, feature, model, now=None):
+        """
+        为对话和报告选择模型
+
+        Returns:
+            str: 预算进入defer及以下且配置了经济模型时返回经济模型，否则返回原模型
+        """
+        if self.economy_model and self.mode(feature, now) in ("defer", "exhausted"):
+            return self.economy_model
+        return model
+
+    def status(self, now=None):
+        """返回当天的预算状态"""
+        features = {}
+        for feature in FEATURES:
+            fraction = self.remaining_fraction(feature, now)
+            features[feature] = {
+                "used": self.used(feature, now),
+                "limit": self.feature_limits.get(feature) or None,
+                "remaining_fraction": round(fraction, 4),
+                "mode": self.mode_for(fraction)
+            }
+        return {
+            "day": _day(now),
+            "used": self.used(now=now),
+            "limit": self.daily_limit or None,
+            "features": features
+        }
+
+    def usage_report(self, days=7, now=None):
+        """
+        汇总最近几天每个功能、每个模型的token用量
+
+        Args:
+            days (int): 包含今天在内的天数
+
+        Returns:
+            dict: days为 [{day, feature, model, requests, prompt_tokens, completion_tokens, total_tokens}, ...]，
+                  features为各功能在这几天的合计，today为当天的预算状态
+        """
+        self.flush()
+        now = now or datetime.now()
+        first_day = _day(now - timedelta(days=max(days, 1) - 1))
+        rows = list(getattr(db, USAGE_COLLECTION).find(
+            {"day": {"$gte": first_day}}, {"_id": 0, "updated_at": 0}
+        ).sort([("day", -1), ("feature", 1), ("model", 1)]))
+
+        features = {}
+        for row in rows:
+            totals = features.setdefault(row["feature"], {
+                "requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0
+            })
+            for field in totals:
+                totals[field] += row.get(field, 0)
+        return {"days": rows, "features": features, "today": self.status(now)}
+
+
+def _setting(key, default):
+    """读取Flask配置，不在应用上下文中时读取环境变量"""
+    try:
+        from flask import current_app
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return os.getenv(key, default)
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_token_budget():
+    """获取进程内共享的token预算，配置在首次调用时读取"""
+    global _budget
+    if _budget is not None:
+        return _budget
+
+    with _budget_lock:
+        if _budget is None:
+            feature_limits = _setting('TOKEN_BUDGET_FEATURES', {})
+            if isinstance(feature_limits, str):
+                feature_limits = json.loads(feature_limits) if feature_limits else {}
+            _budget = TokenBudget(
+                daily_limit=int(float(_setting('DAILY_TOKEN_BUDGET', 0) or 0)),
+                feature_limits=feature_limits,
+                degrade_ratio=float(_setting('TOKEN_BUDGET_DEGRADE_RATIO', 0.5)),
+                defer_ratio=float(_setting('TOKEN_BUDGET_DEFER_RATIO', 0.15)),
+                economy_model=_setting('TOKEN_BUDGET_ECONOMY_MODEL', '')
+            )
+    return _budget
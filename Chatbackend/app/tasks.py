@@ -33,6 +33,51 @@ def collect_news_task():
         # raise self.retry(exc=e, countdown=60)
         return {"error": str(e)}
 
+def run_smart_collect(max_age_minutes):
+    """
+    执行一次智能采集，数据有更新或未变化时检测高热度新闻
+
+    Args:
+        max_age_minutes (int): 传给smart_collect_news的数据最大有效时间（分钟）
+
+    Returns:
+        dict: 采集结果，检测到高热度新闻时包含high_heat_detection，检测到上升话题时包含rising_detection
+    """
+    from .services.news_collection_service import NewsCollectionService
+    from flask import current_app
+    
+    # 从metadata集合获取API更新模式
+    pattern = None
+    try:
+        from app.extensions import db
+        pattern_doc = db.api_update_patterns.find_one({"type": "hourly_pattern"})
+        if pattern_doc:
+            pattern = pattern_doc.get("common_minute")
+            confidence = pattern_doc.get("confidence", 0)
+            print(f"[Celery] 检测到API更新模式: 通常在每小时的第{pattern}分钟更新，置信度: {confidence:.2f}")
+    except Exception as e:
+        print(f"[Celery] 获取API更新模式失败: {str(e)}")
+    
+    stats = NewsCollectionService.smart_collect_news(force=False, max_age_minutes=max_age_minutes)
+    
+    print(f"[{datetime.datetime.now()}] [Celery] 智能热门新闻采集完成: {stats}")
+    
+    if stats.get("status") in ["unchanged", "success"]:
+        print("[Celery] 检测高热度新闻...")
+        threshold = current_app.config.get('HOT_NEWS_THRESHOLD', 0.75)
+        high_heat_result = NewsCollectionService.detect_high_heat_news(threshold=threshold)
+        print(f"[Celery] 高热度新闻检测结果: {high_heat_result}")
+        if high_heat_result.get("status") == "high_heat_detected":
+            stats["high_heat_detection"] = high_heat_result
+        
+        # 尚未达到阈值但正在快速上升的新闻提前分析
+        rising_result = NewsCollectionService.detect_rising_news()
+        print(f"[Celery] 上升话题检测结果: {rising_result.get('message')}")
+        if rising_result.get("status") == "rising_detected":
+            stats["rising_detection"] = rising_result
+    
+    return stats
+
 @celery.task(name='tasks.smart_collect')
 def smart_collect_news_task():
     """
@@ -40,38 +85,28 @@ def smart_collect_news_task():
     """
     try:
         print(f"[{datetime.datetime.now()}] [Celery] 启动智能热门新闻采集...")
+        return run_smart_collect(current_app.config.get('MAX_DATA_AGE_MINUTES', 55))
+    except Exception as e:
+        print(f"[{datetime.datetime.now()}] [Celery] 智能热门新闻采集错误: {str(e)}")
+        traceback.print_exc()
+        return {"error": str(e)}
+
+@celery.task(name='tasks.collection_tick')
+def collection_tick_task():
+    """
+    自适应采集调度检查，到达调度器安排的时间才执行智能采集 (Celery Task)
+    """
+    try:
+        from .services.collection_scheduler import CollectionScheduler, CHANGE_DETECTION_MAX_AGE_MINUTES
         
-        from .services.news_collection_service import NewsCollectionService
-        from flask import current_app
-        
-        # 从metadata集合获取API更新模式
-        pattern = None
-        try:
-            from app.extensions import db
-            pattern_doc = db.api_update_patterns.find_one({"type": "hourly_pattern"})
-            if pattern_doc:
-                pattern = pattern_doc.get("common_minute")
-                confidence = pattern_doc.get("confidence", 0)
-                print(f"[Celery] 检测到API更新模式: 通常在每小时的第{pattern}分钟更新，置信度: {confidence:.2f}")
-        except Exception as e:
-            print(f"[Celery] 获取API更新模式失败: {str(e)}")
-        
-        max_age = current_app.config.get('MAX_DATA_AGE_MINUTES', 55)
-        stats = NewsCollectionService.smart_collect_news(force=False, max_age_minutes=max_age)
-        
-        print(f"[{datetime.datetime.now()}] [Celery] 智能热门新闻采集完成: {stats}")
-        
-        if stats.get("status") in ["unchanged", "success"]:
-            print("[Celery] 检测高热度新闻...")
-            threshold = current_app.config.get('HOT_NEWS_THRESHOLD', 0.75)
-            high_heat_result = NewsCollectionService.detect_high_heat_news(threshold=threshold)
-            print(f"[Celery] 高热度新闻检测结果: {high_heat_result}")
-            if high_heat_result.get("status") == "high_heat_detected":
-                stats["high_heat_detection"] = high_heat_result
+        def run():
+            print(f"[{datetime.datetime.now()}] [Celery] 自适应调度触发智能热门新闻采集...")
+            stats = run_smart_collect(CHANGE_DETECTION_MAX_AGE_MINUTES)
+            return stats, "high_heat_detection" in stats or "rising_detection" in stats
         
-        return stats
+        return CollectionScheduler.from_config().tick(run)
     except Exception as e:
-        print(f"[{datetime.datetime.now()}] [Celery] 智能热门新闻采集错误: {str(e)}")
+        print(f"[{datetime.datetime.now()}] [Celery] 自适应采集调度错误: {str(e)}")
         traceback.print_exc()
         return {"error": str(e)}
 
@@ -119,6 +154,22 @@ def analyze_trending_news_task():
         traceback.print_exc()
         return {"error": str(e)}
 
+@celery.task(name='tasks.retention')
+def retention_task():
+    """
+    清理过期的采集数据，汇总热度序列并精简热榜存档 (Celery Task)
+    """
+    try:
+        print(f"[{datetime.datetime.now()}] [Celery] 开始执行数据保留策略...")
+        
+        from .services.retention_service import RetentionService
+        
+        return RetentionService.run()
+    except Exception as e:
+        print(f"[{datetime.datetime.now()}] [Celery] 数据保留策略执行错误: {str(e)}")
+        traceback.print_exc()
+        return {"error": str(e)}
+
 @celery.task(name='tasks.process_news')
 def process_news_task():
     """Process and analyze collected news via Celery"""
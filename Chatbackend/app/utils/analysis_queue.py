@@ -0,0 +1,270 @@
+"""
+基于租约的分析队列操作
+
+news_analysis_queue中的任务通过租约领取：一次update_many把一批pending任务标记为processing，
+并写入相同的lease_id和到期时间lease_expires_at，再按lease_id一次取回。
+- 每个文档的更新是原子的且过滤条件包含status=pending，多个worker不会领取到同一条任务
+- 租约到期仍未完成（worker崩溃等）的任务会被release_expired_leases放回pending
+- 耗时较长的LLM调用期间用LeaseHeartbeat定期延长租约
+- 重复入队不会改动processing中的任务，避免被其他worker再次领取
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from .queue_priority import RETRY_PENALTY_SECONDS, priority_score, queue_fields, schedule_key
+
+# 默认租约时长（秒）
+LEASE_SECONDS = 600
+
+# 心跳间隔占租约时长的比例
+HEARTBEAT_RATIO = 1 / 3
+
+
+def _queue():
+    from ..models import db
+    return db.news_analysis_queue
+
+
+def _expiry(lease_seconds, now=None):
+    return ((now or datetime.now()) + timedelta(seconds=lease_seconds)).isoformat()
+
+
+def new_lease_id():
+    """生成新的租约ID"""
+    return uuid.uuid4().hex
+
+
+def enqueue(news_id, news_data, fields=None, now=None):
+    """
+    将任务加入队列
+
+    新任务以pending状态写入；已在队列中的任务保留状态、入队时间和尝试次数，只更新新闻数据，
+    优先级分数只升不降，调度键按原入队时间和尝试次数重新计算且只会提前，
+    因此反复入队的任务照常老化，重试推迟也不会被抵消。
+    processing中的任务由持有租约的worker处理，不做任何修改。
+
+    Args:
+        news_id (str): 任务ID
+        news_data (dict): 新闻数据
+        fields (dict, optional): 额外写入的字段，如{"priority": "high"}
+        now (datetime, optional): 入队时间，默认当前时间
+
+    Returns:
+        bool: 是否为新入队的任务
+    """
+    queue = _queue()
+    now = now or datetime.now()
+    update = {"news_data": news_data}
+    update.update(fields or {})
+
+    result = queue.update_one(
+        {"news_id": news_id},
+        {"$setOnInsert": {
+            "news_id": news_id,
+            "status": "pending",
+            "queued_at": now.isoformat(),
+            "attempts": 0,
+            "last_attempt": None,
+            **update,
+            **queue_fields(news_data, now)
+        }},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        return True
+
+    existing = queue.find_one(
+        {"news_id": news_id, "status": {"$ne": "processing"}},
+        {"queued_at": 1, "attempts": 1, "priority_score": 1}
+    )
+    if existing is None:
+        return False
+
+    score = max(priority_score(news_data), existing.get("priority_score") or 0)
+    queue.update_one(
+        {"_id": existing["_id"], "status": {"$ne": "processing"}},
+        {
+            "$set": update,
+            "$max": {"priority_score": score},
+            "$min": {"schedule_key": schedule_key(existing.get("queued_at") or now, score,
+                                                  existing.get("attempts") or 0)}
+        }
+    )
+    return False
+
+
+def claim_batch(limit, query=None, sort=None, lease_id=None, lease_seconds=LEASE_SECONDS):
+    """
+    批量领取待处理任务
+
+    Args:
+        limit (int): 最多领取的数量
+        query (dict, optional): 额外的过滤条件，如{"priority": "high"}
+        sort (list, optional): 领取顺序，默认按schedule_key、queued_at升序
+        lease_id (str, optional): 租约ID，多次领取可共用同一租约
+        lease_seconds (int): 租约时长（秒）
+
+    Returns:
+        tuple: (租约ID, 领取到的任务列表，顺序与sort一致)
+    """
+    lease_id = lease_id or new_lease_id()
+    if limit <= 0:
+        return lease_id, []
+
+    queue = _queue()
+    candidate_query = {"status": "pending"}
+    candidate_query.update(query or {})
+    candidate_ids = [
+        doc["_id"] for doc in queue.find(candidate_query, {"_id": 1})
+        .sort(sort or [("schedule_key", 1), ("queued_at", 1)]).limit(limit)
+    ]
+    if not candidate_ids:
+        return lease_id, []
+
+    now = datetime.now()
+    queue.update_many(
+        {"_id": {"$in": candidate_ids}, "status": "pending"},
+        {
+            "$set": {
+                "status": "processing",
+                "lease_id": lease_id,
+                "lease_expires_at": _expiry(lease_seconds, now),
+                "last_attempt": now.isoformat()
+            },
+            "$inc": {"attempts": 1}
+        }
+    )
+
+    # 只取回本次租约成功领取的任务，被其他worker抢先领取的不会出现在结果中
+    claimed = {doc["_id"]: doc for doc in queue.find({"lease_id": lease_id, "_id": {"$in": candidate_ids}})}
+    return lease_id, [claimed[_id] for _id in candidate_ids if _id in claimed]
+
+
+def extend_lease(lease_id, lease_seconds=LEASE_SECONDS):
+    """
+    延长租约（心跳）
+
+    Returns:
+        int: 延长的任务数量
+    """
+    result = _queue().update_many(
+        {"lease_id": lease_id, "status": "processing"},
+        {"$set": {"lease_expires_at": _expiry(lease_seconds)}}
+    )
+    return result.modified_count
+
+
+def release_expired_leases(lease_seconds=LEASE_SECONDS):
+    """
+    将租约已到期的processing任务放回pending
+
+    没有租约字段的processing任务（租约机制之前遗留的）在last_attempt超过一个租约时长后同样放回。
+    放回的任务按一次重试推迟调度。
+
+    Returns:
+        int: 放回的任务数量
+    """
+    now = datetime.now()
+    result = _queue().update_many(
+        {"status": "processing", "$or": [
+            {"lease_expires_at": {"$lt": now.isoformat()}},
+            {"lease_expires_at": {"$exists": False},
+             "last_attempt": {"$lt": (now - timedelta(seconds=lease_seconds)).isoformat()}}
+        ]},
+        {
+            "$set": {"status": "pending", "updated_at": now.isoformat()},
+            "$unset": {"lease_id": "", "lease_expires_at": ""},
+            "$inc": {"schedule_key": RETRY_PENALTY_SECONDS}
+        }
+    )
+    if result.modified_count:
+        print(f"已将 {result.modified_count} 条租约过期的任务放回待处理状态")
+    return result.modified_count
+
+
+def complete(news_id, lease_id):
+    """
+    完成任务并从队列中移除，只有持有租约的worker可以完成
+
+    Returns:
+        bool: 是否删除成功
+    """
+    return _queue().delete_one({"news_id": news_id, "lease_id": lease_id}).deleted_count > 0
+
+
+def release(lease_id, news_ids=None, status="pending", fields=None, delay_seconds=0):
+    """
+    释放租约下的任务
+
+    Args:
+        lease_id (str): 租约ID
+        news_ids (list, optional): 只释放这些任务，默认释放整个租约
+        status (str): 释放后的状态，pending或failed
+        fields (dict, optional): 额外写入的字段，如error
+        delay_seconds (int): 推迟调度的秒数（累加到schedule_key）
+
+    Returns:
+        int: 释放的任务数量
+    """
+    query = {"lease_id": lease_id, "status": "processing"}
+    if news_ids is not None:
+        query["news_id"] = {"$in": list(news_ids)}
+    update = {"status": status, "updated_at": datetime.now().isoformat()}
+    update.update(fields or {})
+    operations = {"$set": update, "$unset": {"lease_id": "", "lease_expires_at": ""}}
+    if delay_seconds:
+        operations["$inc"] = {"schedule_key": delay_seconds}
+    return _queue().update_many(query, operations).modified_count
+
+
+def release_unfinished(lease_id, max_attempts=3):
+    """
+    处理结束后释放租约下剩余的任务：超过最大尝试次数的标记为failed，其余按一次重试推迟后放回pending
+
+    Returns:
+        tuple: (标记为failed的数量, 放回pending的数量)
+    """
+    failed = _queue().update_many(
+        {"lease_id": lease_id, "status": "processing", "attempts": {"$gte": max_attempts}},
+        {
+            "$set": {"status": "failed", "error": "超过最大尝试次数", "updated_at": datetime.now().isoformat()},
+            "$unset": {"lease_id": "", "lease_expires_at": ""}
+        }
+    ).modified_count
+    retried = release(lease_id, delay_seconds=RETRY_PENALTY_SECONDS)
+    return failed, retried
+
+
+class LeaseHeartbeat:
+    """
+    在后台线程中定期延长租约，用于包裹耗时较长的分析调用
+
+    Example:
+        with LeaseHeartbeat(lease_id):
+            results = analysis_service.analyze_multiple_news(...)
+    """
+
+    def __init__(self, lease_id, lease_seconds=LEASE_SECONDS):
+        self.lease_id = lease_id
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        interval = self.lease_seconds * HEARTBEAT_RATIO
+        while not self._stop.wait(interval):
+            try:
+                extend_lease(self.lease_id, self.lease_seconds)
+            except Exception as e:
+                print(f"延长租约失败: {str(e)}")
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -6,6 +6,10 @@ from datetime import datetime
 from flask import current_app
 import os
 
+from app.utils.hotness_parser import parse_hotness_value
+from app.utils.http_client import get_http_client
+from app.utils.hotlist_stream import HotlistStreamParser
+
 # API调用统计和限流控制
 api_call_stats = {
     "total_calls": 0,
@@ -63,16 +67,24 @@ def fetch_news_titles(api_url="https://api.vvhan.com/api/hotlist/all", max_news_
                 print(f"第{retry_count}次重试获取新闻标题，等待{backoff_time}秒")
                 time.sleep(backoff_time)
             
-            # 发送请求
-            start_time = time.time()
-            response = requests.get(api_url, timeout=timeout)
-            response.raise_for_status()
+            # 发送请求（共享连接池，短时间内的重复调用直接使用缓存，重试时强制重新请求）
+            response = get_http_client().fetch(api_url, timeout=timeout, ttl=0 if retry_count else None)
             
-            # 解析JSON响应
-            json_data = response.json()
+            # 流式解析响应，每个平台读到max_news_per_platform条后跳过剩余部分
+            parser = HotlistStreamParser(max_per_platform=max_news_per_platform)
+            result = {}
+            for news_item in parser.items(response.content):
+                # 组装新闻数据，包含额外可用信息
+                result.setdefault(news_item["platform"] or 'unknown', []).append({
+                    "title": news_item["title"],
+                    "url": news_item["url"],
+                    "hot": news_item["hotness"],
+                    "hot_value": parse_hotness_value(news_item["hotness"])
+                })
+            json_data = parser.meta
             
             # 计算请求时间
-            request_time = time.time() - start_time
+            request_time = response.elapsed
             
             # 检查是否被限流（通过响应时间和状态码判断）
             if request_time > 5 or (json_data.get('code') and json_data.get('code') != 200):
@@ -105,33 +117,6 @@ def fetch_news_titles(api_url="https://api.vvhan.com/api/hotlist/all", max_news_
                 api_call_stats["failed_calls"] += 1
                 return {}
             
-            # 提取新闻标题
-            result = {}
-            for platform_data in json_data.get('data', []):
-                platform_name = platform_data.get('name', 'unknown')
-                news_titles = []
-                
-                for news_item in platform_data.get('data', []):
-                    title = news_item.get('title')
-                    url = news_item.get('url', '')
-                    hot = news_item.get('hot', 0)
-                    
-                    if title:
-                        # 组装新闻数据，包含额外可用信息
-                        news_data = {
-                            "title": title,
-                            "url": url,
-                            "hot": hot
-                        }
-                        news_titles.append(news_data)
-                        
-                        # 达到最大数量后停止添加
-                        if len(news_titles) >= max_news_per_platform:
-                            break
-                
-                if news_titles:
-                    result[platform_name] = news_titles
-            
             # 重置连续失败计数
             api_call_stats["consecutive_failures"] = 0
             api_call_stats["successful_calls"] += 1
@@ -229,11 +214,10 @@ def fetch_hot_news():
         # 获取API配置
         api_url = current_app.config.get('NEWS_API_BASE_URL', 'https://api.vvhan.com/api/hotlist/all')
         
-        # 发送请求
-        response = requests.get(api_url)
-        response.raise_for_status()
+        # 发送请求（共享连接池和短时缓存）
+        response = get_http_client().fetch(api_url)
         
-        # 解析数据
+        # 解析数据，返回的对象与缓存共享，调用方不应修改
         data = response.json()
         
         if not data.get('success'):
@@ -0,0 +1,103 @@
+"""
+布隆过滤器
+
+BloomFilter判断元素"一定不存在"或"可能存在"，不存在误判为不存在的情况。
+TimePartitionedBloomFilter按时间分片，每个分片一个BloomFilter，
+查询时只检查与时间窗口重叠的分片，过期分片整片丢弃，不需要从过滤器中删除元素。
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity=5000, error_rate=0.01):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity (int): 预计元素数量，超过后误判率逐渐升高
+            error_rate (float): 元素数量达到capacity时的误判率
+        """
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # 双重哈希：由一个128位摘要派生hash_count个位置
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        """添加元素"""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TimePartitionedBloomFilter:
+    def __init__(self, partition_seconds=3600, retention_seconds=48 * 3600, capacity=5000, error_rate=0.01):
+        """
+        初始化按时间分片的布隆过滤器
+
+        Args:
+            partition_seconds (int): 每个分片覆盖的时长（秒）
+            retention_seconds (int): 保留的时长（秒），更早的分片被丢弃
+            capacity (int): 每个分片的预计元素数量
+            error_rate (float): 每个分片的误判率
+        """
+        self.partition_seconds = partition_seconds
+        self.retention_seconds = retention_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.partitions = {}
+
+    def _partition(self, when):
+        return int(when.timestamp() // self.partition_seconds)
+
+    def add(self, key, when):
+        """
+        添加一个在when时刻发生的元素
+
+        Args:
+            key (str): 元素
+            when (datetime): 发生时间
+        """
+        partition = self._partition(when)
+        bloom = self.partitions.get(partition)
+        if bloom is None:
+            bloom = self.partitions[partition] = BloomFilter(self.capacity, self.error_rate)
+        bloom.add(key)
+
+    def might_contain(self, key, since):
+        """
+        元素是否可能在since之后出现过
+
+        since所在的分片整片参与判断，因此结果可能包含稍早于since的元素，但不会漏掉since之后的元素。
+
+        Args:
+            key (str): 元素
+            since (datetime): 时间窗口起点
+
+        Returns:
+            bool: 为False时一定没有出现过
+        """
+        first = self._partition(since)
+        return any(key in bloom for partition, bloom in self.partitions.items() if partition >= first)
+
+    def covers(self, since, now):
+        """时间窗口是否在保留时长之内，超出时过滤器无法回答"""
+        return (now - since).total_seconds() <= self.retention_seconds
+
+    def expire(self, now):
+        """丢弃超出保留时长的分片"""
+        first = self._partition(now) - int(math.ceil(self.retention_seconds / self.partition_seconds))
+        for partition in [partition for partition in self.partitions if partition < first]:
+            del self.partitions[partition]
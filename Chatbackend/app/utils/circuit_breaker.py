@@ -0,0 +1,102 @@
+"""
+进程内熔断器
+
+连续失败达到阈值后熔断（open），冷却期内直接跳过调用；冷却期过后放行一次试探调用（half_open），
+成功则恢复（closed），失败则重新熔断且冷却时间翻倍，直到上限。
+采集任务在单个worker中运行，熔断状态不需要跨进程共享。
+"""
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=60, max_reset_timeout=900):
+        """
+        初始化熔断器
+
+        Args:
+            name (str): 名称，用于日志
+            failure_threshold (int): 连续失败多少次后熔断
+            reset_timeout (float): 熔断后的冷却时间（秒）
+            max_reset_timeout (float): 试探失败后冷却时间翻倍的上限（秒）
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = reset_timeout
+        self.probing = False
+
+    @property
+    def state(self):
+        """当前状态：closed、open或half_open"""
+        with self.lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return CLOSED
+        if self.probing or now - self.opened_at >= self.cooldown:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self):
+        """
+        是否允许本次调用，半开状态下只放行一次试探调用
+
+        Returns:
+            bool: 允许调用时为True
+        """
+        with self.lock:
+            state = self._state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self.lock:
+            if self.opened_at is not None:
+                print(f"熔断器 {self.name} 恢复")
+            self.failures = 0
+            self.opened_at = None
+            self.cooldown = self.reset_timeout
+            self.probing = False
+
+    def record_failure(self):
+        """记录一次失败调用"""
+        with self.lock:
+            self.failures += 1
+            if self.probing:
+                # 试探失败，重新熔断并延长冷却时间
+                self.probing = False
+                self.cooldown = min(self.cooldown * 2, self.max_reset_timeout)
+                self.opened_at = time.monotonic()
+                print(f"熔断器 {self.name} 试探失败，{self.cooldown:.0f}秒内跳过")
+            elif self.opened_at is None and self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                print(f"熔断器 {self.name} 连续失败{self.failures}次，{self.cooldown:.0f}秒内跳过")
+
+    def record_cancel(self):
+        """记录一次被主动取消、没有结果的调用，半开状态下允许重新试探"""
+        with self.lock:
+            self.probing = False
+
+    def snapshot(self):
+        """返回当前状态，用于日志和监控"""
+        with self.lock:
+            now = time.monotonic()
+            remaining = 0
+            if self.opened_at is not None and not self.probing:
+                remaining = max(0, self.cooldown - (now - self.opened_at))
+            return {"state": self._state(now), "failures": self.failures, "retry_in": round(remaining, 1)}
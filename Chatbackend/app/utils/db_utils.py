@@ -12,6 +12,8 @@ def ensure_indexes():
         from flask import current_app
         from app.extensions import db
         from app.services.report_service import ReportService
+        from app.services.retention_service import RetentionService
+        from app.services.snapshot_store import HotNewsSnapshotStore
     
         # 用户集合索引
         db.users.create_index([("email", 1)], unique=True)
@@ -30,6 +32,44 @@ def ensure_indexes():
         db.processed_news.create_index([("rank", 1)])
         db.processed_news.create_index([("analyzed_at", -1)])
         
+        # 热榜增量快照索引
+        HotNewsSnapshotStore.ensure_indexes()
+        
+        # 标题热度序列索引
+        db.hot_news_heat_series.create_index([("title_id", 1), ("day", 1)])
+        db.hot_news_heat_series.create_index([("day", 1)])
+        db.hot_news_heat_rollups.create_index([("title_id", 1), ("day", 1)])
+        db.hot_news_heat_rollups.create_index([("day", 1)])
+        
+        # 标题热度状态（热度速度、排名变化）：按榜单时间查询上升话题和清理过期状态
+        db.hot_news_heat_state.create_index([("timestamp", -1), ("rising", 1)])
+        
+        # 热榜采集元数据和上游刷新记录（自适应采集调度）
+        db.hot_news_metadata.create_index([("key", 1)])
+        db.hot_news_updates.create_index([("timestamp", -1)])
+        db.hot_news_checks.create_index([("timestamp", -1)])
+        
+        # 数据保留：检查和刷新记录按expire_at自动过期，热榜存档按存档时间精简
+        RetentionService.ensure_ttl_indexes()
+        db.history_top_news.create_index([("archived_at", 1), ("compacted", 1)])
+        
+        # 按标题批量查询最新分析结果
+        db.transformed_news.create_index([("title", 1), ("analyzed_at", -1)])
+        # 近似标题分析缓存按时间增量加载
+        db.transformed_news.create_index([("analyzed_at", -1)])
+        
+        # 新闻分析队列：按状态领取、按租约取回和回收
+        db.news_analysis_queue.create_index([("status", 1), ("schedule_key", 1), ("queued_at", 1)])
+        db.news_analysis_queue.create_index([("priority_score", -1)])
+        db.news_analysis_queue.create_index([("lease_id", 1)])
+        db.news_analysis_queue.create_index([("status", 1), ("lease_expires_at", 1)])
+        
+        # 分析模型每日的请求质量和耗时累计
+        db.llm_model_metrics.create_index([("day", 1), ("model", 1)], unique=True)
+        
+        # 各功能每日每个模型的token用量
+        db.token_budget_usage.create_index([("day", 1), ("feature", 1), ("model", 1)], unique=True)
+        
         db.analysis_queue.create_index([("status", 1)])
         db.analysis_queue.create_index([("created_at", -1)])
         
@@ -258,6 +298,41 @@ def get_top_news_for_analysis(limit=20):
     
     return news_for_analysis
 
+def get_latest_analyses_by_titles(titles, projection=None, analyzed_after=None):
+    """
+    一次聚合查询获取多个标题各自最新的分析结果
+    
+    依赖transformed_news上的(title, analyzed_at)复合索引，无论标题数量多少都只有一次数据库往返
+    
+    Args:
+        titles (list): 新闻标题列表
+        projection (dict, optional): 返回字段，如{"title": 1, "analyzed_at": 1}
+        analyzed_after (str, optional): ISO格式时间，只考虑此时间之后的分析
+        
+    Returns:
+        dict: 标题到最新分析文档的映射，没有分析的标题不在结果中
+    """
+    from ..models import db
+    
+    titles = list({title for title in titles if title})
+    if not titles:
+        return {}
+    
+    match = {"title": {"$in": titles}}
+    if analyzed_after:
+        match["analyzed_at"] = {"$gte": analyzed_after}
+    
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"title": 1, "analyzed_at": -1}},
+        {"$group": {"_id": "$title", "doc": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$doc"}}
+    ]
+    if projection:
+        pipeline.append({"$project": projection})
+    
+    return {doc["title"]: doc for doc in db.transformed_news.aggregate(pipeline) if doc.get("title")}
+
 def update_analysis_status(news_id, status, result=None):
     """
     更新分析状态
@@ -0,0 +1,336 @@
+"""
+列式热度评分引擎
+
+将整份热榜数据一次性载入NumPy数组（平台索引、解析后的热度、平台权重），
+用数组运算完成加权、全局归一化、多平台加成、综合热度和热度级别的计算，
+替代process_hot_news中多次嵌套的Python循环。
+配置了title_merge_threshold时，各平台措辞略有不同的同一事件会通过LSH聚类合并为一条，
+合并后的规范标题优先沿用已在跟踪中的标题，避免每次采集随热度在不同措辞之间切换。
+"""
+import numpy as np
+
+from .hotness_parser import parse_hotness_batch
+from .similarity import cluster_titles
+
+
+class HeatScoringEngine:
+    """
+    热度评分引擎
+
+    Args:
+        platform_weights (dict): 平台名称到权重的映射
+        platform_categories (dict): 平台分组，分组名称到平台列表的映射
+        heat_levels (dict): 热度级别配置，(下限, 上限) 到级别名称的映射
+        default_weight (float): 未配置平台的默认权重
+        fallback_level (str): 不落在任何区间时的热度级别
+        title_merge_threshold (float, optional): 近似标题合并的Jaccard阈值，None时只合并完全相同的标题
+    """
+
+    def __init__(self, platform_weights, platform_categories, heat_levels,
+                 default_weight=0.5, fallback_level="低", title_merge_threshold=None):
+        self.platform_weights = platform_weights
+        self.default_weight = default_weight
+        self.title_merge_threshold = title_merge_threshold
+
+        # 平台 -> 分组索引（与原逻辑一致：按分组定义顺序取第一个命中的分组）
+        self.category_names = list(platform_categories.keys())
+        self.platform_category = {}
+        for idx, platforms in enumerate(platform_categories.values()):
+            for platform in platforms:
+                self.platform_category.setdefault(platform, idx)
+
+        # 由HEAT_LEVELS推导np.digitize使用的区间边界和标签
+        levels = sorted(heat_levels.items(), key=lambda kv: kv[0][0])
+        self.level_edges = np.array(
+            [low for (low, _), _ in levels[1:]] + [levels[-1][0][1]], dtype=np.float64
+        )
+        self.level_labels = np.array(
+            [level for _, level in levels] + [fallback_level], dtype=object
+        )
+
+        self._reset()
+
+    def _reset(self):
+        self.titles = []
+        self.urls = []
+        self.hotness = []
+        self.platform_names = []
+        self.heat_values = np.zeros(0, dtype=np.float64)
+        self.platform_index = np.zeros(0, dtype=np.int64)
+
+    def load_items(self, items, heat_values=None):
+        """
+        载入标准化后的新闻条目
+
+        Args:
+            items (iterable): 每项包含title、url、hotness、platform，可以是生成器；
+                              未提供heat_values时使用条目的heat_value，没有heat_value的条目
+                              在载入后统一用parse_hotness_batch解析hotness
+            heat_values (numpy.ndarray, optional): 已批量解析的热度数组，与items等长
+
+        Returns:
+            HeatScoringEngine: 当前引擎，便于链式调用
+        """
+        self._reset()
+        platform_lookup = {}
+        item_heat = []
+        unparsed_index = []
+        platform_index = []
+
+        for item in items:
+            platform = item.get("platform")
+            if platform not in platform_lookup:
+                platform_lookup[platform] = len(platform_lookup)
+            self.titles.append(item.get("title", "") or "")
+            self.urls.append(item.get("url", ""))
+            self.hotness.append(item.get("hotness", "0"))
+            if heat_values is None:
+                if "heat_value" in item:
+                    item_heat.append(item["heat_value"] or 0.0)
+                else:
+                    unparsed_index.append(len(item_heat))
+                    item_heat.append(0.0)
+            platform_index.append(platform_lookup[platform])
+
+        self.platforms = list(platform_lookup.keys())
+        self.platform_names = np.array(self.platforms, dtype=object)[platform_index] \
+            if platform_index else np.zeros(0, dtype=object)
+        self.heat_values = np.asarray(
+            item_heat if heat_values is None else heat_values, dtype=np.float64
+        )
+        if unparsed_index:
+            self.heat_values[unparsed_index] = parse_hotness_batch([self.hotness[i] for i in unparsed_index])
+        self.platform_index = np.asarray(platform_index, dtype=np.int64)
+        return self
+
+    def platform_weight_array(self):
+        """返回每个平台的权重数组，顺序与self.platforms一致"""
+        return np.array(
+            [self.platform_weights.get(p, self.default_weight) for p in self.platforms],
+            dtype=np.float64
+        )
+
+    def platform_category_array(self):
+        """返回每个平台的分组索引数组，未分组的平台为-1"""
+        return np.array(
+            [self.platform_category.get(p, -1) for p in self.platforms],
+            dtype=np.int64
+        )
+
+    def weighted_heat(self):
+        """计算每条新闻的加权热度"""
+        if not self.heat_values.size:
+            return np.zeros(0, dtype=np.float64)
+        return self.heat_values * self.platform_weight_array()[self.platform_index]
+
+    @staticmethod
+    def normalize_global(weighted):
+        """
+        跨平台全局归一化，对归一化值做0.8次幂变换以增加头部区分度
+        """
+        if not weighted.size:
+            return weighted
+        global_max = weighted.max()
+        if global_max <= 0:
+            return np.zeros_like(weighted)
+        normalized = weighted / global_max
+        positive = normalized > 0
+        normalized[positive] = normalized[positive] ** 0.8
+        return np.maximum(normalized, 0)
+
+    def heat_level(self, normalized):
+        """使用np.digitize按HEAT_LEVELS区间计算热度级别"""
+        return self.level_labels[np.digitize(normalized, self.level_edges)]
+
+    def score(self, known_since=None):
+        """
+        计算综合热度并返回按综合热度降序排列的合并新闻列表
+
+        Args:
+            known_since (callable, optional): known_since(titles)返回{标题: ISO时间}，表示标题从何时起已有
+                                              热度状态或分析记录；只对发生近似合并的标题调用
+
+        Returns:
+            list: 合并后的新闻，字段与原process_hot_news输出一致
+        """
+        weighted = self.weighted_heat()
+        normalized = self.normalize_global(weighted.copy())
+
+        # 按去除首尾空白后的标题分组，空标题不参与合并
+        group_lookup = {}
+        group_of_item = np.full(len(self.titles), -1, dtype=np.int64)
+        first_item = []
+        for i, title in enumerate(self.titles):
+            title = title.strip()
+            if not title:
+                continue
+            group = group_lookup.get(title)
+            if group is None:
+                group = len(group_lookup)
+                group_lookup[title] = group
+                first_item.append(i)
+            group_of_item[i] = group
+
+        group_titles = list(group_lookup.keys())
+        first_item = np.asarray(first_item, dtype=np.int64)
+        variants = None
+        if self.title_merge_threshold and len(group_titles) > 1:
+            group_titles, group_of_item, first_item, variants = self.merge_similar_groups(
+                group_titles, group_of_item, first_item, normalized, known_since
+            )
+
+        return self._score_groups(group_titles, group_of_item, first_item,
+                                  weighted, normalized, variants)
+
+    def merge_similar_groups(self, group_titles, group_of_item, first_item, normalized, known_since=None):
+        """
+        把标题近似、且来自不同平台的分组合并为一组
+
+        规范标题优先取known_since中最早的标题，这样快照增量、热度序列和按标题查找的分析都沿用同一个标题；
+        都不在known_since中（或未提供）时取组内归一化热度之和最高的标题。
+        url和原始热度取自规范标题的首条新闻。
+
+        Returns:
+            tuple: (合并后的标题列表, 每条新闻所属的新分组, 每组首条新闻下标, 每组的其他标题列表)
+        """
+        valid = group_of_item >= 0
+        groups = group_of_item[valid]
+        group_heat = np.bincount(groups, weights=normalized[valid], minlength=len(group_titles))
+
+        # 每个分组出现的平台，同一平台内的近似标题视为不同话题
+        group_platforms = [set() for _ in group_titles]
+        for group, platform in zip(groups.tolist(), self.platform_index[valid].tolist()):
+            group_platforms[group].add(platform)
+
+        roots = cluster_titles(group_titles, self.title_merge_threshold, exclusive=group_platforms)
+
+        cluster_lookup = {}
+        cluster_members = []
+        for group, root in enumerate(roots):
+            if root not in cluster_lookup:
+                cluster_lookup[root] = len(cluster_members)
+                cluster_members.append([])
+            cluster_members[cluster_lookup[root]].append(group)
+
+        known = {}
+        contested = [group_titles[g] for members in cluster_members if len(members) > 1 for g in members]
+        if known_since is not None and contested:
+            known = known_since(contested)
+
+        def rank(g):
+            since = known.get(group_titles[g])
+            return (since is None, since or "", -group_heat[g])
+
+        cluster_of_group = np.empty(len(group_titles), dtype=np.int64)
+        merged_titles, merged_first, merged_variants = [], [], []
+        for cluster, members in enumerate(cluster_members):
+            cluster_of_group[members] = cluster
+            canonical = min(members, key=rank)
+            merged_titles.append(group_titles[canonical])
+            merged_first.append(first_item[canonical])
+            merged_variants.append([group_titles[g] for g in members if g != canonical])
+
+        merged_group_of_item = np.where(valid, cluster_of_group[np.maximum(group_of_item, 0)], -1)
+        return merged_titles, merged_group_of_item, np.asarray(merged_first, dtype=np.int64), merged_variants
+
+    def _score_groups(self, group_titles, group_of_item, first_item, weighted, normalized, variants=None):
+        group_count = len(group_titles)
+        if group_count == 0:
+            return []
+
+        valid = group_of_item >= 0
+        groups = group_of_item[valid]
+        platform_count = np.bincount(groups, minlength=group_count)
+        heat_sum = np.bincount(groups, weights=normalized[valid], minlength=group_count)
+        weighted_sum = np.zeros(group_count, dtype=np.int64)
+        np.add.at(weighted_sum, groups, np.trunc(weighted[valid]).astype(np.int64))
+
+        diversity = np.minimum(1.0, platform_count / 3)
+        comprehensive = np.minimum(1.0, heat_sum * (1 + diversity))
+
+        max_heat = comprehensive.max()
+        final_normalized = comprehensive / max_heat if max_heat > 0 else np.zeros(group_count)
+        levels = self.heat_level(final_normalized)
+
+        # 每个分组覆盖的平台分组数量
+        item_category = self.platform_category_array()[self.platform_index[valid]] \
+            if self.platforms else np.zeros(0, dtype=np.int64)
+        categorized = item_category >= 0
+        category_pairs = np.unique(
+            groups[categorized] * len(self.category_names) + item_category[categorized]
+        )
+        category_diversity = np.bincount(
+            category_pairs // max(len(self.category_names), 1), minlength=group_count
+        )
+
+        # 各分组的平台列表，保持原始出现顺序
+        valid_positions = np.nonzero(valid)[0]
+        member_order = valid_positions[np.argsort(groups, kind="stable")]
+        member_platforms = np.split(
+            self.platform_names[member_order], np.cumsum(platform_count)[:-1]
+        )
+
+        order = np.argsort(-comprehensive, kind="stable")
+        heat_sum_list = heat_sum.tolist()
+        comprehensive_list = comprehensive.tolist()
+        normalized_list = final_normalized.tolist()
+        weighted_list = weighted_sum.tolist()
+        count_list = platform_count.tolist()
+        diversity_list = category_diversity.tolist()
+
+        results = []
+        for g in order.tolist():
+            first = int(first_item[g])
+            results.append({
+                "title": group_titles[g],
+                "url": self.urls[first],
+                "platforms": member_platforms[g].tolist(),
+                "platform_count": count_list[g],
+                "heat_sum": heat_sum_list[g],
+                "weighted_heat_value": weighted_list[g],
+                "hotness": self.hotness[first],
+                "comprehensive_heat": comprehensive_list[g],
+                "normalized_heat": normalized_list[g],
+                "heat_level": levels[g],
+                "category_diversity": diversity_list[g],
+            })
+            if variants and variants[g]:
+                results[-1]["title_variants"] = variants[g]
+        return results
+
+    @staticmethod
+    def snapshot_column(news_list, field):
+        """从已保存的快照中取出某一数值字段组成数组"""
+        return np.fromiter(
+            (news.get(field, 0) or 0 for news in news_list),
+            dtype=np.float64, count=len(news_list)
+        )
+
+    @classmethod
+    def top_news(cls, news_list, k, field="comprehensive_heat"):
+        """
+        按指定字段取已保存快照中的前k条新闻，排序稳定
+
+        Args:
+            news_list (list): 快照中的新闻列表
+            k (int): 数量
+            field (str): 排序字段
+
+        Returns:
+            list: 前k条新闻
+        """
+        if not news_list or k <= 0:
+            return []
+        column = cls.snapshot_column(news_list, field)
+        order = np.argsort(-column, kind="stable")[:k]
+        return [news_list[i] for i in order.tolist()]
+
+    @classmethod
+    def news_above(cls, news_list, threshold, field="normalized_heat"):
+        """
+        取已保存快照中指定字段不低于阈值的新闻，保持原有顺序
+        """
+        if not news_list:
+            return []
+        column = cls.snapshot_column(news_list, field)
+        return [news_list[i] for i in np.nonzero(column >= threshold)[0].tolist()]
@@ -0,0 +1,139 @@
+"""
+热榜响应的流式解析
+
+上游热榜接口的响应形如 {"success": true, "data": [{"name": 平台, "data": [新闻, ...]}, ...]}，
+完整解析会为所有平台的全部新闻建立Python对象，而排除的平台和超出每平台数量上限的新闻随后就被丢弃。
+这里用ijson逐个读取解析事件，只为保留的新闻构建字典，排除的平台和超出上限的部分只扫描不建对象，
+以生成器的形式把标准化条目交给评分阶段。
+"""
+import ijson
+
+class HotlistStreamParser:
+    def __init__(self, exclude=None, max_per_platform=None):
+        """
+        初始化解析器
+
+        Args:
+            exclude (iterable, optional): 需要跳过的平台名称
+            max_per_platform (int, optional): 每个平台最多保留的新闻数量（只统计有标题的新闻），None表示不限
+        """
+        self.exclude = set(exclude or ())
+        self.max_per_platform = max_per_platform
+        # 响应顶层的标量字段（success、msg、code等）
+        self.meta = {}
+        # 平台 -> 保留的新闻数量，排除的平台为None
+        self.platforms = {}
+        self.skipped_items = 0
+
+    def items(self, source):
+        """
+        流式解析热榜响应
+
+        名称字段通常位于新闻列表之前；如果某个平台的新闻列表先出现，会先暂存最多max_per_platform条，
+        读到名称后再决定是否保留。
+
+        Args:
+            source: bytes、str或以二进制方式打开的文件对象
+
+        Yields:
+            dict: 标准化的新闻条目，包含title、url、hotness、platform
+
+        Raises:
+            ValueError: 数据不是有效的JSON
+        """
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+
+        cap = self.max_per_platform
+        # 嵌套深度：1顶层对象，2平台数组，3平台对象，4新闻数组，5新闻对象
+        depth = 0
+        keys = [None] * 8  # 每层对象当前的键
+        platform = None
+        pending = []  # 名称出现前读到的新闻
+        kept = 0
+        skip_depth = 0  # 非0时跳过直到深度回到该值以下
+        current = None
+
+        try:
+            for event, value in ijson.basic_parse(source, use_float=True):
+                if skip_depth:
+                    # 排除的平台或已达上限：只跟踪嵌套深度，不构建任何对象
+                    if event == "start_map" or event == "start_array":
+                        depth += 1
+                    elif event == "end_map" or event == "end_array":
+                        if depth == 5:
+                            self.skipped_items += 1
+                        depth -= 1
+                        if depth < skip_depth:
+                            skip_depth = 0
+                            if depth == 2:
+                                platform, pending, kept = None, [], 0
+                    continue
+
+                if event == "map_key":
+                    if depth < 8:
+                        keys[depth] = value
+                elif event == "start_map" or event == "start_array":
+                    depth += 1
+                    if depth == 5 and event == "start_map" and keys[3] == "data":
+                        current = {"title": "", "url": "", "hotness": "0"}
+                elif event == "end_map" or event == "end_array":
+                    if depth == 5 and current is not None:
+                        item, current = current, None
+                        if item["title"]:
+                            kept += 1
+                            if platform is None:
+                                pending.append(item)
+                            else:
+                                item["platform"] = platform
+                                self.platforms[platform] = kept
+                                yield item
+                            if cap is not None and kept >= cap:
+                                # 跳过当前新闻数组的剩余部分
+                                skip_depth = 4
+                    elif depth == 3 and event == "end_map":
+                        # 没有名称的平台归入None
+                        if platform is None and pending:
+                            self.platforms[None] = len(pending)
+                            for item in pending:
+                                item["platform"] = None
+                                yield item
+                        platform, pending, kept = None, [], 0
+                    depth -= 1
+                elif depth == 5 and current is not None:
+                    field = keys[5]
+                    if field == "title":
+                        current["title"] = value
+                    elif field == "url":
+                        current["url"] = value
+                    elif field == "hot":
+                        current["hotness"] = value
+                elif depth == 3 and keys[1] == "data" and keys[3] == "name":
+                    platform = value
+                    if platform in self.exclude:
+                        self.platforms[platform] = None
+                        self.skipped_items += len(pending)
+                        pending = []
+                        # 跳过平台对象的剩余部分
+                        skip_depth = 3
+                        continue
+                    self.platforms[platform] = len(pending)
+                    for item in pending:
+                        item["platform"] = platform
+                        yield item
+                    pending = []
+                elif depth == 1:
+                    self.meta[keys[1]] = value
+        except ijson.JSONError as e:
+            # 与json.loads一致抛出ValueError，调用方无需区分解析方式
+            raise ValueError(f"热榜数据不是有效的JSON: {e}") from e
+
+
+def iter_hotlist_items(source, exclude=None, max_per_platform=None):
+    """
+    流式解析热榜响应的便捷函数，参数见HotlistStreamParser
+
+    Returns:
+        generator: 标准化的新闻条目
+    """
+    return HotlistStreamParser(exclude, max_per_platform).items(source)
@@ -0,0 +1,81 @@
+"""
+热度字符串批量解析
+
+各平台热榜的热度字段格式不一（"671.5万"、"5337 万热度"、"3.6亿"、"1266.11热度"等），
+且同样的字符串会在每次采集的快照中反复出现。这里使用一条预编译的文法完成解析，
+并通过有界LRU缓存已解析过的字符串，批量接口直接返回NumPy浮点数组。
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# 单一文法：数字 + 可选空白 + 可选单位（万热度/亿/万/千）
+HOTNESS_PATTERN = re.compile(r'(\d+(?:\.\d*)?|\.\d+)\s*(万热度|亿|万|千)?')
+
+# 部分平台的热度值经过缩放，较小时需要放大一万倍
+SCALED_SOURCE_PATTERN = re.compile(r'36氪|澎湃')
+
+UNIT_MULTIPLIERS = {
+    None: 1,
+    '千': 1000,
+    '万': 10000,
+    '万热度': 10000,
+    '亿': 100000000
+}
+
+# 已解析字符串的缓存上限
+HOTNESS_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=HOTNESS_CACHE_SIZE)
+def _parse_hotness_text(text):
+    """解析单个热度字符串，结果由LRU缓存"""
+    match = HOTNESS_PATTERN.search(text.replace(',', ''))
+    if not match:
+        return 0.0
+
+    result = float(match.group(1)) * UNIT_MULTIPLIERS[match.group(2)]
+    if result < 1000 and SCALED_SOURCE_PATTERN.search(text):
+        result *= 10000
+    return result
+
+
+def parse_hotness_value(value):
+    """
+    将单个热度值解析为浮点数
+
+    Args:
+        value (str|int|float): 热度值，如"1.2万"、"3901 万热度"、12345
+
+    Returns:
+        float: 解析后的数值，无法解析时为0.0
+    """
+    if isinstance(value, bool) or value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str) or not value:
+        return 0.0
+    return _parse_hotness_text(value.strip())
+
+
+def parse_hotness_batch(values):
+    """
+    批量解析热度值
+
+    Args:
+        values (list): 原始热度值列表
+
+    Returns:
+        numpy.ndarray: 与输入等长的float64数组
+    """
+    return np.fromiter(
+        (parse_hotness_value(value) for value in values),
+        dtype=np.float64, count=len(values)
+    )
+
+
+def hotness_cache_info():
+    """返回解析缓存的命中统计"""
+    return _parse_hotness_text.cache_info()
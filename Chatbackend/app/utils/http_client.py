@@ -0,0 +1,219 @@
+"""
+热榜接口共享的HTTP抓取客户端
+
+- 进程内共享一个requests.Session，连接池复用keep-alive连接，默认请求gzip压缩
+- 短时响应缓存：TTL内的重复请求（如collect_news和process_hot_news先后取同一份数据）不访问网络
+- 条件请求：带上次响应的ETag/Last-Modified，上游未变化时只有一次304，不下载也不解析JSON
+- 上游不支持条件请求时比较响应体的MD5，内容相同同样视为未变化，且不重复解析
+验证信息可以通过validators参数传入，使不同进程之间也能发出条件请求，变化也相对调用方持久化的状态判断。
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 默认响应缓存时长（秒）
+DEFAULT_TTL = 30
+
+# 最多缓存的URL数量
+MAX_CACHE_ENTRIES = 64
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "Mozilla/5.0 (compatible; HotNewsCollector/1.0)",
+}
+
+
+class _Body:
+    """响应体及其解析结果，同一份内容的多个抓取结果共享一个实例"""
+
+    def __init__(self, content):
+        self.content = content
+        self.parsed = None
+        self.lock = threading.Lock()
+
+    def json(self):
+        with self.lock:
+            if self.parsed is None:
+                self.parsed = json.loads(self.content)
+        return self.parsed
+
+
+class FetchResult:
+    """一次抓取的结果，JSON只在首次调用json()时解析，并与内容相同的结果共享"""
+
+    def __init__(self, url, status_code, body=None, etag=None, last_modified=None,
+                 body_hash=None, changed=True, from_cache=False, elapsed=0.0):
+        self.url = url
+        self.status_code = status_code
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+        self.changed = changed
+        self.from_cache = from_cache
+        self.elapsed = elapsed
+
+    @property
+    def not_modified(self):
+        """上游返回304"""
+        return self.status_code == 304
+
+    @property
+    def content(self):
+        return self.body.content if self.body else None
+
+    def json(self):
+        """
+        解析响应体，多次调用只解析一次
+
+        Returns:
+            解析后的对象，没有响应体（跨进程条件请求得到304）时返回None。
+            返回的对象与缓存共享，调用方不应修改。
+        """
+        return self.body.json() if self.body else None
+
+    def validators(self):
+        """返回可持久化的验证信息，供下次条件请求使用"""
+        return {"etag": self.etag, "last_modified": self.last_modified, "body_hash": self.body_hash}
+
+    def derive(self, changed, from_cache=False, elapsed=0.0, status_code=None, etag=None, last_modified=None):
+        """以相同内容生成一个新结果"""
+        return FetchResult(self.url, status_code or self.status_code, self.body,
+                           etag or self.etag, last_modified or self.last_modified, self.body_hash,
+                           changed=changed, from_cache=from_cache, elapsed=elapsed)
+
+
+class HttpFetchClient:
+    def __init__(self, pool_size=10, ttl=DEFAULT_TTL, timeout=10, max_entries=MAX_CACHE_ENTRIES):
+        """
+        初始化抓取客户端
+
+        Args:
+            pool_size (int): 每个主机的连接池大小
+            ttl (float): 响应缓存时长（秒），0表示每次都发出（条件）请求
+            timeout (float): 默认超时时间（秒）
+            max_entries (int): 最多缓存的URL数量
+        """
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "unchanged_body": 0, "downloads": 0}
+
+    @staticmethod
+    def _cache_key(url, params):
+        if not params:
+            return url
+        return url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    def _remember(self, key, result):
+        with self.lock:
+            self.cache[key] = (time.time(), result)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def cached(self, url, params=None):
+        """返回URL最近一次的完整响应，没有时返回None"""
+        with self.lock:
+            entry = self.cache.get(self._cache_key(url, params))
+        return entry[1] if entry else None
+
+    def fetch(self, url, params=None, timeout=None, ttl=None, validators=None):
+        """
+        抓取URL
+
+        Args:
+            url (str): 地址
+            params (dict, optional): 查询参数
+            timeout (float, optional): 超时时间（秒），默认使用客户端配置
+            ttl (float, optional): 本次允许使用的缓存时长（秒），默认使用客户端配置
+            validators (dict, optional): 持久化的验证信息（etag、last_modified、body_hash），
+                                         传入时条件请求和变化判断都以它为准，而不是本进程上一次的响应
+
+        Returns:
+            FetchResult: 抓取结果，changed表示内容相对validators（未传入时相对本进程上一次响应）是否变化
+
+        Raises:
+            requests.exceptions.RequestException: 请求失败或返回错误状态码
+        """
+        key = self._cache_key(url, params)
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            entry = self.cache.get(key)
+        previous = entry[1] if entry else None
+
+        if entry and time.time() - entry[0] < ttl:
+            self.stats["cache_hits"] += 1
+            # 缓存的内容可能是其他调用方抓到的新内容，传入validators时相对它判断是否变化
+            changed = bool(validators) and previous.body_hash != validators.get("body_hash")
+            return previous.derive(changed=changed, from_cache=True)
+
+        # 传入validators时以调用方持久化的状态为准，进程内缓存只用于复用内容相同的响应体
+        known = validators or (previous.validators() if previous else {})
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        self.stats["requests"] += 1
+        start = time.time()
+        response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+        elapsed = time.time() - start
+
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            if previous is None or previous.body_hash != known.get("body_hash"):
+                # 只有持久化的验证信息，本进程没有对应的响应体
+                return FetchResult(url, 304, etag=known.get("etag"), last_modified=known.get("last_modified"),
+                                   body_hash=known.get("body_hash"), changed=False, elapsed=elapsed)
+            result = previous.derive(changed=False, elapsed=elapsed, status_code=304)
+            self._remember(key, result)
+            return result
+
+        response.raise_for_status()
+        self.stats["downloads"] += 1
+        content = response.content
+        body_hash = hashlib.md5(content).hexdigest()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        changed = known.get("body_hash") != body_hash
+        if not changed:
+            # 上游不支持条件请求但内容没变
+            self.stats["unchanged_body"] += 1
+
+        if previous is not None and previous.body_hash == body_hash:
+            # 与进程内缓存的内容相同，沿用已解析的JSON
+            result = previous.derive(changed=changed, elapsed=elapsed, status_code=response.status_code,
+                                     etag=etag, last_modified=last_modified)
+        else:
+            result = FetchResult(url, response.status_code, _Body(content), etag, last_modified, body_hash,
+                                 changed=changed, elapsed=elapsed)
+        self._remember(key, result)
+        return result
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """获取进程内共享的抓取客户端"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpFetchClient()
+    return _client
@@ -0,0 +1,99 @@
+"""
+分析队列的数值优先级与老化
+
+每条任务入队时计算priority_score（0~1），由热度级别、平台覆盖数和平台分组多样性决定，
+再换算为调度键schedule_key = 入队时间 - 分数 * MAX_BOOST_SECONDS + 重试次数 * RETRY_PENALTY_SECONDS。
+队列按schedule_key升序领取：高分任务最多可插队MAX_BOOST_SECONDS，
+而任何任务的调度键都不会随时间变大，等待足够久后必然排到前面，不会被持续到来的高热度任务饿死。
+"""
+from datetime import datetime
+
+# 热度级别对应的分数
+HEAT_LEVEL_SCORES = {
+    "爆": 1.0,
+    "热": 0.75,
+    "高": 0.5,
+    "中": 0.25,
+    "低": 0.0
+}
+
+# 上升话题尚未达到高热度级别，按该热度分数参与排序，以便提前分析
+RISING_HEAT_SCORE = 0.75
+
+# 各项因子的权重
+HEAT_WEIGHT = 0.6
+PLATFORM_WEIGHT = 0.25
+DIVERSITY_WEIGHT = 0.15
+
+# 达到满分所需的平台数和平台分组数
+FULL_PLATFORM_COUNT = 5
+FULL_CATEGORY_DIVERSITY = 3
+
+# 满分任务最多可提前的秒数
+MAX_BOOST_SECONDS = 6 * 3600
+
+# 每次重试推迟的秒数
+RETRY_PENALTY_SECONDS = 600
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+def priority_score(news_data):
+    """
+    计算任务的优先级分数
+
+    Args:
+        news_data (dict): 入队的新闻数据，可包含heat_level、normalized_heat、
+                          platform_count、platforms、category_diversity、rising
+
+    Returns:
+        float: 0~1之间的分数
+    """
+    heat = HEAT_LEVEL_SCORES.get(news_data.get("heat_level"))
+    if heat is None:
+        heat = min(max(float(news_data.get("normalized_heat", 0) or 0), 0.0), 1.0)
+    if news_data.get("rising"):
+        heat = max(heat, RISING_HEAT_SCORE)
+
+    platform_count = news_data.get("platform_count") or len(news_data.get("platforms") or []) or 1
+    diversity = news_data.get("category_diversity", 0) or 0
+
+    score = (HEAT_WEIGHT * heat
+             + PLATFORM_WEIGHT * min(platform_count / FULL_PLATFORM_COUNT, 1.0)
+             + DIVERSITY_WEIGHT * min(diversity / FULL_CATEGORY_DIVERSITY, 1.0))
+    return round(score, 4)
+
+
+def schedule_key(queued_at, score, attempts=0):
+    """
+    计算调度键，数值越小越先被领取
+
+    Args:
+        queued_at (str|datetime): 入队时间
+        score (float): 优先级分数
+        attempts (int): 已尝试次数
+
+    Returns:
+        float: 调度键（秒）
+    """
+    return (_to_datetime(queued_at).timestamp()
+            - score * MAX_BOOST_SECONDS
+            + attempts * RETRY_PENALTY_SECONDS)
+
+
+def queue_fields(news_data, queued_at, attempts=0):
+    """返回入队时需要写入的priority_score和schedule_key字段"""
+    score = priority_score(news_data)
+    return {
+        "priority_score": score,
+        "schedule_key": schedule_key(queued_at, score, attempts)
+    }
@@ -0,0 +1,362 @@
+"""
+LLM调用的集群级令牌桶限流
+
+每个供应商/模型有两个令牌桶：请求数（RPM）和token数（TPM），都按每分钟容量匀速补充。
+调用前先估算本次消耗的token并从两个桶中同时扣除，任意一个不足则等待到补足为止，
+调用结束后用实际用量修正估算值（多退少补，token桶允许短暂透支）。
+RPM或TPM配置为0（或负数）表示该维度不限，不检查也不扣除对应的桶。
+- RedisTokenBucket：桶状态存放在Redis，检查和扣除在一个Lua脚本中原子完成，
+  时间取Redis服务器时间，所有Celery worker和Web进程共享同一份配额
+- LocalTokenBucket：进程内实现，用于测试和Redis不可用时的降级
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# 桶状态在Redis中的过期时间（毫秒），空闲超过该时间的桶视为已满
+BUCKET_TTL_MS = 120000
+
+# Redis不可用后改用本地令牌桶的时长（秒）
+REDIS_RETRY_SECONDS = 30
+
+# KEYS[1]=请求桶 KEYS[2]=token桶
+# ARGV: rpm, tpm, 请求数, token数, 是否扣除(1)或只修正token(0)
+# 返回需要等待的毫秒数，0表示已扣除
+TOKEN_BUCKET_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local requests = tonumber(ARGV[3])
+local tokens = tonumber(ARGV[4])
+local acquire = ARGV[5] == '1'
+
+local function level(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local value = tonumber(state[1])
+    if value == nil then
+        return capacity
+    end
+    return math.min(capacity, value + (now - tonumber(state[2])) * capacity / 60000)
+end
+
+local function store(key, value)
+    redis.call('HSET', key, 'level', value, 'ts', now)
+    redis.call('PEXPIRE', key, tonumber(ARGV[6]))
+end
+
+local request_level = rpm > 0 and level(KEYS[1], rpm) or 0
+local token_level = tpm > 0 and level(KEYS[2], tpm) or 0
+
+if not acquire then
+    if tpm > 0 then
+        store(KEYS[2], token_level - tokens)
+    end
+    return 0
+end
+
+local wait = 0
+if rpm > 0 and request_level < requests then
+    wait = (requests - request_level) * 60000 / rpm
+end
+if tpm > 0 and token_level < tokens then
+    wait = math.max(wait, (tokens - token_level) * 60000 / tpm)
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+
+if rpm > 0 then
+    store(KEYS[1], request_level - requests)
+end
+if tpm > 0 then
+    store(KEYS[2], token_level - tokens)
+end
+return 0
+"""
+
+
+class RateLimitExceeded(Exception):
+    """在超时时间内未能取得调用配额"""
+
+
+class LocalTokenBucket:
+    """进程内令牌桶，与RedisTokenBucket接口一致"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _level(self, key, capacity, now):
+        value, ts = self.buckets.get(key, (capacity, now))
+        return min(capacity, value + (now - ts) * capacity / 60)
+
+    def try_acquire(self, keys, rpm, tpm, requests=1, tokens=0):
+        """
+        尝试扣除配额
+
+        Args:
+            keys (tuple): (请求桶键, token桶键)
+            rpm (float): 每分钟请求数，0表示不限
+            tpm (float): 每分钟token数，0表示不限
+            requests (int): 本次消耗的请求数
+            tokens (int): 本次预计消耗的token数
+
+        Returns:
+            float: 需要等待的秒数，0表示已扣除
+        """
+        request_key, token_key = keys
+        with self.lock:
+            now = self.clock()
+            request_level = self._level(request_key, rpm, now) if rpm > 0 else 0
+            token_level = self._level(token_key, tpm, now) if tpm > 0 else 0
+
+            wait = 0
+            if rpm > 0 and request_level < requests:
+                wait = (requests - request_level) * 60 / rpm
+            if tpm > 0 and token_level < tokens:
+                wait = max(wait, (tokens - token_level) * 60 / tpm)
+            if wait > 0:
+                return wait
+
+            if rpm > 0:
+                self.buckets[request_key] = (request_level - requests, now)
+            if tpm > 0:
+                self.buckets[token_key] = (token_level - tokens, now)
+            return 0
+
+    def adjust(self, keys, rpm, tpm, tokens):
+        """从token桶中再扣除tokens个（负数为退还）"""
+        if tpm <= 0:
+            return
+        token_key = keys[1]
+        with self.lock:
+            now = self.clock()
+            self.buckets[token_key] = (self._level(token_key, tpm, now) - tokens, now)
+
+
+class RedisTokenBucket:
+    """Redis令牌桶，多进程共享配额"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def try_acquire(self, keys, rpm, tpm, requests=1, tokens=0):
+        """参见LocalTokenBucket.try_acquire"""
+        wait_ms = self.script(keys=list(keys), args=[rpm, tpm, requests, tokens, 1, BUCKET_TTL_MS])
+        return int(wait_ms) / 1000
+
+    def adjust(self, keys, rpm, tpm, tokens):
+        """参见LocalTokenBucket.adjust"""
+        if tpm <= 0:
+            return
+        self.script(keys=list(keys), args=[rpm, tpm, 0, tokens, 0, BUCKET_TTL_MS])
+
+
+class RateLimiter:
+    def __init__(self, backend, limits=None, default_rpm=300, default_tpm=0, prefix="llm_rate"):
+        """
+        初始化限流器
+
+        Args:
+            backend: RedisTokenBucket或LocalTokenBucket
+            limits (dict, optional): 按"供应商:模型"或"供应商"配置的{"rpm": ..., "tpm": ...}
+            default_rpm (float): 未单独配置时的每分钟请求数，0表示不限
+            default_tpm (float): 未单独配置时的每分钟token数，0表示不限
+            prefix (str): Redis键前缀
+        """
+        self.backend = backend
+        self.limits = limits or {}
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.prefix = prefix
+        self.fallback = LocalTokenBucket()
+        self.backend_down_until = 0
+        self.stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "backend_errors": 0}
+
+    def limits_for(self, provider, model):
+        """返回(rpm, tpm)，优先使用"供应商:模型"的配置，其次是供应商的配置"""
+        limit = self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+        return limit.get("rpm", self.default_rpm), limit.get("tpm", self.default_tpm)
+
+    def _keys(self, provider, model):
+        return f"{self.prefix}:{provider}:{model}:req", f"{self.prefix}:{provider}:{model}:tok"
+
+    def _call(self, method, *args):
+        """调用后端，Redis出错时在一段时间内改用进程内令牌桶"""
+        if time.time() >= self.backend_down_until:
+            try:
+                return getattr(self.backend, method)(*args)
+            except Exception as e:
+                self.stats["backend_errors"] += 1
+                self.backend_down_until = time.time() + REDIS_RETRY_SECONDS
+                print(f"⚠️ 限流后端不可用，{REDIS_RETRY_SECONDS}秒内使用本地令牌桶: {str(e)}")
+        return getattr(self.fallback, method)(*args)
+
+    def try_acquire(self, provider, model, tokens=0):
+        """
+        尝试取得一次调用的配额
+
+        Args:
+            provider (str): 供应商
+            model (str): 模型名称
+            tokens (int): 预计消耗的token数
+
+        Returns:
+            float: 需要等待的秒数，0表示已取得配额
+        """
+        rpm, tpm = self.limits_for(provider, model)
+        if rpm <= 0 and tpm <= 0:
+            return 0
+        # 单次请求超过整桶容量时按整桶计算，避免永远等不到
+        tokens = min(tokens, tpm) if tpm > 0 else 0
+        return self._call("try_acquire", self._keys(provider, model), rpm, tpm, 1, tokens)
+
+    def _granted(self, waited):
+        self.stats["acquired"] += 1
+        if waited:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds"] += waited
+
+    def acquire(self, provider, model, tokens=0, timeout=60):
+        """
+        阻塞直到取得配额
+
+        Raises:
+            RateLimitExceeded: timeout秒内未取得配额
+        """
+        deadline = time.time() + timeout
+        waited = 0
+        while True:
+            wait = self.try_acquire(provider, model, tokens)
+            if wait <= 0:
+                self._granted(waited)
+                return waited
+            if time.time() + wait > deadline:
+                raise RateLimitExceeded(f"{provider}:{model} 在{timeout}秒内未取得调用配额")
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, provider, model, tokens=0, timeout=60):
+        """acquire的异步版本，Redis调用在线程中执行，等待期间不占用事件循环"""
+        deadline = time.time() + timeout
+        waited = 0
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, provider, model, tokens)
+            if wait <= 0:
+                self._granted(waited)
+                return waited
+            if time.time() + wait > deadline:
+                raise RateLimitExceeded(f"{provider}:{model} 在{timeout}秒内未取得调用配额")
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def record_usage(self, provider, model, estimated_tokens, actual_tokens):
+        """
+        用实际token用量修正调用前的估算
+
+        Args:
+            estimated_tokens (int): acquire时传入的预计token数
+            actual_tokens (int): 实际消耗的token数
+        """
+        rpm, tpm = self.limits_for(provider, model)
+        if tpm <= 0 or actual_tokens is None:
+            return
+        delta = actual_tokens - min(estimated_tokens, tpm)
+        if delta:
+            self._call("adjust", self._keys(provider, model), rpm, tpm, delta)
+
+
+def provider_from_url(base_url):
+    """用API地址的主机名作为供应商标识"""
+    return urlparse(base_url or "").hostname or "default"
+
+
+def estimate_tokens(messages=None, text=None, completion_tokens=0):
+    """
+    粗略估算token数：中文等非ASCII字符按每字1个，ASCII字符按每4个1个
+
+    Args:
+        messages (list, optional): OpenAI格式的消息列表
+        text (str, optional): 单段文本
+        completion_tokens (int): 额外预留的输出token数
+
+    Returns:
+        int: 估算的token数
+    """
+    parts = [text or ""] + [str(m.get("content") or "") for m in messages or []]
+    total = 0
+    for part in parts:
+        non_ascii = sum(1 for ch in part if ord(ch) > 127)
+        total += non_ascii + math.ceil((len(part) - non_ascii) / 4)
+    return total + 4 * len(messages or []) + completion_tokens
+
+
+def _setting(key, default):
+    """读取Flask配置，不在应用上下文中时读取环境变量"""
+    try:
+        from flask import current_app
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return os.getenv(key, default)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    获取进程内共享的限流器
+
+    RATE_LIMIT_BACKEND为redis时使用RATE_LIMIT_REDIS_URL。启动时连接失败不会固定使用本地令牌桶，
+    而是按后端出错处理：REDIS_RETRY_SECONDS秒内使用本地令牌桶，之后重新尝试Redis。
+    """
+    global _limiter
+    if _limiter is not None:
+        return _limiter
+
+    with _limiter_lock:
+        if _limiter is not None:
+            return _limiter
+
+        limits = _setting('LLM_RATE_LIMITS', {})
+        if isinstance(limits, str):
+            limits = json.loads(limits) if limits else {}
+
+        backend = None
+        backend_down = False
+        if str(_setting('RATE_LIMIT_BACKEND', 'redis')).lower() == 'redis':
+            try:
+                import redis
+                client = redis.Redis.from_url(_setting('RATE_LIMIT_REDIS_URL', 'redis://redis:6379/2'),
+                                              socket_timeout=2, socket_connect_timeout=2)
+                backend = RedisTokenBucket(client)
+            except Exception as e:
+                print(f"⚠️ 无法创建Redis限流后端，使用本地令牌桶: {str(e)}")
+            else:
+                try:
+                    client.ping()
+                except Exception as e:
+                    backend_down = True
+                    print(f"⚠️ 无法连接Redis限流后端，{REDIS_RETRY_SECONDS}秒内使用本地令牌桶: {str(e)}")
+        if backend is None:
+            backend = LocalTokenBucket()
+
+        limiter = RateLimiter(
+            backend,
+            limits=limits,
+            default_rpm=float(_setting('LLM_DEFAULT_RPM', 300)),
+            default_tpm=float(_setting('LLM_DEFAULT_TPM', 0))
+        )
+        if backend_down:
+            limiter.backend_down_until = time.time() + REDIS_RETRY_SECONDS
+        _limiter = limiter
+        return _limiter
@@ -0,0 +1,217 @@
+"""
+标题近似重复检测：字符n-gram + MinHash/LSH
+
+中文标题不做分词，规范化后直接按字符n-gram切分为集合，用Jaccard相似度衡量两个标题的重合程度。
+MinHash把集合压缩为定长签名，LSH按band分桶，只有至少一个band完全相同的标题才作为候选，
+查询和插入都与已有标题数量无关，再对候选计算精确的Jaccard相似度。
+"""
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+# MinHash使用的梅森素数和32位掩码
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 话题标记、空白和标点
+_HASHTAG_RE = re.compile(r"#")
+_NOISE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+# 默认参数：128个排列分为32个band，每band 4行，候选阈值约为(1/32)^(1/4)≈0.42，
+# Jaccard为0.55的标题成为候选的概率约95%，0.3的约23%
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+DEFAULT_NGRAM = 2
+
+
+def normalize_title(title):
+    """
+    规范化标题：全角转半角、转小写、去掉话题标记、空白和标点
+
+    Args:
+        title (str): 原始标题
+
+    Returns:
+        str: 规范化后的标题
+    """
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    text = _HASHTAG_RE.sub("", text)
+    return _NOISE_RE.sub("", text)
+
+
+def shingles(title, n=DEFAULT_NGRAM):
+    """
+    将标题切分为字符n-gram集合
+
+    Args:
+        title (str): 原始标题
+        n (int): n-gram长度
+
+    Returns:
+        set: n-gram集合，短于n的标题返回只含整个标题的集合
+    """
+    text = normalize_title(title)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a, b):
+    """两个集合的Jaccard相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        """
+        初始化MinHash签名生成器
+
+        Args:
+            num_perm (int): 排列（哈希函数）数量，即签名长度
+            seed (int): 随机种子，同一种子生成的签名可以相互比较
+        """
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, (1 << 61) - 1, num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        """
+        计算集合的MinHash签名
+
+        Args:
+            shingle_set (set): n-gram集合
+
+        Returns:
+            np.ndarray: 长度为num_perm的uint64签名
+        """
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # crc32在不同进程间稳定，不受PYTHONHASHSEED影响
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+                             dtype=np.uint64, count=len(shingle_set))
+        permuted = (hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """由两个MinHash签名估计Jaccard相似度"""
+    return float(np.mean(sig_a == sig_b))
+
+
+class MinHashLSH:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+        """
+        初始化LSH索引
+
+        Args:
+            num_perm (int): 签名长度，需能被bands整除
+            bands (int): band数量，band越多候选阈值越低
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm必须能被bands整除")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.tables = [{} for _ in range(bands)]
+        self.band_keys = {}
+
+    def _bands(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def insert(self, key, signature):
+        """插入一个签名，key已存在时先移除旧签名"""
+        if key in self.band_keys:
+            self.remove(key)
+        band_keys = self._bands(signature)
+        for table, band_key in zip(self.tables, band_keys):
+            table.setdefault(band_key, set()).add(key)
+        self.band_keys[key] = band_keys
+
+    def remove(self, key):
+        """移除一个签名"""
+        for table, band_key in zip(self.tables, self.band_keys.pop(key, [])):
+            bucket = table.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[band_key]
+
+    def query(self, signature):
+        """
+        查询候选
+
+        Args:
+            signature (np.ndarray): MinHash签名
+
+        Returns:
+            set: 至少有一个band相同的key集合
+        """
+        candidates = set()
+        for table, band_key in zip(self.tables, self._bands(signature)):
+            candidates.update(table.get(band_key, ()))
+        return candidates
+
+    def __contains__(self, key):
+        return key in self.band_keys
+
+    def __len__(self):
+        return len(self.band_keys)
+
+
+def cluster_titles(titles, threshold, exclusive=None, hasher=None):
+    """
+    用LSH + 并查集把近似标题聚为一类
+
+    依次把标题插入LSH索引，每个标题只与已插入的候选比较精确的Jaccard相似度，
+    整体复杂度与标题数量近似线性。
+
+    Args:
+        titles (list): 标题列表
+        threshold (float): 合并所需的最低Jaccard相似度
+        exclusive (list, optional): 与titles等长的集合列表（如每个标题出现的平台），
+                                    两类的集合有交集时不合并，避免同一平台的相关话题被连成一串
+        hasher (MinHasher, optional): 签名生成器，默认新建
+
+    Returns:
+        list: 每个标题所属类的代表下标（类中最先出现的标题）
+    """
+    hasher = hasher or MinHasher()
+    index = MinHashLSH(hasher.num_perm)
+    title_shingles = [shingles(title) for title in titles]
+    parent = list(range(len(titles)))
+    members = [set(keys) for keys in exclusive] if exclusive is not None else None
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, current in enumerate(title_shingles):
+        if not current:
+            continue
+        signature = hasher.signature(current)
+        scored = sorted(
+            ((jaccard(current, title_shingles[j]), j) for j in index.query(signature)),
+            reverse=True
+        )
+        for score, j in scored:
+            if score < threshold:
+                break
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j:
+                continue
+            if members is not None and members[root_i] & members[root_j]:
+                continue
+            # 以较早出现的标题为代表
+            root, child = min(root_i, root_j), max(root_i, root_j)
+            parent[child] = root
+            if members is not None:
+                members[root] |= members[child]
+        index.insert(i, signature)
+
+    return [find(i) for i in range(len(titles))]
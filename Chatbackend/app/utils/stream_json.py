@@ -0,0 +1,286 @@
+"""
+流式JSON校验
+
+模型的分析结果以流式分片返回。StreamingJSONValidator逐个分片消费，边接收边检查JSON语法：
+- 语法错误（未加引号的占位符、括号不匹配、非法数字等）无法修复，立即抛出StreamingJSONError，
+  调用方可以关闭流，不再等待剩余输出
+- 顶层字段的值一结束就解析出来并按schema检查形状，形状不符的字段被丢弃（记入warnings），
+  由validate_and_fix_data补齐
+- 顶层对象闭合后即完成，之后的文字（代码块结束标记、说明文字）不再需要
+- 输出被截断时，已完成的顶层字段仍可通过fields取得
+
+开头允许```json代码块标记和少量说明文字。
+"""
+import json
+import re
+
+# JSON开始前最多允许的说明文字长度
+MAX_PREAMBLE = 200
+
+_NUMBER = re.compile(r"-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?$")
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+_NUMBER_CHARS = set("0123456789+-.eE")
+_WHITESPACE = " \t\r\n"
+
+
+class StreamingJSONError(json.JSONDecodeError):
+    """流式输出中出现无法修复的JSON结构错误"""
+
+
+def check_shape(value, spec):
+    """
+    检查值是否符合形状说明
+
+    Args:
+        value: 解析出的值
+        spec: 类型或类型元组；字典表示对象，列出的键存在时递归检查；
+              单元素列表表示数组，每个元素按该元素说明检查
+
+    Returns:
+        bool: 是否符合
+    """
+    if isinstance(spec, dict):
+        return isinstance(value, dict) and all(
+            check_shape(value[key], sub_spec) for key, sub_spec in spec.items() if key in value
+        )
+    if isinstance(spec, list):
+        return isinstance(value, list) and all(check_shape(item, spec[0]) for item in value)
+    return isinstance(value, spec)
+
+
+class StreamingJSONValidator:
+    def __init__(self, expect="object", schema=None, max_preamble=MAX_PREAMBLE):
+        """
+        初始化流式校验器
+
+        Args:
+            expect (str): 顶层结构，object、array或any
+            schema (dict, optional): 顶层对象各字段的形状说明，见check_shape
+            max_preamble (int): JSON开始前最多允许的说明文字长度
+        """
+        self.expect = expect
+        self.schema = schema or {}
+        self.max_preamble = max_preamble
+        self.text = ""
+        self.fields = {}
+        self.warnings = []
+        self.started = False
+        self.done = False
+        self._preamble = 0
+        self._position = 0
+        self._start = None
+        self._end = None
+        # 容器栈，每项为 [类型, 状态]
+        self._stack = []
+        self._scalar = None
+        self._escape = 0
+        self._literal = ""
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+        self._value_pos = None
+
+    def _error(self, message):
+        raise StreamingJSONError(message, self.text, self._position)
+
+    def feed(self, chunk):
+        """
+        消费一个分片
+
+        Args:
+            chunk (str): 新到达的文本
+
+        Returns:
+            bool: 顶层JSON是否已经完整
+
+        Raises:
+            StreamingJSONError: 出现无法修复的结构错误
+        """
+        if self.done or not chunk:
+            return self.done
+        self.text += chunk
+        text = self.text
+        while self._position < len(text) and not self.done:
+            if not self.started:
+                self._find_start(text)
+                continue
+            self._step(text[self._position])
+            self._position += 1
+        return self.done
+
+    def _find_start(self, text):
+        """跳过代码块标记和说明文字，找到顶层JSON的起点"""
+        char = text[self._position]
+        opener = {"object": "{", "array": "["}.get(self.expect, "{[")
+        if char in opener:
+            self.started = True
+            self._start = self._position
+            return
+        if char in "{[":
+            self._error(f"顶层应为{self.expect}")
+        if char not in _WHITESPACE and char != "`":
+            self._preamble += 1
+            if self._preamble > self.max_preamble:
+                self._error("JSON前的说明文字过长")
+        self._position += 1
+
+    def _step(self, char):
+        if self._scalar == "string":
+            self._string_char(char)
+            return
+        if self._scalar == "number":
+            if char in _NUMBER_CHARS:
+                return
+            self._end_number()
+        elif self._scalar == "literal":
+            expected = self._literal[self._position - self._value_pos]
+            if char != expected:
+                self._error(f"无效的字面量，应为{self._literal}")
+            if self._position - self._value_pos == len(self._literal) - 1:
+                self._scalar = None
+                self._value_done(self._position + 1)
+            return
+
+        if char in _WHITESPACE:
+            return
+        if not self._stack:
+            # 只有起点处会进入这里
+            self._open(char)
+            return
+
+        kind, state = self._stack[-1]
+        if kind == "o":
+            if state in ("key_or_end", "key"):
+                if char == '"':
+                    self._scalar = "string"
+                    self._escape = 0
+                    if len(self._stack) == 1:
+                        self._key_start = self._position
+                elif char == "}" and state == "key_or_end":
+                    self._close()
+                else:
+                    self._error("对象中应为字段名")
+            elif state == "colon":
+                if char != ":":
+                    self._error("字段名后应为冒号")
+                self._stack[-1][1] = "value"
+            elif state == "value":
+                self._begin_value(char)
+            elif state == "comma_or_end":
+                if char == ",":
+                    self._stack[-1][1] = "key"
+                elif char == "}":
+                    self._close()
+                else:
+                    self._error("对象中应为逗号或}")
+        else:
+            if state == "comma_or_end":
+                if char == ",":
+                    self._stack[-1][1] = "value"
+                elif char == "]":
+                    self._close()
+                else:
+                    self._error("数组中应为逗号或]")
+            elif char == "]" and state == "value_or_end":
+                self._close()
+            else:
+                self._begin_value(char)
+
+    def _open(self, char):
+        if char == "{":
+            self._stack.append(["o", "key_or_end"])
+        elif char == "[":
+            self._stack.append(["a", "value_or_end"])
+        else:
+            self._error(f"意外的字符 {char!r}")
+
+    def _begin_value(self, char):
+        if len(self._stack) == 1:
+            self._value_start = self._position
+        if char in "{[":
+            self._open(char)
+        elif char == '"':
+            self._scalar = "string"
+            self._escape = 0
+        elif char == "-" or char.isdigit():
+            self._scalar = "number"
+            self._value_pos = self._position
+        elif char in _LITERALS:
+            self._scalar = "literal"
+            self._literal = _LITERALS[char]
+            self._value_pos = self._position
+        else:
+            self._error(f"意外的字符 {char!r}")
+
+    def _string_char(self, char):
+        if self._escape == 1:
+            if char == "u":
+                self._escape = 5
+            elif char in '"\\/bfnrt':
+                self._escape = 0
+            else:
+                self._error("无效的转义字符")
+        elif self._escape > 1:
+            if char not in "0123456789abcdefABCDEF":
+                self._error("无效的\\u转义")
+            self._escape = 0 if self._escape == 2 else self._escape - 1
+        elif char == "\\":
+            self._escape = 1
+        elif char == '"':
+            self._scalar = None
+            kind, state = self._stack[-1]
+            if kind == "o" and state in ("key_or_end", "key"):
+                if len(self._stack) == 1:
+                    self._key = json.loads(self.text[self._key_start:self._position + 1], strict=False)
+                self._stack[-1][1] = "colon"
+            else:
+                self._value_done(self._position + 1)
+
+    def _end_number(self):
+        token = self.text[self._value_pos:self._position]
+        if not _NUMBER.match(token):
+            self._error(f"无效的数字 {token}")
+        self._scalar = None
+        self._value_done(self._position)
+
+    def _close(self):
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+            self._end = self._position + 1
+            return
+        self._value_done(self._position + 1)
+
+    def _value_done(self, end):
+        """当前容器中的一个值结束，end为该值在text中的结束位置（不含）"""
+        kind = self._stack[-1][0]
+        self._stack[-1][1] = "comma_or_end"
+        if len(self._stack) == 1 and kind == "o" and self._key is not None:
+            self._field_done(self._key, self.text[self._value_start:end])
+            self._key = None
+
+    def _field_done(self, key, raw):
+        """顶层字段结束：解析并检查形状，不符合的字段丢弃"""
+        value = json.loads(raw, strict=False)
+        spec = self.schema.get(key)
+        if spec is not None and not check_shape(value, spec):
+            self.warnings.append(f"字段{key}的结构不符合要求，已丢弃")
+            return
+        self.fields[key] = value
+
+    def result(self):
+        """
+        返回完整的顶层JSON
+
+        Returns:
+            dict|list: 解析结果，对象中形状不符的字段已丢弃
+
+        Raises:
+            StreamingJSONError: 输出不完整
+        """
+        if not self.done:
+            self._position = len(self.text)
+            self._error("输出不完整")
+        if self.text[self._start] == "{":
+            return dict(self.fields)
+        return json.loads(self.text[self._start:self._end], strict=False)
@@ -112,6 +112,10 @@ celery.conf.beat_schedule = {
         'task': 'tasks.smart_collect',
         'schedule': timedelta(minutes=30),  # 每 30 分钟执行 (1800 秒)
     },
+    'retention-every-6-hours': {
+        'task': 'tasks.retention',
+        'schedule': timedelta(hours=6),
+    },
     'analyze-trending-every-4-hours': {
         'task': 'tasks.analyze_trending',
         'schedule': timedelta(hours=24),     # 每 4 小时执行 (14400 秒)
@@ -121,6 +125,16 @@ celery.conf.beat_schedule = {
     },
 }
 
+# 自适应采集：每分钟检查一次调度器，到达按上游刷新节奏安排的时间才执行智能采集，
+# 取代固定间隔的collect_news和smart_collect（两个任务仍可手动调用）
+if os.environ.get('ADAPTIVE_COLLECTION_ENABLED', 'True').lower() == 'true':
+    celery.conf.beat_schedule.pop('collect-news-every-hour', None)
+    celery.conf.beat_schedule.pop('smart-collect-every-30-minutes', None)
+    celery.conf.beat_schedule['collection-tick-every-minute'] = {
+        'task': 'tasks.collection_tick',
+        'schedule': timedelta(minutes=1),
+    }
+
 print("[Celery App] Celery 应用实例已创建并配置。")
 print(f"[Celery App] Broker URL: {redis_url}")
 print(f"[Celery App] Result Backend URL: {result_backend_url}")
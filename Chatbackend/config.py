@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,6 +14,13 @@ class Config:
     # News API settings
     NEWS_API_KEY = os.getenv('NEWS_API_KEY')
     NEWS_API_BASE_URL = os.getenv('NEWS_API_BASE_URL', 'https://api.vvhan.com/api/hotlist/all')
+    FALLBACK_NEWS_API_URL = os.getenv('FALLBACK_NEWS_API_URL')
+    # 热榜数据源（JSON列表，每项含type、name、url等，见app.services.news_sources），
+    # 为空时使用NEWS_API_BASE_URL和FALLBACK_NEWS_API_URL；所有数据源并发抓取，各自超时（秒）和熔断
+    NEWS_SOURCES = json.loads(os.getenv('NEWS_SOURCES', '[]'))
+    NEWS_SOURCE_TIMEOUT = float(os.getenv('NEWS_SOURCE_TIMEOUT', 8))
+    NEWS_SOURCE_BREAKER_THRESHOLD = int(os.getenv('NEWS_SOURCE_BREAKER_THRESHOLD', 3))
+    NEWS_SOURCE_BREAKER_RESET_SECONDS = float(os.getenv('NEWS_SOURCE_BREAKER_RESET_SECONDS', 120))
     
     # OpenAI settings
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-1046332dd90148be93f87c7c30fe0e41')
@@ -34,7 +42,62 @@ class Config:
     # News analysis settings
     NEWS_UPDATE_INTERVAL = int(os.getenv('NEWS_UPDATE_INTERVAL', 3600))  # 1 hour in seconds
     MAX_WORKERS = int(os.getenv('MAX_WORKERS', 16))
-    
+    # 异步分析引擎：同时在途的最大请求数、单个请求超时（秒）、整批分析总时限（秒，不设置则不限）
+    ASYNC_ANALYSIS_ENABLED = os.getenv('ASYNC_ANALYSIS_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_MAX_CONCURRENCY = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', 64))
+    ANALYSIS_REQUEST_TIMEOUT = int(os.getenv('ANALYSIS_REQUEST_TIMEOUT', 120))
+    ANALYSIS_TOTAL_TIMEOUT = int(os.getenv('ANALYSIS_TOTAL_TIMEOUT')) if os.getenv('ANALYSIS_TOTAL_TIMEOUT') else None
+    # 每次请求分析的新闻条数（1为逐条请求），批量结果中缺失或无效的条目自动改为逐条分析
+    ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', 1))
+    # 刷新模式：最近一次完整分析未超过ANALYSIS_FULL_MAX_AGE_HOURS小时的新闻再次分析时，
+    # 只更新heatTrend、timeline、emotion和stance；热度最高的ANALYSIS_REFRESH_TOP_N条新闻
+    # 每ANALYSIS_REFRESH_TOP_HOURS小时刷新一次，其余新闻仍为24小时
+    ANALYSIS_REFRESH_ENABLED = os.getenv('ANALYSIS_REFRESH_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_FULL_MAX_AGE_HOURS = float(os.getenv('ANALYSIS_FULL_MAX_AGE_HOURS', 72))
+    ANALYSIS_REFRESH_TOP_N = int(os.getenv('ANALYSIS_REFRESH_TOP_N', 10))
+    ANALYSIS_REFRESH_TOP_HOURS = float(os.getenv('ANALYSIS_REFRESH_TOP_HOURS', 3))
+    # 模型档位，按能力从高到低排列，JSON格式，未配置时全部使用QWEN_MODEL，如
+    # [{"name": "head", "model": "qwen-max", "min_score": 0.5},
+    #  {"name": "tail", "model": "qwen-turbo", "enable_search": false}]
+    # 可选base_url、api_key（默认QWEN_BASE_URL、QWEN_API_KEY）和max_p95（秒，近期p95耗时超过时暂不使用该档位）
+    ANALYSIS_MODEL_TIERS = json.loads(os.getenv('ANALYSIS_MODEL_TIERS', '[]'))
+    # 模型路由：待分析任务达到此数量时高档位门槛提到最高；样本足够后JSON合法率低于或后备数据比例高于阈值的档位暂不使用
+    ROUTER_QUEUE_DEPTH_HIGH = int(os.getenv('ROUTER_QUEUE_DEPTH_HIGH', 200))
+    ROUTER_MIN_VALID_RATE = float(os.getenv('ROUTER_MIN_VALID_RATE', 0.8))
+    ROUTER_MAX_FALLBACK_RATE = float(os.getenv('ROUTER_MAX_FALLBACK_RATE', 0.2))
+
+    # LLM备用供应商，JSON格式，按顺序使用，如
+    # [{"name": "openrouter-qwen", "base_url": "https://openrouter.ai/api/v1", "api_key": "...",
+    #   "model": "qwen/qwen-max", "enable_search": false}]
+    # 缺少的字段取主供应商（分析为各模型档位，报告为LLM_MODEL）的配置
+    ANALYSIS_FAILOVER_PROVIDERS = json.loads(os.getenv('ANALYSIS_FAILOVER_PROVIDERS', '[]'))
+    REPORT_FAILOVER_PROVIDERS = json.loads(os.getenv('REPORT_FAILOVER_PROVIDERS', '[]'))
+    # 对冲请求：主供应商超过近期p95耗时（样本不足时为*_HEDGE_DELAY秒）未完成时向备用供应商再发一次请求
+    LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_HEDGE_DELAY = float(os.getenv('ANALYSIS_HEDGE_DELAY', 60))
+    REPORT_HEDGE_DELAY = float(os.getenv('REPORT_HEDGE_DELAY', 120))
+    # 供应商熔断：连续失败达到次数后在冷却时间内跳过该供应商
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', 60))
+
+    # LLM调用限流（所有worker通过Redis共享令牌桶）
+    # RATE_LIMIT_BACKEND: redis 或 local（仅进程内限流）
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'redis')
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://redis:6379/2')
+    # 未单独配置的供应商/模型的每分钟请求数和token数（0表示不限）
+    LLM_DEFAULT_RPM = float(os.getenv('LLM_DEFAULT_RPM', 300))
+    LLM_DEFAULT_TPM = float(os.getenv('LLM_DEFAULT_TPM', 0))
+    # 按"供应商主机名:模型"或"供应商主机名"配置，JSON格式，如 {"dashscope.aliyuncs.com:qwen-max": {"rpm": 600, "tpm": 1000000}}
+    LLM_RATE_LIMITS = json.loads(os.getenv('LLM_RATE_LIMITS', '{}'))
+
+    # 近似标题分析缓存：字符n-gram Jaccard相似度达到阈值且原分析未超过最长时间时直接复用
+    ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_CACHE_THRESHOLD = float(os.getenv('ANALYSIS_CACHE_THRESHOLD', 0.55))
+    ANALYSIS_CACHE_MAX_AGE_HOURS = float(os.getenv('ANALYSIS_CACHE_MAX_AGE_HOURS', 6))
+
+    # 各平台近似标题合并为一条新闻的字符n-gram Jaccard阈值，0表示只合并完全相同的标题
+    TITLE_MERGE_THRESHOLD = float(os.getenv('TITLE_MERGE_THRESHOLD', 0.55))
+
     # 热门新闻分析设置
     # 选择热度排名前N的新闻进行分析，不再按每个平台分别选择N条
     TOP_HOT_NEWS_COUNT = int(os.getenv('TOP_HOT_NEWS_COUNT', 50))
@@ -42,7 +105,18 @@ class Config:
     MAX_NEWS_PER_PLATFORM = int(os.getenv('MAX_NEWS_PER_PLATFORM', 2))
     # 每日分析限制
     DAILY_ANALYSIS_LIMIT = int(os.getenv('DAILY_ANALYSIS_LIMIT', 20))
-    
+
+    # 每日token预算（新闻分析、对话、报告共用，0表示不限）
+    DAILY_TOKEN_BUDGET = int(float(os.getenv('DAILY_TOKEN_BUDGET', 0)))
+    # 单个功能的每日token上限，JSON格式，如 {"analysis": 5000000, "chat": 2000000, "report": 1000000}
+    TOKEN_BUDGET_FEATURES = json.loads(os.getenv('TOKEN_BUDGET_FEATURES', '{}'))
+    # 剩余预算比例低于DEGRADE时新闻分析更多使用低档位模型并合并请求（每次TOKEN_BUDGET_BATCH_SIZE条），
+    # 低于DEFER时只分析高优先级新闻，对话和报告改用TOKEN_BUDGET_ECONOMY_MODEL（未配置时不换模型）
+    TOKEN_BUDGET_DEGRADE_RATIO = float(os.getenv('TOKEN_BUDGET_DEGRADE_RATIO', 0.5))
+    TOKEN_BUDGET_DEFER_RATIO = float(os.getenv('TOKEN_BUDGET_DEFER_RATIO', 0.15))
+    TOKEN_BUDGET_BATCH_SIZE = int(os.getenv('TOKEN_BUDGET_BATCH_SIZE', 4))
+    TOKEN_BUDGET_ECONOMY_MODEL = os.getenv('TOKEN_BUDGET_ECONOMY_MODEL', '')
+
     # API采集设置
     # 从各平台API获取热搜时，每平台最多获取的条数
     API_NEWS_PER_PLATFORM = int(os.getenv('API_NEWS_PER_PLATFORM', 20))
@@ -54,6 +128,20 @@ class Config:
     SMART_COLLECTION_ENABLED = os.getenv('SMART_COLLECTION_ENABLED', 'True').lower() == 'true'
     # 数据变化检测的最大有效时间（分钟）
     MAX_DATA_AGE_MINUTES = int(os.getenv('MAX_DATA_AGE_MINUTES', 55))
+    # 自适应采集调度（ADAPTIVE_COLLECTION_ENABLED由celery_app读取）：刷新节奏未知时的采集间隔、
+    # 内容持续未变化时放慢到的最长间隔、存在未分析的高热度新闻时的最长间隔（分钟）
+    ADAPTIVE_COLLECTION_ENABLED = os.getenv('ADAPTIVE_COLLECTION_ENABLED', 'True').lower() == 'true'
+    COLLECTION_DEFAULT_INTERVAL_MINUTES = float(os.getenv('COLLECTION_DEFAULT_INTERVAL_MINUTES', 10))
+    COLLECTION_MAX_INTERVAL_MINUTES = float(os.getenv('COLLECTION_MAX_INTERVAL_MINUTES', 120))
+    COLLECTION_HOT_INTERVAL_MINUTES = float(os.getenv('COLLECTION_HOT_INTERVAL_MINUTES', 10))
+    # 数据保留（天）：检查/刷新记录和榜单快照、原始热度序列（更早的按小时/天汇总）、
+    # 逐小时汇总、全天汇总、完整的热榜存档（更早的每小时保留一代精简存档）、精简存档
+    RETENTION_RAW_DAYS = float(os.getenv('RETENTION_RAW_DAYS', 7))
+    HEAT_SERIES_RAW_DAYS = float(os.getenv('HEAT_SERIES_RAW_DAYS', 3))
+    HEAT_ROLLUP_HOURLY_DAYS = float(os.getenv('HEAT_ROLLUP_HOURLY_DAYS', 30))
+    HEAT_ROLLUP_DAYS = float(os.getenv('HEAT_ROLLUP_DAYS', 365))
+    HISTORY_TOP_NEWS_FULL_DAYS = float(os.getenv('HISTORY_TOP_NEWS_FULL_DAYS', 3))
+    HISTORY_TOP_NEWS_DAYS = float(os.getenv('HISTORY_TOP_NEWS_DAYS', 90))
     # API热力值阈值，高于此值的新闻触发即时分析
     HOT_NEWS_THRESHOLD = float(os.getenv('HOT_NEWS_THRESHOLD', 0.75))
     # 每次深度分析的最大新闻数量
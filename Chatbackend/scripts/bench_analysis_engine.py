@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分析引擎基准测试
+
+在子进程中启动本地LLM桩服务（避免服务端线程计入峰值线程数），分别用线程池（ASYNC_ANALYSIS_ENABLED=False）和异步引擎分析同一批标题，
+输出总耗时、吞吐量、峰值线程数，指定--trace-memory时额外统计Python内存分配峰值
+（tracemalloc会明显拖慢CPU密集的事件循环，因此耗时和内存分两次测量）。
+"""
+import os
+import sys
+import io
+import time
+import socket
+import argparse
+import multiprocessing
+import threading
+import tracemalloc
+import contextlib
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from app.services.news_analysis_service import NewsAnalysisService
+from scripts.stub_llm_server import start_server
+
+
+def serve_stub(port, latency):
+    start_server(port, latency)
+    while True:
+        time.sleep(3600)
+
+
+def start_stub_process(latency):
+    """在子进程中启动桩服务，返回 (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=serve_stub, args=(port, latency), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def measure(label, func, trace_memory=False):
+    """运行func并统计耗时、峰值线程数，trace_memory为True时统计内存分配峰值"""
+    peak_threads = [threading.active_count()]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.05):
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = func()
+    elapsed = time.perf_counter() - start
+    peak_memory = 0
+    if trace_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    stop.set()
+    sampler.join()
+
+    print(f"{label:<12}{len(results):>6}{elapsed:>10.2f}{len(results) / elapsed:>10.1f}"
+          f"{peak_threads[0]:>10}{peak_memory / 1024 / 1024 if trace_memory else float('nan'):>12.1f}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='分析引擎基准测试')
+    parser.add_argument('--count', type=int, default=200, help='分析的标题数量')
+    parser.add_argument('--latency', type=float, default=2.0, help='桩服务每个请求的耗时（秒）')
+    parser.add_argument('--workers', type=int, default=16, help='线程池线程数')
+    parser.add_argument('--concurrency', type=int, default=200, help='异步引擎最大并发')
+    parser.add_argument('--trace-memory', action='store_true', help='使用tracemalloc统计内存分配峰值')
+    args = parser.parse_args()
+
+    # 基准测试只比较并发模型，限流使用不设上限的本地令牌桶（线程池的工作线程没有应用上下文，通过环境变量配置）
+    os.environ['RATE_LIMIT_BACKEND'] = 'local'
+    os.environ['LLM_DEFAULT_RPM'] = '1e9'
+
+    stub, base_url = start_stub_process(args.latency)
+    titles = [f"基准测试新闻{i}" for i in range(args.count)]
+    platforms = ["微博"] * args.count
+    print(f"桩服务: {base_url}，{args.count}条标题，单请求耗时{args.latency}秒")
+    print(f"{'模式':<12}{'条数':>6}{'耗时(s)':>10}{'条/秒':>10}{'峰值线程':>10}{'内存峰值(MB)':>12}")
+
+    app = Flask(__name__)
+    # 基准测试的标题彼此近似，关闭近似标题缓存
+    app.config.update(ANALYSIS_MAX_CONCURRENCY=args.concurrency, ANALYSIS_REQUEST_TIMEOUT=60,
+                      ANALYSIS_CACHE_ENABLED=False)
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = NewsAnalysisService("stub-key", base_url, "stub-model")
+
+        app.config["ASYNC_ANALYSIS_ENABLED"] = False
+        measure("线程池", lambda: service.analyze_multiple_news(titles, platforms, max_workers=args.workers),
+                args.trace_memory)
+
+        app.config["ASYNC_ANALYSIS_ENABLED"] = True
+        measure("异步引擎", lambda: service.analyze_multiple_news(titles, platforms), args.trace_memory)
+
+    stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量分析基准测试
+
+在子进程中启动本地LLM桩服务，用异步引擎以不同的ANALYSIS_BATCH_SIZE分析同一批标题，
+输出每条新闻的估算输入/输出token数和每分钟分析条数。
+桩服务的请求耗时为--ttft加上每条结果的--latency，即输出越长耗时越长；
+--concurrency限制同时在途的请求数，模拟供应商的并发上限。
+"""
+import os
+import sys
+import io
+import time
+import socket
+import argparse
+import multiprocessing
+import contextlib
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from app.services.news_analysis_service import NewsAnalysisService
+from scripts.stub_llm_server import start_server
+
+
+def serve_stub(port, latency, ttft, drop_every):
+    start_server(port, latency, ttft=ttft, drop_every=drop_every)
+    while True:
+        time.sleep(3600)
+
+
+def start_stub_process(latency, ttft, drop_every):
+    """在子进程中启动桩服务，返回 (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=serve_stub, args=(port, latency, ttft, drop_every), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='批量分析基准测试')
+    parser.add_argument('--count', type=int, default=48, help='分析的标题数量')
+    parser.add_argument('--sizes', type=str, default='1,2,4,8', help='比较的每次请求条数，逗号分隔')
+    parser.add_argument('--latency', type=float, default=0.5, help='桩服务生成每条结果的耗时（秒）')
+    parser.add_argument('--ttft', type=float, default=1.0, help='桩服务每个请求输出首个分片前的耗时（秒）')
+    parser.add_argument('--concurrency', type=int, default=8, help='异步引擎最大并发')
+    parser.add_argument('--drop-every', type=int, default=0, help='批量结果每N条缺一条，用于测量逐条回退的开销')
+    args = parser.parse_args()
+
+    # 基准测试只比较请求方式，限流使用不设上限的本地令牌桶
+    os.environ['RATE_LIMIT_BACKEND'] = 'local'
+    os.environ['LLM_DEFAULT_RPM'] = '1e9'
+
+    stub, base_url = start_stub_process(args.latency, args.ttft, args.drop_every)
+    titles = [f"基准测试新闻{i}" for i in range(args.count)]
+    platforms = ["微博"] * args.count
+    print(f"桩服务: {base_url}，{args.count}条标题，首字耗时{args.ttft}秒，每条结果{args.latency}秒，"
+          f"最大并发{args.concurrency}")
+    print(f"{'每次条数':<8}{'请求数':>8}{'回退条数':>10}{'输入token/条':>14}{'输出token/条':>14}"
+          f"{'总token/条':>12}{'耗时(s)':>10}{'条/分钟':>10}")
+
+    app = Flask(__name__)
+    # 基准测试的标题彼此近似，关闭近似标题缓存
+    app.config.update(ANALYSIS_MAX_CONCURRENCY=args.concurrency, ANALYSIS_REQUEST_TIMEOUT=60,
+                      ANALYSIS_CACHE_ENABLED=False)
+    with app.app_context():
+        for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+            app.config["ANALYSIS_BATCH_SIZE"] = size
+            with contextlib.redirect_stdout(io.StringIO()):
+                service = NewsAnalysisService("stub-key", base_url, "stub-model")
+                start = time.perf_counter()
+                results = service.analyze_multiple_news(titles, platforms)
+                elapsed = time.perf_counter() - start
+
+            stats = service.api_stats
+            count = len(results)
+            prompt = stats["prompt_tokens"] / count
+            completion = stats["completion_tokens"] / count
+            print(f"{size:<8}{stats['total']:>8}{stats['batch_fallbacks']:>10}{prompt:>14.0f}{completion:>14.0f}"
+                  f"{prompt + completion:>12.0f}{elapsed:>10.2f}{count / elapsed * 60:>10.1f}")
+
+    stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
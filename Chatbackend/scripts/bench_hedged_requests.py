@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+对冲请求与故障转移基准测试
+
+在子进程中启动两个本地LLM桩服务：主供应商每隔若干请求出现一次长尾延迟或返回HTTP 500，
+备用供应商正常。分别只使用主供应商和使用供应商池（主供应商+备用供应商）分析同一批标题，
+输出每条新闻完成耗时的p50/p95/最大值、使用后备数据的条数和对冲/故障转移次数。
+"""
+import os
+import sys
+import io
+import math
+import time
+import socket
+import argparse
+import multiprocessing
+import contextlib
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.async_analysis_engine import AsyncAnalysisEngine
+from app.services.provider_pool import ProviderPool, load_providers
+from scripts.stub_llm_server import start_server
+
+
+class TimedEngine(AsyncAnalysisEngine):
+    """记录每条新闻从开始到完成的耗时以及是否使用了后备数据"""
+
+    def run(self, titles, platforms=None, priors=None):
+        self.started = time.perf_counter()
+        self.finished = []
+        self.fallbacks = 0
+        return super().run(titles, platforms, priors)
+
+    async def _finish(self, title, platform, result, model=None):
+        self.finished.append(time.perf_counter() - self.started)
+        self.fallbacks += result is None
+        return await super()._finish(title, platform, result, model)
+
+
+def serve_stub(port, options):
+    start_server(port, **options)
+    while True:
+        time.sleep(3600)
+
+
+def start_stub_process(options):
+    """在子进程中启动桩服务，返回 (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=serve_stub, args=(port, options), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(p * len(values)) - 1)]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='对冲请求与故障转移基准测试')
+    parser.add_argument('--count', type=int, default=200, help='分析的标题数量')
+    parser.add_argument('--latency', type=float, default=1.0, help='桩服务生成一条完整分析的耗时（秒）')
+    parser.add_argument('--ttft', type=float, default=0.2, help='桩服务每个请求输出首个分片前的耗时（秒）')
+    parser.add_argument('--stall-every', type=int, default=10, help='主供应商每N个请求出现一次长尾延迟')
+    parser.add_argument('--stall', type=float, default=20.0, help='长尾请求额外等待的秒数')
+    parser.add_argument('--error-every', type=int, default=4, help='主供应商每N个请求返回一次HTTP 500')
+    parser.add_argument('--hedge-delay', type=float, default=2.5, help='样本不足时的对冲等待时间（秒）')
+    parser.add_argument('--concurrency', type=int, default=32, help='异步引擎最大并发')
+    parser.add_argument('--timeout', type=float, default=30, help='单个请求的超时时间（秒）')
+    args = parser.parse_args()
+
+    # 基准测试只比较请求方式，限流使用不设上限的本地令牌桶
+    os.environ['RATE_LIMIT_BACKEND'] = 'local'
+    os.environ['LLM_DEFAULT_RPM'] = '1e9'
+
+    base = {"latency": args.latency, "ttft": args.ttft}
+    primary_stub, primary_url = start_stub_process(dict(base, stall_every=args.stall_every, stall=args.stall,
+                                                        error_every=args.error_every))
+    backup_stub, backup_url = start_stub_process(base)
+    titles = [f"基准测试新闻{i}" for i in range(args.count)]
+    print(f"{args.count}条标题，主供应商每{args.stall_every}个请求延迟{args.stall}秒、每{args.error_every}个请求返回500，"
+          f"备用供应商正常，最大并发{args.concurrency}")
+    print(f"{'方式':<10}{'请求数':>8}{'对冲':>6}{'对冲胜出':>10}{'故障转移':>10}{'后备数据':>10}"
+          f"{'p50(s)':>9}{'p95(s)':>9}{'最大(s)':>9}{'总耗时(s)':>11}")
+
+    primary = {"model": "stub-model", "base_url": primary_url, "api_key": "stub-key", "enable_search": False}
+    for name, alternates in (("仅主供应商", []), ("供应商池", [{"name": "backup", "base_url": backup_url}])):
+        pool = ProviderPool(load_providers(alternates, primary), name=f"bench-{len(alternates)}",
+                            default_delay=args.hedge_delay)
+        engine = TimedEngine("stub-key", primary_url, "stub-model", "基准测试", max_concurrency=args.concurrency,
+                             request_timeout=args.timeout, enable_search=False, pool=pool)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine.run(titles)
+            elapsed = time.perf_counter() - start
+
+        stats = engine.api_stats
+        print(f"{name:<10}{stats['total']:>8}{stats['hedged']:>6}{stats['hedge_wins']:>10}{stats['failovers']:>10}"
+              f"{engine.fallbacks:>10}{percentile(engine.finished, 0.5):>9.2f}{percentile(engine.finished, 0.95):>9.2f}"
+              f"{max(engine.finished):>9.2f}{elapsed:>11.2f}")
+
+    primary_stub.terminate()
+    backup_stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热榜流式解析基准测试
+
+使用data/hot_news.json中记录的接口响应，对比完整json.loads后再过滤与
+app.utils.hotlist_stream流式解析的耗时和内存峰值：
+- 排除平台（process_hot_news的EXCLUDE_PLATFORMS）
+- 每平台数量上限（fetch_news_titles的API_NEWS_PER_PLATFORM）
+--scale可以把每个平台的新闻列表重复多次，模拟更大的响应。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.hotlist_stream import HotlistStreamParser
+
+DEFAULT_PAYLOAD = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'hot_news.json'))
+
+# 与NewsCollectionService.EXCLUDE_PLATFORMS一致，避免导入Flask应用
+EXCLUDE_PLATFORMS = ["虫部落", "woShiPm", "虎嗅", "IT之家", "知乎日报", "虎扑", "豆瓣小组", "澎湃新闻", "xiaomi"]
+
+
+def load_payloads(path, scale):
+    """读取记录的快照，返回每个快照的原始接口响应（bytes）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshots = json.load(f)
+    if isinstance(snapshots, dict):
+        snapshots = [snapshots]
+
+    payloads = []
+    for snapshot in snapshots:
+        payload = snapshot.get('data', snapshot)
+        for platform_data in payload.get('data', []):
+            platform_data['data'] = platform_data.get('data', []) * scale
+        payloads.append(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+    return payloads
+
+
+def full_parse(raw, exclude, cap):
+    """原实现：完整解析后过滤"""
+    data = json.loads(raw)
+    items = []
+    for platform_data in data.get('data', []):
+        platform = platform_data.get('name')
+        if platform in exclude:
+            continue
+        kept = 0
+        for news in platform_data.get('data', []):
+            if not news.get('title'):
+                continue
+            items.append({"title": news['title'], "url": news.get('url', ''),
+                          "hotness": news.get('hot', '0'), "platform": platform})
+            kept += 1
+            if cap is not None and kept >= cap:
+                break
+    return items
+
+
+def stream_parse(raw, exclude, cap):
+    """流式解析"""
+    return list(HotlistStreamParser(exclude=exclude, max_per_platform=cap).items(raw))
+
+
+def measure(func, payloads, rounds):
+    """返回平均耗时（秒）和单次解析的内存峰值（字节）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for raw in payloads:
+            func(raw)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    tracemalloc.start()
+    for raw in payloads:
+        func(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='热榜流式解析基准测试')
+    parser.add_argument('--payload', default=DEFAULT_PAYLOAD, help='热榜数据JSON文件')
+    parser.add_argument('--rounds', type=int, default=50, help='重复次数')
+    parser.add_argument('--scale', type=int, default=1, help='每个平台新闻列表的放大倍数')
+    parser.add_argument('--cap', type=int, default=20, help='每平台数量上限')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payload, args.scale)
+    size = sum(len(raw) for raw in payloads)
+    print(f"共 {len(payloads)} 份响应，{size / 1024:.0f} KB，重复 {args.rounds} 次")
+
+    scenarios = [
+        ("排除平台", EXCLUDE_PLATFORMS, None),
+        (f"每平台前{args.cap}条", [], args.cap),
+        (f"排除平台+每平台前{args.cap}条", EXCLUDE_PLATFORMS, args.cap),
+    ]
+    for label, exclude, cap in scenarios:
+        expected = [full_parse(raw, exclude, cap) for raw in payloads]
+        actual = [stream_parse(raw, exclude, cap) for raw in payloads]
+        full_time, full_peak = measure(lambda raw: full_parse(raw, exclude, cap), payloads, args.rounds)
+        stream_time, stream_peak = measure(lambda raw: stream_parse(raw, exclude, cap), payloads, args.rounds)
+        kept = sum(len(items) for items in actual)
+        print(f"{label}: 保留 {kept} 条，结果一致: {expected == actual}")
+        print(f"  完整解析: {full_time * 1000:.2f} ms, 内存峰值 {full_peak / 1024:.0f} KB")
+        print(f"  流式解析: {stream_time * 1000:.2f} ms, 内存峰值 {stream_peak / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
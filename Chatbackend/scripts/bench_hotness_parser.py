@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热度解析基准测试
+
+使用data/hot_news.json中记录的热榜数据，对比逐条正则解析与
+app.utils.hotness_parser批量解析的耗时，并列出两者结果不一致的字符串。
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.hotness_parser import parse_hotness_batch, hotness_cache_info
+
+DEFAULT_PAYLOAD = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'hot_news.json'))
+
+
+def legacy_parse_hotness(hotness_str):
+    """原NewsCollectionService.parse_hotness的逐条实现（去掉了调试输出）"""
+    if not hotness_str or not isinstance(hotness_str, str):
+        return 0
+    original_value = str(hotness_str)
+    cleaned = hotness_str.strip().replace(',', '')
+    if "万热度" in cleaned:
+        try:
+            return float(cleaned.split("万热度")[0].strip()) * 10000
+        except ValueError:
+            pass
+    match = re.search(r'([\d\.]+)([亿万千])?', cleaned)
+    if not match:
+        return 0
+    try:
+        base_num = float(match.group(1))
+    except ValueError:
+        return 0
+    multipliers = {'': 1, '千': 1000, '万': 10000, '亿': 100000000}
+    result = base_num * multipliers.get(match.group(2) or '', 1)
+    if ("36氪" in original_value or "澎湃" in original_value) and result < 1000:
+        result = result * 10000
+    return result
+
+
+def load_hotness_values(path):
+    """读取记录的热榜数据，返回全部热度字符串"""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshots = json.load(f)
+    if isinstance(snapshots, dict):
+        snapshots = [snapshots]
+
+    values = []
+    for snapshot in snapshots:
+        payload = snapshot.get('data', snapshot)
+        for platform_data in payload.get('data', []):
+            for news in platform_data.get('data', []):
+                values.append(news.get('hot', '0'))
+    return values
+
+
+def timed(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='热度解析基准测试')
+    parser.add_argument('--payload', default=DEFAULT_PAYLOAD, help='热榜数据JSON文件')
+    parser.add_argument('--rounds', type=int, default=200, help='重复次数')
+    args = parser.parse_args()
+
+    values = load_hotness_values(args.payload)
+    print(f"共 {len(values)} 个热度值，重复 {args.rounds} 次")
+
+    legacy_time, legacy = timed(lambda: [legacy_parse_hotness(v) for v in values], args.rounds)
+    batch_time, batch = timed(lambda: parse_hotness_batch(values), args.rounds)
+
+    print(f"逐条解析: {legacy_time * 1000:.3f} ms/次")
+    print(f"批量解析: {batch_time * 1000:.3f} ms/次 (加速 {legacy_time / batch_time:.1f}x)")
+    print(f"缓存统计: {hotness_cache_info()}")
+
+    diffs = [(v, old, new) for v, old, new in zip(values, legacy, batch.tolist()) if float(old) != new]
+    print(f"结果不一致: {len(diffs)} 条")
+    for value, old, new in diffs[:20]:
+        print(f"  {value!r}: {old} -> {new}")
+
+
+if __name__ == '__main__':
+    main()
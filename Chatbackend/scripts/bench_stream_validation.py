@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式JSON校验基准测试
+
+在子进程中启动本地LLM桩服务，使每个请求都输出非法JSON（--malformed-every 1），
+分别用"读完全部输出再解析"和"边接收边校验"两种方式读取同一批请求，
+输出发现错误的平均耗时和发现错误前接收的输出token数（即浪费的token）。
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openai import OpenAI
+
+from app.services.news_analysis_service import analysis_validator
+from app.utils.rate_limiter import estimate_tokens
+from app.utils.stream_json import StreamingJSONError
+from scripts.stub_llm_server import start_server
+
+
+def serve_stub(port, latency, chunks):
+    start_server(port, latency, chunks, malformed_every=1)
+    while True:
+        time.sleep(3600)
+
+
+def start_stub_process(latency, chunks):
+    """在子进程中启动桩服务，返回 (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=serve_stub, args=(port, latency, chunks), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return process, f"http://127.0.0.1:{port}/v1"
+
+
+def read_stream(client, title, validate):
+    """
+    发出一次流式请求，返回 (发现错误的耗时, 已接收的文本)
+
+    validate为False时读完全部输出再json.loads，为True时边接收边校验并在出错时关闭流。
+    """
+    start = time.perf_counter()
+    stream = client.chat.completions.create(
+        model="stub-model", messages=[{"role": "user", "content": title}], stream=True
+    )
+    validator = analysis_validator()
+    chunks = []
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                if validate and validator.feed(chunk.choices[0].delta.content):
+                    break
+        if not validate:
+            json.loads("".join(chunks))
+    except json.JSONDecodeError:
+        pass
+    finally:
+        stream.close()
+    return time.perf_counter() - start, "".join(chunks)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='流式JSON校验基准测试')
+    parser.add_argument('--count', type=int, default=10, help='每种方式的请求数')
+    parser.add_argument('--latency', type=float, default=2.0, help='桩服务生成一条完整结果的耗时（秒）')
+    parser.add_argument('--chunks', type=int, default=40, help='桩服务流式输出的分片数')
+    args = parser.parse_args()
+
+    stub, base_url = start_stub_process(args.latency, args.chunks)
+    client = OpenAI(api_key="stub-key", base_url=base_url)
+    print(f"桩服务: {base_url}，每种方式{args.count}个请求，全部输出非法JSON，"
+          f"完整输出耗时{args.latency}秒，{args.chunks}个分片")
+    print(f"{'读取方式':<12}{'发现错误耗时(s)':>16}{'浪费输出token/条':>18}")
+
+    for name, validate in (("读完再解析", False), ("流式校验", True)):
+        durations, tokens = [], []
+        for i in range(args.count):
+            duration, text = read_stream(client, f"基准测试新闻{i}", validate)
+            durations.append(duration)
+            tokens.append(estimate_tokens(text=text))
+        print(f"{name:<12}{sum(durations) / len(durations):>16.3f}{sum(tokens) / len(tokens):>18.0f}")
+
+    stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
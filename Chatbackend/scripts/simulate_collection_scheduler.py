@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+热榜采集调度模拟
+
+模拟上游按固定周期刷新（带随机延迟，偶尔跳过一次），分别回放：
+- 旧策略：beat每30分钟smart_collect（数据超过55分钟时直接collect_news）+ 每小时collect_news
+- 自适应策略：每分钟检查app.services.collection_scheduler安排的时间，到期才做变更检测
+输出每天的请求数、处理次数（其中内容未变化的重复处理次数）以及上游刷新到被处理的延迟。
+"""
+import os
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.collection_scheduler import CollectionScheduler, learn_update_cadence, LEARNING_DAYS
+
+
+def generate_updates(start, days, period, phase, jitter, skip_rate, seed):
+    """生成上游刷新时间"""
+    rng = random.Random(seed)
+    updates = []
+    moment = start + timedelta(minutes=phase)
+    while moment < start + timedelta(days=days):
+        if rng.random() >= skip_rate:
+            updates.append(moment + timedelta(seconds=rng.uniform(0, jitter * 60)))
+        moment += timedelta(minutes=period)
+    return updates
+
+
+class Upstream:
+    """按时间返回上游当前的内容版本"""
+
+    def __init__(self, updates):
+        self.updates = updates
+
+    def version_at(self, moment):
+        count = 0
+        for update in self.updates:
+            if update > moment:
+                break
+            count += 1
+        return count
+
+
+class Recorder:
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.fetches = 0
+        self.processed = 0
+        self.duplicates = 0
+        self.delays = []
+        self.processed_version = 0
+
+    def fetch(self, moment):
+        self.fetches += 1
+        return self.upstream.version_at(moment)
+
+    def process(self, moment, version):
+        self.processed += 1
+        if version == self.processed_version:
+            self.duplicates += 1
+            return
+        # 每个新版本的延迟：从上游刷新到被处理
+        for update in self.upstream.updates[self.processed_version:version]:
+            self.delays.append((moment - update).total_seconds() / 60)
+        self.processed_version = version
+
+
+def run_legacy(upstream, start, days):
+    """旧策略：每30分钟smart_collect + 每小时collect_news"""
+    recorder = Recorder(upstream)
+    last_processed_at = None
+    seen_version = None
+    minute = 0
+    while minute < days * 24 * 60:
+        moment = start + timedelta(minutes=minute)
+        if minute % 30 == 0:
+            # smart_collect：数据足够新时只做变更检测
+            if last_processed_at and moment - last_processed_at < timedelta(minutes=55):
+                version = recorder.fetch(moment)
+                if version != seen_version:
+                    recorder.process(moment, version)
+                    seen_version, last_processed_at = version, moment
+            elif not last_processed_at or moment - last_processed_at >= timedelta(hours=1):
+                version = recorder.fetch(moment)
+                recorder.process(moment, version)
+                seen_version, last_processed_at = version, moment
+        if minute % 60 == 0 and (not last_processed_at or moment - last_processed_at >= timedelta(hours=1)):
+            # collect_news：超过一小时未采集就处理，不做变更检测
+            version = recorder.fetch(moment)
+            recorder.process(moment, version)
+            seen_version, last_processed_at = version, moment
+        minute += 1
+    return recorder
+
+
+def run_adaptive(upstream, start, days, scheduler):
+    """自适应策略：每分钟检查一次调度时间"""
+    recorder = Recorder(upstream)
+    checks = []
+    next_run = start
+    streak = 0
+    seen_version = None
+    last_check = last_changed_at = None
+    minute = 0
+    while minute < days * 24 * 60:
+        moment = start + timedelta(minutes=minute)
+        if moment >= next_run:
+            version = recorder.fetch(moment)
+            if version != seen_version:
+                recorder.process(moment, version)
+                outcome, streak = "changed", 0
+            else:
+                outcome, streak = "unchanged", streak + 1
+            if seen_version is not None:
+                checks.append((last_check, moment, outcome == "changed"))
+            seen_version, last_check = version, moment
+            recent = [c for c in checks if c[1] >= moment - timedelta(days=LEARNING_DAYS)]
+            next_run, _ = scheduler.plan(moment, outcome, streak, cadence=learn_update_cadence(recent),
+                                         last_changed_at=last_changed_at)
+            if outcome == "changed":
+                last_changed_at = moment
+        minute += 1
+    recent = [c for c in checks if c[1] >= start + timedelta(days=days - LEARNING_DAYS)]
+    return recorder, learn_update_cadence(recent)
+
+
+def summarize(label, recorder, days):
+    delays = sorted(recorder.delays)
+    if delays:
+        p50 = delays[len(delays) // 2]
+        p90 = delays[int(len(delays) * 0.9)]
+        mean = sum(delays) / len(delays)
+    else:
+        p50 = p90 = mean = float('nan')
+    print(f"{label}: 每天请求 {recorder.fetches / days:.1f} 次，处理 {recorder.processed / days:.1f} 次"
+          f"（重复 {recorder.duplicates / days:.1f} 次），"
+          f"刷新到处理的延迟 平均 {mean:.1f} / p50 {p50:.1f} / p90 {p90:.1f} 分钟")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='热榜采集调度模拟')
+    parser.add_argument('--days', type=int, default=7, help='模拟天数')
+    parser.add_argument('--period', type=int, default=60, help='上游刷新周期（分钟）')
+    parser.add_argument('--phase', type=int, default=7, help='上游在周期内的刷新分钟')
+    parser.add_argument('--jitter', type=float, default=2, help='上游刷新的随机延迟上限（分钟）')
+    parser.add_argument('--skip-rate', type=float, default=0.05, help='上游跳过一次刷新的概率')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+
+    start = datetime(2025, 4, 8)
+    updates = generate_updates(start, args.days, args.period, args.phase, args.jitter, args.skip_rate, args.seed)
+    upstream = Upstream(updates)
+    print(f"上游每{args.period}分钟刷新（第{args.phase}分钟起，延迟0~{args.jitter}分钟），"
+          f"{args.days}天共 {len(updates)} 次")
+
+    summarize("旧策略", run_legacy(upstream, start, args.days), args.days)
+    recorder, cadence = run_adaptive(upstream, start, args.days, CollectionScheduler())
+    summarize("自适应", recorder, args.days)
+    print(f"学到的刷新节奏: {cadence}")
+
+
+if __name__ == '__main__':
+    main()
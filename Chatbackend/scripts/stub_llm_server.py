@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地OpenAI兼容的LLM桩服务
+
+POST /v1/chat/completions 返回一份以新闻标题生成的分析JSON，支持stream=True的SSE分片输出，
+通过--latency模拟模型生成耗时，用于在不消耗额度的情况下对分析引擎做并发基准测试。
+用户消息是[{"index": 序号, "title": 标题}, ...]时按批量分析返回JSON数组，
+耗时为--ttft加上每条结果的--latency；--drop-every可让批量结果每N条缺一条，用于验证逐条回退。
+--malformed-every让每N个单条请求在开头附近输出未加引号的占位符，模拟模型输出的非法JSON。
+--stall-every让每N个单条请求在首个分片前多等待--stall秒，模拟供应商的长尾延迟；
+--error-every让每N个单条请求返回HTTP 500，模拟供应商故障。
+用户消息是上次分析的JSON对象时按刷新模式只返回heatTrend、timeline、emotion和stance，
+生成耗时按输出长度相对完整分析的比例缩短。
+"""
+import os
+import sys
+import json
+import time
+import re
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 确保能够导入项目模块
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.data_utils import generate_fallback_data
+
+
+def batch_items(content):
+    """用户消息是批量分析的标题列表时返回该列表，否则返回None"""
+    try:
+        items = json.loads(content)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(items, list) and items and all(isinstance(item, dict) and "title" in item for item in items):
+        return items
+    return None
+
+
+def malform(content):
+    """把第一个数值替换为未加引号的占位符，使输出从该处开始不是合法的JSON"""
+    return re.sub(r'(": )-?[0-9][0-9.]*', r'\1数值', content, count=1)
+
+
+def refresh_prior(content):
+    """用户消息是刷新模式的上次分析时返回该分析，否则返回None"""
+    try:
+        prior = json.loads(content)
+    except (TypeError, ValueError):
+        return None
+    return prior if isinstance(prior, dict) and "title" in prior else None
+
+
+def refresh_result(prior):
+    """以上次分析为基础生成刷新结果：新增一个热度点和一个时间线事件"""
+    data = generate_fallback_data(prior["title"])
+    return {
+        "heatTrend": data["heatTrend"][-1:],
+        "timeline": data["timeline"][-1:],
+        "emotion": data["emotion"],
+        "stance": data["stance"]
+    }
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 1.0
+    ttft = 0.0
+    chunks = 20
+    drop_every = 0
+    malformed_every = 0
+    stall_every = 0
+    stall = 0.0
+    error_every = 0
+    requests = itertools.count(1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        title = (body.get("messages") or [{}])[-1].get("content", "模拟新闻")
+        items = batch_items(title)
+        prior = refresh_prior(title) if items is None else None
+        stalled = 0.0
+        if prior is not None:
+            content = json.dumps(refresh_result(prior), ensure_ascii=False)
+            full_length = len(json.dumps(generate_fallback_data(prior["title"]), ensure_ascii=False))
+            duration = self.ttft + self.latency * min(1.0, len(content) / full_length)
+        elif items is None:
+            content = json.dumps(generate_fallback_data(title), ensure_ascii=False)
+            duration = self.ttft + self.latency
+            number = next(self.requests)
+            if self.error_every and number % self.error_every == 0:
+                self._send_json({"error": {"message": "stub internal error", "type": "server_error"}}, status=500)
+                return
+            if self.malformed_every and number % self.malformed_every == 0:
+                content = malform(content)
+            if self.stall_every and number % self.stall_every == 0:
+                stalled = self.stall
+        else:
+            results = []
+            for position, item in enumerate(items, 1):
+                if self.drop_every and position % self.drop_every == 0:
+                    continue
+                results.append({"index": item.get("index"), **generate_fallback_data(item["title"])})
+            content = json.dumps(results, ensure_ascii=False)
+            duration = self.ttft + self.latency * len(items)
+
+        if not body.get("stream"):
+            time.sleep(duration + stalled)
+            self._send_json({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}]
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        size = max(1, len(content) // self.chunks + 1)
+        time.sleep(self.ttft + stalled)
+        try:
+            for i in range(0, len(content), size):
+                time.sleep((duration - self.ttft) / self.chunks)
+                self._send_chunk({
+                    "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]
+                })
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前关闭了流
+            self.close_connection = True
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 监听队列需容纳基准测试的全部并发连接
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # 客户端提前关闭流后连接被重置，不是桩服务的错误
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_server(port=0, latency=1.0, chunks=20, ttft=0.0, drop_every=0, malformed_every=0,
+                 stall_every=0, stall=0.0, error_every=0):
+    """在后台线程中启动桩服务，返回 (server, base_url)"""
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,),
+                   {"latency": latency, "chunks": chunks, "ttft": ttft, "drop_every": drop_every,
+                    "malformed_every": malformed_every, "stall_every": stall_every, "stall": stall,
+                    "error_every": error_every, "requests": itertools.count(1)})
+    server = StubLLMServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地LLM桩服务')
+    parser.add_argument('--port', type=int, default=8089, help='监听端口')
+    parser.add_argument('--latency', type=float, default=1.0, help='每个请求的生成耗时（秒）')
+    parser.add_argument('--chunks', type=int, default=20, help='流式输出的分片数')
+    parser.add_argument('--ttft', type=float, default=0.0, help='每个请求输出首个分片前的耗时（秒）')
+    parser.add_argument('--drop-every', type=int, default=0, help='批量结果每N条缺一条，0为不缺')
+    parser.add_argument('--malformed-every', type=int, default=0, help='每N个单条请求输出非法JSON，0为不输出')
+    parser.add_argument('--stall-every', type=int, default=0, help='每N个单条请求额外等待--stall秒，0为不等待')
+    parser.add_argument('--stall', type=float, default=10.0, help='长尾请求首个分片前额外等待的秒数')
+    parser.add_argument('--error-every', type=int, default=0, help='每N个单条请求返回HTTP 500，0为不返回')
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.port, args.latency, args.chunks, args.ttft, args.drop_every,
+                                    args.malformed_every, args.stall_every, args.stall, args.error_every)
+    print(f"桩服务已启动: {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -411,4 +411,14 @@ def mock_db_instance(collections_data=None):
 
 if __name__ == "__main__":
     # Run the tests
-    unittest.main() 
\ No newline at end of file
+    unittest.main() 
+
+def patch_app_db():
+    """
+    Point the application's Database wrapper (app.extensions.db) at a fresh mongomock database.
+
+    Unlike MongoClientMock this supports query operators, aggregation, bulk writes and rename,
+    so services can be exercised end to end. Returns a patcher whose start() gives the database.
+    """
+    import mongomock
+    return patch('app.extensions.db.db', mongomock.MongoClient().db)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for title shingling, MinHash/LSH and the near-duplicate analysis cache.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.similarity import MinHasher, MinHashLSH, estimate_similarity, jaccard, normalize_title, shingles
+from app.services.analysis_cache import AnalysisSimilarityCache, reuse_analysis
+
+
+class TestSimilarity(unittest.TestCase):
+    """Tests for normalize_title / shingles / MinHashLSH"""
+
+    def test_normalization_ignores_punctuation_and_hashtags(self):
+        self.assertEqual(normalize_title("#“中国版平准基金”横空出世！#"), "中国版平准基金横空出世")
+        self.assertEqual(shingles("“国家队”出手增持"), shingles("国家队出手增持？"))
+        self.assertEqual(shingles("A"), {"a"})
+        self.assertEqual(shingles("！？"), set())
+
+    def test_lsh_finds_variants_and_skips_unrelated_titles(self):
+        hasher = MinHasher()
+        index = MinHashLSH()
+        titles = [
+            "奥迪暂停向美国经销商交付汽车",
+            "李家超：香港将从7方面应对美关税挑战",
+            "甲亢哥与大张伟见面激动相拥",
+        ]
+        for title in titles:
+            index.insert(title, hasher.signature(shingles(title)))
+
+        variant = "因新关税政策，奥迪暂停向美国经销商交付汽车"
+        self.assertIn(titles[0], index.query(hasher.signature(shingles(variant))))
+        self.assertNotIn(titles[2], index.query(hasher.signature(shingles("北京今日降温"))))
+
+        index.remove(titles[0])
+        self.assertNotIn(titles[0], index)
+        self.assertEqual(len(index), 2)
+
+    def test_signature_estimates_jaccard(self):
+        hasher = MinHasher()
+        a, b = shingles("李家超：香港将从7方面应对美关税挑战"), shingles("李家超：香港将从七方面应对美国滥施关税挑战")
+        self.assertAlmostEqual(estimate_similarity(hasher.signature(a), hasher.signature(b)), jaccard(a, b), delta=0.15)
+
+
+class TestAnalysisSimilarityCache(unittest.TestCase):
+    """Tests for AnalysisSimilarityCache without a database"""
+
+    def test_reuses_fresh_analysis_of_similar_title(self):
+        cache = AnalysisSimilarityCache(threshold=0.55, max_age_hours=6)
+        cache.add("奥迪暂停向美国经销商交付汽车", {"id": "orig", "type": "财经", "participants": 0.8})
+
+        matched, score = cache.find_similar("因新关税政策，奥迪暂停向美国经销商交付汽车")
+        self.assertEqual(matched, "奥迪暂停向美国经销商交付汽车")
+        self.assertGreaterEqual(score, 0.55)
+        self.assertEqual(cache.find_similar("人的肩部为何会演化出一个「座位」？"), (None, 0.0))
+
+        # Entries older than max_age are never reused
+        self.assertEqual(cache.find_similar("奥迪暂停向美国经销商交付汽车", datetime.now() + timedelta(hours=7)),
+                         (None, 0.0))
+
+    def test_fallback_and_reused_results_are_not_cached(self):
+        cache = AnalysisSimilarityCache()
+        cache.add("全球股市巨震", {"is_fallback": True})
+        cache.add("全球股市巨震了", {"reused_from": {"title": "x"}})
+        self.assertEqual(len(cache.index), 0)
+
+    def test_reuse_analysis_rewrites_identity(self):
+        source = {"_id": 1, "id": "orig", "title": "全球股市巨震", "type": "财经"}
+        result = reuse_analysis(source, "“黑色星期一”来了，全球股市巨震", "全球股市巨震", 0.42,
+                                "2025-04-08T11:00:00")
+        self.assertNotIn("_id", result)
+        self.assertEqual(result["title"], "“黑色星期一”来了，全球股市巨震")
+        self.assertNotEqual(result["id"], "orig")
+        self.assertEqual(result["reused_from"],
+                         {"title": "全球股市巨震", "analyzed_at": "2025-04-08T11:00:00", "similarity": 0.42})
+        self.assertEqual(source["id"], "orig")
+
+
+if __name__ == "__main__":
+    unittest.main()
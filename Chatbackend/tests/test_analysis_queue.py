@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for leased claiming of analysis queue items.
+"""
+import os
+import sys
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.utils import analysis_queue
+from app.utils.queue_priority import schedule_key
+
+
+class TestAnalysisQueueLeases(unittest.TestCase):
+    """Tests for claim_batch / release_expired_leases / complete / release / LeaseHeartbeat"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        now = datetime.now().isoformat()
+        self.db.news_analysis_queue.insert_many([
+            {"news_id": f"n{i}", "status": "pending", "schedule_key": i, "queued_at": now, "attempts": 0}
+            for i in range(6)
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def news_ids(self, items):
+        return [item["news_id"] for item in items]
+
+    def test_concurrent_claimers_never_share_items(self):
+        original = mongomock.collection.Collection.update_many
+        other = {}
+
+        def interleaved(collection, *args, **kwargs):
+            if not other:
+                # A second worker claims between this worker's candidate query and its update
+                other["started"] = True
+                other["items"] = analysis_queue.claim_batch(4)[1]
+            return original(collection, *args, **kwargs)
+
+        with patch.object(mongomock.collection.Collection, "update_many", autospec=True, side_effect=interleaved):
+            _, first = analysis_queue.claim_batch(4)
+        _, rest = analysis_queue.claim_batch(10)
+
+        claimed = self.news_ids(other["items"]) + self.news_ids(first) + self.news_ids(rest)
+        self.assertEqual(self.news_ids(other["items"]), ["n0", "n1", "n2", "n3"])
+        self.assertEqual(sorted(claimed), [f"n{i}" for i in range(6)])
+        self.assertEqual(self.db.news_analysis_queue.count_documents({"attempts": 1}), 6)
+
+    def test_expired_lease_is_reclaimed(self):
+        analysis_queue.claim_batch(2, lease_seconds=-1)
+        live, _ = analysis_queue.claim_batch(1)
+
+        self.assertEqual(analysis_queue.release_expired_leases(), 2)
+        _, reclaimed = analysis_queue.claim_batch(10)
+        # Released items are pushed back by the retry penalty; the live lease is untouched
+        self.assertEqual(self.news_ids(reclaimed), ["n3", "n4", "n5", "n0", "n1"])
+        self.assertEqual([item["attempts"] for item in reclaimed if item["news_id"] in ("n0", "n1")], [2, 2])
+        self.assertEqual(self.db.news_analysis_queue.find_one({"news_id": "n2"})["lease_id"], live)
+
+    def test_stale_lease_cannot_complete_or_release(self):
+        stale, _ = analysis_queue.claim_batch(2, lease_seconds=-1)
+        analysis_queue.release_expired_leases()
+        current, _ = analysis_queue.claim_batch(2, query={"news_id": {"$in": ["n0", "n1"]}})
+
+        self.assertFalse(analysis_queue.complete("n0", stale))
+        self.assertEqual(analysis_queue.release(stale), 0)
+        self.assertEqual(analysis_queue.release(stale, ["n1"], status="failed"), 0)
+        self.assertEqual(self.db.news_analysis_queue.count_documents({"lease_id": current, "status": "processing"}), 2)
+
+        self.assertTrue(analysis_queue.complete("n0", current))
+        self.assertIsNone(self.db.news_analysis_queue.find_one({"news_id": "n0"}))
+
+    def test_reenqueue_leaves_leased_item_alone(self):
+        lease_id, _ = analysis_queue.claim_batch(1)
+
+        self.assertFalse(analysis_queue.enqueue("n0", {"title": "n0", "heat_level": "爆"}))
+        self.assertTrue(analysis_queue.enqueue("n9", {"title": "n9"}))
+        _, others = analysis_queue.claim_batch(10)
+
+        self.assertNotIn("n0", self.news_ids(others))
+        self.assertIn("n9", self.news_ids(others))
+        self.assertTrue(analysis_queue.complete("n0", lease_id))
+
+    def test_reenqueue_keeps_age_and_retry_penalty(self):
+        self.db.news_analysis_queue.delete_many({})
+        queued_at = datetime(2025, 3, 1, 8, 0)
+        analysis_queue.enqueue("n0", {"title": "n0", "heat_level": "高"}, now=queued_at)
+        analysis_queue.claim_batch(1, lease_seconds=-1)
+        analysis_queue.release_expired_leases()
+        retried = self.db.news_analysis_queue.find_one({"news_id": "n0"})
+
+        # The same title is detected again an hour later with a lower heat level
+        analysis_queue.enqueue("n0", {"title": "n0", "heat_level": "低"}, now=queued_at + timedelta(hours=1))
+        again = self.db.news_analysis_queue.find_one({"news_id": "n0"})
+        self.assertEqual(again["queued_at"], queued_at.isoformat())
+        self.assertEqual(again["attempts"], 1)
+        self.assertEqual(again["priority_score"], retried["priority_score"])
+        self.assertEqual(again["schedule_key"], retried["schedule_key"])
+
+        # A higher heat level only moves it earlier
+        analysis_queue.enqueue("n0", {"title": "n0", "heat_level": "爆"}, now=queued_at + timedelta(hours=2))
+        boosted = self.db.news_analysis_queue.find_one({"news_id": "n0"})
+        self.assertGreater(boosted["priority_score"], retried["priority_score"])
+        self.assertLess(boosted["schedule_key"], retried["schedule_key"])
+        self.assertEqual(boosted["schedule_key"],
+                         schedule_key(queued_at, boosted["priority_score"], 1))
+
+    def test_heartbeat_extends_lease(self):
+        lease_id, _ = analysis_queue.claim_batch(1, lease_seconds=0.3)
+        claimed_until = self.db.news_analysis_queue.find_one({"news_id": "n0"})["lease_expires_at"]
+
+        with analysis_queue.LeaseHeartbeat(lease_id, lease_seconds=0.3):
+            time.sleep(0.5)
+
+        self.assertGreater(self.db.news_analysis_queue.find_one({"news_id": "n0"})["lease_expires_at"], claimed_until)
+        self.assertEqual(analysis_queue.release_expired_leases(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio analysis engine with a stubbed AsyncOpenAI client.
+"""
+import asyncio
+import io
+import contextlib
+import json
+import os
+import sys
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import async_analysis_engine
+from app.services.async_analysis_engine import AsyncAnalysisEngine
+from app.services.provider_pool import ProviderPool, load_providers
+from app.utils.data_utils import generate_fallback_data
+from app.utils.rate_limiter import LocalTokenBucket, RateLimiter
+
+
+class FakeStream:
+    """Streams a complete analysis in a few chunks, sleeping before each one"""
+
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        content = json.dumps(generate_fallback_data(title), ensure_ascii=False)
+        size = len(content) // 4 + 1
+        self.chunks = [content[i:i + size] for i in range(0, len(content), size)]
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def _generate(self):
+        for content in self.chunks:
+            await asyncio.sleep(self.client.hang.get(self.title, self.client.delay))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    async def close(self):
+        self.client.in_flight -= 1
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for AsyncOpenAI that records how many streams are open at once"""
+
+    delay = 0.01
+    hang = {}
+    down = set()
+    instances = []
+
+    def __init__(self, api_key=None, base_url=None, max_retries=None):
+        self.base_url = base_url
+        self.in_flight = 0
+        self.peak = 0
+        self.threads = set()
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        FakeAsyncOpenAI.instances.append(self)
+
+    async def create(self, messages, **kwargs):
+        if self.base_url in self.down:
+            raise ConnectionError(f"{self.base_url} is down")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.threads.add(threading.get_ident())
+        return FakeStream(self, messages[-1]["content"])
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncAnalysisEngine(unittest.TestCase):
+    """Tests for AsyncAnalysisEngine.run"""
+
+    def setUp(self):
+        FakeAsyncOpenAI.delay = 0.01
+        FakeAsyncOpenAI.hang = {}
+        FakeAsyncOpenAI.down = set()
+        FakeAsyncOpenAI.instances = []
+        self.statuses = {}
+        limiter = RateLimiter(LocalTokenBucket(), default_rpm=1e9)
+        patchers = [
+            patch.object(async_analysis_engine, "AsyncOpenAI", FakeAsyncOpenAI),
+            patch.object(async_analysis_engine, "get_rate_limiter", return_value=limiter),
+            patch.object(async_analysis_engine, "update_analysis_status", side_effect=self.record_status),
+            patch.object(async_analysis_engine, "generate_fallback_data", side_effect=lambda title: {"fallback_for": title}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def record_status(self, news_id, status, result=None):
+        self.statuses[news_id] = status
+
+    def engine(self, **kwargs):
+        kwargs.setdefault("max_concurrency", 64)
+        return AsyncAnalysisEngine("key", f"http://{self.id()}/v1", "stub-model", "分析新闻", enable_search=False,
+                                   **kwargs)
+
+    def run_engine(self, engine, titles):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return engine.run(titles, ["微博"] * len(titles))
+
+    def test_semaphore_caps_in_flight_requests(self):
+        titles = [f"新闻{i}" for i in range(10)]
+        results = self.run_engine(self.engine(max_concurrency=3), titles)
+
+        client = FakeAsyncOpenAI.instances[0]
+        self.assertEqual(client.peak, 3)
+        self.assertEqual(client.in_flight, 0)
+        self.assertTrue(client.closed)
+        self.assertEqual(sorted(result["title"] for result in results), sorted(titles))
+        self.assertEqual(list(self.statuses.values()), ["completed"] * 10)
+
+    def test_request_timeout_falls_back(self):
+        FakeAsyncOpenAI.hang = {"慢新闻": 5}
+        engine = self.engine(request_timeout=0.2, max_retries=0)
+        results = {result["title"]: result for result in self.run_engine(engine, ["慢新闻", "快新闻"])}
+
+        self.assertEqual(engine.api_stats["timeout"], 1)
+        self.assertEqual(sorted(self.statuses.values()), ["completed", "failed"])
+        self.assertEqual(results["慢新闻"]["fallback_for"], "慢新闻")
+        self.assertEqual(results["慢新闻"]["platform"], "微博")
+        self.assertNotIn("fallback_for", results["快新闻"])
+        # The timed-out stream was closed
+        self.assertEqual(FakeAsyncOpenAI.instances[0].in_flight, 0)
+
+    def test_run_inside_running_event_loop(self):
+        engine = self.engine()
+
+        async def caller():
+            return self.run_engine(engine, ["新闻甲", "新闻乙"])
+
+        results = asyncio.run(caller())
+
+        self.assertEqual(sorted(result["title"] for result in results), ["新闻乙", "新闻甲"])
+        self.assertNotIn(threading.get_ident(), FakeAsyncOpenAI.instances[0].threads)
+        self.assertEqual(engine.api_stats["success"], 2)
+
+    def test_failover_usage_is_recorded_under_serving_model(self):
+        primary_url = f"http://{self.id()}/v1"
+        FakeAsyncOpenAI.down = {primary_url}
+        pool = ProviderPool(load_providers(
+            [{"base_url": f"http://alt.{self.id()}/v1", "model": "alt-model"}],
+            {"model": "stub-model", "base_url": primary_url, "api_key": "key"}
+        ), name=self.id())
+        engine = self.engine(pool=pool, max_retries=0)
+        results = self.run_engine(engine, ["新闻甲", "新闻乙"])
+
+        self.assertEqual([result["analysis_model"] for result in results], ["alt-model"] * 2)
+        self.assertEqual(engine.model_usage["alt-model"]["requests"], 2)
+        self.assertGreater(engine.model_usage["alt-model"]["completion_tokens"], 0)
+        self.assertEqual(engine.model_usage.get("stub-model", {}).get("completion_tokens", 0), 0)
+        self.assertEqual(sum(usage["prompt_tokens"] for usage in engine.model_usage.values()),
+                         engine.api_stats["prompt_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for splitting batched multi-title analysis responses.
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.news_analysis_service import build_batch_messages, split_batch_response
+
+
+class TestSplitBatchResponse(unittest.TestCase):
+    """Tests for split_batch_response"""
+
+    def setUp(self):
+        self.titles = ["新闻甲", "新闻乙", "新闻丙"]
+
+    def test_matches_items_by_index_and_validates(self):
+        text = "```json\n" + json.dumps([
+            {"index": 2, "title": "新闻乙", "spreadSpeed": 0.4},
+            {"index": 1, "title": "新闻甲"},
+        ], ensure_ascii=False) + "\n```"
+        results = split_batch_response(text, self.titles)
+
+        self.assertEqual(sorted(results), [0, 1])
+        self.assertEqual(results[1]["spreadSpeed"], 0.4)
+        self.assertNotIn("index", results[0])
+        self.assertIn("emotion", results[0])
+
+    def test_title_wins_over_wrong_index_and_duplicates_are_dropped(self):
+        text = json.dumps([
+            {"index": 1, "title": "新闻丙"},
+            {"index": 3, "title": "新闻丙"},
+            {"title": "新闻甲"},
+        ], ensure_ascii=False)
+        results = split_batch_response(text, self.titles)
+
+        self.assertEqual(sorted(results), [0, 2])
+
+    def test_truncated_array_keeps_complete_items(self):
+        complete = json.dumps({"index": 1, "title": "新闻甲"}, ensure_ascii=False)
+        text = f'[{complete}, {{"index": 2, "title": "新闻乙", "introduction": "被截'
+        results = split_batch_response(text, self.titles)
+
+        self.assertEqual(list(results), [0])
+
+    def test_unparseable_response_yields_nothing(self):
+        self.assertEqual(split_batch_response("模型拒绝回答", self.titles), {})
+
+    def test_batch_messages_number_titles_from_one(self):
+        messages = build_batch_messages("系统提示", self.titles)
+
+        self.assertTrue(messages[0]["content"].startswith("系统提示"))
+        self.assertEqual(json.loads(messages[1]["content"])[2], {"index": 3, "title": "新闻丙"})
+
+
+if __name__ == "__main__":
+    unittest.main()
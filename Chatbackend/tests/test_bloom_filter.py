@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the Bloom filters behind the "already analyzed recently" pre-check.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.bloom_filter import BloomFilter, TimePartitionedBloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    """Tests for BloomFilter"""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"新闻标题{i}")
+
+        self.assertTrue(all(f"新闻标题{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"其他标题{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestTimePartitionedBloomFilter(unittest.TestCase):
+    """Tests for TimePartitionedBloomFilter"""
+
+    def setUp(self):
+        self.now = datetime(2025, 4, 8, 12, 30)
+        self.bloom = TimePartitionedBloomFilter(partition_seconds=3600, retention_seconds=48 * 3600)
+
+    def test_window_only_checks_overlapping_partitions(self):
+        self.bloom.add("old", self.now - timedelta(hours=10))
+        self.bloom.add("recent", self.now - timedelta(hours=2))
+
+        since = self.now - timedelta(hours=4)
+        self.assertTrue(self.bloom.might_contain("recent", since))
+        self.assertFalse(self.bloom.might_contain("old", since))
+        self.assertTrue(self.bloom.might_contain("old", self.now - timedelta(hours=24)))
+
+    def test_partition_containing_window_start_is_included(self):
+        self.bloom.add("edge", self.now - timedelta(hours=4, minutes=20))
+
+        self.assertTrue(self.bloom.might_contain("edge", self.now - timedelta(hours=4)))
+
+    def test_expire_drops_partitions_beyond_retention(self):
+        self.bloom.add("stale", self.now - timedelta(hours=60))
+        self.bloom.add("fresh", self.now)
+        self.bloom.expire(self.now)
+
+        self.assertEqual(len(self.bloom.partitions), 1)
+        self.assertFalse(self.bloom.covers(self.now - timedelta(hours=72), self.now))
+
+
+if __name__ == "__main__":
+    unittest.main()
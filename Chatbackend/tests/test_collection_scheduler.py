@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive collection scheduler.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.collection_scheduler import CollectionScheduler, learn_update_cadence
+
+
+def poll_checks(updates, start, end, interval_minutes=10):
+    """(previous_check, checked_at, changed) tuples for fixed-interval polling"""
+    checks = []
+    previous = start
+    moment = start + timedelta(minutes=interval_minutes)
+    while moment <= end:
+        changed = any(previous < update <= moment for update in updates)
+        checks.append((previous, moment, changed))
+        previous = moment
+        moment += timedelta(minutes=interval_minutes)
+    return checks
+
+
+class TestLearnUpdateCadence(unittest.TestCase):
+    """Tests for learn_update_cadence"""
+
+    def setUp(self):
+        self.start = datetime(2025, 4, 8)
+        self.end = self.start + timedelta(days=2)
+
+    def test_learns_hourly_refresh(self):
+        updates = [self.start + timedelta(hours=h, minutes=7, seconds=40) for h in range(48)]
+        cadence = learn_update_cadence(poll_checks(updates, self.start, self.end))
+
+        self.assertEqual(cadence["period"], 60)
+        self.assertLessEqual(cadence["window_start"], 7)
+        self.assertGreater((cadence["window_end"] - 7) % 60, 0)
+        self.assertEqual(cadence["error"], 0)
+
+    def test_prefers_shortest_consistent_period(self):
+        # 10-minute polls cannot tell a 30-minute refresh at :12 from a 15-minute one, 7-minute polls can
+        updates = [self.start + timedelta(minutes=30 * k + 12) for k in range(96)]
+        cadence = learn_update_cadence(poll_checks(updates, self.start, self.end, interval_minutes=7))
+
+        self.assertEqual(cadence["period"], 30)
+
+    def test_no_cadence_without_changes(self):
+        self.assertIsNone(learn_update_cadence(poll_checks([], self.start, self.end)))
+
+
+class TestCollectionSchedulerPlan(unittest.TestCase):
+    """Tests for CollectionScheduler.plan"""
+
+    def setUp(self):
+        self.scheduler = CollectionScheduler()
+        self.cadence = {"period": 60, "window_start": 6, "window_end": 9, "error": 0.0, "samples": 100}
+
+    def test_waits_for_next_window_after_change(self):
+        now = datetime(2025, 4, 8, 10, 9, 30)
+        next_run, _ = self.scheduler.plan(now, "changed", 0, cadence=self.cadence)
+
+        self.assertEqual(next_run.hour, 11)
+        self.assertGreaterEqual(next_run.minute, 6)
+        self.assertLess(next_run.minute, 10)
+
+    def test_retries_inside_window_when_unchanged(self):
+        now = datetime(2025, 4, 8, 10, 9, 30)
+        next_run, _ = self.scheduler.plan(now, "unchanged", 2, cadence=self.cadence,
+                                          last_changed_at=datetime(2025, 4, 8, 9, 9, 30))
+
+        self.assertEqual(next_run, now + timedelta(minutes=1))
+
+    def test_high_heat_tightens_interval(self):
+        now = datetime(2025, 4, 8, 10, 9, 30)
+        next_run, _ = self.scheduler.plan(now, "changed", 0, high_heat=True, cadence=self.cadence)
+
+        self.assertEqual(next_run, now + timedelta(minutes=10))
+
+    def test_backs_off_without_cadence(self):
+        now = datetime(2025, 4, 8, 10, 0)
+        quiet, _ = self.scheduler.plan(now, "unchanged", 1)
+        stalled, _ = self.scheduler.plan(now, "unchanged", 20)
+
+        self.assertEqual(quiet, now + timedelta(minutes=10))
+        self.assertGreater(stalled, quiet)
+        self.assertLessEqual(stalled, now + timedelta(minutes=120))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for rebuilding current_hot_news through a staging collection.
+"""
+import io
+import contextlib
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.services.news_service import NewsService
+from app.services.snapshot_store import HotNewsSnapshotStore, to_processed_record
+
+TITLES = ["事件A", "事件B", "事件C"]
+
+
+class TestCurrentHotNewsSwap(unittest.TestCase):
+    """Tests for NewsService.update_current_hot_news step 5"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+        now = datetime.now().isoformat()
+        news = [{"title": title, "comprehensive_heat": 1.0 - i * 0.1} for i, title in enumerate(TITLES)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            HotNewsSnapshotStore.save(to_processed_record(now, news))
+        self.db.transformed_news.insert_many([{"title": title, "analyzed_at": now} for title in TITLES])
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def rebuild(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return NewsService.update_current_hot_news(n=len(TITLES))
+
+    def staging_collections(self):
+        return [name for name in self.db.list_collection_names()
+                if name.startswith(NewsService.CURRENT_HOT_NEWS_STAGING)]
+
+    def test_rebuild_replaces_current_hot_news(self):
+        self.db.current_hot_news.insert_one({"title": "旧事件", "rank": 1})
+
+        self.assertEqual(self.rebuild()["status"], "success")
+        self.assertEqual([news["title"] for news in self.db.current_hot_news.find(sort=[("rank", 1)])], TITLES)
+        self.assertEqual(self.db.history_top_news.count_documents({"title": "旧事件"}), 1)
+        self.assertEqual(self.staging_collections(), [])
+
+    def test_interleaved_rebuilds_do_not_clobber_each_other(self):
+        original = mongomock.collection.Collection.insert_many
+        nested = {}
+
+        def interleaved(collection, documents, *args, **kwargs):
+            result = original(collection, documents, *args, **kwargs)
+            if collection.name.startswith(NewsService.CURRENT_HOT_NEWS_STAGING) and not nested:
+                # Another rebuild runs to completion between this one's insert and rename
+                nested["started"] = True
+                nested["result"] = self.rebuild()
+            return result
+
+        with patch.object(mongomock.collection.Collection, "insert_many", autospec=True, side_effect=interleaved):
+            result = self.rebuild()
+
+        self.assertEqual(nested["result"]["status"], "success")
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(self.db.current_hot_news.count_documents({}), len(TITLES))
+        self.assertEqual(self.staging_collections(), [])
+
+    def test_failed_rename_drops_staging_and_keeps_current(self):
+        self.db.current_hot_news.insert_one({"title": "旧事件", "rank": 1})
+
+        with patch.object(mongomock.collection.Collection, "rename", side_effect=RuntimeError("rename failed")):
+            result = self.rebuild()
+
+        self.assertEqual(result["status"], "error")
+        self.assertEqual([news["title"] for news in self.db.current_hot_news.find()], ["旧事件"])
+        self.assertEqual(self.staging_collections(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
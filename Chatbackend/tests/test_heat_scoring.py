@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar heat scoring engine.
+"""
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.utils.hotness_parser import parse_hotness_batch
+from app.utils.heat_scoring import HeatScoringEngine
+from app.services.heat_velocity import HeatVelocityStore
+from app.services.news_collection_service import NewsCollectionService
+
+PLATFORM_WEIGHTS = {"微博": 20, "抖音": 5, "知乎热榜": 2}
+PLATFORM_CATEGORIES = {
+    "综合热点": ["微博", "抖音"],
+    "专业平台": ["知乎热榜"],
+}
+HEAT_LEVELS = {
+    (0.8, 2): "爆",
+    (0.6, 0.8): "热",
+    (0.4, 0.6): "高",
+    (0.2, 0.4): "中",
+    (0, 0.2): "低"
+}
+
+
+def make_item(title, platform, heat_value):
+    return {
+        "title": title,
+        "url": f"https://example.com/{platform}/{title}",
+        "hotness": str(heat_value),
+        "heat_value": heat_value,
+        "platform": platform
+    }
+
+
+class TestHeatScoringEngine(unittest.TestCase):
+    """Tests for HeatScoringEngine"""
+
+    def setUp(self):
+        self.engine = HeatScoringEngine(PLATFORM_WEIGHTS, PLATFORM_CATEGORIES, HEAT_LEVELS)
+
+    def test_merges_titles_across_platforms(self):
+        items = [
+            make_item("事件A", "微博", 1000),
+            make_item("事件B", "微博", 10),
+            make_item(" 事件A ", "知乎热榜", 500),
+            make_item("事件A", "抖音", 100),
+        ]
+        result = self.engine.load_items(items).score()
+
+        self.assertEqual([news["title"] for news in result], ["事件A", "事件B"])
+        top = result[0]
+        self.assertEqual(top["platforms"], ["微博", "知乎热榜", "抖音"])
+        self.assertEqual(top["platform_count"], 3)
+        self.assertEqual(top["weighted_heat_value"], 20000 + 1000 + 500)
+        self.assertEqual(top["category_diversity"], 2)
+        self.assertEqual(top["url"], items[0]["url"])
+        self.assertAlmostEqual(top["normalized_heat"], 1.0)
+        self.assertEqual(top["heat_level"], "爆")
+
+    def test_fuzzy_merge_of_similar_titles(self):
+        engine = HeatScoringEngine(PLATFORM_WEIGHTS, PLATFORM_CATEGORIES, HEAT_LEVELS,
+                                   title_merge_threshold=0.55)
+        items = [
+            make_item("奥迪暂停向美国经销商交付汽车", "抖音", 100),
+            make_item("因新关税政策，奥迪暂停向美国经销商交付汽车", "微博", 1000),
+            make_item("#奥迪暂停向美国经销商交付汽车#", "知乎热榜", 50),
+            # Similar titles on the same platform are kept apart
+            make_item("奥迪暂停向美国经销商交付新车", "微博", 10),
+            make_item("北京今日降温", "抖音", 10),
+        ]
+        result = engine.load_items(items).score()
+
+        self.assertEqual(len(result), 3)
+        top = result[0]
+        self.assertEqual(top["title"], "因新关税政策，奥迪暂停向美国经销商交付汽车")
+        self.assertEqual(top["url"], items[1]["url"])
+        self.assertEqual(top["platforms"], ["抖音", "微博", "知乎热榜"])
+        self.assertEqual(top["platform_count"], 3)
+        self.assertCountEqual(top["title_variants"],
+                              ["#奥迪暂停向美国经销商交付汽车#", "奥迪暂停向美国经销商交付汽车"])
+        self.assertNotIn("title_variants", result[1])
+
+    def test_canonical_title_prefers_earliest_known_title(self):
+        engine = HeatScoringEngine(PLATFORM_WEIGHTS, PLATFORM_CATEGORIES, HEAT_LEVELS,
+                                   title_merge_threshold=0.55)
+        calls = []
+
+        def known_since(titles):
+            calls.append(sorted(titles))
+            return {"#奥迪暂停向美国经销商交付汽车#": "2025-03-01T09:00:00",
+                    "奥迪暂停向美国经销商交付汽车": "2025-03-01T08:00:00"}
+
+        items = [
+            make_item("奥迪暂停向美国经销商交付汽车", "抖音", 100),
+            make_item("因新关税政策，奥迪暂停向美国经销商交付汽车", "微博", 1000),
+            make_item("#奥迪暂停向美国经销商交付汽车#", "知乎热榜", 50),
+            make_item("北京今日降温", "抖音", 10),
+        ]
+        top = engine.load_items(items).score(known_since=known_since)[0]
+
+        self.assertEqual(top["title"], "奥迪暂停向美国经销商交付汽车")
+        self.assertEqual(top["url"], items[0]["url"])
+        self.assertCountEqual(top["title_variants"],
+                              ["#奥迪暂停向美国经销商交付汽车#", "因新关税政策，奥迪暂停向美国经销商交付汽车"])
+        # Only titles that were merged are looked up
+        self.assertEqual(calls, [sorted(item["title"] for item in items[:3])])
+
+        # Unknown clusters still fall back to heat
+        unknown = engine.load_items(items).score(known_since=lambda titles: {})[0]
+        self.assertEqual(unknown["title"], "因新关税政策，奥迪暂停向美国经销商交付汽车")
+
+    def test_hotness_is_batch_parsed_when_heat_value_is_missing(self):
+        items = [
+            {"title": "事件A", "hotness": "1.2万", "platform": "微博"},
+            make_item("事件B", "抖音", 500),
+            {"title": "事件C", "hotness": "3901 万热度", "platform": "知乎热榜"},
+        ]
+        with patch("app.utils.heat_scoring.parse_hotness_batch", wraps=parse_hotness_batch) as batch:
+            engine = self.engine.load_items(iter(items))
+
+        batch.assert_called_once_with(["1.2万", "3901 万热度"])
+        np.testing.assert_array_equal(engine.heat_values, [12000.0, 500.0, 39010000.0])
+
+    def test_heat_levels_follow_configured_ranges(self):
+        levels = self.engine.heat_level(np.array([0.0, 0.19, 0.2, 0.5, 0.79, 0.8, 1.0, 2.5]))
+        self.assertListEqual(list(levels), ["低", "低", "中", "高", "热", "爆", "爆", "低"])
+
+    def test_empty_titles_and_zero_heat(self):
+        items = [make_item("", "微博", 100), make_item("事件C", "未知平台", 0)]
+        result = self.engine.load_items(items).score()
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["comprehensive_heat"], 0.0)
+        self.assertEqual(result[0]["heat_level"], "低")
+        self.assertEqual(result[0]["category_diversity"], 0)
+
+    def test_empty_payload(self):
+        self.assertEqual(self.engine.load_items([]).score(), [])
+
+    def test_snapshot_helpers(self):
+        news_list = [
+            {"title": "a", "comprehensive_heat": 0.2, "normalized_heat": 0.3},
+            {"title": "b", "comprehensive_heat": 0.9, "normalized_heat": 1.0},
+            {"title": "c", "comprehensive_heat": 0.5, "normalized_heat": 0.8},
+        ]
+        top = HeatScoringEngine.top_news(news_list, 2)
+        self.assertEqual([news["title"] for news in top], ["b", "c"])
+
+        above = HeatScoringEngine.news_above(news_list, 0.75)
+        self.assertEqual([news["title"] for news in above], ["b", "c"])
+
+
+class TestKnownSince(unittest.TestCase):
+    """Tests for NewsCollectionService.known_since"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_heat_state_then_analysis(self):
+        HeatVelocityStore.record("2025-03-01T08:00:00", [{"title": "事件A", "normalized_heat": 0.5}])
+        HeatVelocityStore.record("2025-03-01T09:00:00", [{"title": "事件A", "normalized_heat": 0.6}])
+        self.db.transformed_news.insert_one({"title": "事件B", "analyzed_at": "2025-03-01T07:00:00"})
+
+        known = NewsCollectionService.known_since(["事件A", "事件B", "事件C"])
+        self.assertEqual(known, {"事件A": "2025-03-01T08:00:00", "事件B": "2025-03-01T07:00:00"})
+
+    def test_canonical_title_survives_heat_flip(self):
+        engine = NewsCollectionService.scoring_engine()
+        first = [make_item("奥迪暂停向美国经销商交付汽车", "微博", 1000),
+                 make_item("因新关税政策，奥迪暂停向美国经销商交付汽车", "抖音", 100)]
+        flipped = [make_item("奥迪暂停向美国经销商交付汽车", "微博", 100),
+                   make_item("因新关税政策，奥迪暂停向美国经销商交付汽车", "抖音", 100000)]
+
+        titles = []
+        for timestamp, items in (("2025-03-01T08:00:00", first), ("2025-03-01T09:00:00", flipped)):
+            news = engine.load_items(items).score(known_since=NewsCollectionService.known_since)
+            HeatVelocityStore.record(timestamp, news)
+            titles.append(news[0]["title"])
+
+        self.assertEqual(titles, ["奥迪暂停向美国经销商交付汽车"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
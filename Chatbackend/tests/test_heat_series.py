@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for per-title heat series buckets and the current_hot_news history source.
+"""
+import io
+import contextlib
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.services.heat_series import HeatSeriesStore, title_id
+from app.services.news_service import NewsService
+from app.services.snapshot_store import HotNewsSnapshotStore, to_processed_record
+
+
+def make_news(title, heat):
+    return {"title": title, "comprehensive_heat": heat, "weighted_heat_value": heat * 100, "normalized_heat": heat}
+
+
+class TestHeatSeriesStore(unittest.TestCase):
+    """Tests for HeatSeriesStore.record / history"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_record_appends_to_daily_buckets(self):
+        HeatSeriesStore.record("2025-03-01T22:00:00", [make_news("事件A", 0.5), make_news("事件B", 0.3), {"title": ""}])
+        HeatSeriesStore.record("2025-03-01T23:00:00", [make_news("事件A", 0.6)])
+        self.assertEqual(HeatSeriesStore.record("2025-03-02T00:00:00", [make_news("事件A", 0.7)]), 1)
+
+        bucket = self.db.hot_news_heat_series.find_one({"_id": f"{title_id('事件A')}:2025-03-01"})
+        self.assertEqual(bucket["title"], "事件A")
+        self.assertEqual(bucket["day"], "2025-03-01")
+        self.assertEqual([point["comprehensive_heat"] for point in bucket["points"]], [0.5, 0.6])
+        self.assertEqual(self.db.hot_news_heat_series.count_documents({}), 3)
+        self.assertEqual(HeatSeriesStore.first_day(), "2025-03-01")
+
+    def test_history_spans_day_boundary(self):
+        for hour, heat in (("2025-03-01T22:00:00", 0.5), ("2025-03-01T23:00:00", 0.6), ("2025-03-02T01:00:00", 0.7)):
+            HeatSeriesStore.record(hour, [make_news("事件A", heat), make_news("事件B", heat / 2)])
+
+        history = HeatSeriesStore.history(["事件A", "没有记录"], "2025-03-01T23:00:00")
+
+        self.assertEqual(list(history), ["事件A"])
+        self.assertEqual([point["timestamp"] for point in history["事件A"]],
+                         ["2025-03-01T23:00:00", "2025-03-02T01:00:00"])
+        self.assertEqual(history["事件A"][1]["weighted_heat_value"], 70)
+
+
+class TestCurrentHotNewsHistory(unittest.TestCase):
+    """Tests for the heat history source used by NewsService.update_current_hot_news"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+        now = datetime.now()
+        self.earlier = (now - timedelta(days=3)).isoformat()
+        self.latest = now.isoformat()
+        with contextlib.redirect_stdout(io.StringIO()):
+            HotNewsSnapshotStore.save(to_processed_record(self.earlier, [make_news("事件A", 0.4)]))
+            HotNewsSnapshotStore.save(to_processed_record(self.latest, [make_news("事件A", 0.8)]))
+        self.db.transformed_news.insert_one({"title": "事件A", "analyzed_at": self.latest})
+
+    def tearDown(self):
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+        self.patcher.stop()
+
+    def heat_history(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(NewsService.update_current_hot_news(n=1)["status"], "success")
+        return self.db.current_hot_news.find_one({"title": "事件A"})["heat_history"]
+
+    def test_replays_snapshots_when_series_starts_inside_window(self):
+        # The series was only enabled for the latest snapshot
+        HeatSeriesStore.record(self.latest, [make_news("事件A", 0.8)])
+
+        history = self.heat_history()
+        self.assertEqual([point["timestamp"] for point in history], [self.earlier, self.latest])
+        self.assertEqual([point["comprehensive_heat"] for point in history], [0.4, 0.8])
+
+    def test_uses_series_once_it_covers_window(self):
+        HeatSeriesStore.record((datetime.now() - timedelta(days=8)).isoformat(), [make_news("事件A", 0.1)])
+        HeatSeriesStore.record(self.latest, [make_news("事件A", 0.9)])
+
+        history = self.heat_history()
+        self.assertEqual([point["comprehensive_heat"] for point in history], [0.9])
+
+
+if __name__ == "__main__":
+    unittest.main()
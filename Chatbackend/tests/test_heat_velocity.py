@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental heat velocity tracking and rising-topic detection.
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.heat_velocity import is_rising, update_heat_state
+from app.utils.queue_priority import priority_score
+
+
+class TestHeatState(unittest.TestCase):
+    """Tests for update_heat_state and is_rising"""
+
+    def test_first_sighting_is_never_rising(self):
+        state = update_heat_state(None, {"title": "a", "normalized_heat": 0.7}, 5, "2025-04-08T10:00:00")
+
+        self.assertEqual(state["seen_count"], 1)
+        self.assertEqual(state["velocity"], 0.0)
+        self.assertFalse(is_rising(state, 0.75))
+
+    def test_accelerating_heat_is_rising_before_threshold(self):
+        first = update_heat_state(None, {"title": "a", "normalized_heat": 0.3}, 60, "2025-04-08T10:00:00")
+        second = update_heat_state(first, {"title": "a", "normalized_heat": 0.4}, 58, "2025-04-08T10:30:00")
+        third = update_heat_state(second, {"title": "a", "normalized_heat": 0.6}, 55, "2025-04-08T11:00:00")
+
+        self.assertAlmostEqual(second["velocity"], 0.1)
+        self.assertGreater(third["velocity"], second["velocity"])
+        self.assertGreater(third["acceleration"], 0)
+        self.assertTrue(is_rising(third, 0.75))
+        self.assertEqual(third["first_seen"], "2025-04-08T10:00:00")
+
+    def test_rank_jump_is_rising(self):
+        first = update_heat_state(None, {"title": "a", "normalized_heat": 0.2}, 45, "2025-04-08T10:00:00")
+        second = update_heat_state(first, {"title": "a", "normalized_heat": 0.2}, 20, "2025-04-08T10:30:00")
+
+        self.assertEqual(second["rank_delta"], 25)
+        self.assertTrue(is_rising(second, 0.75))
+
+    def test_high_heat_and_stale_states_are_not_rising(self):
+        first = update_heat_state(None, {"title": "a", "normalized_heat": 0.5}, 40, "2025-04-08T10:00:00")
+        hot = update_heat_state(first, {"title": "a", "normalized_heat": 0.9}, 1, "2025-04-08T10:30:00")
+        stale = update_heat_state(first, {"title": "a", "normalized_heat": 0.7}, 10, "2025-04-09T10:00:00")
+
+        self.assertFalse(is_rising(hot, 0.75))
+        self.assertEqual(stale["velocity"], 0.0)
+        self.assertFalse(is_rising(stale, 0.75))
+
+    def test_rising_news_gets_high_heat_priority(self):
+        news = {"heat_level": "低", "normalized_heat": 0.3}
+
+        self.assertGreater(priority_score(dict(news, rising=True)), priority_score(news))
+
+
+if __name__ == "__main__":
+    unittest.main()
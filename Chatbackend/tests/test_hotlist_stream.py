@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming hotlist parser.
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.hotlist_stream import HotlistStreamParser
+
+PAYLOAD_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "hot_news.json")
+
+
+class TestHotlistStreamParser(unittest.TestCase):
+    """Tests for HotlistStreamParser"""
+
+    def test_matches_full_parse_on_recorded_payload(self):
+        with open(PAYLOAD_FILE, "r", encoding="utf-8") as f:
+            payload = json.load(f)[0]["data"]
+        exclude = {"虎扑", "知乎日报", "豆瓣小组"}
+
+        expected = []
+        for platform_data in payload["data"]:
+            if platform_data["name"] in exclude:
+                continue
+            news_list = [news for news in platform_data["data"] if news.get("title")][:5]
+            expected.extend((platform_data["name"], news["title"], news.get("url", ""), news.get("hot", "0"))
+                            for news in news_list)
+
+        parser = HotlistStreamParser(exclude=exclude, max_per_platform=5)
+        raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        actual = [(item["platform"], item["title"], item["url"], item["hotness"]) for item in parser.items(raw)]
+
+        self.assertEqual(actual, expected)
+        self.assertEqual(parser.meta, {"success": True})
+        self.assertIsNone(parser.platforms["虎扑"])
+        self.assertEqual(parser.platforms["微博"], 5)
+
+    def test_list_before_name_and_nested_fields(self):
+        payload = {
+            "data": [
+                {"data": [{"title": "a", "hot": 1}, {"title": ""}, {"title": "b"}], "name": "排除"},
+                {"data": [{"title": "c", "hot": "3万", "extra": {"title": "ignored"}}, {"title": "d"}], "name": "微博"},
+            ],
+            "success": False,
+            "msg": "限流",
+        }
+        parser = HotlistStreamParser(exclude=["排除"], max_per_platform=1)
+        items = list(parser.items(json.dumps(payload, ensure_ascii=False)))
+
+        self.assertEqual(items, [{"title": "c", "url": "", "hotness": "3万", "platform": "微博"}])
+        self.assertEqual(parser.meta, {"success": False, "msg": "限流"})
+        self.assertEqual(parser.platforms, {"排除": None, "微博": 1})
+
+    def test_invalid_json_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(HotlistStreamParser().items(b'{"data": [{"name": "x", "data": ['))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch hotness parser.
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.hotness_parser import parse_hotness_value, parse_hotness_batch
+
+
+class TestHotnessParser(unittest.TestCase):
+    """Tests for parse_hotness_value / parse_hotness_batch"""
+
+    def test_units_and_formats(self):
+        self.assertEqual(parse_hotness_value("671.5万"), 6715000.0)
+        self.assertEqual(parse_hotness_value("5337 万热度"), 53370000.0)
+        self.assertEqual(parse_hotness_value("3.6亿"), 360000000.0)
+        self.assertEqual(parse_hotness_value("2千"), 2000.0)
+        self.assertEqual(parse_hotness_value("1,266.11热度"), 1266.11)
+        self.assertEqual(parse_hotness_value("9.4 澎湃"), 94000.0)
+
+    def test_invalid_values(self):
+        for value in (None, "", "今日", True, ["1万"]):
+            self.assertEqual(parse_hotness_value(value), 0.0)
+        self.assertEqual(parse_hotness_value("1.2.3"), 1.2)
+        self.assertEqual(parse_hotness_value(12345), 12345.0)
+
+    def test_batch_returns_float_array(self):
+        result = parse_hotness_batch(["1万", "1万", "50亮", None])
+        self.assertEqual(result.dtype.name, "float64")
+        self.assertListEqual(result.tolist(), [10000.0, 10000.0, 50.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled conditional-request fetch client.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.http_client import HttpFetchClient
+
+
+class HotlistHandler(BaseHTTPRequestHandler):
+    """Serves server.payload, with an ETag unless server.send_etag is False"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        body = json.dumps(server.payload, ensure_ascii=False).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if server.send_etag and self.headers.get("If-None-Match") == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if server.send_etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpFetchClient(unittest.TestCase):
+    """Tests for HttpFetchClient against a local server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), HotlistHandler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/hotlist"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.payload = {"success": True, "data": [{"name": "微博", "data": [{"title": "事件A", "hot": "1万"}]}]}
+        self.server.send_etag = True
+        self.server.requests = 0
+        self.server.not_modified = 0
+
+    def test_ttl_hit_skips_network(self):
+        client = HttpFetchClient(ttl=60)
+        first = client.fetch(self.url)
+        second = client.fetch(self.url)
+
+        self.assertTrue(first.changed)
+        self.assertTrue(second.from_cache)
+        self.assertFalse(second.changed)
+        self.assertIs(second.json(), first.json())
+        self.assertEqual(first.json()["data"][0]["name"], "微博")
+        self.assertEqual(self.server.requests, 1)
+
+    def test_conditional_request_reuses_parsed_body(self):
+        client = HttpFetchClient(ttl=0)
+        parsed = client.fetch(self.url).json()
+        again = client.fetch(self.url)
+
+        self.assertTrue(again.not_modified)
+        self.assertFalse(again.changed)
+        self.assertIs(again.json(), parsed)
+        self.assertEqual(self.server.not_modified, 1)
+
+        self.server.payload = {"success": True, "data": []}
+        updated = client.fetch(self.url)
+        self.assertTrue(updated.changed)
+        self.assertEqual(updated.json()["data"], [])
+
+    def test_persisted_validators_work_across_clients(self):
+        validators = HttpFetchClient(ttl=0).fetch(self.url).validators()
+        result = HttpFetchClient(ttl=0).fetch(self.url, validators=validators)
+
+        self.assertTrue(result.not_modified)
+        self.assertFalse(result.changed)
+        self.assertIsNone(result.json())
+
+    def test_persisted_validators_win_over_in_process_fetch(self):
+        client = HttpFetchClient(ttl=0)
+        persisted = client.fetch(self.url).validators()
+
+        # Another in-process caller sees the update first
+        self.server.payload = {"success": True, "data": []}
+        self.assertTrue(client.fetch(self.url).changed)
+
+        result = client.fetch(self.url, validators=persisted)
+        self.assertTrue(result.changed)
+        self.assertEqual(result.json()["data"], [])
+        self.assertFalse(client.fetch(self.url, validators=result.validators()).changed)
+
+    def test_persisted_validators_apply_to_ttl_hits(self):
+        client = HttpFetchClient(ttl=60)
+        persisted = HttpFetchClient(ttl=0).fetch(self.url).validators()
+        self.server.payload = {"success": True, "data": []}
+        client.fetch(self.url)
+
+        result = client.fetch(self.url, validators=persisted)
+        self.assertTrue(result.from_cache)
+        self.assertTrue(result.changed)
+        self.assertFalse(client.fetch(self.url, validators=result.validators()).changed)
+
+    def test_body_hash_detects_unchanged_content_without_etag(self):
+        self.server.send_etag = False
+        client = HttpFetchClient(ttl=0)
+        parsed = client.fetch(self.url).json()
+        again = client.fetch(self.url)
+
+        self.assertEqual(again.status_code, 200)
+        self.assertFalse(again.changed)
+        self.assertIs(again.json(), parsed)
+        self.assertEqual(client.stats["unchanged_body"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
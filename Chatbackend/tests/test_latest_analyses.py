@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for looking up the latest analysis of many titles in one aggregation.
+"""
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import mongomock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.utils.db_utils import get_latest_analyses_by_titles
+
+
+class TestLatestAnalysesByTitles(unittest.TestCase):
+    """Tests for get_latest_analyses_by_titles"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        self.db.transformed_news.insert_many([
+            {"title": "事件A", "analyzed_at": "2025-03-01T08:00:00", "summary": "A旧"},
+            {"title": "事件A", "analyzed_at": "2025-03-01T10:00:00", "summary": "A新"},
+            {"title": "事件A", "analyzed_at": "2025-03-01T09:00:00", "summary": "A中"},
+            {"title": "事件B", "analyzed_at": "2025-03-01T07:00:00", "summary": "B"},
+            {"title": "事件C", "analyzed_at": "2025-03-01T11:00:00", "summary": "C"},
+        ])
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_newest_analysis_wins(self):
+        results = get_latest_analyses_by_titles(["事件A", "事件B", "事件A", "", "没有分析"])
+
+        self.assertEqual(sorted(results), ["事件A", "事件B"])
+        self.assertEqual(results["事件A"]["summary"], "A新")
+        self.assertEqual(results["事件B"]["summary"], "B")
+
+    def test_analyzed_after_filter(self):
+        results = get_latest_analyses_by_titles(["事件A", "事件B"], analyzed_after="2025-03-01T08:30:00")
+
+        self.assertEqual(list(results), ["事件A"])
+        self.assertEqual(results["事件A"]["summary"], "A新")
+
+    def test_projection_keeps_title(self):
+        results = get_latest_analyses_by_titles(["事件A", "事件C"], projection={"title": 1, "analyzed_at": 1, "_id": 0})
+
+        self.assertEqual(results["事件A"], {"title": "事件A", "analyzed_at": "2025-03-01T10:00:00"})
+        self.assertEqual(results["事件C"], {"title": "事件C", "analyzed_at": "2025-03-01T11:00:00"})
+
+    def test_empty_titles_do_not_query(self):
+        with patch.object(mongomock.collection.Collection, "aggregate") as aggregate:
+            self.assertEqual(get_latest_analyses_by_titles([]), {})
+            self.assertEqual(get_latest_analyses_by_titles(["", None]), {})
+        aggregate.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
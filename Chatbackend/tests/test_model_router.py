@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for routing analyses across model tiers.
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.model_router import ModelMetrics, ModelRouter, load_tiers
+
+
+class TestModelRouter(unittest.TestCase):
+    """Tests for ModelRouter"""
+
+    def setUp(self):
+        self.metrics = ModelMetrics()
+        self.tiers = load_tiers([
+            {"name": "head", "model": "big", "min_score": 0.6},
+            {"name": "mid", "model": "medium", "min_score": 0.3, "max_p95": 10},
+            {"name": "tail", "model": "small", "min_score": 0.2, "enable_search": False},
+        ], "default-model", "http://llm/v1", "key")
+        self.router = ModelRouter(self.tiers, self.metrics, queue_depth_high=100, min_samples=5)
+
+    def test_load_tiers_fills_defaults(self):
+        tiers = load_tiers("", "default-model", "http://llm/v1", "key")
+
+        self.assertEqual(len(tiers), 1)
+        self.assertEqual(tiers[0]["model"], "default-model")
+        self.assertEqual(self.tiers[1]["base_url"], "http://llm/v1")
+        self.assertEqual(self.tiers[2]["min_score"], 0.0)
+        self.assertFalse(self.tiers[2]["enable_search"])
+
+    def test_routes_by_score(self):
+        self.assertEqual(self.router.route(0.9)["name"], "head")
+        self.assertEqual(self.router.route(0.4)["name"], "mid")
+        self.assertEqual(self.router.route(0.1)["name"], "tail")
+
+    def test_queue_and_budget_pressure_raise_thresholds(self):
+        self.assertEqual(self.router.route(0.65, queue_depth=100)["name"], "mid")
+        self.assertEqual(self.router.route(0.65, budget_remaining=0.0)["name"], "mid")
+        self.assertEqual(self.router.route(0.65, budget_remaining=0.6)["name"], "head")
+        self.assertEqual(self.router.route(0.95, queue_depth=500)["name"], "head")
+
+    def test_unhealthy_tier_escalates_then_demotes(self):
+        for _ in range(5):
+            self.metrics.record_request("medium", 1.0, valid=False)
+        self.assertEqual(self.router.route(0.4)["name"], "head")
+
+        for _ in range(5):
+            self.metrics.record_request("big", 1.0, valid=True)
+            self.metrics.record_result("big", fallback=True)
+        self.assertEqual(self.router.route(0.4)["name"], "tail")
+
+    def test_slow_tier_is_skipped(self):
+        for _ in range(5):
+            self.metrics.record_request("medium", 30.0, valid=True)
+
+        self.assertEqual(self.router.route(0.4)["name"], "head")
+
+    def test_assign_groups_indices_by_tier(self):
+        groups = self.router.assign([0.1, 0.9, 0.4, 0.05])
+
+        self.assertEqual([(tier["name"], indices) for tier, indices in groups],
+                         [("head", [1]), ("mid", [2]), ("tail", [0, 3])])
+
+
+class TestModelMetrics(unittest.TestCase):
+    """Tests for ModelMetrics"""
+
+    def test_summary_rates_and_percentiles(self):
+        metrics = ModelMetrics(window=10)
+        for duration in range(1, 11):
+            metrics.record_request("m", float(duration), valid=duration != 10)
+        metrics.record_request("m")
+        metrics.record_result("m", fallback=True)
+        metrics.record_result("m", fallback=False)
+
+        summary = metrics.summary("m")
+        self.assertEqual(summary["samples"], 10)
+        self.assertEqual(summary["p95"], 10.0)
+        self.assertAlmostEqual(summary["valid_rate"], 8 / 9)
+        self.assertAlmostEqual(summary["error_rate"], 0.1)
+        self.assertEqual(summary["fallback_rate"], 0.5)
+        self.assertEqual(metrics.pending["m"]["requests"], 11)
+        self.assertEqual(metrics.pending["m"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable concurrent news source collector.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.news_sources import NewsSourceCollector, build_sources
+from app.utils.circuit_breaker import CircuitBreaker
+
+HOTLIST = {
+    "success": True,
+    "data": [
+        {"name": "微博", "data": [{"title": "a", "hot": "1万", "url": "u1"}, {"title": "b", "hot": 5}]},
+        {"name": "虎扑", "data": [{"title": "c", "hot": 1}]},
+    ],
+}
+PLATFORM_LIST = {"data": {"list": [{"name": "b", "score": 9}, {"name": "d", "score": 3, "link": "u4"}]}}
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """Serves payloads by path; /slow sleeps before answering"""
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(2)
+        payload = PLATFORM_LIST if self.path.startswith("/list") else HOTLIST
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestNewsSourceCollector(unittest.TestCase):
+    """Tests for NewsSourceCollector"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_slow_and_dead_sources_do_not_delay_collection(self):
+        sources = build_sources([
+            {"type": "hotlist", "name": "fast-1", "url": f"{self.base}/hotlist?fast1"},
+            {"type": "hotlist", "name": "slow-1", "url": f"{self.base}/slow?1", "timeout": 0.5},
+            {"type": "hotlist", "name": "dead-1", "url": f"http://127.0.0.1:{unused_port()}/"},
+            {"type": "json_list", "name": "list-1", "url": f"{self.base}/list?1", "platform": "知乎",
+             "items_path": "data.list", "title_field": "name", "hot_field": "score", "url_field": "link"},
+        ], exclude=["虎扑"], timeout=1)
+        collection = NewsSourceCollector(sources).collect()
+
+        self.assertLess(collection.elapsed, 1.5)
+        self.assertEqual(collection.reports["fast-1"]["status"], "ok")
+        self.assertEqual(collection.reports["slow-1"]["status"], "timeout")
+        self.assertEqual(collection.reports["dead-1"]["status"], "error")
+        self.assertEqual([(item["platform"], item["title"]) for item in collection.items],
+                         [("微博", "a"), ("微博", "b"), ("知乎", "b"), ("知乎", "d")])
+        self.assertEqual(collection.items[3], {"title": "d", "url": "u4", "hotness": 3, "platform": "知乎"})
+
+    def test_duplicate_sources_keep_first_in_config_order(self):
+        sources = build_sources([
+            {"name": "primary-2", "url": f"{self.base}/hotlist?primary2"},
+            {"name": "fallback-2", "url": f"{self.base}/hotlist?fallback2"},
+        ])
+        collection = NewsSourceCollector(sources).collect()
+
+        self.assertEqual(collection.reports["fallback-2"]["items"], 3)
+        self.assertEqual(len(collection.items), 3)
+        self.assertIsNotNone(collection.response_for(f"{self.base}/hotlist?primary2"))
+
+    def test_open_circuit_skips_dead_source(self):
+        dead_url = f"http://127.0.0.1:{unused_port()}/"
+        sources = build_sources([{"name": "dead-3", "url": dead_url}, {"name": "fast-3", "url": f"{self.base}/?3"}])
+        collector = NewsSourceCollector(sources, failure_threshold=2, reset_timeout=60)
+
+        for _ in range(2):
+            self.assertEqual(collector.collect().reports["dead-3"]["status"], "error")
+        collection = collector.collect()
+
+        self.assertEqual(collection.reports["dead-3"]["status"], "circuit_open")
+        self.assertEqual(collection.reports["fast-3"]["status"], "ok")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests for CircuitBreaker"""
+
+    def test_half_open_probe_after_cooldown(self):
+        breaker = CircuitBreaker("probe", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
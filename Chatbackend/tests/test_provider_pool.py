@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged requests, failover and per-provider circuit breaking in the provider pool.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.provider_pool import ProviderPool, ProvidersUnavailable, load_providers
+
+
+def make_pool(count=2, **kwargs):
+    """Create a pool with uniquely named providers so breaker state is not shared between tests"""
+    prefix = uuid.uuid4().hex[:8]
+    alternates = [{"name": f"{prefix}-alt{i}", "base_url": f"http://alt{i}/v1"} for i in range(1, count)]
+    primary = {"name": f"{prefix}-primary", "model": "m", "base_url": "http://primary/v1", "api_key": "k"}
+    kwargs.setdefault("default_delay", 0.05)
+    kwargs.setdefault("min_delay", 0)
+    return ProviderPool(load_providers(alternates, primary), name=prefix, **kwargs)
+
+
+class TestLoadProviders(unittest.TestCase):
+    """Tests for load_providers"""
+
+    def test_alternates_inherit_primary_fields_and_duplicates_are_dropped(self):
+        providers = load_providers(json.dumps([
+            {"base_url": "http://other/v1", "enable_search": False},
+            {"model": "m"},
+        ]), {"model": "m", "base_url": "http://primary/v1", "api_key": "k"})
+
+        self.assertEqual([provider["name"] for provider in providers], ["primary:m", "other:m"])
+        self.assertEqual(providers[1]["api_key"], "k")
+        self.assertTrue(providers[0]["enable_search"])
+        self.assertFalse(providers[1]["enable_search"])
+
+
+class TestProviderPoolAsync(unittest.TestCase):
+    """Tests for ProviderPool.call_async"""
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        pool = make_pool()
+        cancelled = []
+
+        async def request(provider):
+            try:
+                await asyncio.sleep(1.0 if provider is pool.primary else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(provider["name"])
+                raise
+            return provider["name"]
+
+        stats = {"hedged": 0, "hedge_wins": 0}
+        start = time.monotonic()
+        result, provider = asyncio.run(pool.call_async(request, stats))
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(result, pool.providers[1]["name"])
+        self.assertEqual(cancelled, [pool.primary["name"]])
+        self.assertEqual(stats, {"hedged": 1, "hedge_wins": 1})
+
+    def test_fast_primary_is_not_hedged(self):
+        pool = make_pool()
+        calls = []
+
+        async def request(provider):
+            calls.append(provider["name"])
+            return "ok"
+
+        self.assertEqual(asyncio.run(pool.call_async(request))[1], pool.primary)
+        self.assertEqual(calls, [pool.primary["name"]])
+        self.assertEqual(pool.stats["hedged"], 0)
+
+    def test_failure_fails_over_and_trips_breaker(self):
+        pool = make_pool(failure_threshold=2, reset_timeout=60)
+
+        async def request(provider):
+            if provider is pool.primary:
+                raise ConnectionError("down")
+            return "ok"
+
+        for _ in range(2):
+            self.assertEqual(asyncio.run(pool.call_async(request))[1], pool.providers[1])
+        self.assertEqual(pool.stats["failovers"], 2)
+
+        # The primary is skipped while its breaker is open
+        asyncio.run(pool.call_async(request))
+        self.assertEqual(pool.stats["skipped"], 1)
+        self.assertEqual(pool.stats["failovers"], 2)
+
+    def test_invalid_output_fails_over_without_tripping_breaker(self):
+        pool = make_pool(failure_threshold=1)
+
+        async def request(provider):
+            if provider is pool.primary:
+                raise json.JSONDecodeError("bad", "{", 0)
+            return "ok"
+
+        asyncio.run(pool.call_async(request))
+        self.assertEqual(pool.breakers[pool.primary["name"]].state, "closed")
+
+    def test_all_providers_failing_raises_last_error(self):
+        pool = make_pool(count=3)
+
+        async def request(provider):
+            raise ValueError(provider["name"])
+
+        with self.assertRaises(ValueError) as context:
+            asyncio.run(pool.call_async(request))
+        self.assertEqual(str(context.exception), pool.providers[2]["name"])
+
+    def test_single_provider_ignores_breaker(self):
+        pool = make_pool(count=1, failure_threshold=1)
+        pool.breakers[pool.primary["name"]].record_failure()
+
+        async def request(provider):
+            return "ok"
+
+        self.assertEqual(asyncio.run(pool.call_async(request))[0], "ok")
+
+    def test_every_provider_open_raises_unavailable(self):
+        pool = make_pool(failure_threshold=1)
+        for breaker in pool.breakers.values():
+            breaker.record_failure()
+
+        async def request(provider):
+            return "ok"
+
+        with self.assertRaises(ProvidersUnavailable):
+            asyncio.run(pool.call_async(request))
+
+
+class TestProviderPoolSync(unittest.TestCase):
+    """Tests for ProviderPool.call"""
+
+    def test_slow_primary_is_hedged_and_notified(self):
+        pool = make_pool()
+        events = {}
+
+        def request(provider, cancelled):
+            events[provider["name"]] = cancelled
+            if provider is pool.primary:
+                cancelled.wait(1.0)
+                return "slow"
+            return "fast"
+
+        result, provider = pool.call(request)
+
+        self.assertEqual(result, "fast")
+        self.assertTrue(events[pool.primary["name"]].is_set())
+        self.assertFalse(events[pool.providers[1]["name"]].is_set())
+
+    def test_failure_fails_over(self):
+        pool = make_pool()
+
+        def request(provider, cancelled):
+            if provider is pool.primary:
+                raise TimeoutError("slow")
+            return threading.current_thread().name
+
+        self.assertEqual(pool.call(request)[1], pool.providers[1])
+        self.assertEqual(pool.stats["failovers"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
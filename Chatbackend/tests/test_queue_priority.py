@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for analysis queue priority scoring and aging.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.queue_priority import (
+    MAX_BOOST_SECONDS, RETRY_PENALTY_SECONDS, priority_score, schedule_key
+)
+
+
+class TestQueuePriority(unittest.TestCase):
+    """Tests for priority_score / schedule_key"""
+
+    def test_score_orders_by_heat_and_spread(self):
+        hot = priority_score({"heat_level": "爆", "platform_count": 5, "category_diversity": 3})
+        warm = priority_score({"heat_level": "热", "platform_count": 2, "category_diversity": 1})
+        cold = priority_score({"title": "no heat info"})
+
+        self.assertEqual(hot, 1.0)
+        self.assertGreater(warm, cold)
+        self.assertGreaterEqual(cold, 0.0)
+        self.assertGreater(priority_score({"normalized_heat": 0.8}), priority_score({"heat_level": "热"}))
+
+    def test_aging_bounds_how_far_new_items_can_jump(self):
+        start = datetime(2025, 1, 1, 8, 0)
+        old_low = schedule_key(start, 0.0)
+        new_top = schedule_key(start + timedelta(seconds=MAX_BOOST_SECONDS - 1), 1.0)
+        newer_top = schedule_key(start + timedelta(seconds=MAX_BOOST_SECONDS + 1), 1.0)
+
+        self.assertLess(new_top, old_low)
+        self.assertGreater(newer_top, old_low)
+        self.assertEqual(schedule_key(start.isoformat(), 0.5, attempts=2) - schedule_key(start, 0.5),
+                         2 * RETRY_PENALTY_SECONDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
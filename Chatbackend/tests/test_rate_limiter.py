@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM token-bucket rate limiter (local backend).
+"""
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import (
+    LocalTokenBucket, RateLimiter, RateLimitExceeded, RedisTokenBucket, estimate_tokens, provider_from_url
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests for LocalTokenBucket / RateLimiter"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(
+            LocalTokenBucket(clock=self.clock),
+            limits={"api.example.com:small": {"rpm": 3, "tpm": 600}},
+        )
+
+    def test_request_bucket_refills_over_time(self):
+        for _ in range(3):
+            self.assertEqual(self.limiter.try_acquire("api.example.com", "small"), 0)
+
+        wait = self.limiter.try_acquire("api.example.com", "small")
+        self.assertAlmostEqual(wait, 20.0)
+
+        self.clock.now += 20
+        self.assertEqual(self.limiter.try_acquire("api.example.com", "small"), 0)
+
+    def test_token_bucket_and_usage_correction(self):
+        self.assertEqual(self.limiter.try_acquire("api.example.com", "small", tokens=500), 0)
+        self.assertAlmostEqual(self.limiter.try_acquire("api.example.com", "small", tokens=200), 10.0)
+
+        # The call used far fewer tokens than estimated: the difference is refunded
+        self.limiter.record_usage("api.example.com", "small", 500, 100)
+        self.assertEqual(self.limiter.try_acquire("api.example.com", "small", tokens=200), 0)
+
+    def test_acquire_times_out(self):
+        for _ in range(3):
+            self.limiter.acquire("api.example.com", "small", timeout=1)
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire("api.example.com", "small", timeout=1)
+
+    def test_zero_limits_are_unlimited(self):
+        limiter = RateLimiter(
+            LocalTokenBucket(clock=self.clock),
+            limits={"no-rpm": {"rpm": 0, "tpm": 600}, "no-tpm": {"rpm": 3, "tpm": 0}},
+            default_rpm=0,
+            default_tpm=0,
+        )
+        for _ in range(10):
+            self.assertEqual(limiter.try_acquire("other", "model", tokens=10000), 0)
+            limiter.record_usage("other", "model", 10000, 20000)
+
+        # rpm=0 only lifts the request limit; the token limit still applies
+        for _ in range(5):
+            self.assertEqual(limiter.try_acquire("no-rpm", "m", tokens=100), 0)
+        self.assertAlmostEqual(limiter.try_acquire("no-rpm", "m", tokens=200), 10.0)
+
+        for _ in range(3):
+            self.assertEqual(limiter.try_acquire("no-tpm", "m", tokens=10000), 0)
+        self.assertAlmostEqual(limiter.try_acquire("no-tpm", "m"), 20.0)
+
+    def test_zero_rpm_in_backend(self):
+        bucket = LocalTokenBucket(clock=self.clock)
+        for _ in range(5):
+            self.assertEqual(bucket.try_acquire(("req", "tok"), 0, 0, tokens=100), 0)
+        self.assertEqual(bucket.buckets, {})
+
+    def test_acquire_async_runs_backend_off_the_loop(self):
+        threads = []
+        acquire = self.limiter.backend.try_acquire
+
+        def recording(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return acquire(*args, **kwargs)
+
+        self.limiter.backend.try_acquire = recording
+        asyncio.run(self.limiter.acquire_async("api.example.com", "small"))
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_helpers(self):
+        self.assertEqual(provider_from_url("https://dashscope.aliyuncs.com/compatible-mode/v1"),
+                         "dashscope.aliyuncs.com")
+        self.assertEqual(self.limiter.limits_for("other", "model"), (300, 0))
+        self.assertEqual(estimate_tokens(text="新闻abcd"), 3)
+        self.assertEqual(estimate_tokens([{"role": "user", "content": "你好"}], completion_tokens=10), 16)
+
+
+class TestGetRateLimiter(unittest.TestCase):
+    """Tests for get_rate_limiter"""
+
+    def test_redis_is_retried_after_startup_failure(self):
+        client = MagicMock()
+        client.ping.side_effect = ConnectionError("redis down")
+        script = client.register_script.return_value
+        script.return_value = 0
+
+        with patch.object(rate_limiter, "_limiter", None), \
+                patch("redis.Redis.from_url", return_value=client), \
+                patch.dict(os.environ, {"RATE_LIMIT_BACKEND": "redis"}):
+            limiter = rate_limiter.get_rate_limiter()
+
+            self.assertIsInstance(limiter.backend, RedisTokenBucket)
+            self.assertEqual(limiter.try_acquire("api.example.com", "m"), 0)
+            script.assert_not_called()
+
+            # Once the retry window has passed Redis is used again
+            limiter.backend_down_until = 0
+            self.assertEqual(limiter.try_acquire("api.example.com", "m"), 0)
+            script.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the recent-analysis pre-check against analyses written by other processes.
+"""
+import io
+import contextlib
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from bson import ObjectId
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.services import recent_analysis_filter
+from app.services.recent_analysis_filter import RecentAnalysisFilter
+
+
+class TestRecentAnalysisFilter(unittest.TestCase):
+    """Tests for RecentAnalysisFilter.candidates / analyzed_since"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        RecentAnalysisFilter._filter = None
+        RecentAnalysisFilter._synced_at = 0.0
+        self.since = datetime.now() - timedelta(hours=24)
+        self.db.transformed_news.insert_one({"title": "本进程分析", "analyzed_at": datetime.now().isoformat()})
+        with contextlib.redirect_stdout(io.StringIO()):
+            RecentAnalysisFilter.warm()
+
+    def tearDown(self):
+        RecentAnalysisFilter._filter = None
+        self.patcher.stop()
+
+    def test_unanalyzed_titles_skip_the_database(self):
+        self.assertEqual(RecentAnalysisFilter.candidates(["本进程分析", "没有分析"], self.since), ["本进程分析"])
+
+    def test_insert_from_another_process_before_next_sync(self):
+        # Another worker stamps analyzed_at and commits after this process last synced
+        stamped = (datetime.now() - timedelta(seconds=5)).isoformat()
+        self.db.transformed_news.insert_one({"title": "其他进程分析", "analyzed_at": stamped})
+
+        self.assertEqual(RecentAnalysisFilter.candidates(["其他进程分析", "没有分析"], self.since), ["其他进程分析"])
+        self.assertIn("其他进程分析", RecentAnalysisFilter.analyzed_since(["其他进程分析"], self.since))
+
+    def test_insert_committed_after_watermark_passed_its_analyzed_at(self):
+        stamped = (datetime.now() - timedelta(seconds=5)).isoformat()
+        RecentAnalysisFilter._refreshed_at = 0.0
+        RecentAnalysisFilter.candidates(["其他标题"], self.since)
+        # The slow writer commits a row stamped before the sync that just ran
+        self.db.transformed_news.insert_one({"title": "慢写入分析", "analyzed_at": stamped})
+        RecentAnalysisFilter._refreshed_at = 0.0
+
+        self.assertEqual(RecentAnalysisFilter.candidates(["慢写入分析"], self.since), ["慢写入分析"])
+        # Once synced it stays in the filter after the overlap window has passed
+        with patch.object(recent_analysis_filter, "SYNC_OVERLAP_SECONDS", -3600):
+            self.assertEqual(RecentAnalysisFilter.candidates(["慢写入分析"], self.since), ["慢写入分析"])
+
+    def test_in_place_reanalysis_of_an_old_document(self):
+        old_id = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(days=5))
+        self.db.transformed_news.insert_one({"_id": old_id, "title": "旧新闻",
+                                             "analyzed_at": (datetime.now() - timedelta(days=5)).isoformat()})
+        self.assertEqual(RecentAnalysisFilter.candidates(["旧新闻"], self.since), [])
+
+        self.db.transformed_news.update_one({"title": "旧新闻"}, {"$set": {"analyzed_at": datetime.now().isoformat()}})
+        self.assertEqual(RecentAnalysisFilter.candidates(["旧新闻"], self.since), ["旧新闻"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the refresh mode that only regenerates time-sensitive analysis fields.
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.news_analysis_service import (build_refresh_messages, refresh_validator, merge_refresh,
+                                                REFRESH_CONTEXT_POINTS)
+
+
+class TestRefreshAnalysis(unittest.TestCase):
+    """Tests for building refresh requests and merging their results"""
+
+    def setUp(self):
+        self.prior = {
+            "_id": "mongo-id",
+            "title": "新闻甲",
+            "type": "科技新闻",
+            "introduction": "简介",
+            "x": 120.1,
+            "y": 30.2,
+            "analyzed_at": "2025-04-08T10:00:00",
+            "heatTrend": [{"date": f"2025-04-0{day}", "value": 0.123456} for day in range(1, 9)],
+            "timeline": [{"date": "2025-04-06", "event": "事件开始"}, {"date": "2025-04-07", "event": "事件发酵"}],
+            "emotion": {"schema": {"喜悦": 1.0}, "rationale": "旧依据"},
+            "stance": {"schema": {"中立陈述": 1.0}, "rationale": "旧依据"},
+            "wordCloud": [{"word": f"词{i}", "weight": 1} for i in range(20)]
+        }
+
+    def test_messages_send_only_recent_time_sensitive_context(self):
+        messages = build_refresh_messages("刷新提示", self.prior)
+        context = json.loads(messages[1]["content"])
+
+        self.assertEqual(messages[0]["content"], "刷新提示")
+        self.assertNotIn("wordCloud", context)
+        self.assertNotIn("_id", context)
+        self.assertEqual(len(context["heatTrend"]), REFRESH_CONTEXT_POINTS)
+        self.assertEqual(context["heatTrend"][-1], {"date": "2025-04-08", "value": 0.123})
+        self.assertEqual(context["emotion"], {"schema": {"喜悦": 1.0}})
+
+    def test_merge_updates_time_sensitive_fields_and_keeps_the_rest(self):
+        validator = refresh_validator()
+        validator.feed(json.dumps({
+            "heatTrend": [{"date": "2025-04-08", "value": 0.9}, {"date": "2025-04-09", "value": 0.7}],
+            "timeline": [{"date": "2025-04-09", "event": "新进展"}],
+            "emotion": {"schema": {"愤怒": 1.0}, "rationale": "新依据"},
+            "stance": {"schema": {"强烈反对": 1.0}, "rationale": "新依据"}
+        }, ensure_ascii=False))
+
+        result = merge_refresh(self.prior, validator, "新闻甲")
+
+        self.assertNotIn("_id", result)
+        self.assertEqual(result["introduction"], "简介")
+        self.assertEqual(result["wordCloud"][0], {"word": "词0", "weight": 1})
+        self.assertEqual(len(self.prior["wordCloud"]), 20)
+        self.assertEqual([point["date"] for point in result["heatTrend"]][-2:], ["2025-04-08", "2025-04-09"])
+        self.assertEqual(len(result["heatTrend"]), 9)
+        self.assertEqual(result["heatTrend"][-2]["value"], 0.9)
+        self.assertEqual(len(result["timeline"]), 3)
+        self.assertEqual(result["emotion"]["rationale"], "新依据")
+        self.assertEqual(result["analysis_mode"], "refresh")
+        self.assertEqual(result["full_analyzed_at"], "2025-04-08T10:00:00")
+
+    def test_truncated_refresh_merges_completed_fields_only(self):
+        self.prior["full_analyzed_at"] = "2025-04-07T10:00:00"
+        validator = refresh_validator()
+        validator.feed('{"heatTrend": [{"date": "2025-04-09", "value": 0.5}], "timeline": [{"da')
+
+        result = merge_refresh(self.prior, validator, "新闻甲")
+
+        self.assertEqual(len(result["heatTrend"]), 9)
+        self.assertEqual(result["timeline"], self.prior["timeline"])
+        self.assertEqual(result["full_analyzed_at"], "2025-04-07T10:00:00")
+
+    def test_refresh_without_usable_fields_raises(self):
+        for text in ('{"heatTr', '{"heatTrend": "无"}'):
+            validator = refresh_validator()
+            validator.feed(text)
+            with self.assertRaises(json.JSONDecodeError, msg=text):
+                merge_refresh(self.prior, validator, "新闻甲")
+
+
+if __name__ == "__main__":
+    unittest.main()
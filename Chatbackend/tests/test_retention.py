@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for heat series rollups and history_top_news generation selection.
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.heat_series import rollup_points
+from app.services.retention_service import select_generations
+
+
+class TestRollupPoints(unittest.TestCase):
+    """Tests for rollup_points"""
+
+    def setUp(self):
+        self.points = [
+            {"timestamp": "2025-04-08T10:05:00", "comprehensive_heat": 10, "normalized_heat": 0.2},
+            {"timestamp": "2025-04-08T10:35:00", "comprehensive_heat": 30, "normalized_heat": 0.4},
+            {"timestamp": "2025-04-08T11:05:00", "comprehensive_heat": 50, "normalized_heat": 0.6},
+        ]
+
+    def test_hourly_rollup_averages_and_peaks(self):
+        hours = rollup_points(self.points, 13)
+
+        self.assertEqual([hour["timestamp"] for hour in hours], ["2025-04-08T10:00:00", "2025-04-08T11:00:00"])
+        self.assertEqual(hours[0]["samples"], 2)
+        self.assertEqual(hours[0]["comprehensive_heat"], 20)
+        self.assertEqual(hours[0]["comprehensive_heat_max"], 30)
+        self.assertEqual(hours[0]["weighted_heat_value"], 0)
+
+    def test_daily_rollup(self):
+        days = rollup_points(self.points, 10)
+
+        self.assertEqual(len(days), 1)
+        self.assertEqual(days[0]["timestamp"], "2025-04-08T00:00:00")
+        self.assertEqual(days[0]["samples"], 3)
+        self.assertAlmostEqual(days[0]["normalized_heat"], 0.4)
+
+
+class TestSelectGenerations(unittest.TestCase):
+    """Tests for select_generations"""
+
+    def test_keeps_earliest_generation_per_hour(self):
+        kept, dropped = select_generations([
+            "2025-04-08T10:40:00", "2025-04-08T10:05:00", "2025-04-08T10:05:00", "2025-04-08T11:20:00"
+        ])
+
+        self.assertEqual(kept, {"2025-04-08T10:05:00", "2025-04-08T11:20:00"})
+        self.assertEqual(dropped, {"2025-04-08T10:40:00"})
+
+
+if __name__ == "__main__":
+    unittest.main()
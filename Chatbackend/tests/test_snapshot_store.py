@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the delta-encoded hot news snapshot helpers.
+"""
+import io
+import contextlib
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import mongomock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.mongo_mock import patch_app_db
+from app.services.snapshot_store import HotNewsSnapshotStore, compute_delta, apply_delta, to_processed_record
+
+
+def make_news(title, heat, platforms=("微博",)):
+    return {
+        "title": title,
+        "url": f"https://example.com/{title}",
+        "platforms": list(platforms),
+        "comprehensive_heat": heat,
+        "normalized_heat": heat,
+        "heat_level": "低"
+    }
+
+
+class TestSnapshotDelta(unittest.TestCase):
+    """Tests for compute_delta / apply_delta"""
+
+    def test_delta_only_contains_churn(self):
+        previous = [make_news("a", 0.9), make_news("b", 0.5), make_news("c", 0.1)]
+        current = [make_news("a", 0.9), make_news("d", 0.6), make_news("b", 0.4)]
+        delta = compute_delta(previous, current)
+
+        self.assertEqual([news["title"] for news in delta["added"]], ["d"])
+        self.assertEqual(delta["removed"], ["c"])
+        self.assertEqual(delta["changed"], [
+            {"title": "b", "fields": {"comprehensive_heat": 0.4, "normalized_heat": 0.4}}
+        ])
+        self.assertNotIn("order", delta)
+        self.assertEqual(apply_delta(previous, delta), current)
+
+    def test_order_recorded_when_ties_reorder(self):
+        previous = [make_news("a", 1.0), make_news("b", 1.0)]
+        current = [make_news("b", 1.0), make_news("a", 1.0)]
+        delta = compute_delta(previous, current)
+
+        self.assertEqual(delta["order"], ["b", "a"])
+        self.assertEqual(apply_delta(previous, delta), current)
+
+    def test_removed_fields_are_tombstoned(self):
+        previous = [make_news("a", 0.9)]
+        current = [{key: value for key, value in make_news("a", 0.8).items() if key != "url"}]
+        delta = compute_delta(previous, current)
+
+        self.assertEqual(delta["changed"][0]["unset"], ["url"])
+        self.assertEqual(apply_delta(previous, delta), current)
+
+    def test_apply_delta_does_not_mutate_input(self):
+        previous = [make_news("a", 0.5)]
+        apply_delta(previous, compute_delta(previous, [make_news("a", 0.7)]))
+        self.assertEqual(previous[0]["comprehensive_heat"], 0.5)
+
+
+class TestSnapshotStoreConcurrency(unittest.TestCase):
+    """Tests for HotNewsSnapshotStore.save with concurrent writers"""
+
+    def setUp(self):
+        self.patcher = patch_app_db()
+        self.db = self.patcher.start()
+        HotNewsSnapshotStore.ensure_indexes()
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+        self.base = [make_news("a", 0.9), make_news("b", 0.5), make_news("c", 0.3)]
+        self.save("2025-03-01T08:00:00", self.base)
+
+    def tearDown(self):
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+        self.patcher.stop()
+
+    def save(self, timestamp, news_list):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return HotNewsSnapshotStore.save(to_processed_record(timestamp, news_list))
+
+    def restore(self, timestamp):
+        return HotNewsSnapshotStore.get_at(timestamp)["data"][0]["data"]
+
+    def test_concurrent_writers_get_distinct_seq(self):
+        mine = [make_news("a", 0.8), make_news("b", 0.6), make_news("c", 0.3)]
+        theirs = [make_news("a", 0.9), make_news("b", 0.5), make_news("c", 0.2)]
+        original = mongomock.collection.Collection.insert_one
+        other = {}
+
+        def interleaved(collection, document, *args, **kwargs):
+            if document.get("kind") == "delta" and not other:
+                # Another process saves between this writer reading the head and inserting
+                other["started"] = True
+                HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+                self.save("2025-03-01T08:01:00", theirs)
+            return original(collection, document, *args, **kwargs)
+
+        with patch.object(mongomock.collection.Collection, "insert_one", autospec=True, side_effect=interleaved):
+            self.assertEqual(self.save("2025-03-01T08:02:00", mine), "delta")
+
+        deltas = list(self.db.hot_news_snapshots.find({"kind": "delta"}, sort=[("seq", 1)]))
+        self.assertEqual([delta["seq"] for delta in deltas], [1, 2])
+        self.assertEqual(self.restore("2025-03-01T08:01:00"), theirs)
+        self.assertEqual(self.restore("2025-03-01T08:02:00"), mine)
+
+    def test_persistent_conflicts_fall_back_to_keyframe(self):
+        with patch.object(mongomock.collection.Collection, "insert_one", autospec=True,
+                          side_effect=self.conflict_on_delta(mongomock.collection.Collection.insert_one)):
+            self.assertEqual(self.save("2025-03-01T08:01:00", [make_news("a", 0.7)] + self.base[1:]), "keyframe")
+
+    @staticmethod
+    def conflict_on_delta(original):
+        def insert_one(collection, document, *args, **kwargs):
+            if document.get("kind") == "delta":
+                raise mongomock.DuplicateKeyError("E11000 duplicate key error")
+            return original(collection, document, *args, **kwargs)
+        return insert_one
+
+    def test_removed_field_does_not_survive_replay(self):
+        current = [dict(news) for news in self.base]
+        del current[1]["url"]
+        self.save("2025-03-01T08:01:00", current)
+        HotNewsSnapshotStore._last_written = {"id": None, "news": None}
+
+        self.assertNotIn("url", self.restore("2025-03-01T08:01:00")[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
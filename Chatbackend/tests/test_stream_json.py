@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental JSON validator applied to streamed analysis output.
+"""
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.news_analysis_service import analysis_validator, analysis_from_validator
+from app.utils.stream_json import StreamingJSONValidator, StreamingJSONError
+
+
+def feed_in_chunks(validator, text, size=7):
+    """Feed text in fixed-size chunks, return the number of characters consumed"""
+    for i in range(0, len(text), size):
+        if validator.feed(text[i:i + size]):
+            return i + size
+    return len(text)
+
+
+class TestStreamingJSONValidator(unittest.TestCase):
+    """Tests for StreamingJSONValidator"""
+
+    def setUp(self):
+        self.document = {
+            "title": "新闻\"甲\"\n",
+            "spreadSpeed": -1.5e2,
+            "emotion": {"schema": {"喜悦": 10, "愤怒": None}},
+            "wordCloud": [{"word": "新闻", "weight": 0.8}],
+            "flag": True
+        }
+
+    def test_chunked_document_parses_and_stops_at_closing_brace(self):
+        text = "```json\n" + json.dumps(self.document, ensure_ascii=False) + "\n```\n以上是分析结果"
+        validator = StreamingJSONValidator()
+        consumed = feed_in_chunks(validator, text)
+
+        self.assertTrue(validator.done)
+        self.assertLess(consumed, len(text))
+        self.assertEqual(validator.result(), self.document)
+
+    def test_irrecoverable_structure_raises_near_the_error(self):
+        bad_outputs = [
+            '{"x": 经度, "y": 1}',
+            '{"a": [1, 2}',
+            '{"a": 01}',
+            '{"a" 1}',
+            '{"a": tru e}',
+        ]
+        for text in bad_outputs:
+            validator = StreamingJSONValidator()
+            with self.assertRaises(StreamingJSONError, msg=text):
+                feed_in_chunks(validator, text + " " * 100, size=3)
+            self.assertLess(len(validator.text), len(text) + 3)
+
+    def test_wrong_top_level_and_long_preamble_are_rejected(self):
+        with self.assertRaises(StreamingJSONError):
+            StreamingJSONValidator(expect="object").feed('[{"a": 1}]')
+        with self.assertRaises(StreamingJSONError):
+            StreamingJSONValidator(max_preamble=10).feed("好的，下面是这条新闻的分析结果：{")
+
+    def test_fields_are_available_as_soon_as_they_complete(self):
+        validator = StreamingJSONValidator(schema={"emotion": {"schema": dict}})
+        validator.feed('{"emotion": {"schema": {"喜悦": 1}}, "intro')
+
+        self.assertFalse(validator.done)
+        self.assertEqual(validator.fields, {"emotion": {"schema": {"喜悦": 1}}})
+        with self.assertRaises(StreamingJSONError):
+            validator.result()
+
+    def test_misshapen_fields_are_dropped_with_warning(self):
+        validator = StreamingJSONValidator(schema={"emotion": {"schema": dict}, "wordCloud": [dict]})
+        validator.feed('{"emotion": {"schema": "高兴"}, "wordCloud": [{"word": "a"}], "x": 1}')
+
+        self.assertEqual(validator.result(), {"wordCloud": [{"word": "a"}], "x": 1})
+        self.assertEqual(len(validator.warnings), 1)
+
+    def test_any_accepts_array(self):
+        validator = StreamingJSONValidator(expect="any")
+        feed_in_chunks(validator, '[{"index": 1}, {"index": 2}] 多余文字')
+
+        self.assertEqual(validator.result(), [{"index": 1}, {"index": 2}])
+
+
+class TestAnalysisFromValidator(unittest.TestCase):
+    """Tests for analysis_from_validator"""
+
+    def test_truncated_output_with_core_fields_is_salvaged(self):
+        validator = analysis_validator()
+        validator.feed(json.dumps({
+            "introduction": "简介",
+            "emotion": {"schema": {"喜悦": 30}},
+            "stance": {"schema": {"积极倡导": 0.5}},
+        }, ensure_ascii=False)[:-1] + ', "heatTrend": [{"da')
+
+        result = analysis_from_validator(validator, "新闻甲")
+
+        self.assertEqual(result["introduction"], "简介")
+        self.assertIn("heatTrend", result)
+        self.assertIn("wordCloud", result)
+
+    def test_truncated_output_without_core_fields_raises(self):
+        validator = analysis_validator()
+        validator.feed('{"introduction": "简介", "emotion": {"sch')
+
+        with self.assertRaises(json.JSONDecodeError):
+            analysis_from_validator(validator, "新闻甲")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily token budget and its degradation levels.
+"""
+import os
+import sys
+import time
+import unittest
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.token_budget import TokenBudget
+
+
+def make_budget(stored=None, **kwargs):
+    """Create a budget whose stored usage for today is already loaded and never flushed"""
+    budget = TokenBudget(flush_seconds=float("inf"), refresh_seconds=float("inf"), **kwargs)
+    budget.stored = dict(stored or {})
+    budget.stored_day = datetime.now().strftime("%Y-%m-%d")
+    budget.stored_at = time.time()
+    return budget
+
+
+class TestTokenBudget(unittest.TestCase):
+    """Tests for TokenBudget"""
+
+    def test_used_combines_stored_and_pending_usage(self):
+        budget = make_budget({"analysis": 1000, "chat": 200})
+        budget.record("analysis", "qwen-max", 300, 200)
+        budget.record("analysis", "qwen-max", 100, 0)
+        budget.record("chat", "deepseek", 50, 50, requests=2)
+
+        self.assertEqual(budget.used("analysis"), 1600)
+        self.assertEqual(budget.used(), 1900)
+        counts = budget.pending[(budget.stored_day, "analysis", "qwen-max")]
+        self.assertEqual(counts, {"requests": 2, "prompt_tokens": 400, "completion_tokens": 200,
+                                  "total_tokens": 600})
+        self.assertEqual(budget.pending[(budget.stored_day, "chat", "deepseek")]["requests"], 2)
+
+    def test_usage_from_another_day_is_not_counted(self):
+        budget = make_budget()
+        budget.record("chat", "deepseek", 500, 500, now=datetime(2020, 1, 1))
+
+        self.assertEqual(budget.used(), 0)
+
+    def test_remaining_fraction_uses_tightest_limit(self):
+        budget = make_budget({"analysis": 600, "chat": 200}, daily_limit=2000,
+                             feature_limits={"chat": 250})
+
+        self.assertAlmostEqual(budget.remaining_fraction("analysis"), 0.6)
+        self.assertAlmostEqual(budget.remaining_fraction("chat"), 0.2)
+        self.assertEqual(make_budget({"analysis": 10 ** 9}).remaining_fraction("analysis"), 1.0)
+
+        budget.record("chat", "deepseek", 100)
+        self.assertEqual(budget.remaining_fraction("chat"), 0.0)
+
+    def test_modes_degrade_as_budget_drains(self):
+        budget = make_budget(daily_limit=1000, degrade_ratio=0.5, defer_ratio=0.15)
+
+        self.assertEqual(budget.mode("analysis"), "normal")
+        budget.record("analysis", "m", 600)
+        self.assertEqual(budget.mode("analysis"), "economy")
+        budget.record("analysis", "m", 300)
+        self.assertEqual(budget.mode("analysis"), "defer")
+        budget.record("analysis", "m", 100)
+        self.assertEqual(budget.mode("analysis"), "exhausted")
+
+    def test_economy_model_only_replaces_model_when_deferring(self):
+        budget = make_budget({"chat": 700}, daily_limit=1000, economy_model="cheap")
+
+        self.assertEqual(budget.choose_model("chat", "big"), "big")
+        budget.record("chat", "big", 200)
+        self.assertEqual(budget.choose_model("chat", "big"), "cheap")
+        self.assertEqual(make_budget({"chat": 10 ** 6}, daily_limit=1000).choose_model("chat", "big"), "big")
+
+    def test_status_reports_every_feature(self):
+        budget = make_budget({"report": 100}, daily_limit=1000, feature_limits={"report": 100})
+        status = budget.status()
+
+        self.assertEqual(status["used"], 100)
+        self.assertEqual(status["features"]["report"]["mode"], "exhausted")
+        self.assertEqual(status["features"]["analysis"]["remaining_fraction"], 0.9)
+        self.assertEqual(set(status["features"]), {"analysis", "chat", "report"})
+
+
+if __name__ == "__main__":
+    unittest.main()